@@ -7,29 +7,38 @@ class SharedFrame:
     def __init__(self):
         self.lock = threading.Lock()
         self.frame = None
+        self.stamp = None  # 프레임 캡처 시각 (time.monotonic)
 
-    def set(self, frame):
+    def set(self, frame, stamp=None):
         with self.lock:
             self.frame = frame.copy()
+            self.stamp = stamp or time.monotonic()
 
     def get(self):
         with self.lock:
             return self.frame.copy() if self.frame is not None else None
 
+    def get_with_stamp(self):
+        with self.lock:
+            if self.frame is None:
+                return None, None
+            return self.frame.copy(), self.stamp
+
 class ArUcoReader:
-    def __init__(self, dictionary_id=aruco.DICT_5X5_100, cooldown=1):
+    def __init__(self, dictionary_id=aruco.DICT_5X5_100, cooldown=1, clock=time.time):
         self.aruco_dict = aruco.getPredefinedDictionary(dictionary_id)
         self.parameters = aruco.DetectorParameters()
         self.detector = aruco.ArucoDetector(self.aruco_dict, self.parameters)
         self.last_id = None
         self.last_time = 0
         self.cooldown = cooldown
+        self.clock = clock  # 쿨다운 기준 시계 (세션 재생 시 녹화 시각)
 
     def scan(self, frame):
         # 카메라 프레임에서 마커 탐지
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         corners, ids, rejected = self.detector.detectMarkers(gray)
-        now = time.time()
+        now = self.clock()
         result = []
 
         if ids is not None:
@@ -62,15 +71,18 @@ class ArUcoReader:
 
         return result
 
-def aruco_thread_func(shared_frame, aruco_reader, agv_messenger):
+def aruco_thread_func(shared_frame, aruco_reader, agv_messenger, pose_estimator=None):
     while True:
-        frame = shared_frame.get()
+        frame, stamp = shared_frame.get_with_stamp()
         if frame is None:
             time.sleep(0.05)
             continue
 
         marker_results = aruco_reader.scan(frame)
         for marker in marker_results:
+            # 마커를 본 프레임 시각 기준으로 위치 추정 보정
+            if pose_estimator is not None:
+                pose_estimator.on_marker(marker, frame.shape, stamp)
             # 예시: 마커 ID를 agv_messenger로 전송
             agv_messenger.send_qr_info(f"ID:{marker['id']:03d}")
         time.sleep(0.01)
@@ -1,3 +1,4 @@
 from .uart import UARTHandler
 from .agv_to_server import AgvToServer
-from .agv_to_controll import AgvToControll
\ No newline at end of file
+from .agv_to_controll import AgvToControll
+from .mqtt_session import MqttSession, get_mqtt_session
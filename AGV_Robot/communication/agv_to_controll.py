@@ -3,20 +3,40 @@ AGV) - 서버
 
 사용자 AGV가 컨트롤러와 송수신
 사용자 AGV가 2개이기 때문에 원하는 AGV로 연결해서 통신
+여러 컨트롤러(고객 태블릿, 직원용 등)가 동시에 연결할 수 있음
+ - 연결마다 스레드를 만들지 않고 selectors 한 스레드에서 모든 연결을 처리
+ - 연결마다 송신 버퍼를 두고, 느린 연결에는 최신 위치만 보냄 (밀린 위치는 버림)
 '''
 
+import selectors
 import socket
 import threading
-import json
 import time
-import random
+
+from .framing import FrameDecoder, FramingError, encode_position
+
+
+class ControllerConnection:
+    """컨트롤러 연결 하나의 수신 디코더/송신 버퍼"""
+
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.decoder = FrameDecoder()
+        self.out = bytearray()          # 아직 보내지 못한 바이트
+        self.position_pending = False   # 송신 버퍼가 빌 때 최신 위치를 보내야 함
+        self.stalled_since = None       # 송신이 막히기 시작한 시각
+
 
 class AgvToControll:
-    def __init__(self, agv_name):
-        self.host = '0.0.0.0' # 모든 네트워크 접근 허용
-        self.port = 9001      # 서버가 열릴 포트 번호
+    RECV_SIZE = 4096
+    STALL_TIMEOUT = 10.0    # 이 시간 동안 송신이 전혀 진행되지 않으면 연결 종료 (초)
+
+    def __init__(self, agv_name, host='0.0.0.0', port=9001):
+        self.host = host      # 기본값: 모든 네트워크 접근 허용
+        self.port = port      # 서버가 열릴 포트 번호 (0이면 임의 포트)
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.conn = None
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
         # 송신할 변수
         self.agv_name = agv_name  # AGV 이름
@@ -29,14 +49,24 @@ class AgvToControll:
         self.shopping_list = None
         self.move_flag = False
 
-        # 스레드 관련 변수
+        # 수신 이벤트 (폴링 대신 wait 또는 콜백으로 반응)
+        self.cart_received = threading.Event()   # 장바구니 수신
+        self.move_requested = threading.Event()  # 사용자 이동 요청 (다음/계산 버튼)
+        self.cart_callbacks = []
+        self.move_callbacks = []
+
+        # 서버 루프 관련 변수
         self.running = False
-        self.send_thread = None
-        self.recv_thread = None
-        self.test_thread = None
+        self.ready = threading.Event()           # listen 시작됨 (port가 확정됨)
+        self.stopped = threading.Event()         # 서버 루프 종료됨
+        self.selector = selectors.DefaultSelector()
+        self.connections = {}                    # socket -> ControllerConnection
+        self.position_dirty = False
 
-        # 이벤트 처리 변수
-        self.send_event = threading.Event()
+        # 다른 스레드에서 set_position/close를 호출하면 이 소켓으로 select를 깨움
+        self.wake_recv, self.wake_send = socket.socketpair()
+        self.wake_recv.setblocking(False)
+        self.wake_send.setblocking(False)
 
     # AGV의 위치정보가 바뀌거나 목표 위치정보가 바뀌면
     # 무조건 컨트롤러에 송신하도록
@@ -47,130 +77,214 @@ class AgvToControll:
         self.target_x = t_x
         self.target_y = t_y
 
-        self.send_event.set() # 송신 이벤트 활성화
+        self.position_dirty = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self.wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # 이미 깨울 신호가 쌓여 있음
+
+    @property
+    def client_count(self):
+        return len(self.connections)
+
+    # 장바구니를 받으면 callback(shopping_list) 호출 (서버 스레드에서 실행됨)
+    def on_cart_received(self, callback):
+        self.cart_callbacks.append(callback)
 
-    # AGV <--> 컨트롤러 사이의 연결을 시작함
+    # 이동 요청을 받으면 callback() 호출 (서버 스레드에서 실행됨)
+    def on_move_requested(self, callback):
+        self.move_callbacks.append(callback)
+
+    def wait_for_cart(self, timeout=None):
+        """장바구니를 받을 때까지 대기 (CPU 사용 없음)"""
+        if self.cart_received.wait(timeout):
+            return self.shopping_list
+        return None
+
+    def wait_for_move(self, timeout=None):
+        """이동 요청을 받을 때까지 대기 후 요청을 소비"""
+        if not self.move_requested.wait(timeout):
+            return False
+        self.clear_move_request()
+        return True
+
+    # 상품 위치에 도착하면 이전 요청을 지우고 새 요청을 기다림
+    def clear_move_request(self):
+        self.move_flag = False
+        self.move_requested.clear()
+
+    def _handle_message(self, recv_json):
+        snack_cart = recv_json.get("snack_cart")
+        if snack_cart is not None and snack_cart != self.shopping_list:
+            self.shopping_list = snack_cart
+            self.cart_received.set()
+            for callback in self.cart_callbacks:
+                callback(snack_cart)
+
+        # False는 무시 (요청 소비는 clear_move_request로만)
+        if recv_json.get("move_flag"):
+            self.move_flag = True
+            self.move_requested.set()
+            for callback in self.move_callbacks:
+                callback()
+
+    # AGV <--> 컨트롤러 사이의 서버 루프 (close가 호출될 때까지 블로킹)
     def start(self):
         self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(1)
+        self.server_socket.listen(8)
+        self.server_socket.setblocking(False)
+        self.port = self.server_socket.getsockname()[1]
+        self.selector.register(self.server_socket, selectors.EVENT_READ, "accept")
+        self.selector.register(self.wake_recv, selectors.EVENT_READ, "wake")
+        self.running = True
+        self.ready.set()
         print(f"[{self.agv_name}] Listening on {self.host}:{self.port}...")
-        while True:
-            conn, addr = self.server_socket.accept()
-            print(f"[{self.agv_name}] Connected by {addr}")
-
-            # 연결 수립 전에 반드시 이전 연결, 스레드 모두 종료
-            if self.conn:
-                print(f"[{self.agv_name}] 이전 연결 종료 시도")
-                self.running = False
-                self.send_event.set()
-                # join 전에 None check & is_alive 체크
-                if self.send_thread and self.send_thread.is_alive():
-                    self.send_thread.join()
-                if self.recv_thread and self.recv_thread.is_alive():
-                    self.recv_thread.join()
-                if self.test_thread and self.test_thread.is_alive():
-                    self.test_thread.join()
-                try:
-                    self.conn.close()
-                except Exception:
-                    pass
-                self.conn = None
-
-            self.conn = conn
-            self.running = True
-
-            # 송신 스레드
-            self.send_thread = threading.Thread(target=self.send_to_controller)
-            # 수신 스레드
-            self.recv_thread = threading.Thread(target=self.recv_from_controller, args=(addr,))
-            # # 테스트 스레드
-            # self.test_thread = threading.Thread(target=self.test_test_test)
-
-            self.send_thread.start()
-            self.recv_thread.start()
-            #self.test_thread.start()
-
-    def send_frame(self):
-        return {
-            "name": self.agv_name,
-            "x": self.position_x, "y": self.position_y,
-            "target_x": self.target_x, "target_y": self.target_y
-        }
-
-    # (AGV -> 컨트롤러): 컨트롤러에 데이터를 송신함
-    def send_to_controller(self):
-        while self.running:
-
-            # set_position 함수가 불러질 때까지 여기서 송신을 대기함
-            self.send_event.wait() # 이벤트가 발생될때까지 대기
-            self.send_event.clear() # 이벤트 다시 비활성화
-
-            if not self.running:
-                break
-            if self.conn:
-                try:
-                    payload = json.dumps(self.send_frame())
-                    self.conn.sendall(payload.encode())
-                except Exception as e:
-                    print(f"송신 에러: {e}")
-                    break
-        print("송신스레드 종료")
 
-    # (AGV <- 컨트롤러): 컨트롤러가 보낸 데이터를 수신함
-    def recv_from_controller(self, addr):
         try:
             while self.running:
-                recv_data = self.conn.recv(1024)
-                if not recv_data:
-                    print("데이터가 없습니다.")
-                    break
-                recv_data = recv_data.decode()
-                print(f"수신 데이터: {recv_data}")
-
-                recv_json = json.loads(recv_data)
-
-                if "snack_cart" in recv_data:
-                    self.shopping_list = recv_json["snack_cart"]
-                if "move_flag" in recv_data:
-                    self.move_flag = recv_json["move_flag"]
-                
-                if recv_data == "disconnect": # 연결 해제
-                    break
-                #else:
+                # 송신이 막힌 연결이 있을 때만 시간 제한 (평소에는 이벤트가 올 때까지 잠듦)
+                stalled = any(c.stalled_since is not None for c in self.connections.values())
+                for key, events in self.selector.select(1.0 if stalled else None):
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_wake()
+                    else:
+                        if events & selectors.EVENT_READ:
+                            self._read(key.data)
+                        if events & selectors.EVENT_WRITE and key.data.sock in self.connections:
+                            self._write(key.data)
 
+                if self.position_dirty:
+                    self.position_dirty = False
+                    self._broadcast_position()
+                if stalled:
+                    self._drop_stalled()
         finally:
-            self.running = False
-            self.send_event.set()
-            try:
-                if self.conn:
-                    self.conn.close()
-            except Exception:
+            for conn in list(self.connections.values()):
+                self._close_connection(conn, "서버 종료")
+            self.selector.close()
+            self.stopped.set()
+
+    def _accept(self):
+        try:
+            sock, addr = self.server_socket.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = ControllerConnection(sock, addr)
+        self.connections[sock] = conn
+        self.selector.register(sock, selectors.EVENT_READ, conn)
+        print(f"[{self.agv_name}] Connected by {addr} (연결 {len(self.connections)}개)")
+
+        # 새 컨트롤러도 바로 현재 위치를 표시할 수 있도록
+        self._queue_position(conn)
+
+    def _drain_wake(self):
+        try:
+            while self.wake_recv.recv(1024):
                 pass
-            self.conn = None
-            print(f"[{self.agv_name}] Connection closed")
-
-    def test_test_test(self):
-        flag = True
-        while self.running:
-            if self.conn:
-                if flag:
-                    self.set_position(random.randint(0, 1), random.randint(0, 1))
-                    flag = False
-                else:
-                    self.set_target_position(random.randint(0, 1), random.randint(0, 1))
-                    flag = True
-            time.sleep(5)
+        except (BlockingIOError, OSError):
+            pass
+
+    # (AGV <- 컨트롤러): 컨트롤러가 보낸 데이터를 수신함
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(self.RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._close_connection(conn, f"수신 에러: {e}")
+            return
+        if not data:
+            self._close_connection(conn, "데이터가 없습니다.")
+            return
+
+        # 길이 헤더로 메시지 경계를 찾음 (붙거나 나뉘어 온 TCP 조각도 메시지 단위로 복원)
+        try:
+            messages = conn.decoder.feed(data)
+        except FramingError as e:
+            self._close_connection(conn, f"수신 에러: {e}")
+            return
+        for message in messages:
+            print(f"수신 데이터({conn.addr[0]}): {message}")
+            if message.get("disconnect"): # 연결 해제
+                self._close_connection(conn, "연결 해제 요청")
+                return
+            self._handle_message(message)
+
+    def send_frame(self):
+        return encode_position(self.agv_name, self.position_x, self.position_y, self.target_x, self.target_y)
+
+    # (AGV -> 컨트롤러): 모든 컨트롤러에 현재 위치 송신
+    def _broadcast_position(self):
+        for conn in list(self.connections.values()):
+            self._queue_position(conn)
+
+    def _queue_position(self, conn):
+        if conn.out:
+            # 아직 이전 위치를 보내는 중 → 버퍼가 빌 때 최신 위치만 보냄 (위치는 최신 값만 의미 있음)
+            conn.position_pending = True
+            return
+        conn.out += self.send_frame()
+        self._write(conn)
+
+    def _write(self, conn):
+        try:
+            sent = conn.sock.send(conn.out)
+        except BlockingIOError:
+            sent = 0
+        except OSError as e:
+            self._close_connection(conn, f"송신 에러: {e}")
+            return
+        del conn.out[:sent]
+
+        if not conn.out and conn.position_pending:
+            conn.position_pending = False
+            conn.out += self.send_frame()
+            return self._write(conn)
+
+        # 보낼 데이터가 남아 있을 때만 쓰기 가능 이벤트를 기다림
+        if conn.out:
+            if sent or conn.stalled_since is None:
+                conn.stalled_since = time.monotonic()
+            self.selector.modify(conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, conn)
+        else:
+            conn.stalled_since = None
+            self.selector.modify(conn.sock, selectors.EVENT_READ, conn)
+
+    def _drop_stalled(self):
+        now = time.monotonic()
+        for conn in list(self.connections.values()):
+            if conn.stalled_since is not None and now - conn.stalled_since > self.STALL_TIMEOUT:
+                self._close_connection(conn, "송신 정체")
+
+    def _close_connection(self, conn, reason):
+        if self.connections.pop(conn.sock, None) is None:
+            return
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            conn.sock.close()
+        except OSError:
+            pass
+        print(f"[{self.agv_name}] Connection closed {conn.addr} - {reason} (연결 {len(self.connections)}개)")
 
     def close(self):
         self.running = False
-        self.send_event.set()
-        time.sleep(0.1)
+        self._wake()
+        if self.ready.is_set():
+            self.stopped.wait(2.0)
 
-        self.send_thread.join()
-        self.recv_thread.join()
-        self.test_thread.join()
-        
         self.server_socket.close()
+        self.wake_send.close()
+        self.wake_recv.close()
         print(f"[{self.agv_name}] 서버 종료")
 
 if __name__ == "__main__":
@@ -1,22 +1,23 @@
-import paho.mqtt.client as mqtt
 import json
 import time
 import random
 
+from .mqtt_session import get_mqtt_session, BROKER_IP, BROKER_PORT
+
 class AgvToServer:
     def __init__(self, agv_name):
         self.SEND_TOPIC = f"agv/{agv_name}/qr_id"  # QR 정보 송신 토픽
         self.RECV_TOPIC = f"agv/{agv_name}/pos"    # 위치 정보 수신 토픽
 
-        self.BROKER_IP = "100.123.1.124"   # 관제센터 IP
+        self.BROKER_IP = BROKER_IP   # 관제센터 IP
 
-        self.BROKER_PORT = 1883
+        self.BROKER_PORT = BROKER_PORT
         self.agv_name = agv_name
 
-        self.client = mqtt.Client(client_id=f"{agv_name}")
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        self.client.connect(self.BROKER_IP, self.BROKER_PORT)
+        # 프로세스 공용 세션 (비동기 연결 + 자동 재연결, 재연결 시 위치 토픽 재구독)
+        self.session = get_mqtt_session(agv_name, self.BROKER_IP, self.BROKER_PORT)
+        self.session.subscribe(self.RECV_TOPIC, self.on_message)
+        print(f"[{self.agv_name}] {self.RECV_TOPIC} 구독 등록")
 
         self.agv_qr = ""       # AGV QR 정보
         self.position_x = 0    # AGV x 위치
@@ -29,11 +30,6 @@ class AgvToServer:
     def get_position(self):
         return {"x": self.position_x, "y": self.position_y}
 
-    def on_connect(self, client, userdata, flags, rc):
-        print(f"[{self.agv_name}] MQTT 연결 성공" if rc == 0 else f"MQTT 연결 실패: {rc}")
-        client.subscribe(self.RECV_TOPIC)
-        print(f"[{self.agv_name}] {self.RECV_TOPIC} 구독 시작")
-
     # QR에 맞는 위치 정보를 수신함
     def on_message(self, client, userdata, msg):
         data = json.loads(msg.payload.decode())
@@ -43,17 +39,18 @@ class AgvToServer:
         print(f"[{self.agv_name}] 위치 정보 수신: x={self.position_x}, y={self.position_y}")
 
     # QR 정보를 관제센터로 송신
+    # 위치 응답은 지금 위치에만 의미가 있으므로 연결이 끊긴 동안의 QR은 버퍼링하지 않음
     def send_qr_info(self, qr_info):
-        payload = json.dumps({"QR_info": qr_info})
-        self.client.publish(self.SEND_TOPIC, payload)
-        print(f"[{self.agv_name}] QR 정보 송신: {qr_info}")
+        self.agv_qr = qr_info  # 위치 응답이 어떤 마커에 대한 것인지 (위치 추정 보정용)
+        if self.session.publish(self.SEND_TOPIC, {"QR_info": qr_info}, buffer_offline=False):
+            print(f"[{self.agv_name}] QR 정보 송신: {qr_info}")
 
     def start(self):
-        self.client.loop_start()
+        self.session.start()
 
     def stop(self):
-        self.client.loop_stop()
-        self.client.disconnect()
+        # 공용 세션은 다른 사용자(DetectionController 등)가 남아 있으면 유지
+        self.session.release()
             
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+'''
+AGV <--> 컨트롤러 TCP 메시지 프레이밍
+
+TCP는 메시지 경계를 보장하지 않으므로 (여러 메시지가 붙거나 하나가 나뉘어 도착)
+모든 메시지를 [길이 4바이트][타입 1바이트][payload] 프레임으로 보냄
+
+- MSG_POSITION: 위치 보고 (AGV -> 컨트롤러), 고정 길이 바이너리 + AGV 이름
+- MSG_CART: 장바구니 (컨트롤러 -> AGV), 좌표 쌍을 int16 배열로
+- MSG_MOVE: 이동 요청 (컨트롤러 -> AGV), payload 없음
+- MSG_DISCONNECT: 연결 해제 알림, payload 없음
+
+※ user_controller/framing.py와 같은 내용을 유지해야 함 (컨트롤러는 별도 기기에서 실행)
+'''
+
+import struct
+
+MSG_POSITION = 1
+MSG_CART = 2
+MSG_MOVE = 3
+MSG_DISCONNECT = 4
+
+MSG_NAMES = {
+    MSG_POSITION: "position",
+    MSG_CART: "cart",
+    MSG_MOVE: "move",
+    MSG_DISCONNECT: "disconnect",
+}
+
+HEADER = struct.Struct("!IB")           # payload 길이, 메시지 타입
+POSITION = struct.Struct("!hhhh")       # x, y, target_x, target_y
+CART_ITEM = struct.Struct("!hh")        # 장바구니 좌표 한 쌍 (x, y)
+MAX_PAYLOAD = 64 * 1024                 # 이보다 긴 길이는 손상된 스트림으로 간주
+
+
+class FramingError(ValueError):
+    """스트림이 손상되어 더 이상 프레임 경계를 알 수 없음 (연결을 끊어야 함)"""
+
+
+# ==================== 인코딩 ====================
+
+def encode_message(msg_type, payload=b""):
+    if msg_type not in MSG_NAMES:
+        raise FramingError(f"알 수 없는 메시지 타입: {msg_type}")
+    if len(payload) > MAX_PAYLOAD:
+        raise FramingError(f"payload가 너무 깁니다: {len(payload)} bytes")
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+def encode_position(name, x, y, target_x, target_y):
+    return encode_message(MSG_POSITION, POSITION.pack(x, y, target_x, target_y) + name.encode())
+
+
+def encode_cart(snack_cart):
+    # 위치 메시지와 같은 int16 좌표 (큰 매장 맵도 표현 가능)
+    try:
+        payload = b"".join(CART_ITEM.pack(pos[0], pos[1]) for pos in snack_cart)
+    except struct.error as e:
+        raise FramingError(f"장바구니 좌표가 int16 범위를 벗어났습니다: {e}")
+    return encode_message(MSG_CART, payload)
+
+
+def encode_move():
+    return encode_message(MSG_MOVE)
+
+
+def encode_disconnect():
+    return encode_message(MSG_DISCONNECT)
+
+
+# ==================== 디코딩 ====================
+
+def decode_payload(msg_type, payload):
+    """
+    프레임 payload → 기존 수신 처리와 같은 dict
+    (위치: name/x/y/target_x/target_y, 장바구니: snack_cart, 이동: move_flag, 해제: disconnect)
+    """
+    if msg_type == MSG_POSITION:
+        if len(payload) < POSITION.size:
+            raise FramingError(f"위치 메시지가 너무 짧습니다: {len(payload)} bytes")
+        x, y, target_x, target_y = POSITION.unpack_from(payload)
+        return {"name": payload[POSITION.size:].decode(errors="replace"),
+                "x": x, "y": y, "target_x": target_x, "target_y": target_y}
+    if msg_type == MSG_CART:
+        if len(payload) % CART_ITEM.size:
+            raise FramingError(f"장바구니 좌표 길이가 맞지 않습니다: {len(payload)} bytes")
+        return {"snack_cart": [list(pos) for pos in CART_ITEM.iter_unpack(payload)]}
+    if msg_type == MSG_MOVE:
+        return {"move_flag": True}
+    if msg_type == MSG_DISCONNECT:
+        return {"disconnect": True}
+    raise FramingError(f"알 수 없는 메시지 타입: {msg_type}")
+
+
+class FrameDecoder:
+    """
+    스트리밍 디코더 - recv로 받은 바이트 조각을 feed하면 완성된 메시지만 돌려줌
+    남은 조각은 다음 feed까지 버퍼에 보관
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """
+        :return: 완성된 메시지 dict 리스트 (없으면 빈 리스트)
+        :raises FramingError: 길이/타입이 잘못된 프레임
+        """
+        self.buffer += data
+        messages = []
+        offset = 0
+        view = memoryview(self.buffer)
+        try:
+            while len(self.buffer) - offset >= HEADER.size:
+                length, msg_type = HEADER.unpack_from(self.buffer, offset)
+                if length > MAX_PAYLOAD or msg_type not in MSG_NAMES:
+                    raise FramingError(f"손상된 헤더: length={length}, type={msg_type}")
+                end = offset + HEADER.size + length
+                if end > len(self.buffer):
+                    break  # 아직 덜 받은 메시지
+                messages.append(decode_payload(msg_type, bytes(view[offset + HEADER.size:end])))
+                offset = end
+        finally:
+            view.release()
+        del self.buffer[:offset]
+        return messages
+
+
+class MessageReader:
+    """소켓에서 큰 단위로 읽어 프레임 단위 메시지로 돌려주는 버퍼 리더"""
+
+    def __init__(self, sock, bufsize=4096):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.decoder = FrameDecoder()
+
+    def read(self):
+        """
+        메시지가 하나 이상 완성될 때까지 수신
+        :return: 메시지 dict 리스트, 연결이 끊기면 None
+        """
+        while True:
+            data = self.sock.recv(self.bufsize)
+            if not data:
+                return None
+            messages = self.decoder.feed(data)
+            if messages:
+                return messages
@@ -0,0 +1,242 @@
+'''
+프로세스 공용 MQTT 세션
+- 브로커별로 하나의 연결을 공유 (AgvToServer, DetectionController 등)
+  get_mqtt_session으로 얻은 만큼 release하고, 마지막 사용자가 release하면 연결 종료
+- 비동기 연결 + 자동 재연결, QoS 1 송신
+- 연결이 끊긴 동안 만든 메시지는 디스크 outbox에 저장했다가 재연결 시 묶어서 전송
+'''
+import json
+import os
+import threading
+
+import paho.mqtt.client as mqtt
+
+BROKER_IP = "100.123.1.124"   # 관제센터 IP
+BROKER_PORT = 1883
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _create_client(client_id):
+    """paho 1.x / 2.x 모두 기존(VERSION1) 콜백 시그니처로 생성"""
+    callback_api = getattr(mqtt, "CallbackAPIVersion", None)
+    if callback_api is not None:
+        return mqtt.Client(callback_api.VERSION1, client_id=client_id, clean_session=False)
+    return mqtt.Client(client_id=client_id, clean_session=False)
+
+
+class MqttSession:
+    """브로커 하나에 대한 공용 MQTT 연결 (get_mqtt_session으로 얻어서 사용)"""
+
+    def __init__(self, client_id, host=BROKER_IP, port=BROKER_PORT, outbox_path=None,
+                 keepalive=60, flush_batch=20, ack_timeout=5.0):
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.flush_batch = flush_batch      # 재연결 시 한 번에 보내고 ACK를 기다릴 메시지 수
+        self.ack_timeout = ack_timeout      # 묶음 ACK 대기 시간 (초)
+        self.outbox_path = outbox_path or f"mqtt_outbox_{client_id}.jsonl"
+
+        self.lock = threading.Lock()
+        self.connected = threading.Event()
+        self.started = False
+        self.users = 0                      # get_mqtt_session으로 세션을 가져간 사용자 수
+        self.subscriptions = {}             # {topic: qos} - 재연결 시 다시 구독
+        self.outbox = self._load_outbox()   # [{"topic": ..., "payload": ..., "qos": ...}]
+        self.flush_thread = None
+
+        self.client = _create_client(client_id)
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+
+    # ==================== outbox ====================
+
+    def _load_outbox(self):
+        if not os.path.exists(self.outbox_path):
+            return []
+        messages = []
+        with open(self.outbox_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    messages.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"[MqttSession] outbox 손상된 줄 무시: {line[:60]}")
+        if messages:
+            print(f"[MqttSession] 📦 미전송 메시지 {len(messages)}개 로드 ({self.outbox_path})")
+        return messages
+
+    def _save_outbox(self):
+        """outbox 전체를 임시 파일에 쓰고 교체 (쓰는 도중 종료돼도 이전 상태 유지)"""
+        tmp_path = self.outbox_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for message in self.outbox:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.outbox_path)
+
+    def _enqueue(self, topic, payload, qos):
+        with self.lock:
+            self.outbox.append({"topic": topic, "payload": payload, "qos": qos})
+            self._save_outbox()
+            pending = len(self.outbox)
+        print(f"[MqttSession] 📥 연결 끊김 - outbox 저장 ({pending}개 대기): {topic}")
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.outbox)
+
+    def flush_outbox(self):
+        """
+        outbox 메시지를 flush_batch개씩 보내고 ACK를 받은 묶음만 outbox에서 제거
+        전송 중 다시 끊기면 남은 메시지는 다음 재연결 때 이어서 전송
+        """
+        while self.connected.is_set():
+            with self.lock:
+                batch = list(self.outbox[:self.flush_batch])
+            if not batch:
+                return
+
+            infos = [self.client.publish(m["topic"], m["payload"], qos=m["qos"]) for m in batch]
+            for info in infos:
+                if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                    info.wait_for_publish(self.ack_timeout)
+            delivered = 0
+            for info in infos:
+                if info.rc != mqtt.MQTT_ERR_SUCCESS or not info.is_published():
+                    break
+                delivered += 1
+            if delivered == 0:
+                print("[MqttSession] ⚠️ outbox 전송 ACK 없음 - 재연결 후 재시도")
+                return
+
+            with self.lock:
+                del self.outbox[:delivered]
+                self._save_outbox()
+                remaining = len(self.outbox)
+            print(f"[MqttSession] 📤 outbox {delivered}개 전송 완료 (남은 {remaining}개)")
+
+    def _start_flush(self):
+        """ACK 대기는 네트워크 루프 밖에서 해야 하므로 별도 스레드로 outbox 전송"""
+        with self.lock:
+            if not self.outbox or (self.flush_thread and self.flush_thread.is_alive()):
+                return
+            self.flush_thread = threading.Thread(target=self.flush_outbox, daemon=True)
+            self.flush_thread.start()
+
+    # ==================== 연결 관리 ====================
+
+    def start(self):
+        """비동기 연결 시작 (브로커가 없어도 블로킹하지 않고 백그라운드에서 재시도)"""
+        with self.lock:
+            if self.started:
+                return self
+            self.started = True
+        self.client.connect_async(self.host, self.port, self.keepalive)
+        self.client.loop_start()
+        print(f"[MqttSession] 🔌 {self.host}:{self.port} 연결 시작 ({self.client_id})")
+        return self
+
+    def release(self):
+        """사용자 하나가 세션 사용을 마침 (남은 사용자가 없을 때만 연결 종료)"""
+        with _sessions_lock:
+            self.users = max(self.users - 1, 0)
+            if self.users:
+                print(f"[MqttSession] 세션 유지 ({self.client_id}, 사용자 {self.users}명 남음)")
+                return
+        self.stop()
+
+    def stop(self):
+        """사용자 수와 관계없이 연결 종료 (프로세스 종료용 - 보통은 release 사용)"""
+        with self.lock:
+            if not self.started:
+                return
+            self.started = False
+        self.client.disconnect()
+        self.client.loop_stop()
+        self.connected.clear()
+        with _sessions_lock:
+            if _sessions.get((self.host, self.port)) is self:
+                del _sessions[(self.host, self.port)]
+        print(f"[MqttSession] 연결 종료 ({self.client_id})")
+
+    def is_connected(self):
+        return self.connected.is_set()
+
+    def wait_until_connected(self, timeout=None):
+        return self.connected.wait(timeout)
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            print(f"[MqttSession] MQTT 연결 실패: {rc}")
+            return
+        print(f"[MqttSession] ✅ MQTT 연결 성공 ({self.client_id})")
+        self.connected.set()
+
+        with self.lock:
+            subscriptions = dict(self.subscriptions)
+        for topic, qos in subscriptions.items():
+            client.subscribe(topic, qos)
+
+        self._start_flush()
+
+    def on_disconnect(self, client, userdata, rc):
+        self.connected.clear()
+        if rc != 0:
+            print(f"[MqttSession] ⚠️ MQTT 연결 끊김 ({rc}) - 자동 재연결 대기")
+
+    # ==================== 송수신 ====================
+
+    def publish(self, topic, payload, qos=1, buffer_offline=True):
+        """
+        메시지 송신 (dict는 JSON으로 변환)
+        연결이 없거나 outbox에 먼저 보낼 메시지가 남아 있으면 순서 유지를 위해 outbox에 저장
+
+        Args:
+            buffer_offline: False면 연결이 없을 때 버림 (나중에 보내면 의미 없는 실시간 메시지용)
+
+        Returns:
+            bool: 브로커로 보냈으면 True, outbox에 저장했거나 버렸으면 False
+        """
+        if not isinstance(payload, str):
+            payload = json.dumps(payload, ensure_ascii=False)
+
+        if self.connected.is_set() and (not buffer_offline or not self.pending_count()):
+            info = self.client.publish(topic, payload, qos=qos)
+            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                return True
+
+        if not buffer_offline:
+            print(f"[MqttSession] ⚠️ 연결 끊김 - 메시지 버림: {topic}")
+            return False
+
+        self._enqueue(topic, payload, qos)
+        if self.connected.is_set():
+            self._start_flush()
+        return False
+
+    def subscribe(self, topic, callback, qos=1):
+        """토픽 구독 + 전용 콜백 등록 (재연결 시 자동으로 다시 구독)"""
+        with self.lock:
+            self.subscriptions[topic] = qos
+        self.client.message_callback_add(topic, callback)
+        if self.connected.is_set():
+            self.client.subscribe(topic, qos)
+
+
+def get_mqtt_session(client_id, host=BROKER_IP, port=BROKER_PORT):
+    """
+    브로커별 공용 세션 반환 (처음 요청한 client_id로 생성 후 연결 시작)
+    사용이 끝나면 session.release() 호출 (다른 사용자가 남아 있으면 연결 유지)
+    """
+    with _sessions_lock:
+        session = _sessions.get((host, port))
+        if session is None:
+            session = MqttSession(client_id, host, port)
+            _sessions[(host, port)] = session
+        session.users += 1
+    return session.start()
@@ -1,4 +1,5 @@
 from .manager_planner import ManagerPlanner
 from .manager_executor import ManagerExecutor
 from .detection_controller import DetectionController
-from .resource_manager import ResourceManager
\ No newline at end of file
+from .resource_manager import ResourceManager
+from .stock_tracker import ShelfStockTracker
@@ -1,201 +1,242 @@
 import time
 import sys
 import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-# webcam.detection 모듈 import
+from .stock_tracker import ShelfStockTracker
+
+# webcam.detection_service 모듈 import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class DetectionController:
     """
     Detection 기능을 제어하는 클래스
-    webcam.detection 모듈과 연동하여 Detection 실행 및 결과 관리
+    webcam.detection_service(상주 탐지 서비스)와 연동하여 Detection 실행 및 결과 관리
     """
     
     def __init__(self):
-        self.detector = None
+        self.service = None           # 상주 탐지 서비스 (모델/웹캠 1회 로드)
+        self.pending_future = None    # 진행 중인 관찰 요청
         self.detection_active = False
         self.detection_results = None
+        self.stock_tracker = ShelfStockTracker()  # 매대별 마지막 재고 (델타 보고용)
+        self.mqtt_session = None      # 공용 MQTT 세션 (처음 전송할 때 가져오고 shutdown에서 반납)
         
-        # DB 연결 설정 (recv_from_agv.py와 동일한 패턴)
-        self.db_config = {
-            'user': 'root',
-            'password': '1234',
-            'host': '100.123.1.124',
-            'database': 'qr_reader'  # 기본값, 필요시 manager_db로 변경
-        }
-        
-    def start_detection(self):
+    def start_service(self, wait=False):
         """
-        Detection 시작
+        탐지 서비스 시작 (모델 로딩/웹캠 워밍업을 주행 중 미리 수행)
+        
+        Args:
+            wait: True면 준비 완료까지 대기
         """
         try:
-            from webcam.detection import detect_start
-            print("[DetectionController] 🔍 Detection 시작...")
+            from webcam.detection_service import get_detection_service
             
-            self.detector = detect_start()
-            self.detection_active = True
+            if self.service is None:
+                print("[DetectionController] 🔥 탐지 서비스 워밍업 시작...")
+                self.service = get_detection_service()
+            
+            if wait:
+                return self.service.wait_until_ready()
+            return True
             
-            if self.detector:
-                print("[DetectionController] Detection 모듈 초기화 완료")
-                return True
-            else:
-                print("[DetectionController] ❌ Detection 모듈 초기화 실패")
-                return False
-                
         except ImportError as e:
-            print(f"[DetectionController] ❌ webcam.detection 모듈 import 실패: {e}")
+            print(f"[DetectionController] ❌ webcam.detection_service 모듈 import 실패: {e}")
             return False
         except Exception as e:
-            print(f"[DetectionController] ❌ Detection 시작 중 오류: {e}")
+            print(f"[DetectionController] ❌ 탐지 서비스 시작 중 오류: {e}")
             return False
+        
+    def is_service_ready(self):
+        """탐지 서비스 준비(모델 로딩/웹캠 워밍업) 완료 여부"""
+        return self.service is not None and self.service.is_ready()
+        
+    def start_detection(self, shelf_id=None, wait=True):
+        """
+        Detection 시작 (상주 서비스에 관찰 요청)
+        
+        Args:
+            shelf_id: 관찰할 매대 식별자 (Detection 좌표)
+            wait: True면 서비스 준비 완료까지 대기
+                  False면 바로 요청만 넣음 (서비스가 준비되는 대로 관찰 - 주행 스케줄러용)
+        """
+        if not self.start_service(wait=wait):
+            print("[DetectionController] ❌ Detection 모듈 초기화 실패")
+            return False
+            
+        print(f"[DetectionController] 🔍 Detection 시작... (매대: {shelf_id})")
+        self.pending_future = self.service.request_count(shelf_id)
+        self.detection_active = True
+        return True
             
     def stop_detection(self):
         """
-        Detection 중지
+        Detection 중지 (서비스는 유지, 대기 중인 요청 취소 또는 진행 중인 관찰 중단)
         """
-        try:
-            if self.detector:
-                from webcam.detection import detect_stop
-                detect_stop()
-                print("[DetectionController] 🛑 Detection 중지")
-                
-            self.detection_active = False
-            self.detector = None
+        if self.pending_future is not None and not self.pending_future.done():
+            # 이미 관찰 중이면 cancel()이 실패하므로 서비스에 중지 요청 (관찰 루프가 실패 결과로 종료)
+            if not self.pending_future.cancel() and self.service is not None:
+                self.service.cancel_current()
+            print("[DetectionController] 🛑 Detection 중지")
             
+        self.detection_active = False
+        self.pending_future = None
+        
+    def shutdown(self):
+        """
+        탐지 서비스 종료 (프로그램 종료 시 호출)
+        """
+        self.stop_detection()
+        try:
+            from webcam.detection_service import stop_detection_service
+            stop_detection_service()
         except Exception as e:
-            print(f"[DetectionController] ❌ Detection 중지 중 오류: {e}")
+            print(f"[DetectionController] ❌ 탐지 서비스 종료 중 오류: {e}")
+        self.service = None
+        
+        # 공용 MQTT 세션 반납 (AgvToServer가 아직 쓰고 있으면 연결 유지)
+        if self.mqtt_session is not None:
+            self.mqtt_session.release()
+            self.mqtt_session = None
             
     def is_detection_complete(self):
         """
         Detection 완료 여부 확인
         """
-        if not self.detector:
-            return False
+        return self.pending_future is not None and self.pending_future.done()
             
-        try:
-            return self.detector.is_detection_complete()
-        except Exception as e:
-            print(f"[DetectionController] ❌ Detection 상태 확인 오류: {e}")
-            return False
-            
-    def get_detection_results(self):
+    def get_detection_results(self, timeout=None):
         """
         Detection 결과 가져오기
+        
+        Args:
+            timeout: 결과 대기 시간 (None이면 완료된 경우에만 반환)
         """
-        if not self.detector:
+        if self.pending_future is None:
             return None
             
         try:
-            if self.detector.is_detection_complete():
-                # Detection 결과 함수들 호출 (존재하는 메서드만 사용)
-                final_results = self.detector.get_final_results()
-                count_summary = self.detector.get_count_summary()
-                
-                self.detection_results = {
-                    'final_results': final_results,
-                    'count_summary': count_summary,
-                    'timestamp': time.time()
-                }
-                
-                print("[DetectionController] 📋 Detection 결과 수집 완료")
-                print(f"[DetectionController] 최종 결과: {final_results}")
-                print(f"[DetectionController] 개수 요약: {count_summary}")
-                
-                return self.detection_results
-            else:
+            if timeout is None and not self.pending_future.done():
                 return None
+            final_results = self.pending_future.result(timeout=timeout)
+            count_summary = final_results['final_counts']
+            
+            self.detection_results = {
+                'final_results': final_results,
+                'count_summary': count_summary,
+                'shelf_id': final_results.get('shelf_id'),
+                'timestamp': time.time()
+            }
+            
+            print("[DetectionController] 📋 Detection 결과 수집 완료")
+            print(f"[DetectionController] 최종 결과: {final_results}")
+            print(f"[DetectionController] 개수 요약: {count_summary}")
+            
+            return self.detection_results
                 
+        except FutureTimeoutError:
+            print("[DetectionController] ⏰ Detection 타임아웃")
+            return None
         except Exception as e:
             print(f"[DetectionController] ❌ Detection 결과 가져오기 오류: {e}")
             return None
             
-    def run_detection_cycle(self, max_wait_time=30):
+    def run_detection_cycle(self, max_wait_time=30, shelf_id=None):
         """
-        Detection 전체 사이클 실행 (시작 → 대기 → 결과 수집 → 중지)
+        Detection 전체 사이클 실행 (요청 → 결과 대기 → 처리)
+        모델/웹캠은 서비스가 유지하므로 관찰 시간만 소요됨
         
         Args:
             max_wait_time: 최대 대기 시간 (초)
+            shelf_id: 관찰할 매대 식별자 (Detection 좌표)
             
         Returns:
             Detection 결과 또는 None
         """
         print("[DetectionController] 🔄 Detection 사이클 시작")
         
-        # 1. Detection 시작
-        if not self.start_detection():
+        # 1. Detection 요청
+        if not self.start_detection(shelf_id):
             return None
             
-        # 2. Detection 완료까지 대기
-        start_time = time.time()
-        while time.time() - start_time < max_wait_time:
-            if self.is_detection_complete():
-                print("[DetectionController] ✅ Detection 완료 감지")
-                break
-                
-            print("[DetectionController] ⏳ Detection 진행 중...")
-            time.sleep(1)
-        else:
-            print("[DetectionController] ⏰ Detection 타임아웃")
-            self.stop_detection()
-            return None
+        # 2. 결과 대기 및 처리
+        return self.finish_detection_cycle(timeout=max_wait_time)
+        
+    def finish_detection_cycle(self, timeout=0):
+        """
+        진행 중인 Detection 요청 마무리 (결과 수집 → 처리 → 요청 정리)
+        start_detection 후 is_detection_complete()를 확인하며 주행 루프를 막지 않고 사용할 수 있음
+        
+        Args:
+            timeout: 결과 대기 시간 (0이면 완료되지 않은 요청은 타임아웃 처리)
             
-        # 3. 결과 수집
-        results = self.get_detection_results()
+        Returns:
+            Detection 결과 또는 None
+        """
+        results = self.get_detection_results(timeout=timeout)
 
-        # Detection 결과 처리 (MQTT 전송 + DB 저장)
+        # Detection 결과 처리 (바뀐 제품만 MQTT 전송 - DB는 관제센터가 갱신)
         if results and 'count_summary' in results:
             print(f"[DetectionController] 🎯 Detection 결과 처리: {results['count_summary']}")
-            
-            # MQTT 전송
-            self._send_detection_to_mqtt(results['count_summary'])
-            
-            # DB 저장
-            self._save_detection_to_db(results['count_summary'])
+            self._report_detection(results)
         else:
             print("[DetectionController] ❌ Detection 결과 없음 - 처리 건너뜀")
         
-        # 4. Detection 중지
+        # 3. 요청 정리
         self.stop_detection()
         
         print("[DetectionController] 🏁 Detection 사이클 완료")
         return results
 
-    def _send_detection_to_mqtt(self, count_summary):
-        """Detection 결과를 MQTT로 전송"""
+    def _report_detection(self, results):
+        """
+        마지막 매대 상태와 비교해 바뀐 제품만 보고
+        전송에 성공한 경우에만 마지막 상태를 갱신하므로 실패한 변경은 다음 관찰에서 다시 전송됨
+        """
+        shelf_id = results.get('shelf_id')
+        if shelf_id is None:
+            # 매대 정보가 없으면 전체 결과 전송 (이전 방식)
+            self._send_detection_to_mqtt({"QR_info": "detection_complete", "snack_num": results['count_summary']})
+            return
+        
+        confidences = results['final_results'].get('count_confidence')
+        delta = self.stock_tracker.compute_delta(shelf_id, results['count_summary'], confidences)
+        if not delta:
+            print(f"[DetectionController] ✅ 매대 {shelf_id} 재고 변화 없음 - 전송 생략")
+            return
+        
+        seq = self.stock_tracker.seq + 1
+        mqtt_data = self.stock_tracker.build_message(seq, shelf_id, delta)
+        if not self._send_detection_to_mqtt(mqtt_data):
+            return
+        
+        self.stock_tracker.commit(shelf_id, delta)
+        print(f"[DetectionController] 📦 매대 {shelf_id} 델타 {len(delta)}건 반영 (seq={seq})")
+
+    def _send_detection_to_mqtt(self, mqtt_data):
+        """
+        Detection 결과 메시지를 공용 MQTT 세션으로 전송 (QoS 1)
+        연결이 끊겨 있으면 세션의 디스크 outbox에 저장되어 재연결 시 전송됨
+        
+        Returns:
+            bool: 전송 또는 outbox 저장 성공 여부
+        """
         print(f"[DetectionController] 📡 MQTT 전송 시작...")
-        print(f"[DetectionController] 전송할 데이터: {count_summary}")
         
         try:
-            import paho.mqtt.client as mqtt
-            import json
+            from communication.mqtt_session import get_mqtt_session
             
-            # MQTT 클라이언트 생성
-            client = mqtt.Client(client_id="DetectionController")
-            print(f"[DetectionController] MQTT 클라이언트 생성 완료")
-            
-            # 브로커 연결
-            client.connect("localhost", 1883, 60)
-            print(f"[DetectionController] MQTT 브로커 연결 완료")
-            
-            # MQTT 데이터 구성
-            mqtt_data = {
-                "QR_info": "detection_complete",
-                "snack_num": count_summary  # {'haetae_Osajjeu_60G': 1}
-            }
-            
-            print(f"[DetectionController] 📦 MQTT 메시지 구성: {mqtt_data}")
+            if self.mqtt_session is None:
+                self.mqtt_session = get_mqtt_session("managerAGV")
             
             # managerAGV로 전송
             topic = "agv/managerAGV/qr_id"
-            result = client.publish(topic, json.dumps(mqtt_data))
+            sent = self.mqtt_session.publish(topic, mqtt_data, qos=1)
             
-            print(f"[DetectionController] 📤 MQTT 전송 완료")
+            print(f"[DetectionController] 📤 MQTT {'전송 완료' if sent else 'outbox 저장 (재연결 시 전송)'}")
             print(f"[DetectionController] Topic: {topic}")
-            print(f"[DetectionController] Message: {json.dumps(mqtt_data)}")
-            print(f"[DetectionController] Result: {result}")
-            
-            client.disconnect()
-            print(f"[DetectionController] MQTT 연결 종료")
+            print(f"[DetectionController] Message: {mqtt_data}")
+            return True
             
         except ImportError as e:
             print(f"[DetectionController] ❌ MQTT 라이브러리 import 실패: {e}")
@@ -203,66 +244,8 @@ class DetectionController:
             print(f"[DetectionController] ❌ MQTT 전송 실패: {e}")
             import traceback
             print(f"[DetectionController] 오류 상세: {traceback.format_exc()}")
+        return False
 
-    def _save_detection_to_db(self, count_summary):
-        """Detection 결과를 DB에 저장"""
-        print(f"[DetectionController] 💾 DB 저장 시작...")
-        print(f"[DetectionController] 저장할 데이터: {count_summary}")
-        
-        # 제품명 매핑 테이블 (Detection 결과 → DB product_name)
-        product_mapping = {
-            'haetae_Osajjeu_60G': 'haetae_Osajjeu_60G',
-            'crown_ChocoHaim_142G': 'crown_ChocoHaim_142G', 
-            'crown_Concho_66G': 'crown_Concho_66G',
-            'crown_Potto_Cheese_Tart_322G': 'crown_Potto_Cheese_Tart_322G',
-            'orion_Pocachip_Original_66G': 'orion_Pocachip_Original_66G',
-            'orion_Gosomi_80G': 'orion_Gosomi_80G'
-        }
-        
-        try:
-            import mysql.connector
-            
-            # DB 연결 설정 (manager_db 우선 시도)
-            db_config = {
-                'user': 'root',
-                'password': '1234',
-                'host': '100.123.1.124',
-                'database': 'manager_db'  # 옵션 2: manager_db 사용
-            }
-            
-            print(f"[DetectionController] DB 연결 시도: manager_db")
-            conn = mysql.connector.connect(**db_config)
-            cursor = conn.cursor()
-            
-            # Detection 결과를 DB에 업데이트
-            for detected_name, count in count_summary.items():
-                # 매핑된 제품명 가져오기
-                product_name = product_mapping.get(detected_name, detected_name)
-                
-                # snack_stock 테이블 업데이트
-                update_query = """
-                UPDATE snack_stock 
-                SET product_count = %s 
-                WHERE product_name = %s
-                """
-                
-                cursor.execute(update_query, (count, product_name))
-                print(f"[DetectionController] DB 업데이트: {product_name} → {count}개")
-            
-            # 변경사항 커밋
-            conn.commit()
-            print(f"[DetectionController] ✅ DB 저장 완료")
-            
-            cursor.close()
-            conn.close()
-            
-        except ImportError as e:
-            print(f"[DetectionController] ❌ mysql.connector import 실패: {e}")
-        except Exception as e:
-            print(f"[DetectionController] ❌ DB 저장 실패: {e}")
-            import traceback
-            print(f"[DetectionController] 오류 상세: {traceback.format_exc()}")
-        
     def get_last_results(self):
         """마지막 Detection 결과 반환"""
         return self.detection_results
@@ -1,10 +1,10 @@
-import time
 import sys
 import os
 
 # 상위 vision 폴더의 모듈들 import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from vision.path_planner import DirectionResolver
+from vision.maneuver import ManeuverRunner
 
 class ManagerExecutor:
     """
@@ -12,7 +12,7 @@ class ManagerExecutor:
     순환 구조 제거, 설정된 목표로만 이동
     """
     
-    def __init__(self, planner, uart, tracer, start_dir='U'):
+    def __init__(self, planner, uart, tracer, start_dir='U', pose_estimator=None, clock=None):
         self.planner = planner
         self.uart = uart
         self.tracer = tracer
@@ -20,6 +20,8 @@ class ManagerExecutor:
         self.command_queue = []
         self.executing = False
         self.target_reached = False  # 목표 도달 플래그
+        # 회전/정렬 기동은 메인 루프의 tick()으로 진행 (프레임 처리를 막지 않음)
+        self.maneuver = ManeuverRunner(self.send_uart, tracer, pose_estimator, name="ManagerExecutor", clock=clock)
         
     def send_uart(self, msg):
         """UART 전송 처리"""
@@ -28,20 +30,20 @@ class ManagerExecutor:
         else:
             self.uart.put(msg)
             
-    def follow_line_until_aligned(self, frame_getter, timeout=1.2):
+    def tick(self, frame=None):
         """
-        라인 중심 정렬
+        진행 중인 기동을 한 단계 진행 (메인 루프에서 프레임마다 호출)
+        
+        Returns:
+            bool: 기동이 아직 진행 중이면 True
         """
-        start_time = time.time()
-        while True:
-            frame = frame_getter()
-            direction, offset, _, _, found = self.tracer.get_direction(frame)
-
-            if direction == 'F' or time.time() - start_time > timeout:
-                break
-
-            self.send_uart(direction + '\n')
-            time.sleep(0.05)
+        if callable(frame):
+            frame = frame()
+        return self.maneuver.tick(frame)
+        
+    def is_maneuvering(self):
+        """회전/정렬 기동 중 여부 (이때는 라인트레이싱 명령을 보내지 않음)"""
+        return self.maneuver.is_busy()
             
     def run_to_target(self, frame_getter):
         """
@@ -73,10 +75,16 @@ class ManagerExecutor:
         self.target_reached = False
         return True
         
-    def execute_next_command(self, frame_getter):
+    def execute_next_command(self, frame=None):
         """
-        다음 명령 실행
+        다음 명령의 기동을 시작하고 바로 반환 (이후 진행은 tick()에서)
+        
+        Args:
+            frame: 현재 프레임 또는 프레임 획득 함수 (있으면 첫 tick까지 수행)
         """
+        if self.maneuver.is_busy():
+            return  # 이전 기동 진행 중
+            
         if not self.command_queue:
             if self.executing:
                 print("[ManagerExecutor] 경로 주행 완료")
@@ -85,29 +93,20 @@ class ManagerExecutor:
             return
 
         cmd = self.command_queue.pop(0)
-
-        if cmd == 'F':
-            self.send_uart('F\n')
-            self.follow_line_until_aligned(frame_getter)
-
-        elif cmd in ('L90', 'R90'):
+        if cmd in ('L90', 'R90'):
             print(f"[ManagerExecutor] {cmd}: 먼저 전진 후 회전")
-            self.send_uart('F\n')
-            time.sleep(0.85)
-            self.send_uart(cmd + '\n')
-            print(f"[ManagerExecutor] 전송: {cmd}")
-            time.sleep(0.9)
-
-            # 회전 후 current_dir 갱신
-            self.current_dir = self._get_next_direction(self.current_dir, cmd)
 
-        else:
-            self.send_uart(cmd + '\n')
-            print(f"[ManagerExecutor] 전송: {cmd}")
-            time.sleep(1)
+        next_dir = self._get_next_direction(self.current_dir, cmd)
+        self.maneuver.start(
+            cmd,
+            turn_point=(self.planner.now_pos_x, self.planner.now_pos_y),
+            target_dir=next_dir
+        )
+        if cmd in ('L90', 'R90', 'B'):
+            self.current_dir = next_dir
             
-            if cmd in ('L90', 'R90', 'B'):
-                self.current_dir = self._get_next_direction(self.current_dir, cmd)
+        if frame is not None:
+            self.tick(frame)
                 
     def _get_next_direction(self, current_dir, cmd):
         """방향 전환 계산"""
@@ -146,6 +145,7 @@ class ManagerExecutor:
         
     def stop_execution(self):
         """실행 중지"""
+        self.maneuver.cancel()
         self.send_uart('S\n')
         self.command_queue.clear()
         self.executing = False
@@ -1,10 +1,10 @@
-from collections import deque
 import sys
 import os
 
 # 상위 vision 폴더의 모듈들 import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from vision.path_planner import DirectionResolver
+from vision.store_map import as_store_map
 
 class ManagerPlanner:
     """
@@ -14,10 +14,11 @@ class ManagerPlanner:
     
     def __init__(self, position_map):
         self.position_map = position_map
+        self.store_map = as_store_map(position_map)
         self.now_pos_x, self.now_pos_y = [6, 0]  # 초기 위치
         
-        # Detection 가능한 매대 좌표들 (순환하지 않음)
-        self.detection_coordinates = [
+        # Detection 가능한 매대 좌표들 (순환하지 않음) - 맵 파일에 detection_poses가 있으면 그 값 사용
+        self.detection_coordinates = [list(p) for p in self.store_map.detection_poses] or [
             [2, 0],  # [1,1] 매대 detection [0, 1], [0, 3], [0, 5]
             [2, 1],  # [1,3] 매대 detection  
             [5, 0],  # [1,5] 매대 detection
@@ -72,39 +73,7 @@ class ManagerPlanner:
         BFS 경로 탐색
         """
         print(f"[BFS] BFS 탐색 시작: 현재=({self.now_pos_x},{self.now_pos_y}) → 목표=({target_x},{target_y})")
-        move = [[-1, 0], [0, 1], [1, 0], [0, -1]]   # AGV 이동방향 (상, 우, 하, 좌 순서로)
-        
-        n, m = len(self.position_map), len(self.position_map[0])
-        visited = [[False]*m for _ in range(n)]
-        prev = [[None]*m for _ in range(n)]
-        queue = deque()
-
-        # 현재의 위치를 방문처리
-        sx, sy = self.now_pos_x, self.now_pos_y
-        queue.append((sx, sy))
-        visited[sx][sy] = True
-
-        while queue:
-            x, y = queue.popleft()
-
-            if (x, y) == (target_x, target_y):
-                path = []
-                while (x, y) != (sx, sy):
-                    path.append([x, y])
-                    x, y = prev[x][y]
-                path.append([sx, sy])
-                path.reverse()
-                return path
-
-            for dx, dy in move:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < n and 0 <= ny < m and self.position_map[nx][ny] == 0:
-                    if not visited[nx][ny]:
-                        visited[nx][ny] = True
-                        prev[nx][ny] = (x, y)
-                        queue.append((nx, ny))
-        
-        return None
+        return self.store_map.bfs((self.now_pos_x, self.now_pos_y), (target_x, target_y))
 
     def path_find_to_target(self):
         """
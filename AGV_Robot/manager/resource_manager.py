@@ -1,4 +1,3 @@
-import cv2
 import gc
 import time
 import threading
@@ -9,6 +8,8 @@ class ResourceManager:
     Detection 시 불필요한 자원을 해제하고, 완료 후 복원
     """
     
+    RESTORE_SETTLE_TIME = 0.5   # 자원 복원 후 카메라 안정화 시간 (초)
+    
     def __init__(self):
         self.saved_frame_rate = None
         self.paused_threads = []
@@ -39,12 +40,13 @@ class ResourceManager:
         
         print("[ResourceManager] ✅ 자원 준비 완료 - Detection 시작 가능")
         
-    def restore_after_detection(self, picam2=None):
+    def restore_after_detection(self, picam2=None, wait=True):
         """
         Detection 완료 후 자원 복원
         
         Args:
             picam2: Picamera2 객체 (프레임레이트 복원용)  
+            wait: True면 안정화 대기 (False면 호출한 쪽에서 RESTORE_SETTLE_TIME만큼 기다림 - 주행 스케줄러용)
         """
         print("[ResourceManager] 🔄 Detection 완료 후 자원 복원 시작...")
         
@@ -56,13 +58,15 @@ class ResourceManager:
         self.line_tracer_active = True
         
         # 3. 잠시 대기 (안정화)
-        time.sleep(0.5)
+        if wait:
+            time.sleep(self.RESTORE_SETTLE_TIME)
         
         print("[ResourceManager] ✅ 자원 복원 완료 - 주행 재개 가능")
         
     def _close_opencv_windows(self):
         """OpenCV 창들 닫기"""
         try:
+            import cv2
             cv2.destroyAllWindows()
             self.opencv_windows_closed = True
             print("[ResourceManager] OpenCV 창 해제 완료")
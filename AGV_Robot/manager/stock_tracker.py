@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+
+# 상태 파일은 실행 위치와 관계없이 이 모듈 폴더(manager/)에 저장
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_state.json")
+
+
+class ShelfStockTracker:
+    """
+    매대별 마지막 재고 상태 관리 클래스
+    Detection 결과와 비교해 바뀐 제품만 (개수, 신뢰도) 델타로 만들고,
+    서버가 중복/역순 메시지를 무시할 수 있도록 증가하는 시퀀스 번호를 붙임
+    """
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH, epoch_path=None, min_confidence=0.6):
+        """
+        Args:
+            state_path: 마지막 재고 상태/시퀀스 저장 파일 (재시작 후에도 유지)
+            epoch_path: 재시작 횟수(epoch) 저장 파일 (기본: 상태 파일 옆 <이름>_epoch.json)
+                        재고 상태를 지워 초기화해도 epoch는 계속 증가하도록 따로 저장
+            min_confidence: 이 값보다 낮은 신뢰도의 변경은 보류 (다음 관찰에서 확인)
+        """
+        self.state_path = state_path
+        self.epoch_path = epoch_path or os.path.splitext(state_path)[0] + "_epoch.json"
+        self.min_confidence = min_confidence
+        self.lock = threading.Lock()
+
+        self.shelves = {}   # {"x,y": {product_name: count}}
+        self.seq = 0        # 마지막으로 발급한 시퀀스 번호
+        self.epoch = 0      # 재시작마다 1씩 증가하는 세대 번호 (seq가 다시 시작돼도 서버가 무시하지 않도록)
+        self.epoch_started = False  # 이번 실행의 epoch 발급 여부 (첫 델타를 보낼 때 발급)
+        self._load()
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)  # 쓰는 도중 종료돼도 이전 내용 유지
+
+    @staticmethod
+    def _shelf_key(shelf_id):
+        return ",".join(str(int(v)) for v in shelf_id)
+
+    def _load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.shelves = state.get('shelves', {})
+            self.seq = int(state.get('seq', 0))
+            self.epoch = int(state.get('epoch') or 0)
+            print(f"[ShelfStockTracker] 마지막 재고 상태 로드: 매대 {len(self.shelves)}개, seq={self.seq}, epoch={self.epoch}")
+        except Exception as e:
+            print(f"[ShelfStockTracker] 재고 상태 로드 실패 (초기화): {e}")
+            self.shelves = {}
+            self.seq = 0
+
+    def _next_epoch(self):
+        """
+        저장된 epoch 카운터 + 1 (시계가 아니라 카운터라서 RTC 없는 Pi의 부팅 직후 시각이 과거여도 줄어들지 않음)
+        이전 버전 상태 파일의 epoch(시각 기반)보다도 크게 이어감
+        """
+        last_epoch = self.epoch
+        if os.path.exists(self.epoch_path):
+            try:
+                with open(self.epoch_path, 'r', encoding='utf-8') as f:
+                    last_epoch = max(last_epoch, int(json.load(f)['epoch']))
+            except Exception as e:
+                print(f"[ShelfStockTracker] epoch 파일 로드 실패: {e}")
+
+        self.epoch = last_epoch + 1
+        self.epoch_started = True
+        self._write_json(self.epoch_path, {'epoch': self.epoch})
+        print(f"[ShelfStockTracker] 재고 보고 시작: epoch={self.epoch}")
+
+    def _save(self):
+        self._write_json(self.state_path, {'epoch': self.epoch, 'seq': self.seq, 'shelves': self.shelves})
+
+    def compute_delta(self, shelf_id, count_summary, confidences=None):
+        """
+        이번 관찰 결과와 마지막 상태를 비교해 바뀐 제품만 반환
+
+        Args:
+            shelf_id: Detection 좌표 (x, y)
+            count_summary: {product_name: count} (0개 제품은 빠져 있을 수 있음)
+            confidences: {product_name: 최빈 개수의 빈도 비율} (없으면 1.0)
+
+        Returns:
+            {product_name: (count, confidence)} - 신뢰도가 min_confidence 이상인 변경만
+        """
+        confidences = confidences or {}
+        key = self._shelf_key(shelf_id)
+
+        with self.lock:
+            last_state = self.shelves.get(key, {})
+            delta = {}
+
+            # 이전에 있었지만 이번에 안 보인 제품은 0개로 처리
+            for product_name in set(last_state) | set(count_summary):
+                count = int(count_summary.get(product_name, 0))
+                if last_state.get(product_name, 0) == count:
+                    continue
+
+                confidence = float(confidences.get(product_name, 1.0))
+                if confidence < self.min_confidence:
+                    print(f"[ShelfStockTracker] 신뢰도 낮음 - 변경 보류: {product_name} → {count}개 ({confidence:.2f})")
+                    continue
+                delta[product_name] = (count, confidence)
+
+            return delta
+
+    def commit(self, shelf_id, delta):
+        """
+        델타를 마지막 상태에 반영하고 시퀀스 번호 발급
+
+        Returns:
+            int: 이 델타의 시퀀스 번호 (델타가 비어 있으면 None)
+        """
+        if not delta:
+            return None
+
+        key = self._shelf_key(shelf_id)
+        with self.lock:
+            if not self.epoch_started:
+                self._next_epoch()
+            shelf_state = self.shelves.setdefault(key, {})
+            for product_name, (count, _) in delta.items():
+                if count > 0:
+                    shelf_state[product_name] = count
+                else:
+                    shelf_state.pop(product_name, None)
+
+            self.seq += 1
+            self._save()
+            return self.seq
+
+    def build_message(self, seq, shelf_id, delta):
+        """
+        서버로 보낼 압축 델타 메시지 (바뀐 제품만, 신뢰도는 소수 둘째 자리)
+        서버는 (epoch, seq) 순서로 비교하므로 재시작 후나 상태 파일이 초기화돼 seq가 1부터 다시 시작해도 무시되지 않음
+        """
+        return {
+            "QR_info": "detection_delta",
+            "epoch": self.epoch,
+            "seq": seq,
+            "shelf": [int(v) for v in shelf_id],
+            "d": {name: [count, round(confidence, 2)] for name, (count, confidence) in delta.items()}
+        }
+
+    def get_shelf_state(self, shelf_id):
+        """매대의 마지막 재고 상태 반환"""
+        with self.lock:
+            return dict(self.shelves.get(self._shelf_key(shelf_id), {}))
@@ -23,10 +23,11 @@ class SharedFrame:
         
 
 class QRReader:
-    def __init__(self, cooldown=1):
+    def __init__(self, cooldown=1, clock=time.time):
         self.last_id = None
         self.last_time = 0
         self.cooldown = cooldown
+        self.clock = clock  # 쿨다운 기준 시계 (세션 재생 시 녹화 시각)
 
     def scan(self, frame):
         # h, w = frame.shape[:2]
@@ -44,7 +45,7 @@ class QRReader:
         scale_y = frame.shape[0] / 240          # 240
 
         decoded = decode(small)
-        now = time.time()
+        now = self.clock()
         result = []
 
         for obj in decoded:
@@ -0,0 +1,3 @@
+from .session_store import SessionWriter, SessionReader
+from .recorder import SessionRecorder, RecordingCamera, RecordingCapture, RecordingQueue, tap_messenger
+from .player import SessionPlayer, ReplayCamera, ReplayCapture, ReplayUart, ReplayMessenger
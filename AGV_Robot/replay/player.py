@@ -0,0 +1,432 @@
+"""
+녹화 세션 재생 - 녹화한 프레임/이벤트를 실제와 같은 인터페이스로 다시 공급
+
+    SessionPlayer     세션 타임라인 재생 (speed=1.0 실시간, 0이면 최대 속도) + 재생 시계
+    ReplayCamera      Picamera2 자리 (capture_array)
+    ReplayCapture     cv2.VideoCapture 자리 (read/grab) - SnackDetector.cap에 사용
+    ReplayUart        rx_queue 자리 (녹화된 STM32 수신 줄) + 송신 명령 기록
+    ReplayMessenger   AgvToServer 자리 (녹화된 위치 응답)
+
+프레임을 요청할 때 재생 시계가 그 프레임 시각까지 진행하고, 그 사이의 이벤트는 등록된 콜백으로 전달
+
+python -m replay.player <세션> --mode line|aruco|qr|detect 로 인식 모듈을 로봇 없이 돌려
+프레임별 결과/지연시간 보고서를 만들고, --baseline으로 이전 보고서와 결과를 비교 (회귀 테스트)
+"""
+
+import contextlib
+import io
+import json
+import queue
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+from .session_store import SessionReader
+
+
+class SessionPlayer:
+    def __init__(self, session, speed=0.0):
+        """
+        :param session: 세션 폴더 경로 또는 SessionReader
+        :param speed: 재생 배속 (1.0 = 녹화 당시 속도, 0 = 기다리지 않고 최대 속도)
+        """
+        self.reader = session if isinstance(session, SessionReader) else SessionReader(session)
+        self.speed = speed
+        self.listeners = {}         # {이벤트 종류: [콜백(record)]}
+        self.position = 0           # 다음에 처리할 기록 번호
+        self.now = 0.0              # 재생 시각 (세션 시작 기준 초)
+        self.wall_start = None
+        self.finished = False
+
+    def on_event(self, kind, callback):
+        """이벤트 종류별 콜백 등록 (재생 시계가 이벤트 시각을 지날 때 callback(record) 호출)"""
+        self.listeners.setdefault(kind, []).append(callback)
+
+    def clock(self):
+        """재생 시각 (녹화 당시 epoch 초) - ArUcoReader/QRReader/PathExecutor의 clock으로 사용"""
+        return self.reader.start_time + self.now
+
+    def _advance(self, t):
+        """t까지 재생 시계 진행 (실시간 재생이면 실제 시간도 맞춰 대기)"""
+        if self.speed > 0:
+            if self.wall_start is None:
+                self.wall_start = time.perf_counter() - t / self.speed
+            wait = self.wall_start + t / self.speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        self.now = max(self.now, t)
+
+    def next_frame(self, stream=None):
+        """
+        다음 프레임까지 재생 (사이의 이벤트는 콜백으로 전달, 다른 스트림 프레임은 건너뜀)
+        :return: (프레임 기록, 이미지) 또는 세션 끝이면 None
+        """
+        records = self.reader.records
+        while self.position < len(records):
+            record = records[self.position]
+            self.position += 1
+            if record['kind'] == 'frame':
+                if stream is not None and record['stream'] != stream:
+                    continue
+                self._advance(record['t'])
+                return record, self.reader.read_frame(record)
+
+            self._advance(record['t'])
+            for callback in self.listeners.get(record['kind'], []):
+                callback(record)
+        self.finished = True
+        return None
+
+    def frames(self, stream=None):
+        """(프레임 기록, 이미지) 제너레이터"""
+        while True:
+            item = self.next_frame(stream)
+            if item is None:
+                return
+            yield item
+
+    def close(self):
+        self.reader.close()
+
+
+class ReplayCamera:
+    """Picamera2 대신 사용 - capture_array()가 녹화된 프레임을 순서대로 반환 (끝나면 None)"""
+
+    def __init__(self, player, stream='csi'):
+        self.player = player
+        self.stream = stream
+        self.record = None
+
+    def capture_array(self, *args):
+        item = self.player.next_frame(self.stream)
+        if item is None:
+            return None
+        self.record, frame = item
+        return frame
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class ReplayCapture:
+    """cv2.VideoCapture 대신 사용 (SnackDetector.cap 자리) - 세션이 끝나면 read()가 (False, None)"""
+
+    def __init__(self, player, stream='usb'):
+        self.player = player
+        self.stream = stream
+        self.record = None
+        records = player.reader.frame_records(stream)
+        self.shape = records[0]['shape'] if records else [0, 0]
+        self.fps = (len(records) - 1) / (records[-1]['t'] - records[0]['t']) if len(records) > 1 else 0.0
+
+    def isOpened(self):
+        return not self.player.finished
+
+    def read(self):
+        item = self.player.next_frame(self.stream)
+        if item is None:
+            return False, None
+        self.record, frame = item
+        return True, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        import cv2
+
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.shape[1], cv2.CAP_PROP_FRAME_HEIGHT: self.shape[0],
+                cv2.CAP_PROP_FPS: self.fps}.get(prop, 0.0)
+
+    def release(self):
+        pass
+
+
+class ReplayUart:
+    """
+    UART 자리 - 녹화된 STM32 수신 줄을 재생 시각에 rx_queue로 전달 (PoseEstimator.consume_uart용)
+    put(msg)은 송신 명령을 기록만 함 (tx_queue/CommandTap의 tx_queue 자리에 사용)
+    """
+
+    def __init__(self, player):
+        self.rx_queue = queue.Queue()
+        self.sent = []              # (재생 시각, 명령)
+        self.player = player
+        player.on_event('uart_rx', lambda record: self.rx_queue.put(record['data']))
+
+    def put(self, msg):
+        self.sent.append((self.player.now, msg.strip()))
+
+
+class ReplayMessenger:
+    """AgvToServer 자리 - 녹화된 위치 응답을 재생 시각에 반영하고, QR 송신은 기록만 함"""
+
+    def __init__(self, player, agv_name=None):
+        self.player = player
+        self.agv_name = agv_name
+        self.agv_qr = ""
+        self.position_x = 0
+        self.position_y = 0
+        self.received_pos = False
+        self.sent = []              # (재생 시각, QR 정보)
+        player.on_event('mqtt_in', self._on_message)
+
+    def _on_message(self, record):
+        topic, payload = record['data']['topic'], record['data']['payload']
+        if not topic.endswith("/pos") or not isinstance(payload, dict):
+            return
+        self.position_x = int(payload["x"])
+        self.position_y = int(payload["y"])
+        self.received_pos = True
+
+    def get_position(self):
+        return {"x": self.position_x, "y": self.position_y}
+
+    def send_qr_info(self, qr_info):
+        self.agv_qr = qr_info
+        self.sent.append((self.player.now, qr_info))
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+# ==================== 인식 모듈 재생 ====================
+
+def latency_summary(latencies):
+    if not latencies:
+        return None
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'frames': len(latencies),
+        'latency_ms_mean': round(float(latencies_ms.mean()), 3),
+        'latency_ms_p50': round(float(np.percentile(latencies_ms, 50)), 3),
+        'latency_ms_p95': round(float(np.percentile(latencies_ms, 95)), 3),
+        'latency_ms_max': round(float(latencies_ms.max()), 3),
+    }
+
+
+def line_processor(player):
+    """LineTracer.get_direction → [방향, 오프셋]"""
+    from line_tracer import LineTracer
+
+    tracer = LineTracer()
+
+    def process(frame):
+        direction, offset, annotated, binary, found = tracer.get_direction(frame)
+        return [direction, int(offset)], annotated
+
+    def summarize(results):
+        directions = Counter(value[0] for _, _, value in results)
+        return {'directions': dict(directions),
+                'line_found_ratio': round(1 - directions.get('S', 0) / max(len(results), 1), 4)}
+
+    return process, summarize
+
+
+def marker_processor(player, marker_type):
+    """ArUcoReader/QRReader.scan → 이번 프레임에 새로 읽은 마커 ID 리스트 (쿨다운은 재생 시계 기준)"""
+    if marker_type == 'qr':
+        from qr import QRReader
+        reader = QRReader(clock=player.clock)
+        kind = lambda marker: marker["id"] or marker["raw"]
+    else:
+        from aruco_marker import ArUcoReader
+        reader = ArUcoReader(clock=player.clock)
+        kind = lambda marker: f"ID:{marker['id']:03d}"
+
+    def process(frame):
+        annotated = frame.copy()  # scan이 인식 결과를 프레임에 그림
+        return [kind(marker) for marker in reader.scan(annotated)], annotated
+
+    def summarize(results):
+        sightings = [(t, marker_id) for t, _, ids in results for marker_id in ids]
+        # 녹화 당시 실제로 관제센터에 보낸 마커 (aruco는 'ID:003', qr는 ID 또는 원문)
+        recorded = [record['data']['payload'].get('QR_info') for record in player.reader.events('mqtt_out')
+                    if isinstance(record['data'].get('payload'), dict)]
+        return {'sightings': len(sightings), 'unique_markers': sorted(set(m for _, m in sightings)),
+                'sequence': [m for _, m in sightings],
+                'recorded_sequence': [m for m in recorded if m]}
+
+    return process, summarize
+
+
+def detect_processor(player, model_path=None, backend=None, shelf_id=None):
+    """
+    SnackDetector.detect_objects + 투표 (detection_interval 프레임마다 관찰, 수렴하면 결과 기록 후 새 관찰 시작)
+    → 관찰 프레임의 {클래스: 개수}
+    """
+    from webcam.config import CAMERA_CONFIG
+    from webcam.detection import SnackDetector
+
+    detector = SnackDetector(model_path=model_path, backend=backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if detector.roi_profiles is not None and not detector.roi_profiles.load():
+            detector.roi_profiles = None
+        detector.initialize_model()
+        detector.reset_observation()
+    detector.current_shelf_id = tuple(shelf_id) if shelf_id else None
+    interval = CAMERA_CONFIG['detection_interval']
+    observations = []
+
+    def process(frame):
+        detector.frame_count += 1
+        if detector.frame_count % interval:
+            return None, frame
+        with contextlib.redirect_stdout(io.StringIO()):
+            detections = detector.detect_objects(frame)
+            detector.tracker.update(detections)
+            detector.observation_count += 1
+            detector.record_observation_result()
+            detector.stop_reason = detector.check_convergence()
+            if detector.is_observation_complete():
+                detector.analyze_final_results()
+                final = detector.get_final_results()
+                observations.append({'t': round(player.now, 3), 'final_counts': final['final_counts'],
+                                     'observations': detector.observation_count,
+                                     'stop_reason': detector.stop_reason})
+                detector.reset_observation()
+        return dict(sorted(Counter(d['name'] for d in detections).items())), frame
+
+    def summarize(results):
+        detector.release()
+        return {'backend': detector.backend_name, 'model_path': detector.model_path,
+                'detection_interval': interval, 'votes': observations}
+
+    return process, summarize
+
+
+def replay_perception(player, stream, process, show=False):
+    """
+    세션 프레임을 인식 모듈에 차례로 넣고 [(시각, 프레임 번호, 결과)]와 지연시간 수집
+    (결과가 None인 프레임은 제외 - 탐지 간격이 아닌 프레임 등)
+    """
+    import cv2
+
+    results = []
+    latencies = []
+    for record, frame in player.frames(stream):
+        start = time.perf_counter()
+        value, annotated = process(frame)
+        latency = time.perf_counter() - start
+        if value is not None:
+            results.append((round(record['t'], 6), record['seq'], value))
+            latencies.append(latency)
+        if show:
+            cv2.imshow("Replay", annotated)
+            if cv2.waitKey(1) & 0xFF in (ord('q'), 27):
+                break
+    if show:
+        cv2.destroyAllWindows()
+    return results, latencies
+
+
+def compare_results(baseline, results):
+    """
+    이전 보고서와 프레임별 결과 비교
+    :return: (비교한 프레임 수, [(프레임 번호, 이전 결과, 현재 결과)] 달라진 프레임)
+    """
+    previous = {seq: value for _, seq, value in baseline}
+    current = {seq: value for _, seq, value in results}
+    diffs = [(seq, previous.get(seq), current.get(seq))
+             for seq in sorted(set(previous) | set(current)) if previous.get(seq) != current.get(seq)]
+    return len(set(previous) | set(current)), diffs
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="녹화 세션으로 인식 모듈 재생 (로봇 없이 튜닝/벤치마크/회귀 테스트)")
+    parser.add_argument("session", help="세션 폴더 (replay.recorder 또는 AgvRuntime(record_dir=...)로 녹화)")
+    parser.add_argument("--mode", choices=["info", "line", "aruco", "qr", "detect"], default="info")
+    parser.add_argument("--stream", default=None, help="프레임 스트림 (기본: detect는 usb, 그 외 csi - 없으면 첫 스트림)")
+    parser.add_argument("--speed", type=float, default=0.0, help="재생 배속 (1.0 = 실시간, 0 = 최대 속도)")
+    parser.add_argument("--backend", default=None, help="detect: 추론 백엔드")
+    parser.add_argument("--model", default=None, help="detect: 모델 경로")
+    parser.add_argument("--shelf", type=int, nargs=2, default=None, metavar=("X", "Y"), help="detect: 매대 ROI 프로필 좌표")
+    parser.add_argument("--output", default=None, help="보고서 JSON 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 보고서 (결과가 다르면 종료 코드 1)")
+    parser.add_argument("--show", action="store_true", help="인식 결과 화면 표시")
+    args = parser.parse_args()
+
+    player = SessionPlayer(args.session, speed=args.speed)
+    streams = player.reader.streams()
+    print(f"📼 세션: {args.session} - {player.reader.summary()}")
+    if args.mode == 'info':
+        for key in ('started_at', 'agv_name', 'marker_type', 'camera', 'dropped_frames'):
+            if key in player.reader.meta:
+                print(f"  {key}: {player.reader.meta[key]}")
+        return
+
+    stream = args.stream or ('usb' if args.mode == 'detect' else 'csi')
+    if stream not in streams:
+        if args.stream or not streams:
+            print(f"❌ '{stream}' 스트림이 없습니다 (있는 스트림: {', '.join(streams) or '없음'})")
+            sys.exit(2)
+        stream = next(iter(streams))
+
+    if args.mode == 'line':
+        process, summarize = line_processor(player)
+    elif args.mode == 'detect':
+        process, summarize = detect_processor(player, args.model, args.backend, args.shelf)
+    else:
+        process, summarize = marker_processor(player, args.mode)
+
+    print(f"▶️ {args.mode} 재생 ({stream}, {'최대 속도' if args.speed <= 0 else f'{args.speed}배속'})")
+    wall_start = time.perf_counter()
+    results, latencies = replay_perception(player, stream, process, args.show)
+    wall_time = time.perf_counter() - wall_start
+    player.close()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'session': args.session,
+        'mode': args.mode,
+        'stream': stream,
+        'speed': args.speed,
+        'wall_s': round(wall_time, 3),
+        'latency': latency_summary(latencies),
+        'summary': summarize(results),
+        'results': [list(item) for item in results],
+    }
+    print("\n📊 결과:")
+    for key, value in report['summary'].items():
+        if isinstance(value, list) and (len(value) > 10 or any(isinstance(v, dict) for v in value)):
+            value = f"{len(value)}개 (보고서 참고)"
+        print(f"  {key}: {value}")
+    if report['latency']:
+        latency = report['latency']
+        print(f"⏱️ {latency['frames']}프레임 - 평균 {latency['latency_ms_mean']:.2f}ms, "
+              f"p50 {latency['latency_ms_p50']:.2f}ms, p95 {latency['latency_ms_p95']:.2f}ms (전체 {wall_time:.1f}초)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📄 보고서 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        compared, diffs = compare_results(baseline['results'], report['results'])
+        if not diffs:
+            print(f"✅ 기준 보고서와 동일 ({compared}프레임)")
+            return
+        print(f"⚠️ 기준 보고서와 다른 프레임 {len(diffs)}/{compared}개")
+        for seq, previous, current in diffs[:10]:
+            print(f"  프레임 {seq}: {previous} → {current}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
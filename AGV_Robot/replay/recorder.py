@@ -0,0 +1,314 @@
+"""
+주행 세션 녹화 - 카메라 프레임 + UART/MQTT 이벤트를 타임스탬프와 함께 세션 폴더에 기록
+
+실제 객체를 감싸는 래퍼로 연결하므로 역할/인식 코드는 바꾸지 않음
+    RecordingCamera   Picamera2 (capture_array)
+    RecordingCapture  cv2.VideoCapture (read) - 웹캠 탐지용
+    RecordingQueue    tx_queue (put) / rx_queue (get)
+    tap_messenger     AgvToServer (QR 송신 / 위치 수신)
+
+인코딩/디스크 쓰기는 기록 스레드에서 처리하므로 주행 작업은 프레임 복사만큼만 느려짐
+"""
+
+import json
+import queue
+import threading
+import time
+
+from .session_store import SessionWriter
+
+
+class SessionRecorder:
+    """
+    세션 녹화기 (여러 스레드에서 frame/event 호출 가능)
+    기록 스레드가 밀리면 프레임만 버리고 (dropped_frames), 이벤트는 버리지 않음
+    기록 중 예외가 나면 한 번 출력하고 error에 남긴 뒤 녹화만 끔
+    (frame/event는 예외를 던지지 않음 - 래퍼가 감싼 UART/카메라 동작은 녹화 실패와 무관하게 진행,
+     실패는 error와 stop()의 session.json 'error'로 확인)
+    """
+
+    def __init__(self, path, codec='jpg', quality=90, chunk_mb=64, max_pending=60, meta=None,
+                 clock=time.monotonic):
+        """
+        :param max_pending: 인코딩 대기 프레임 수 상한 (넘으면 새 프레임을 버림)
+        :param meta: session.json에 같이 기록할 정보 (AGV 이름, 마커 종류 등)
+        """
+        self.path = path
+        self.writer = SessionWriter(path, codec, quality, chunk_mb, meta)
+        self.max_pending = max_pending
+        self.clock = clock
+
+        self.queue = queue.Queue()
+        self.pending_frames = 0
+        self.dropped_frames = 0
+        self.error = None   # 기록 스레드에서 난 예외
+        self.lock = threading.Lock()
+        self.thread = None
+        self.t0 = None
+
+    def start(self):
+        if self.thread is not None:
+            return self
+        self.t0 = self.clock()
+        self.thread = threading.Thread(target=self._writer_loop, name="SessionRecorder", daemon=True)
+        self.thread.start()
+        print(f"[Recorder] 🔴 녹화 시작: {self.path}")
+        return self
+
+    def elapsed(self):
+        return self.clock() - self.t0
+
+    def recording(self):
+        """녹화 중 여부 (시작 전, 종료 후, 기록 실패 후에는 False)"""
+        return self.thread is not None and self.error is None
+
+    def _fail(self, error):
+        """첫 기록 실패만 출력하고 녹화 끄기"""
+        with self.lock:
+            if self.error is not None:
+                return
+            self.error = error
+        print(f"[Recorder] ❌ 기록 실패, 녹화 중단 (주행은 계속): {error!r} ({self.path})")
+
+    # ==================== 기록 ====================
+
+    def frame(self, stream, frame):
+        """프레임 기록 요청 (복사본을 기록하므로 호출 후 원본을 수정해도 됨)"""
+        if not self.recording() or frame is None:
+            return False
+        try:
+            t = self.elapsed()
+            copied = frame.copy()
+        except Exception as e:
+            self._fail(e)
+            return False
+        with self.lock:
+            if self.pending_frames >= self.max_pending:
+                self.dropped_frames += 1
+                return False
+            self.pending_frames += 1
+        self.queue.put(('frame', stream, copied, t))
+        return True
+
+    def event(self, kind, data):
+        """이벤트 기록 요청 (kind: 'uart_tx', 'uart_rx', 'mqtt_out', 'mqtt_in' 등)"""
+        if not self.recording():
+            return False
+        try:
+            t = self.elapsed()
+        except Exception as e:
+            self._fail(e)
+            return False
+        self.queue.put(('event', kind, data, t))
+        return True
+
+    def _writer_loop(self):
+        last_flush = time.monotonic()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                # 기록 실패 후에는 남은 요청을 쓰지 않고 비우기만 함 (stop()의 종료 신호까지)
+                if self.error is not None:
+                    continue
+                if item[0] == 'frame':
+                    _, stream, frame, t = item
+                    self.writer.write_frame(stream, frame, t)
+                else:
+                    _, kind, data, t = item
+                    self.writer.write_event(kind, data, t)
+                # 1초마다 디스크에 반영 (녹화 중 종료돼도 그때까지는 재생 가능)
+                if time.monotonic() - last_flush > 1.0:
+                    self.writer.flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                self._fail(e)
+            finally:
+                if item[0] == 'frame':
+                    with self.lock:
+                        self.pending_frames -= 1
+
+    def stop(self):
+        """남은 기록을 모두 쓰고 session.json 작성"""
+        if self.thread is None:
+            return None
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        extra = {'dropped_frames': self.dropped_frames}
+        if self.error is not None:
+            extra['error'] = repr(self.error)     # 실패 전까지 기록된 부분은 재생 가능
+        meta = self.writer.close(extra)
+        frames = sum(meta['frames'].values())
+        events = sum(meta['events'].values())
+        print(f"[Recorder] ⏹️ 녹화 종료: {meta['duration_s']:.1f}초, 프레임 {frames}개 "
+              f"(버림 {self.dropped_frames}), 이벤트 {events}개 → {self.path}")
+        if self.error is not None:
+            print(f"[Recorder] ⚠️ 기록 실패로 중간에 멈춘 세션입니다: {self.error!r}")
+        return meta
+
+
+# ==================== 래퍼 ====================
+
+def _record(record, *args):
+    """
+    래퍼에서 녹화 호출 (실제 동작을 먼저 끝낸 뒤 호출)
+    예외가 나도 호출 쪽으로 올리지 않고 녹화만 끔 - 실패는 recorder.error / session.json으로 보고
+    """
+    try:
+        record(*args)
+    except Exception as e:
+        record.__self__._fail(e)
+
+class RecordingCamera:
+    """Picamera2 대신 넘기는 래퍼 - capture_array 결과를 녹화 (나머지 속성은 원래 카메라로 전달)"""
+
+    def __init__(self, camera, recorder, stream='csi'):
+        self.camera = camera
+        self.recorder = recorder
+        self.stream = stream
+
+    def capture_array(self, *args, **kwargs):
+        frame = self.camera.capture_array(*args, **kwargs)
+        _record(self.recorder.frame, self.stream, frame)
+        return frame
+
+    def __getattr__(self, name):
+        return getattr(self.camera, name)
+
+
+class RecordingCapture:
+    """cv2.VideoCapture 대신 넘기는 래퍼 - read()로 읽은 프레임을 녹화 (grab으로 버린 프레임은 제외)"""
+
+    def __init__(self, cap, recorder, stream='usb'):
+        self.cap = cap
+        self.recorder = recorder
+        self.stream = stream
+
+    def read(self, *args):
+        ret, frame = self.cap.read(*args)
+        if ret:
+            _record(self.recorder.frame, self.stream, frame)
+        return ret, frame
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+class RecordingQueue:
+    """tx_queue/rx_queue 래퍼 - put한 명령 / get한 수신 줄을 이벤트로 기록"""
+
+    def __init__(self, target, recorder, kind):
+        """:param kind: 'uart_tx' (put 기록) 또는 'uart_rx' (get 기록)"""
+        self.target = target
+        self.recorder = recorder
+        self.kind = kind
+
+    def put(self, item, *args, **kwargs):
+        # 명령을 먼저 넣고 기록 (녹화가 실패해도 STM32로 가는 명령은 막지 않음)
+        result = self.target.put(item, *args, **kwargs)
+        if self.kind == 'uart_tx':
+            _record(self.recorder.event, self.kind, item.strip())
+        return result
+
+    def get(self, *args, **kwargs):
+        item = self.target.get(*args, **kwargs)
+        if self.kind == 'uart_rx':
+            _record(self.recorder.event, self.kind, item)
+        return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+def tap_messenger(messenger, recorder):
+    """
+    AgvToServer의 QR 송신(mqtt_out)과 위치 수신(mqtt_in)을 기록
+    (위치 토픽은 같은 세션에 기록용 콜백으로 다시 구독 - 원래 on_message도 그대로 호출)
+    """
+    send_qr_info = messenger.send_qr_info
+    on_message = messenger.on_message
+
+    def recorded_send(qr_info):
+        send_qr_info(qr_info)
+        _record(recorder.event, 'mqtt_out', {'topic': messenger.SEND_TOPIC, 'payload': {"QR_info": qr_info}})
+
+    def recorded_message(client, userdata, msg):
+        on_message(client, userdata, msg)
+        try:
+            payload = json.loads(msg.payload.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            payload = msg.payload.decode(errors='replace')
+        _record(recorder.event, 'mqtt_in', {'topic': msg.topic, 'payload': payload})
+
+    messenger.send_qr_info = recorded_send
+    messenger.session.subscribe(messenger.RECV_TOPIC, recorded_message)
+    return messenger
+
+
+# python -m replay.recorder 명령어로 실행 (카메라만 녹화 - 라인/마커/탐지 튜닝용 세션)
+def main():
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="카메라 세션 녹화 (UART/MQTT까지 기록하려면 AgvRuntime(record_dir=...) 사용)")
+    parser.add_argument("--camera", choices=["csi", "usb"], default="csi", help="csi: Picamera2 (주행 카메라), usb: 웹캠 (탐지)")
+    parser.add_argument("--device", type=int, default=0, help="usb 카메라 장치 번호")
+    parser.add_argument("--size", type=int, nargs=2, default=[640, 480], metavar=("W", "H"))
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=60.0, help="녹화 시간 (초)")
+    parser.add_argument("--codec", choices=["jpg", "png"], default="jpg")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG 품질")
+    parser.add_argument("--output", default=None, help="세션 폴더 (기본: sessions/<시각>_<카메라>)")
+    args = parser.parse_args()
+
+    output = args.output or f"sessions/{datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.camera}"
+    recorder = SessionRecorder(output, args.codec, args.quality,
+                               meta={'camera': args.camera, 'frame_size': args.size, 'fps': args.fps})
+
+    if args.camera == 'csi':
+        from picamera2 import Picamera2
+
+        picam2 = Picamera2()
+        frame_duration = int(1e6 / args.fps)
+        picam2.configure(
+            picam2.create_video_configuration(
+                main={"format": "RGB888", "size": tuple(args.size)},
+                controls={"FrameDurationLimits": (frame_duration, frame_duration)}
+            )
+        )
+        picam2.start()
+        camera = RecordingCamera(picam2, recorder, 'csi')
+        read = camera.capture_array
+        release = picam2.stop
+    else:
+        import cv2
+
+        cap = cv2.VideoCapture(args.device)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, args.size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.size[1])
+        cap.set(cv2.CAP_PROP_FPS, args.fps)
+        if not cap.isOpened():
+            raise RuntimeError("❌ 웹캠 열기 실패")
+        camera = RecordingCapture(cap, recorder, 'usb')
+        read = lambda: camera.read()[1]
+        release = cap.release
+
+    recorder.start()
+    try:
+        while recorder.elapsed() < args.duration:
+            read()
+    except KeyboardInterrupt:
+        print("\n🔚 Ctrl+C로 녹화 종료")
+    finally:
+        release()
+        recorder.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+녹화 세션 저장소 - 청크 단위 MJPEG + 시간순 인덱스
+
+세션 폴더:
+    index.jsonl          기록 한 줄씩 (프레임 위치 / UART·MQTT 이벤트), 녹화 중 계속 추가
+    chunk_00000.mjpg     인코딩된 프레임을 이어 붙인 청크 (chunk_mb마다 새 파일)
+    session.json         세션 정보 (시작 시각, 코덱, 스트림별 프레임 수, 길이) - 녹화 종료 시 기록
+
+녹화 도중 전원이 꺼져도 index.jsonl에 남은 기록까지는 그대로 재생할 수 있음
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+SESSION_VERSION = 1
+
+# 코덱 → (청크 확장자, 인코딩 옵션)
+CODECS = {
+    'jpg': '.mjpg',     # MJPEG (작고 빠름, 손실 압축)
+    'png': '.mpng',     # PNG 이어 붙이기 (무손실, HSV 임계값 튜닝용)
+}
+
+
+def encode_params(codec, quality):
+    if codec == 'jpg':
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    return [cv2.IMWRITE_PNG_COMPRESSION, 1]
+
+
+class SessionWriter:
+    """
+    세션 폴더에 프레임/이벤트 기록 (스레드 안전하지 않음 - SessionRecorder의 기록 스레드 하나에서만 사용)
+    """
+
+    def __init__(self, path, codec='jpg', quality=90, chunk_mb=64, meta=None):
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 코덱: {codec} (사용 가능: {', '.join(CODECS)})")
+        self.path = path
+        self.codec = codec
+        self.quality = quality
+        self.chunk_bytes = int(chunk_mb * 1024 * 1024)
+        self.meta = dict(meta or {})
+        self.params = encode_params(codec, quality)
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, "index.jsonl")):
+            raise FileExistsError(f"이미 녹화된 세션입니다: {path}")
+
+        self.started_at = time.time()
+        self.index = open(os.path.join(path, "index.jsonl"), 'w', encoding='utf-8')
+        self.chunk = None
+        self.chunk_id = -1
+        self.chunk_size = 0
+        self.frame_counts = {}      # {스트림: 프레임 수}
+        self.event_counts = {}      # {이벤트 종류: 개수}
+        self.last_t = 0.0
+
+    def chunk_path(self, chunk_id):
+        return os.path.join(self.path, f"chunk_{chunk_id:05d}{CODECS[self.codec]}")
+
+    def _next_chunk(self):
+        if self.chunk is not None:
+            self.chunk.close()
+            self.index.flush()
+        self.chunk_id += 1
+        self.chunk_size = 0
+        self.chunk = open(self.chunk_path(self.chunk_id), 'wb')
+
+    def _append(self, record):
+        self.index.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self.last_t = max(self.last_t, record['t'])
+
+    def write_frame(self, stream, frame, t):
+        """
+        :param t: 세션 시작 기준 시각 (초)
+        :return: 인코딩된 크기 (바이트)
+        """
+        ok, encoded = cv2.imencode('.' + self.codec, frame, self.params)
+        if not ok:
+            raise ValueError(f"프레임 인코딩 실패 (shape={frame.shape})")
+        data = encoded.tobytes()
+        if self.chunk is None or self.chunk_size + len(data) > self.chunk_bytes:
+            self._next_chunk()
+
+        self.chunk.write(data)
+        seq = self.frame_counts.get(stream, 0)
+        self._append({'t': round(t, 6), 'kind': 'frame', 'stream': stream, 'seq': seq,
+                      'chunk': self.chunk_id, 'offset': self.chunk_size, 'size': len(data),
+                      'shape': list(frame.shape)})
+        self.chunk_size += len(data)
+        self.frame_counts[stream] = seq + 1
+        return len(data)
+
+    def write_event(self, kind, data, t):
+        """UART/MQTT 이벤트 (data는 JSON 직렬화 가능해야 함)"""
+        self._append({'t': round(t, 6), 'kind': kind, 'data': data})
+        self.event_counts[kind] = self.event_counts.get(kind, 0) + 1
+
+    def flush(self):
+        if self.chunk is not None:
+            self.chunk.flush()
+        self.index.flush()
+
+    def close(self, extra=None):
+        """청크/인덱스를 닫고 session.json 기록"""
+        if self.chunk is not None:
+            self.chunk.close()
+        self.index.close()
+
+        meta = {
+            'version': SESSION_VERSION,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+            'start_time': self.started_at,
+            'duration_s': round(self.last_t, 3),
+            'codec': self.codec,
+            'quality': self.quality,
+            'chunks': self.chunk_id + 1,
+            'frames': self.frame_counts,
+            'events': self.event_counts,
+        }
+        meta.update(self.meta)
+        meta.update(extra or {})
+        with open(os.path.join(self.path, "session.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        return meta
+
+
+class SessionReader:
+    """
+    녹화 세션 읽기 - 기록을 시간순으로 정렬해서 제공하고, 프레임은 필요할 때 청크에서 읽어 디코딩
+    session.json이 없으면 (녹화 중 종료) 인덱스만으로 세션 정보를 복원
+    """
+
+    def __init__(self, path):
+        self.path = path
+        index_path = os.path.join(path, "index.jsonl")
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"세션 인덱스가 없습니다: {index_path}")
+
+        meta_path = os.path.join(path, "session.json")
+        self.meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        self.codec = self.meta.get('codec') or self._guess_codec()
+        self.records = self._load_index(index_path)
+        self.chunks = {}            # {청크 번호: 열린 파일}
+
+    def _guess_codec(self):
+        for codec, ext in CODECS.items():
+            if os.path.exists(os.path.join(self.path, f"chunk_00000{ext}")):
+                return codec
+        return 'jpg'
+
+    def _load_index(self, index_path):
+        """인덱스 로드 (마지막 줄이 잘렸거나 청크에 다 쓰이지 못한 프레임은 제외)"""
+        chunk_sizes = {}
+        records = []
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record['kind'] == 'frame':
+                    chunk = record['chunk']
+                    if chunk not in chunk_sizes:
+                        path = self.chunk_path(chunk)
+                        chunk_sizes[chunk] = os.path.getsize(path) if os.path.exists(path) else 0
+                    if record['offset'] + record['size'] > chunk_sizes[chunk]:
+                        continue
+                records.append(record)
+        records.sort(key=lambda r: r['t'])  # 여러 스레드에서 들어온 기록은 순서가 조금 섞일 수 있음
+        return records
+
+    def chunk_path(self, chunk_id):
+        return os.path.join(self.path, f"chunk_{chunk_id:05d}{CODECS[self.codec]}")
+
+    # ==================== 조회 ====================
+
+    @property
+    def start_time(self):
+        """녹화 시작 시각 (epoch 초, 없으면 0)"""
+        return self.meta.get('start_time', 0.0)
+
+    @property
+    def duration(self):
+        return self.records[-1]['t'] if self.records else 0.0
+
+    def streams(self):
+        """{스트림: 프레임 수}"""
+        counts = {}
+        for record in self.records:
+            if record['kind'] == 'frame':
+                counts[record['stream']] = counts.get(record['stream'], 0) + 1
+        return counts
+
+    def event_kinds(self):
+        """{이벤트 종류: 개수}"""
+        counts = {}
+        for record in self.records:
+            if record['kind'] != 'frame':
+                counts[record['kind']] = counts.get(record['kind'], 0) + 1
+        return counts
+
+    def frame_records(self, stream=None):
+        return [r for r in self.records if r['kind'] == 'frame' and (stream is None or r['stream'] == stream)]
+
+    def events(self, kind=None):
+        return [r for r in self.records if r['kind'] != 'frame' and (kind is None or r['kind'] == kind)]
+
+    def read_frame(self, record):
+        """프레임 기록 → 이미지 (녹화 당시 채널 순서 그대로)"""
+        chunk = self.chunks.get(record['chunk'])
+        if chunk is None:
+            chunk = self.chunks[record['chunk']] = open(self.chunk_path(record['chunk']), 'rb')
+        chunk.seek(record['offset'])
+        data = np.frombuffer(chunk.read(record['size']), dtype=np.uint8)
+        frame = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if frame is None:
+            raise ValueError(f"프레임 디코딩 실패 (chunk {record['chunk']}, offset {record['offset']})")
+        return frame
+
+    def summary(self):
+        streams = ", ".join(f"{name} {count}프레임" for name, count in self.streams().items()) or "프레임 없음"
+        events = ", ".join(f"{kind} {count}" for kind, count in self.event_kinds().items()) or "이벤트 없음"
+        return f"{self.duration:.1f}초, {streams}, {events} ({self.codec})"
+
+    def close(self):
+        for chunk in self.chunks.values():
+            chunk.close()
+        self.chunks = {}
@@ -0,0 +1,4 @@
+from .scheduler import Scheduler, PeriodicTask
+from .agv_runtime import AgvRuntime, default_store_map
+from .user_role import UserRole
+from .manager_role import ManagerRole
@@ -0,0 +1,265 @@
+import threading
+import time
+
+from .scheduler import Scheduler
+
+# 작업 주기(초) / 우선순위 (낮을수록 먼저) / 마감 시간(초, None이면 주기) / 첫 실행 지연(초)
+RUNTIME_TASKS = {
+    'capture':  {'period': 1 / 60, 'priority': 0, 'deadline': None},
+    'tracing':  {'period': 1 / 60, 'priority': 1, 'deadline': 0.010},
+    'comms':    {'period': 1 / 50, 'priority': 2, 'deadline': 0.005},
+    'markers':  {'period': 1 / 20, 'priority': 3, 'deadline': 0.005},   # 프레임 전달만 (인식은 마커 스레드)
+    'planning': {'period': 1 / 10, 'priority': 4, 'deadline': 0.050},
+    'stats':    {'period': 10.0,   'priority': 9, 'deadline': None, 'phase': 10.0},
+}
+
+
+def default_store_map():
+    """역할의 기본 매장 맵 (maps/store_map.json 또는 환경변수 STORE_MAP - 맵 파일만 고치면 런타임에도 반영)"""
+    from vision import load_store_map
+
+    return load_store_map()
+
+
+def start_uart(port='/dev/serial0', baudrate=19200):
+    """UART 송수신 스레드 시작"""
+    from communication import UARTHandler
+
+    uart = UARTHandler(port=port, baudrate=baudrate)
+    threading.Thread(target=uart.uart_tx, daemon=True).start()
+    threading.Thread(target=uart.uart_rx, daemon=True).start()
+    return uart
+
+
+class AgvRuntime:
+    """
+    AGV 공통 런타임
+    UART/카메라/마커/MQTT/위치 추정을 한 번에 초기화하고, 이름 있는 주기 작업을 스케줄러로 실행
+    주행 방식은 역할(UserRole, ManagerRole)이 tracing/planning 작업과 위치 수신 처리로 결정
+    """
+
+    def __init__(self, role, agv_name, start_position=(6, 0), start_dir='U',
+                 marker_type='aruco', frame_size=(640, 480), frame_duration=16666, tasks=None, record_dir=None,
+                 pose_estimation=False):
+        """
+        :param role: 역할 객체 (setup/trace/on_position/plan/shutdown)
+        :param marker_type: 'aruco' 또는 'qr' (위치 마커 종류)
+        :param frame_duration: 카메라 프레임 간격 (us, 16666 = 60fps)
+        :param tasks: RUNTIME_TASKS 일부 덮어쓰기
+        :param record_dir: 세션 녹화 폴더 (카메라 프레임 + UART/MQTT 이벤트, python -m replay.player로 재생)
+        :param pose_estimation: True면 PoseEstimator로 회전 시점/완료 판단
+                                (POSE_CONFIG 속도 값을 실측 보정하기 전까지는 기본 꺼짐 - 고정 시간 기동 사용)
+        """
+        self.role = role
+        self.agv_name = agv_name
+        self.start_position = start_position
+        self.start_dir = start_dir
+        self.marker_type = marker_type
+        self.frame_size = frame_size
+        self.frame_duration = frame_duration
+        self.task_config = {name: dict(cfg, **(tasks or {}).get(name, {})) for name, cfg in RUNTIME_TASKS.items()}
+        self.record_dir = record_dir
+        self.recorder = None
+        self.pose_estimation = pose_estimation
+
+        self.scheduler = Scheduler(name=f"{agv_name} Runtime")
+        self.clock = time.time  # 역할/기동의 시간 기준 (시뮬레이터는 가상 시계로 대체)
+
+        # 최신 프레임 (capture 작업이 갱신)
+        self.frame = None
+        self.frame_stamp = None
+        self.frame_seq = 0
+        self.traced_seq = 0
+        self.pose = None
+
+        # 마커 인식 스레드 (pyzbar/ArUco 인식이 느려도 스케줄러 tick을 막지 않도록 최신 프레임만 넘김)
+        self.marker_lock = threading.Lock()
+        self.marker_event = threading.Event()
+        self.marker_stop = threading.Event()
+        self.marker_pending = None      # (프레임, 캡처 시각) - 인식 스레드가 아직 가져가지 않은 최신 프레임
+        self.marker_seq = 0
+        self.marker_dropped = 0         # 인식이 밀려서 건너뛴 프레임 수
+        self.marker_thread = None
+
+    # ==================== 초기화 ====================
+
+    def setup(self):
+        from picamera2 import Picamera2
+        from utils.buffer import tx_queue, rx_queue
+        from communication import AgvToServer
+        from line_tracer import LineTracer
+        from vision import PoseEstimator, CommandTap
+
+        # 0) 세션 녹화 (카메라/UART/MQTT를 녹화 래퍼로 감싸서 사용)
+        if self.record_dir:
+            from replay import SessionRecorder, RecordingQueue
+
+            self.recorder = SessionRecorder(self.record_dir, meta={
+                'agv_name': self.agv_name, 'marker_type': self.marker_type, 'frame_size': list(self.frame_size),
+                'start_position': list(self.start_position), 'start_dir': self.start_dir})
+            tx_queue = RecordingQueue(tx_queue, self.recorder, 'uart_tx')
+            rx_queue = RecordingQueue(rx_queue, self.recorder, 'uart_rx')
+
+        # 1) UART 송수신 스레드 시작
+        start_uart()
+        self.tx_queue = tx_queue
+
+        # 2) 카메라 설정
+        self.picam2 = Picamera2()
+        self.picam2.configure(
+            self.picam2.create_video_configuration(
+                main={"format": "RGB888", "size": self.frame_size},
+                controls={"FrameDurationLimits": (self.frame_duration, self.frame_duration)}
+            )
+        )
+        self.picam2.start()
+        if self.recorder is not None:
+            from replay import RecordingCamera
+            self.picam2 = RecordingCamera(self.picam2, self.recorder, 'csi')
+
+        # 3) 라인트레이서, 마커 리더, 관제센터 통신
+        self.tracer = LineTracer()
+        if self.marker_type == 'qr':
+            from qr import QRReader
+            self.marker_reader = QRReader()
+        else:
+            from aruco_marker import ArUcoReader
+            self.marker_reader = ArUcoReader()
+        self.agv_messenger = AgvToServer(self.agv_name)
+        if self.recorder is not None:
+            from replay import tap_messenger
+            tap_messenger(self.agv_messenger, self.recorder)
+            self.recorder.start()
+        self.agv_messenger.start()
+
+        # 4) 위치 추정기 (송신 명령은 CommandTap을 거쳐 추정기에도 전달)
+        if self.pose_estimation:
+            self.pose_estimator = PoseEstimator(*self.start_position, start_dir=self.start_dir)
+            self.motion_tx = CommandTap(tx_queue, self.pose_estimator)
+            threading.Thread(target=self.pose_estimator.consume_uart, args=(rx_queue,), daemon=True).start()
+        else:
+            self.pose_estimator = None
+            self.motion_tx = tx_queue
+
+        # 5) 역할 초기화 후 작업 등록
+        self.role.setup(self)
+        self.start_marker_worker()
+        self._add_task('capture', self.capture_task)
+        self._add_task('tracing', self.tracing_task)
+        self._add_task('comms', self.comms_task)
+        self._add_task('markers', self.markers_task)
+        self._add_task('planning', self.role.plan)
+        self._add_task('stats', self.scheduler.report)
+
+    def _add_task(self, name, func):
+        cfg = self.task_config[name]
+        self.scheduler.add_task(name, func, cfg['period'], cfg['priority'], cfg['deadline'], cfg.get('phase', 0.0))
+
+    # ==================== 주기 작업 ====================
+
+    def capture_task(self):
+        self.frame = self.picam2.capture_array()
+        self.frame_stamp = time.monotonic()
+        self.frame_seq += 1
+        if self.pose_estimator is not None:
+            self.pose = self.pose_estimator.update(self.frame_stamp)  # 프레임마다 위치 추정 갱신
+
+    def tracing_task(self):
+        """새 프레임이 있을 때만 역할의 주행 처리 (기동 tick + 라인트레이싱)"""
+        if self.frame is None or self.frame_seq == self.traced_seq:
+            return
+        self.traced_seq = self.frame_seq
+        self.role.trace(self.frame)
+
+    def comms_task(self):
+        """관제센터 위치 응답 처리"""
+        if not self.agv_messenger.received_pos:
+            return
+        x, y = self.agv_messenger.position_x, self.agv_messenger.position_y
+        self.agv_messenger.received_pos = False
+        if self.pose_estimator is not None:
+            self.pose_estimator.on_position_fix(x, y, self.agv_messenger.agv_qr)
+        self.role.on_position(x, y)
+
+    def markers_task(self):
+        """최신 프레임을 마커 인식 스레드로 넘김 (기다리지 않음 - 이전 프레임을 아직 인식 중이면 교체)"""
+        if self.frame is None or self.frame_seq == self.marker_seq:
+            return
+        self.marker_seq = self.frame_seq
+        frame = self.frame.copy()  # 인식 결과 그리기가 주행용 프레임을 바꾸지 않도록
+        with self.marker_lock:
+            if self.marker_pending is not None:
+                self.marker_dropped += 1
+            self.marker_pending = (frame, self.frame_stamp)
+        self.marker_event.set()
+
+    def start_marker_worker(self):
+        if self.marker_thread is None:
+            self.marker_stop.clear()
+            self.marker_thread = threading.Thread(target=self._marker_loop, name=f"{self.agv_name} Markers", daemon=True)
+            self.marker_thread.start()
+
+    def _marker_loop(self):
+        """위치 마커 인식 → 관제센터로 송신 (ArUco는 위치 추정 보정에도 사용)"""
+        while not self.marker_stop.is_set():
+            if not self.marker_event.wait(0.1):
+                continue
+            self.marker_event.clear()
+            with self.marker_lock:
+                pending, self.marker_pending = self.marker_pending, None
+            if pending is None:
+                continue
+
+            frame, stamp = pending
+            try:
+                for marker in self.marker_reader.scan(frame):
+                    if self.marker_type == 'qr':
+                        if marker["id"]:
+                            self.agv_messenger.send_qr_info(marker["id"])
+                        continue
+                    # 마커를 본 프레임 시각 기준으로 위치 추정 보정
+                    if self.pose_estimator is not None:
+                        self.pose_estimator.on_marker(marker, frame.shape, stamp)
+                    self.agv_messenger.send_qr_info(f"ID:{marker['id']:03d}")
+            except Exception as e:
+                print(f"[{self.agv_name}] ❌ 마커 인식 오류: {e}")
+
+    # ==================== 실행 ====================
+
+    def send(self, cmd):
+        """STM32로 주행 명령 전송 (위치 추정기에도 반영)"""
+        self.motion_tx.put(cmd + "\n")
+
+    def call_soon(self, func, *args):
+        """통신 스레드의 이벤트를 스케줄러 스레드에서 즉시 처리 (역할 상태는 스케줄러 스레드에서만 변경)"""
+        self.scheduler.call_soon(func, *args)
+
+    def set_task_enabled(self, name, enabled):
+        self.scheduler.set_enabled(name, enabled)
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def run(self):
+        self.setup()
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            print(f"\n[{self.agv_name}] 🛑 사용자 중단 요청")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        import cv2
+
+        print(f"[{self.agv_name}] 🏁 종료 중...")
+        self.tx_queue.put("S\n")
+        self.marker_stop.set()
+        try:
+            self.role.shutdown()
+        finally:
+            self.scheduler.report()
+            self.picam2.stop()
+            if self.recorder is not None:
+                self.recorder.stop()
+            cv2.destroyAllWindows()
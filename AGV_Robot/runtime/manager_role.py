@@ -0,0 +1,181 @@
+from webcam.config import SERVICE_CONFIG
+
+from .agv_runtime import default_store_map
+
+
+class ManagerRole:
+    """
+    관리자(재고 확인) AGV 역할
+    라인을 따라 주행하다 Detection 좌표에 도착하면 정지 → 매대 관찰 → 라인을 따라 벗어난 뒤 주행 재개
+    관찰/이탈 과정도 상태로 진행하므로 스케줄러(프레임 캡처, 통신)를 막지 않음
+    (시간은 runtime.clock 기준 - 시뮬레이터에서는 가상 시계)
+    """
+
+    DETECTION_TIMEOUT = 30      # 관찰 결과 최대 대기 (초)
+    EXIT_MOVES = 8              # Detection 위치를 벗어나기 위한 라인 추종 이동 횟수
+    EXIT_TRACE_TIME = 0.3       # 라인 추종 이동 간격
+    EXIT_FORWARD_TIME = 0.2     # 라인이 없을 때 안전 전진 간격
+    EXIT_SETTLE_TIME = 0.4      # 정지 후 안정화 시간
+
+    def __init__(self, grid=None, enable_detection=True):
+        """
+        :param grid: 매장 맵 (StoreMap 또는 list-of-lists, None이면 공용 맵 파일)
+        :param enable_detection: False면 주행만 수행 (탐지 모델/웹캠을 로드하지 않음)
+        """
+        self.grid = grid if grid is not None else default_store_map()
+        self.enable_detection = enable_detection
+        self.runtime = None
+
+        self.state = 'driving'              # 'driving' | 'detecting' | 'exiting' | 'settling'
+        self.last_detection_position = None # 마지막 Detection 실행 위치
+        self.detection_deadline = 0.0
+        self.exit_count = 0
+        self.next_exit_time = 0.0
+
+    def setup(self, runtime):
+        from manager import ManagerPlanner, ManagerExecutor, DetectionController, ResourceManager
+
+        print("🤖 관리자 로봇 시작!")
+        print("📋 Detection 포인트 도달 시 Detection 실행 모드")
+        print("-" * 60)
+
+        self.runtime = runtime
+        self.planner = ManagerPlanner(self.grid)
+        self.planner.set_now_position(*runtime.start_position)  # 시작 위치
+        self.executor = ManagerExecutor(
+            self.planner, runtime.motion_tx, runtime.tracer,
+            start_dir=runtime.start_dir, pose_estimator=runtime.pose_estimator, clock=runtime.clock
+        )
+        self.detection_controller = DetectionController()
+        self.resource_manager = ResourceManager()
+
+        # 탐지 모델/웹캠은 주행 시작 전에 미리 로드 (Detection 포인트에서는 관찰만 수행)
+        if self.enable_detection:
+            self.detection_controller.start_service()
+        else:
+            print("[ManagerRole] 🚗 주행 전용 모드 - Detection 비활성화")
+
+        print(f"[ManagerRole] 관리자 로봇 초기화 완료")
+        print(f"[ManagerRole] Detection 가능 좌표: {self.planner.get_detection_coordinates()}")
+
+    # ==================== 주기 작업 ====================
+
+    def trace(self, frame):
+        now = self.runtime.clock()
+        if self.state == 'exiting':
+            self._exit_step(frame, now)
+            return
+        if self.state == 'settling':
+            if now >= self.next_exit_time:
+                # 이제 라인트레이싱 재개 허용
+                self.state = 'driving'
+                print(f"[ManagerRole] 🔄 일반 주행 모드로 전환")
+            return
+        if self.state != 'driving' or not self.resource_manager.is_line_tracer_active():
+            # Detection 중이므로 주행 정지 (프레임마다 반복 - 정지 명령 하나가 유실돼도 멈춰 있도록)
+            self.runtime.send("S")
+            return
+
+        # 진행 중인 회전/정렬 기동 진행
+        maneuvering = self.executor.tick(frame)
+        direction, offset, annotated, binary, found = self.runtime.tracer.get_direction(frame)
+
+        # 실행 중인 명령이 있으면 처리
+        if self.executor.is_executing():
+            # 한 칸 전진 완료 체크
+            if self.executor.command_queue and self.executor.command_queue[0] == 'F':
+                self.executor.command_queue.pop(0)
+
+            # 회전 명령 시작 (진행은 tick에서)
+            if (not maneuvering and self.executor.command_queue and
+                self.executor.command_queue[0] in ('R90', 'L90', 'B', 'B90')):
+                self.executor.execute_next_command(frame)
+                maneuvering = self.executor.is_maneuvering()
+
+        # UART 송신 (일반 라인 추종, 기동 중에는 기동 명령이 우선)
+        if not maneuvering:
+            self.runtime.send(direction)
+
+    def plan(self):
+        """Detection 결과 확인 (완료 또는 타임아웃 시 결과 처리 후 이탈 시작)"""
+        if self.state != 'detecting':
+            return
+        if not self.detection_controller.is_detection_complete() and self.runtime.clock() < self.detection_deadline:
+            return
+
+        detection_results = self.detection_controller.finish_detection_cycle()
+        if detection_results:
+            print(f"[ManagerRole] ✅ Detection 완료!")
+            print(f"[ManagerRole] 📊 결과: {detection_results['count_summary']}")
+        else:
+            print(f"[ManagerRole] ❌ Detection 실패 또는 타임아웃")
+        self._start_exit()
+
+    def on_position(self, x, y):
+        print(f"[ManagerRole] 🎯 위치 수신됨! ({x}, {y})")
+        self.planner.set_now_position(x, y)
+        current_position = [x, y]
+
+        # Detection 위치 도달 체크 (이전에 실행하지 않은 위치에서만)
+        if (self.enable_detection and
+            self.planner.is_detection_point(x, y) and
+            self.state == 'driving' and
+            current_position != self.last_detection_position):
+            self._start_detection(current_position)
+
+    # ==================== Detection / 이탈 ====================
+
+    def _start_detection(self, position):
+        print(f"[ManagerRole] 🎯 새로운 Detection 위치 도달: {position}")
+        self.state = 'detecting'
+        self.last_detection_position = list(position)
+
+        # 자원 절약을 위한 준비
+        self.resource_manager.prepare_for_detection(self.runtime.picam2)
+        self.executor.stop_execution()  # 현재 실행 중인 명령 중지
+
+        print(f"[ManagerRole] 🔍 Detection 시작...")
+        self.detection_deadline = self.runtime.clock() + self.DETECTION_TIMEOUT
+        if not self.detection_controller.is_service_ready():
+            # 모델/웹캠이 아직 준비 중이면 요청만 넣고 준비 시간만큼 더 기다림 (plan에서 완료 확인)
+            print(f"[ManagerRole] ⏳ 탐지 서비스 준비 중 - 준비되는 대로 관찰")
+            self.detection_deadline += SERVICE_CONFIG['ready_timeout']
+        if not self.detection_controller.start_detection(shelf_id=tuple(position), wait=False):
+            print(f"[ManagerRole] ❌ Detection 시작 실패")
+            self._start_exit()
+
+    def _start_exit(self):
+        # 자원 복원 (안정화 대기는 이탈 시작을 늦추는 것으로 대신함)
+        self.resource_manager.restore_after_detection(self.runtime.picam2, wait=False)
+
+        # 🔥 Detection 완료 후 라인을 따라가면서 조금씩 이동
+        print(f"[ManagerRole] 🚗 Detection 위치에서 라인을 따라 벗어나기...")
+        self.state = 'exiting'
+        self.exit_count = 0
+        self.next_exit_time = self.runtime.clock() + self.resource_manager.RESTORE_SETTLE_TIME
+
+    def _exit_step(self, frame, now):
+        if now < self.next_exit_time:
+            return
+
+        if self.exit_count >= self.EXIT_MOVES:
+            self.runtime.send("S")  # 정지
+            self.state = 'settling'
+            self.next_exit_time = now + self.EXIT_SETTLE_TIME
+            return
+
+        direction, offset, _, _, found = self.runtime.tracer.get_direction(frame)
+        self.exit_count += 1
+        if found and direction in ['F', 'L', 'R']:
+            # 라인을 따라 이동
+            self.runtime.send(direction)
+            self.next_exit_time = now + self.EXIT_TRACE_TIME
+            print(f"[ManagerRole] 라인 추종 이동 {self.exit_count}/{self.EXIT_MOVES} - 방향: {direction}")
+        else:
+            # 라인이 없으면 조금만 전진
+            self.runtime.send("F")
+            self.next_exit_time = now + self.EXIT_FORWARD_TIME
+            print(f"[ManagerRole] 안전 전진 {self.exit_count}/{self.EXIT_MOVES}")
+
+    def shutdown(self):
+        self.detection_controller.shutdown()
@@ -0,0 +1,165 @@
+import collections
+import threading
+import time
+
+
+class PeriodicTask:
+    """
+    스케줄러 주기 작업
+    - period: 실행 주기 (초), priority: 같은 시점에 실행할 때 낮은 값이 먼저
+    - deadline: 한 번 실행에 허용되는 시간 (넘으면 overrun으로 기록, 기본값 = period)
+    - phase: 스케줄러 시작 후 첫 실행까지의 지연 (초)
+    """
+
+    def __init__(self, name, func, period, priority=0, deadline=None, phase=0.0):
+        if period <= 0:
+            raise ValueError(f"{name}: period는 0보다 커야 합니다")
+        self.name = name
+        self.func = func
+        self.period = period
+        self.priority = priority
+        self.deadline = deadline if deadline is not None else period
+        self.phase = phase
+        self.enabled = True
+        self.next_run = None
+
+        # 통계
+        self.runs = 0
+        self.overruns = 0       # 실행 시간이 deadline을 넘은 횟수
+        self.skipped = 0        # 밀려서 건너뛴 주기 수
+        self.errors = 0
+        self.jitter_sum = 0.0   # 예정 시각 대비 시작 지연
+        self.jitter_max = 0.0
+        self.exec_sum = 0.0
+        self.exec_max = 0.0
+
+    def record(self, scheduled, started, finished):
+        jitter = started - scheduled
+        exec_time = finished - started
+        self.runs += 1
+        self.jitter_sum += jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+        self.exec_sum += exec_time
+        self.exec_max = max(self.exec_max, exec_time)
+        if exec_time > self.deadline:
+            self.overruns += 1
+
+        # 다음 예정 시각 (밀린 주기는 한 번에 따라잡지 않고 건너뜀)
+        missed = int((finished - scheduled) // self.period)
+        self.skipped += missed
+        self.next_run = scheduled + (missed + 1) * self.period
+
+    def stats(self):
+        runs = max(self.runs, 1)
+        return {
+            'period_ms': round(self.period * 1000, 2),
+            'priority': self.priority,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'jitter_ms_mean': round(self.jitter_sum / runs * 1000, 3),
+            'jitter_ms_max': round(self.jitter_max * 1000, 3),
+            'exec_ms_mean': round(self.exec_sum / runs * 1000, 3),
+            'exec_ms_max': round(self.exec_max * 1000, 3),
+        }
+
+
+class Scheduler:
+    """
+    단일 스레드 협조형 tick 스케줄러
+    예정 시각이 된 작업을 우선순위 순으로 실행하고, 다음 예정 시각까지는 Event.wait로 잠듦 (busy-wait 없음)
+    """
+
+    def __init__(self, name="Scheduler"):
+        self.name = name
+        self.tasks = []
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()     # call_soon 또는 stop 시 대기 중인 루프를 깨움
+        self.callbacks = collections.deque()    # 다른 스레드가 요청한 1회성 작업
+
+    def add_task(self, name, func, period, priority=0, deadline=None, phase=0.0):
+        task = PeriodicTask(name, func, period, priority, deadline, phase)
+        self.tasks.append(task)
+        return task
+
+    def get_task(self, name):
+        for task in self.tasks:
+            if task.name == name:
+                return task
+        return None
+
+    def set_enabled(self, name, enabled):
+        task = self.get_task(name)
+        if task is not None:
+            task.enabled = enabled
+
+    def call_soon(self, func, *args):
+        """다른 스레드(통신 수신 등)에서 호출 - 스케줄러 스레드에서 가능한 빨리 func(*args) 실행"""
+        self.callbacks.append((func, args))
+        self.wake_event.set()
+
+    def _run_callbacks(self):
+        while self.callbacks and not self.stop_event.is_set():
+            func, args = self.callbacks.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"[{self.name}] ❌ 콜백 오류: {e}")
+
+    def run_once(self, now=None):
+        """
+        예정 시각이 지난 작업 실행
+        :return: 가장 가까운 다음 예정 시각 (time.monotonic 기준)
+        """
+        now = time.monotonic() if now is None else now
+        for task in self.tasks:
+            if task.next_run is None:
+                task.next_run = now + task.phase
+
+        due = sorted(
+            (task for task in self.tasks if task.enabled and task.next_run <= now),
+            key=lambda task: (task.priority, task.next_run)
+        )
+        for task in due:
+            if self.stop_event.is_set():
+                break
+            started = time.monotonic()
+            try:
+                task.func()
+            except Exception as e:
+                task.errors += 1
+                print(f"[{self.name}] ❌ 작업 '{task.name}' 오류: {e}")
+            task.record(task.next_run, started, time.monotonic())
+            self._run_callbacks()  # 긴 작업 사이에도 이벤트 반응 지연을 줄임
+
+        enabled = [task.next_run for task in self.tasks if task.enabled]
+        return min(enabled) if enabled else time.monotonic() + 0.1
+
+    def run(self):
+        """stop()이 호출될 때까지 실행"""
+        self.stop_event.clear()
+        print(f"[{self.name}] ▶️ 스케줄러 시작 (작업 {len(self.tasks)}개)")
+        while not self.stop_event.is_set():
+            self.wake_event.clear()
+            self._run_callbacks()
+            next_run = self.run_once()
+            wait = next_run - time.monotonic()
+            if wait > 0 and not self.callbacks:
+                self.wake_event.wait(wait)
+        print(f"[{self.name}] ⏹️ 스케줄러 종료")
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def stats(self):
+        return {task.name: task.stats() for task in self.tasks}
+
+    def report(self):
+        """작업별 지터/오버런 통계 출력"""
+        print(f"[{self.name}] 📊 작업 통계")
+        for name, s in self.stats().items():
+            print(f"  {name:<10} runs={s['runs']:<6} overrun={s['overruns']:<4} skip={s['skipped']:<4} "
+                  f"jitter(mean/max)={s['jitter_ms_mean']:.2f}/{s['jitter_ms_max']:.2f}ms "
+                  f"exec(mean/max)={s['exec_ms_mean']:.2f}/{s['exec_ms_max']:.2f}ms")
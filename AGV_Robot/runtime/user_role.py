@@ -0,0 +1,147 @@
+from .agv_runtime import default_store_map
+
+
+class UserRole:
+    """
+    사용자(쇼핑) AGV 역할
+    - 컨트롤러 사용 시: 장바구니 수신 → 상품 위치마다 정지 → 사용자 이동 요청(move_flag) 후 다음 상품으로
+      (수신 이벤트 콜백으로 반응하므로 폴링 주기만큼 기다리지 않음)
+    - 컨트롤러 없이: 고정 쇼핑 리스트를 순서대로 주행 (테스트용)
+    """
+
+    def __init__(self, grid=None, shopping_list=None, use_controller=True, exit_position=(5, 6)):
+        """
+        :param grid: 매장 맵 (StoreMap 또는 list-of-lists, None이면 공용 맵 파일)
+        :param shopping_list: 컨트롤러 없이 주행할 때의 쇼핑 리스트
+        :param exit_position: 장바구니 마지막에 추가할 계산대 위치
+        """
+        self.grid = grid if grid is not None else default_store_map()
+        self.initial_shopping_list = shopping_list or []
+        self.use_controller = use_controller
+        self.exit_position = list(exit_position) if exit_position else None
+
+        self.runtime = None
+        self.controller = None
+        self.state = 'driving'          # 'waiting_cart' | 'driving' | 'shopping'
+        self.pending_position = None    # 쇼핑 중 정지한 위치 (이동 요청 후 경로 계속)
+
+    def setup(self, runtime):
+        from vision import PathExecutor, PathPlanner
+
+        self.runtime = runtime
+        self.planner = PathPlanner(self.grid)
+        self.planner.set_now_position(*runtime.start_position)
+        self.executor = PathExecutor(
+            self.planner, runtime.motion_tx, runtime.tracer,
+            start_dir=runtime.start_dir, pose_estimator=runtime.pose_estimator, clock=runtime.clock
+        )
+
+        if self.use_controller:
+            import threading
+            from communication import AgvToControll
+
+            self.controller = AgvToControll(runtime.agv_name)
+            self.controller.on_cart_received(lambda cart: runtime.call_soon(self._on_cart))
+            self.controller.on_move_requested(lambda: runtime.call_soon(self._on_move))
+            threading.Thread(target=self.controller.start, daemon=True).start()
+            self.state = 'waiting_cart'
+            print(f"[UserRole] 🛒 장바구니 수신 대기")
+        else:
+            self.planner.set_shopping_list([list(item) for item in self.initial_shopping_list])
+
+    # ==================== 주기 작업 ====================
+
+    def trace(self, frame):
+        """기동 진행 + 라인트레이싱 (장바구니 대기/쇼핑 중에는 정지 상태 유지)"""
+        if self.state != 'driving':
+            return
+        maneuvering = self.executor.tick(frame)
+        direction, offset, annotated, binary, found = self.runtime.tracer.get_direction(frame)
+        if not maneuvering:
+            self.runtime.send(direction)
+
+    def plan(self):
+        """수신 이벤트 놓침 대비 확인 (평소에는 콜백이 먼저 처리)"""
+        if self.controller is None:
+            return
+        if self.state == 'waiting_cart' and self.controller.cart_received.is_set():
+            self._on_cart()
+        elif self.state == 'shopping' and self.controller.move_requested.is_set():
+            self._on_move()
+
+    # ==================== 컨트롤러 이벤트 (스케줄러 스레드에서 실행) ====================
+
+    def _on_cart(self):
+        if self.state != 'waiting_cart':
+            return
+        print("[UserRole] 장바구니 확인 :", self.controller.shopping_list)
+        shopping_list = list(self.controller.shopping_list)
+        if self.exit_position:
+            shopping_list.append(self.exit_position)
+        # 경로를 검색하기전에 쇼핑리스트를 받아와야함
+        self.planner.set_shopping_list(shopping_list)
+        self.state = 'driving'
+
+    def _on_move(self):
+        if self.state != 'shopping':
+            return  # 상품 위치 도착 전 요청은 도착 시 지워짐
+        self.controller.clear_move_request()
+        print("[UserRole] 🚶 이동 요청 수신 - 다음 상품으로 출발")
+        self.state = 'driving'
+        self._continue_route(*self.pending_position)
+
+    def on_position(self, x, y):
+        """QR/마커 위치 수신 시 경로 갱신"""
+        if self.state == 'waiting_cart':
+            return
+        if self.state == 'shopping':
+            # 상품 위치에 정지한 동안 같은 마커를 다시 읽어도 (쿨다운 만료 후 재응답) 사용자 이동 요청 전에는 출발하지 않음
+            return
+        print(f"[UserRole] 현재 위치로 설정: {x}, {y}")
+        self.planner.set_now_position(x, y)
+
+        # 👉 QR 도착(위치수신)시에만 shopping_list에서 pop!
+        if [x, y] in self.planner.shopping_list:
+            self.planner.shopping_list.remove([x, y])
+            print(f"[UserRole] {x}, {y} 좌표 쇼핑리스트에서 제거")
+            if self.controller is not None:
+                # 상품 위치에서 정지하고 사용자가 이동을 요청할 때까지 대기
+                self.runtime.send("S")
+                self.controller.set_position(x, y, self.planner.next_pos_x, self.planner.next_pos_y)
+                self.controller.clear_move_request()
+                self.pending_position = (x, y)
+                self.state = 'shopping'
+                return
+
+        self._continue_route(x, y)
+
+    def _continue_route(self, x, y):
+        frame = self.runtime.frame
+        self.executor.plan_new_path(frame)
+
+        # 컨트롤러에 현재위치 (x, y)와 목표위치 (t_x, t_y)를 송신함
+        if self.controller is not None:
+            self.controller.set_position(x, y, self.planner.next_pos_x, self.planner.next_pos_y)
+
+        # 한 칸 전진 완료(F pop)
+        if self.executor.command_queue and self.executor.command_queue[0] == 'F':
+            if len(self.executor.command_queue) == 1:
+                self.executor.command_queue.pop(0)
+
+        # 회전류 명령(도착 후) 바로 시작 (진행은 trace의 tick에서)
+        if self.executor.command_queue and self.executor.command_queue[0] in ('R90', 'L90', 'B', 'B90'):
+            self.executor.execute_next_command(frame)
+
+        # 경로 완료 시, 새 경로 계획
+        if not self.executor.command_queue:
+            self.executor.plan_new_path(frame)
+
+        # 모든 목표를 다 돈 경우 완전 정지!
+        if not self.planner.get_shopping_list() and not self.executor.command_queue:
+            print("[UserRole] 모든 목표 완료! RC카 정지")
+            self.runtime.send("S")
+            self.runtime.stop()
+
+    def shutdown(self):
+        if self.controller is not None:
+            self.controller.close()
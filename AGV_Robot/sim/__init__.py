@@ -0,0 +1,4 @@
+from .world import SimWorld, SIM_TIMINGS
+from .fakes import FakeUart, FakeCamera, FakeLineTracer, GridMarkerSource
+from .layouts import random_store_layout, random_shopping_list
+from .sim_runtime import SimRuntime, run_user_mission
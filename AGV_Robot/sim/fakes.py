@@ -0,0 +1,91 @@
+from collections import deque, namedtuple
+
+# 가짜 카메라 프레임: 실제 이미지 대신 촬영 시점의 로봇 상태
+SimFrame = namedtuple('SimFrame', ['seq', 'stamp', 'x', 'y', 'dir'])
+
+
+class FakeUart:
+    """
+    UARTHandler/tx_queue 대신 사용하는 가짜 UART
+    - put(msg): 송신 명령을 기록하고 SimWorld에 바로 전달 (executor/CommandTap의 uart 자리에 사용)
+    - rx: SimWorld가 만든 ENC/IMU 줄 (실제 rx_queue처럼 오래된 줄은 버려짐)
+    """
+
+    def __init__(self, world, rx_size=5, record=True):
+        self.world = world
+        self.rx = deque(maxlen=rx_size)
+        self.sent = [] if record else None
+
+    def put(self, msg):
+        if self.sent is not None:
+            self.sent.append((self.world.now, msg.strip()))
+        self.world.command(msg)
+
+    def feed_sensors(self):
+        self.rx.extend(self.world.sensor_line())
+
+    def get_nowait(self):
+        return self.rx.popleft()
+
+
+class FakeCamera:
+    """Picamera2 대신 사용하는 가짜 카메라 (source가 있으면 source(world) 결과를 프레임으로)"""
+
+    def __init__(self, world, source=None):
+        self.world = world
+        self.source = source
+        self.seq = 0
+
+    def capture_array(self):
+        self.seq += 1
+        if self.source is not None:
+            return self.source(self.world)
+        w = self.world
+        return SimFrame(self.seq, w.now, w.x, w.y, w.dir)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class FakeLineTracer:
+    """LineTracer 대신 사용 - 라인 추종이 완벽하다고 가정하고 항상 중앙('F')으로 응답"""
+
+    def get_direction(self, frame):
+        return 'F', 0, frame, None, True
+
+
+class GridMarkerSource:
+    """
+    SimWorld의 마커 인식 셀을 관제센터 위치 응답처럼 지연 후 전달
+    (실제: 마커 인식 → MQTT로 QR 송신 → 관제센터가 좌표 응답)
+    """
+
+    def __init__(self, world, latency=None, drop_every=0):
+        """
+        :param latency: 인식 → 위치 응답 지연 (초, 기본값은 timings['fix_latency'])
+        :param drop_every: N번째 인식마다 하나씩 놓침 (0이면 놓치지 않음, 인식 실패 재현용)
+        """
+        self.world = world
+        self.latency = world.timings['fix_latency'] if latency is None else latency
+        self.drop_every = drop_every
+        self.pending = deque()      # (전달 시각, (x, y))
+        self.seen = 0
+        self.dropped = 0
+
+    def observe(self, cells):
+        for cell in cells:
+            self.seen += 1
+            if self.drop_every and self.seen % self.drop_every == 0:
+                self.dropped += 1
+                continue
+            self.pending.append((self.world.now + self.latency, cell))
+
+    def poll(self):
+        """전달 시각이 된 위치 응답 리스트"""
+        fixes = []
+        while self.pending and self.pending[0][0] <= self.world.now:
+            fixes.append(self.pending.popleft()[1])
+        return fixes
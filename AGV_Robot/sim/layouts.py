@@ -0,0 +1,39 @@
+import random
+
+
+def random_store_layout(rows, cols, seed=0, max_shelf_len=6):
+    """
+    실제 매장(maps/store_map.json)처럼 통로 행과 매대 행이 번갈아 있는 임의 맵 (0: 이동 가능, 1: 매대)
+    짝수 행, 첫/마지막 열, 마지막 행은 항상 통로이므로 모든 통로 셀이 연결됨
+    """
+    rng = random.Random(seed)
+    grid = [[0] * cols for _ in range(rows)]
+    for x in range(1, rows - 1, 2):
+        y = 1
+        while y < cols - 1:
+            length = rng.randint(1, max_shelf_len)
+            for yy in range(y, min(y + length, cols - 1)):
+                grid[x][yy] = 1
+            y += length + rng.randint(1, 2)  # 매대 사이 교차 통로
+    return grid
+
+
+def shelf_front_cells(grid):
+    """매대와 맞닿은 통로 셀 (상품 위치 후보)"""
+    rows, cols = len(grid), len(grid[0])
+    cells = []
+    for x in range(rows):
+        for y in range(cols):
+            if grid[x][y] != 0:
+                continue
+            if any(0 <= x + dx < rows and 0 <= y + dy < cols and grid[x + dx][y + dy] == 1
+                   for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))):
+                cells.append([x, y])
+    return cells
+
+
+def random_shopping_list(grid, count, seed=0, exclude=()):
+    """매대 앞 셀 중 중복 없이 count개 선택"""
+    rng = random.Random(seed)
+    candidates = [cell for cell in shelf_front_cells(grid) if tuple(cell) not in {tuple(e) for e in exclude}]
+    return rng.sample(candidates, min(count, len(candidates)))
@@ -0,0 +1,146 @@
+import contextlib
+import io
+import time
+from collections import deque
+
+from .world import SimWorld
+from .fakes import FakeUart, FakeCamera, FakeLineTracer, GridMarkerSource
+
+
+class SimRuntime:
+    """
+    AgvRuntime 대신 역할(UserRole 등)을 실행하는 헤드리스 런타임
+    카메라/UART/마커를 가짜 소스로 바꾸고, 가상 시계로 고정 간격(dt) 이산 시뮬레이션
+    역할 코드(PathPlanner, PathExecutor, ManeuverRunner)는 실제 주행과 같은 코드를 그대로 사용
+    """
+
+    def __init__(self, role, grid, start_position=(6, 0), start_dir='U', timings=None,
+                 frame_period=1 / 60, plan_period=0.1, agv_name="simAGV",
+                 uart=None, camera=None, markers=None):
+        """
+        :param timings: SIM_TIMINGS 일부 덮어쓰기 (이동 속도/펌웨어 동작 시간)
+        :param frame_period: 프레임(tracing) 간격 = 시뮬레이션 dt (초)
+        :param uart, camera, markers: 가짜 소스 교체 (None이면 기본 FakeUart/FakeCamera/GridMarkerSource)
+        """
+        self.role = role
+        self.agv_name = agv_name
+        self.start_position = tuple(start_position)
+        self.start_dir = start_dir
+        self.frame_period = frame_period
+        self.plan_period = plan_period
+
+        self.world = SimWorld(grid, start_position, start_dir, timings)
+        self.motion_tx = uart or FakeUart(self.world)
+        self.picam2 = camera or FakeCamera(self.world)
+        self.markers = markers or GridMarkerSource(self.world)
+        self.tracer = FakeLineTracer()
+        self.pose_estimator = None      # 고정 시간 기동 기준선 (추정기 비교는 별도로)
+        self.clock = lambda: self.world.now
+
+        self.frame = None
+        self.callbacks = deque()
+        self.running = False
+        self.finished = False           # 역할이 stop()으로 임무 완료를 알림
+
+        # 통계
+        self.plan_times = []            # 위치 수신 처리(경로 재계획 포함) 실제 소요 시간 (초)
+        self.fixes = []                 # (가상 시각, (x, y))
+
+    # ==================== AgvRuntime 호환 ====================
+
+    def send(self, cmd):
+        self.motion_tx.put(cmd + "\n")
+
+    def call_soon(self, func, *args):
+        self.callbacks.append((func, args))
+
+    def set_task_enabled(self, name, enabled):
+        pass
+
+    def stop(self):
+        self.running = False
+        self.finished = True
+
+    # ==================== 실행 ====================
+
+    def run(self, max_time=1800.0, stall_time=60.0, quiet=True):
+        """
+        임무가 끝나거나 (역할이 stop 호출), 충돌/정체/시간 초과까지 실행
+        :param stall_time: 이 시간(가상 초) 동안 새 위치를 받지 못하면 실패로 종료
+        :param quiet: 역할/플래너 print 출력 숨김
+        :return: result() 통계
+        """
+        out = io.StringIO() if quiet else None
+        wall_start = time.perf_counter()
+        with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+            self._run(max_time, stall_time)
+        self.wall_time = time.perf_counter() - wall_start
+        return self.result()
+
+    def _run(self, max_time, stall_time):
+        world = self.world
+        self.role.setup(self)
+        self.running = True  # 실제처럼 첫 마커를 읽을 때까지는 라인을 따라 전진하며 위치를 모름
+
+        next_plan = 0.0
+        next_sensor = 0.0
+        last_fix = 0.0
+        while self.running and world.now < max_time:
+            self.markers.observe(world.step(self.frame_period))
+            if world.now >= next_sensor and hasattr(self.motion_tx, 'feed_sensors'):
+                self.motion_tx.feed_sensors()
+                next_sensor += world.timings['sensor_period']
+
+            # comms: 위치 응답 처리 (경로 재계획 시간 측정)
+            for x, y in self.markers.poll():
+                self.fixes.append((world.now, (x, y)))
+                last_fix = world.now
+                started = time.perf_counter()
+                self.role.on_position(x, y)
+                self.plan_times.append(time.perf_counter() - started)
+            while self.callbacks:
+                func, args = self.callbacks.popleft()
+                func(*args)
+            if not self.running:
+                break
+
+            # capture + tracing
+            self.frame = self.picam2.capture_array()
+            self.role.trace(self.frame)
+
+            # planning
+            if world.now >= next_plan:
+                self.role.plan()
+                next_plan += self.plan_period
+
+            if world.collisions or world.now - last_fix > stall_time:
+                break
+
+    def result(self):
+        world = self.world
+        plan_ms = [t * 1000 for t in self.plan_times] or [0.0]
+        offsets = world.turn_offsets or [0.0]
+        return {
+            'completed': self.finished,
+            'mission_time_s': round(world.now, 2),
+            'distance_cells': round(world.distance, 2),
+            'cells_visited': len(self.fixes),
+            'turns': world.turns,
+            'turn_offset_mean': round(sum(offsets) / len(offsets), 3),
+            'turn_offset_max': round(max(offsets), 3),
+            'collisions': world.collisions,
+            'commands': world.commands,
+            'plan_ms_mean': round(sum(plan_ms) / len(plan_ms), 3),
+            'plan_ms_max': round(max(plan_ms), 3),
+            'wall_s': round(getattr(self, 'wall_time', 0.0), 3),
+        }
+
+
+def run_user_mission(grid, shopping_list, start_position=(6, 0), start_dir='U',
+                     timings=None, max_time=1800.0, quiet=True):
+    """컨트롤러 없는 UserRole로 쇼핑 리스트를 순서대로 주행하고 통계 반환"""
+    from runtime.user_role import UserRole
+
+    role = UserRole(grid, shopping_list=shopping_list, use_controller=False)
+    sim = SimRuntime(role, grid, start_position, start_dir, timings)
+    return sim.run(max_time=max_time, quiet=quiet)
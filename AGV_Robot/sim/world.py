@@ -0,0 +1,204 @@
+import math
+
+# STM32 펌웨어(stm_controller/App/ap.c) 동작을 따르는 이동 모델 시간/속도
+# 좌표는 planner와 같은 격자 좌표 (x=행, y=열, 셀 단위 연속값)
+SIM_TIMINGS = {
+    'forward_speed': 0.45,          # 'F' / 'L' / 'R' 라인 추종 전진 속도 (셀/초)
+    'backward_speed': 0.45,         # 'B' 후진 속도 (셀/초) - 펌웨어의 'B'는 제자리 반전이 아닌 후진 (반전은 R180)
+    'turn_forward_time': 1.8,       # L90/R90: 먼저 저속 전진하는 시간 (펌웨어 HAL_Delay(1800))
+    'turn_forward_speed': 0.2,      # L90/R90 저속 전진 속도 (셀/초, Set_Speed(30))
+    'turn_rotate_time': 1.45,       # L90/R90 제자리 회전 시간 (펌웨어 HAL_Delay(1450))
+    'reverse_stop_time': 0.1,       # R180: 회전 전 정지 시간 (펌웨어 HAL_Delay(100))
+    'reverse_rotate_time': 2.9,     # R180 회전 시간 (펌웨어 HAL_Delay(2900))
+    'marker_lead': 0.35,            # 카메라가 셀 중심보다 이 거리(셀) 앞에서 마커를 읽음
+    'fix_latency': 0.05,            # 마커 인식 → 관제센터 위치 응답까지 지연 (초)
+    'sensor_period': 0.02,          # ENC/IMU 줄 송신 주기 (초)
+    'ticks_per_cell': 1200,         # 엔코더 틱 / 셀 (PoseEstimator와 동일)
+}
+
+DIRS = ['U', 'R', 'D', 'L']
+DIR_VECTOR = {'U': (-1, 0), 'R': (0, 1), 'D': (1, 0), 'L': (0, -1)}
+
+
+class SimWorld:
+    """
+    격자 매장의 이산 시간 로봇 모델
+    - 로봇은 라인(격자선) 위에서만 움직이고, 라인 추종은 완벽하다고 가정
+    - L90/R90/R180은 펌웨어처럼 블로킹 복합 동작 (그동안 들어온 명령은 마지막 것만 끝난 뒤 적용)
+    - 셀 중심 부근을 지나면 마커 인식 이벤트 발생, 매대/맵 밖으로 들어가면 충돌로 정지
+    """
+
+    def __init__(self, grid, start=(6, 0), start_dir='U', timings=None):
+        self.grid = grid
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.timings = dict(SIM_TIMINGS, **(timings or {}))
+
+        self.x, self.y = float(start[0]), float(start[1])
+        self.dir = start_dir
+        self.motion = 'S'           # 현재 연속 동작 ('F', 'B', 'S')
+        self.composite = None       # 진행 중인 복합 동작 [(동작, 남은 시간, 회전 방향), ...]
+        self.pending_cmd = None     # 복합 동작 중 수신한 마지막 명령
+        self.now = 0.0
+
+        # 통계
+        self.distance = 0.0         # 이동 거리 (셀)
+        self.turns = 0              # 완료한 90도 회전 수 (반전은 2회)
+        self.turn_offsets = []      # 회전 시작 시 셀 중심에서 벗어난 거리 (셀)
+        self.collisions = 0
+        self.commands = 0
+
+        # 센서 (엔코더 누적 틱, IMU yaw)
+        self.ticks = [0, 0]
+        self.yaw = 0.0
+
+    # ==================== 명령 ====================
+
+    def command(self, cmd):
+        """STM32가 받은 명령 한 줄 반영 (개행 제거된 문자열)"""
+        cmd = cmd.strip()
+        if not cmd:
+            return
+        self.commands += 1
+        if self.composite:
+            self.pending_cmd = cmd  # 펌웨어는 복합 동작이 끝난 뒤 마지막 수신 명령만 처리
+            return
+        self._apply(cmd)
+
+    def _apply(self, cmd):
+        if cmd in ('F', 'L', 'R'):
+            self.motion = 'F'       # L/R은 라인 중심 보정 - 완벽한 라인 추종 가정에서는 전진과 같음
+        elif cmd == 'R180':
+            self.motion = 'S'
+            self.composite = [('stop', self.timings['reverse_stop_time'], 0),
+                              ('rotate', self.timings['reverse_rotate_time'], 2)]
+        elif cmd == 'B':
+            self.motion = 'B'
+        elif cmd in ('L90', 'R90'):
+            turn = -1 if cmd == 'L90' else 1
+            self.motion = 'S'
+            self.composite = [('advance', self.timings['turn_forward_time'], 0),
+                              ('rotate', self.timings['turn_rotate_time'], turn)]
+        else:
+            self.motion = 'S'
+
+    # ==================== 시뮬레이션 ====================
+
+    def is_blocked(self, x, y):
+        return not (0 <= x < self.rows and 0 <= y < self.cols) or self.grid[x][y] != 0
+
+    @property
+    def cell(self):
+        return int(round(self.x)), int(round(self.y))
+
+    @property
+    def heading(self):
+        return DIRS.index(self.dir) * 90.0
+
+    def step(self, dt):
+        """
+        dt초 진행
+        :return: 이번 스텝에 인식한 마커 셀 리스트 [(x, y), ...]
+        """
+        self.now += dt
+        if self.collisions:
+            return []
+
+        if self.composite:
+            return self._step_composite(dt)
+        if self.motion == 'F':
+            return self._move(self.timings['forward_speed'] * dt)
+        if self.motion == 'B':
+            return self._move(-self.timings['backward_speed'] * dt)
+        return []
+
+    def _step_composite(self, dt):
+        sightings = []
+        while dt > 0 and self.composite:
+            phase, remaining, turn = self.composite[0]
+            used = min(dt, remaining)
+            if phase == 'advance':
+                sightings += self._move(self.timings['turn_forward_speed'] * used)
+            elif phase == 'rotate':
+                # 회전은 시간 비율만큼 yaw만 변화, 완료 시 방향 확정
+                rotate_time = self.timings['reverse_rotate_time'] if abs(turn) == 2 else self.timings['turn_rotate_time']
+                self.yaw = (self.yaw + turn * 90.0 * used / rotate_time) % 360.0
+            dt -= used
+            remaining -= used
+            if remaining > 1e-9:
+                self.composite[0] = (phase, remaining, turn)
+                break
+
+            self.composite.pop(0)
+            if phase == 'rotate':
+                self._finish_turn(turn)
+            if self.collisions:
+                self.composite = None
+                break
+
+        if not self.composite:
+            self.composite = None
+            if self.pending_cmd is not None:
+                cmd, self.pending_cmd = self.pending_cmd, None
+                self._apply(cmd)
+        return sightings
+
+    def _finish_turn(self, turn):
+        # 셀 중심이 아닌 곳에서 회전했다면 새 라인으로 다시 붙는다고 가정 (벗어난 거리는 기록)
+        offset = math.hypot(self.x - round(self.x), self.y - round(self.y))
+        self.turn_offsets.append(offset)
+        self.x, self.y = float(round(self.x)), float(round(self.y))
+        self.dir = DIRS[(DIRS.index(self.dir) + turn) % 4]
+        self.yaw = self.heading
+        self.turns += abs(turn)
+
+    def _move(self, distance):
+        """현재 방향 축을 따라 distance만큼 이동 (음수면 후진), 지나친 마커 셀 반환"""
+        if distance == 0:
+            return []
+        dx, dy = DIR_VECTOR[self.dir]
+        axis_is_x = dx != 0
+        sign = dx if axis_is_x else dy              # 전방이 축 증가 방향이면 +1
+        start = self.x if axis_is_x else self.y
+        end = start + sign * distance
+
+        # 로봇 중심이 셀 경계(k ± 0.5)를 넘어 매대/맵 밖으로 들어가면 충돌
+        lo, hi = sorted((start, end))
+        boundaries = range(math.floor(lo + 0.5), math.floor(hi + 0.5) + 1)
+        for k in (boundaries if end > start else reversed(boundaries)):  # 이동 순서대로 확인
+            boundary = k - 0.5
+            if lo < boundary <= hi:
+                cell_index = k if end > start else k - 1
+                cx, cy = (cell_index, int(round(self.y))) if axis_is_x else (int(round(self.x)), cell_index)
+                if self.is_blocked(cx, cy):
+                    end = boundary - 1e-6 if end > start else boundary + 1e-6
+                    self.collisions += 1
+                    self.motion = 'S'
+                    break
+
+        # 마커 인식 지점: 셀 중심에서 카메라 전방 거리만큼 앞 (k - lead × 전방 부호)
+        lead = self.timings['marker_lead'] * sign
+        lo, hi = sorted((start, end))
+        sightings = []
+        for k in range(math.floor(lo + lead) - 1, math.ceil(hi + lead) + 2):
+            point = k - lead
+            if lo < point <= hi if end > start else lo <= point < hi:
+                cx, cy = (k, int(round(self.y))) if axis_is_x else (int(round(self.x)), k)
+                if not self.is_blocked(cx, cy):
+                    sightings.append((cx, cy))
+        if end < start:
+            sightings.reverse()
+
+        moved = abs(end - start)
+        self.distance += moved
+        ticks = int(round(math.copysign(moved, distance) * self.timings['ticks_per_cell']))
+        self.ticks[0] += ticks
+        self.ticks[1] += ticks
+        if axis_is_x:
+            self.x = end
+        else:
+            self.y = end
+        return sightings
+
+    def sensor_line(self):
+        """현재 엔코더/IMU 값을 STM32 수신 줄 형식으로"""
+        return [f"ENC,{self.ticks[0]},{self.ticks[1]}", f"IMU,{self.yaw:.1f}"]
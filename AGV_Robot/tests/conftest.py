@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 테스트는 AGV_Robot 폴더 기준 import (python -m 실행과 동일)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+""" SnackDetector 조기 종료 - 깜빡이는 탐지는 '안정' 수렴으로 판정되지 않는지 확인 (모델/카메라 없이 추적기만 사용) """
+
+import pytest
+
+from webcam import detection
+from webcam.detection import SnackDetector
+
+BOX = {'bbox': (10, 10, 60, 60), 'confidence': 0.9}
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setitem(detection.ROI_CONFIG, 'enabled', False)
+    monkeypatch.setitem(detection.TRACKER_CONFIG, 'max_history', 5)
+    monkeypatch.setitem(detection.TRACKER_CONFIG, 'min_votes', 3)
+    detector = SnackDetector(backend='onnx')
+    detector.initialize_tracker()
+    return detector
+
+
+def observe(detector, frames):
+    """observe() 루프와 같은 순서로 관찰 기록 후 프레임별 수렴 판정 반환"""
+    reasons = []
+    for names in frames:
+        detector.tracker.update([dict(BOX, name=name) for name in names])
+        detector.observation_count += 1
+        detector.record_observation_result()
+        reasons.append(detector.check_convergence())
+    return reasons
+
+
+def test_flickering_detection_does_not_converge(detector):
+    # 과자 A는 5프레임 창에서 3번만 보임 - 추적기는 개수 1을 내지만 안정적이지 않음
+    frames = [['B'], ['B'], ['A', 'B'], ['A', 'B'], ['A', 'B'], ['B'], ['B']]
+    reasons = observe(detector, frames)
+
+    assert [r['class_counts'].get('A', 0) for r in detector.observation_results[-3:]] == [1, 1, 1]
+    assert all(obj['stability'] == 1.0 for obj in detector.tracker.stable_objects)
+    assert reasons == [None] * len(frames)
+
+
+def test_steady_detection_converges(detector):
+    reasons = observe(detector, [['A', 'B']] * 5)
+    assert reasons[-1] is not None
@@ -0,0 +1,73 @@
+""" SnackDetector.observe 중단 - 웹캠 읽기 실패/중지 요청 시 멈추지 않고 실패 결과를 반환하는지 확인 """
+
+import time
+
+import numpy as np
+import pytest
+
+from webcam import detection
+from webcam.detection import SnackDetector
+from webcam.detection_service import DetectionService
+
+
+class FakeCapture:
+    def __init__(self, ok=True):
+        self.ok = ok
+
+    def read(self):
+        if not self.ok:
+            return False, None
+        time.sleep(0.005)
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def grab(self):
+        return self.ok
+
+    def release(self):
+        pass
+
+
+class EmptyModel:
+    def infer(self, frame, conf_threshold):
+        return []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setitem(detection.ROI_CONFIG, 'enabled', False)
+    monkeypatch.setitem(detection.OBSERVATION_CONFIG, 'early_stop', False)
+    monkeypatch.setitem(detection.OBSERVATION_CONFIG, 'max_observations', 10 ** 6)
+    monkeypatch.setitem(detection.OBSERVATION_CONFIG, 'max_read_failures', 3)
+    detector = SnackDetector(backend='onnx')
+    detector.model = EmptyModel()
+    detector.initialize_tracker()
+    return detector
+
+
+def test_camera_failure_returns_failed_result(detector):
+    detector.cap = FakeCapture(ok=False)
+    results = detector.observe(shelf_id=(2, 0))
+
+    assert results['is_complete'] is False
+    assert "읽기 실패" in results['error']
+
+
+def test_running_observation_can_be_cancelled(detector):
+    detector.cap = FakeCapture()
+    service = DetectionService()
+    service._initialize = lambda: setattr(service, 'detector', detector)
+    service.start()
+    assert service.wait_until_ready(timeout=5)
+
+    future = service.request_count((2, 0))
+    while not future.running():
+        time.sleep(0.01)
+    assert not future.cancel()      # 실행 중인 Future는 cancel()로 멈추지 않음
+
+    service.cancel_current()
+    assert isinstance(future.exception(timeout=5), RuntimeError)
+    service.stop()
+    assert service.worker_thread is None
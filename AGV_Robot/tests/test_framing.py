@@ -0,0 +1,51 @@
+""" AGV <--> 컨트롤러 프레이밍 - 장바구니 좌표 인코딩 (AGV/컨트롤러 양쪽 framing.py) """
+
+import importlib.util
+import os
+
+import pytest
+
+AGV_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_framing(path, name):
+    """communication 패키지(__init__)는 serial/paho를 import하므로 framing.py만 직접 로드"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+framing = load_framing(os.path.join(AGV_ROOT, "communication", "framing.py"), "agv_framing")
+controller_framing = load_framing(os.path.join(AGV_ROOT, "..", "user_controller", "framing.py"), "controller_framing")
+
+
+@pytest.mark.parametrize("encoder, decoder", [
+    (framing, framing),
+    (controller_framing, framing),
+    (framing, controller_framing),
+])
+def test_cart_round_trip_large_coordinates(encoder, decoder):
+    cart = [[0, 0], [255, 256], [1023, 4000], [-1, 32767], [-32768, 7]]
+    messages = decoder.FrameDecoder().feed(encoder.encode_cart(cart))
+    assert messages == [{"snack_cart": cart}]
+
+
+def test_cart_split_across_reads():
+    cart = [[300, 12], [7, 999]]
+    data = framing.encode_cart(cart) + framing.encode_move()
+    decoder = framing.FrameDecoder()
+    messages = []
+    for i in range(len(data)):
+        messages += decoder.feed(data[i:i + 1])
+    assert messages == [{"snack_cart": cart}, {"move_flag": True}]
+
+
+def test_cart_out_of_range_raises_framing_error():
+    with pytest.raises(framing.FramingError):
+        framing.encode_cart([[70000, 0]])
+
+
+def test_cart_odd_payload_is_rejected():
+    with pytest.raises(framing.FramingError):
+        framing.decode_payload(framing.MSG_CART, b"\x00\x01\x00")
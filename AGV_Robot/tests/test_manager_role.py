@@ -0,0 +1,75 @@
+""" ManagerRole Detection 정지/이탈 - 스케줄러를 막지 않고 runtime.clock 기준으로 진행하는지 확인 """
+
+from runtime import ManagerRole
+from tests.test_user_role import StubRuntime
+
+
+class StubDetectionController:
+    def __init__(self):
+        self.requests = []
+        self.complete = False
+
+    def is_service_ready(self):
+        return False    # 아직 모델 로딩 중
+
+    def start_detection(self, shelf_id=None, wait=True):
+        self.requests.append((shelf_id, wait))
+        return True
+
+    def is_detection_complete(self):
+        return self.complete
+
+    def finish_detection_cycle(self, timeout=0):
+        return {'count_summary': {}}
+
+    def shutdown(self):
+        pass
+
+
+def detecting_role():
+    runtime = StubRuntime()
+    runtime.picam2 = None
+    role = ManagerRole(enable_detection=False)
+    role.setup(runtime)
+    role.enable_detection = True
+    role.detection_controller = StubDetectionController()
+
+    x, y = role.planner.get_detection_coordinates()[0]
+    role.on_position(x, y)
+    assert role.state == 'detecting'
+    return role, runtime
+
+
+def test_detection_request_does_not_wait_for_service():
+    role, runtime = detecting_role()
+
+    assert role.detection_controller.requests[0][1] is False
+    # 서비스 준비 시간만큼 마감이 늘어나므로 관찰 시간만 지나서는 타임아웃되지 않음
+    runtime.now += role.DETECTION_TIMEOUT + 1
+    role.plan()
+    assert role.state == 'detecting'
+
+
+def test_stop_is_repeated_every_frame_while_detecting():
+    role, runtime = detecting_role()
+    runtime.sent.clear()
+
+    for _ in range(3):
+        role.trace(frame=None)
+
+    assert runtime.sent == ['S', 'S', 'S']
+
+
+def test_exit_waits_for_settle_time_on_runtime_clock():
+    role, runtime = detecting_role()
+    role.detection_controller.complete = True
+    role.plan()
+    assert role.state == 'exiting'
+    runtime.sent.clear()
+
+    role.trace(frame=None)
+    assert runtime.sent == []
+
+    runtime.now += role.resource_manager.RESTORE_SETTLE_TIME
+    role.trace(frame=None)
+    assert runtime.sent == ['F']
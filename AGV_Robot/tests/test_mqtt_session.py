@@ -0,0 +1,141 @@
+""" 공용 MQTT 세션 - 브로커 재시작 시 outbox 재전송, 사용자 수 기반 종료 (가짜 paho 클라이언트 사용) """
+
+import importlib.util
+import json
+import os
+import sys
+import types
+
+import pytest
+
+AGV_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MQTT_ERR_SUCCESS = 0
+MQTT_ERR_NO_CONN = 4
+
+
+class FakeBroker:
+    """연결 상태와 받은 메시지만 기록하는 브로커 대역"""
+
+    def __init__(self):
+        self.up = True
+        self.received = []      # [(topic, payload)]
+        self.subscribed = []
+
+
+class FakeInfo:
+    def __init__(self, rc):
+        self.rc = rc
+
+    def wait_for_publish(self, timeout=None):
+        pass
+
+    def is_published(self):
+        return self.rc == MQTT_ERR_SUCCESS
+
+
+class FakeClient:
+    broker = None
+
+    def __init__(self, client_id=None, clean_session=True):
+        self.client_id = client_id
+        self.running = False
+        self.callbacks = {}
+
+    def reconnect_delay_set(self, min_delay=1, max_delay=120):
+        pass
+
+    def connect_async(self, host, port, keepalive):
+        pass
+
+    def loop_start(self):
+        self.running = True
+
+    def loop_stop(self):
+        self.running = False
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload, qos=0):
+        if not self.broker.up:
+            return FakeInfo(MQTT_ERR_NO_CONN)
+        self.broker.received.append((topic, payload))
+        return FakeInfo(MQTT_ERR_SUCCESS)
+
+    def subscribe(self, topic, qos=0):
+        self.broker.subscribed.append(topic)
+
+    def message_callback_add(self, topic, callback):
+        self.callbacks[topic] = callback
+
+
+@pytest.fixture
+def mqtt_session(monkeypatch, tmp_path):
+    """가짜 paho.mqtt.client를 끼운 채로 mqtt_session.py만 로드 (communication 패키지는 serial도 import)"""
+    client_module = types.ModuleType("paho.mqtt.client")
+    client_module.Client = FakeClient
+    client_module.MQTT_ERR_SUCCESS = MQTT_ERR_SUCCESS
+    paho = types.ModuleType("paho")
+    paho.mqtt = types.ModuleType("paho.mqtt")
+    paho.mqtt.client = client_module
+    monkeypatch.setitem(sys.modules, "paho", paho)
+    monkeypatch.setitem(sys.modules, "paho.mqtt", paho.mqtt)
+    monkeypatch.setitem(sys.modules, "paho.mqtt.client", client_module)
+    monkeypatch.setattr(FakeClient, "broker", FakeBroker())
+    monkeypatch.chdir(tmp_path)  # 기본 outbox 파일은 현재 폴더에 생성됨
+
+    spec = importlib.util.spec_from_file_location("mqtt_session", os.path.join(AGV_ROOT, "communication", "mqtt_session.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def connect(session):
+    session.on_connect(session.client, None, {}, 0)
+
+
+def disconnect(session):
+    session.on_disconnect(session.client, None, 1)
+
+
+def test_outbox_replayed_after_broker_restart(mqtt_session, tmp_path):
+    broker = FakeClient.broker
+    outbox_path = str(tmp_path / "outbox.jsonl")
+    session = mqtt_session.MqttSession("managerAGV", outbox_path=outbox_path).start()
+    session.subscribe("agv/managerAGV/pos", lambda *args: None)
+    connect(session)
+    assert session.publish("agv/managerAGV/qr_id", {"seq": 1})
+
+    # 브로커 재시작 - 끊긴 동안의 메시지는 디스크 outbox에 순서대로 저장
+    broker.up = False
+    disconnect(session)
+    for seq in (2, 3, 4):
+        assert not session.publish("agv/managerAGV/qr_id", {"seq": seq})
+    with open(outbox_path, encoding="utf-8") as f:
+        assert [json.loads(json.loads(line)["payload"])["seq"] for line in f] == [2, 3, 4]
+    assert mqtt_session.MqttSession("reloaded", outbox_path=outbox_path).pending_count() == 3
+
+    # 재연결 - 다시 구독하고 outbox를 보낸 뒤 비움
+    broker.up = True
+    broker.subscribed.clear()
+    connect(session)
+    session.flush_thread.join(timeout=5)
+
+    assert [json.loads(payload)["seq"] for _, payload in broker.received] == [1, 2, 3, 4]
+    assert broker.subscribed == ["agv/managerAGV/pos"]
+    assert session.pending_count() == 0
+    assert os.path.getsize(outbox_path) == 0
+
+
+def test_shared_session_stays_open_until_last_release(mqtt_session):
+    messenger_session = mqtt_session.get_mqtt_session("managerAGV", "broker", 1883)
+    detection_session = mqtt_session.get_mqtt_session("managerAGV", "broker", 1883)
+    assert messenger_session is detection_session
+
+    messenger_session.release()  # AgvToServer.stop()
+    assert detection_session.started and detection_session.client.running
+
+    detection_session.release()  # DetectionController.shutdown()
+    assert not detection_session.started and not detection_session.client.running
+    assert mqtt_session.get_mqtt_session("managerAGV", "broker", 1883) is not detection_session
@@ -0,0 +1,32 @@
+""" PoseEstimator 명령 기반 예측 - 펌웨어 복합 회전(L90/R90: 전진 후 회전, R180: 정지 후 반전) 순서 """
+
+import pytest
+
+from vision.pose_estimator import PoseEstimator
+
+
+def test_l90_advances_before_rotating():
+    estimator = PoseEstimator(6, 0, start_dir='U')
+    t0 = estimator.stamp
+    estimator.on_command('L90', stamp=t0)
+
+    pose = estimator.update(t0 + estimator.config['turn_advance_time'])
+    assert pose.heading == pytest.approx(0.0)
+    assert pose.x == pytest.approx(6 - estimator.turn_lead())
+    assert estimator.is_turning()
+
+    pose = estimator.update(t0 + estimator.turn_duration('L90') + 0.01)
+    assert pose.heading == pytest.approx(270.0)
+    assert pose.x == pytest.approx(6 - estimator.turn_lead())
+    assert not estimator.is_turning()
+
+
+def test_r180_turns_in_place_and_stops():
+    estimator = PoseEstimator(4, 2, start_dir='R')
+    t0 = estimator.stamp
+    estimator.on_command('F', stamp=t0)
+    estimator.on_command('R180', stamp=t0 + 1.0)
+
+    pose = estimator.update(t0 + 1.0 + estimator.turn_duration('R180') + 1.0)
+    assert pose.heading == pytest.approx(270.0)
+    assert pose.y == pytest.approx(2 + estimator.config['forward_speed'])
@@ -0,0 +1,53 @@
+""" SessionRecorder 기록 스레드 오류 - 녹화만 멈추고 UART 명령/카메라 프레임은 그대로 전달되는지 확인 """
+
+import json
+import queue
+import time
+
+import numpy as np
+
+from replay import RecordingCamera, RecordingQueue, SessionRecorder
+
+
+class StubCamera:
+    def capture_array(self):
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def wait_until(condition):
+    for _ in range(500):
+        if condition():
+            break
+        time.sleep(0.01)
+
+
+def test_commands_pass_through_after_writer_error(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / "session")).start()
+    tx_queue = RecordingQueue(queue.Queue(), recorder, 'uart_tx')
+    rx_queue = RecordingQueue(queue.Queue(), recorder, 'uart_rx')
+    camera = RecordingCamera(StubCamera(), recorder)
+    tx_queue.put("F\n")
+    wait_until(lambda: recorder.writer.event_counts.get('uart_tx') == 1)
+
+    def disk_full(*args):
+        raise OSError("No space left on device")
+
+    recorder.writer.write_event = disk_full
+    tx_queue.put("L90\n")
+    wait_until(lambda: recorder.error is not None)
+    assert isinstance(recorder.error, OSError)
+    assert not recorder.recording()
+
+    # 녹화 실패 후에도 정지 명령은 STM32 송신 큐로, 수신 줄/프레임은 호출 쪽으로 전달
+    tx_queue.put("S\n")
+    assert [tx_queue.get_nowait() for _ in range(3)] == ["F\n", "L90\n", "S\n"]
+    rx_queue.target.put("DONE")
+    assert rx_queue.get_nowait() == "DONE"
+    assert camera.capture_array().shape == (4, 4, 3)
+    assert recorder.pending_frames == 0
+
+    meta = recorder.stop()
+    assert meta['events'] == {'uart_tx': 1}
+    assert 'No space left on device' in meta['error']
+    with open(tmp_path / "session" / "session.json", encoding='utf-8') as f:
+        assert json.load(f)['error'] == meta['error']
@@ -0,0 +1,58 @@
+""" AgvRuntime 마커 인식 - 느린 QR 디코딩이 스케줄러 tick(capture/tracing)을 밀지 않는지 확인 """
+
+import threading
+import time
+
+import numpy as np
+
+from runtime import AgvRuntime, UserRole
+
+DECODE_TIME = 0.15
+
+
+class SlowQRReader:
+    """pyzbar 디코딩이 오래 걸리는 경우를 흉내 내는 리더"""
+
+    def __init__(self):
+        self.scans = 0
+
+    def scan(self, frame):
+        time.sleep(DECODE_TIME)
+        self.scans += 1
+        return [{"id": "ID:007"}]
+
+
+class StubMessenger:
+    def __init__(self):
+        self.sent = []
+
+    def send_qr_info(self, qr_info):
+        self.sent.append(qr_info)
+
+
+def test_slow_marker_decoding_does_not_delay_ticks():
+    runtime = AgvRuntime(UserRole(use_controller=False), "testAGV", marker_type='qr')
+    runtime.marker_reader = SlowQRReader()
+    runtime.agv_messenger = StubMessenger()
+    runtime.pose_estimator = None
+
+    def capture():
+        runtime.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        runtime.frame_stamp = time.monotonic()
+        runtime.frame_seq += 1
+
+    runtime.start_marker_worker()
+    runtime._add_task('capture', capture)
+    runtime._add_task('markers', runtime.markers_task)
+    timer = threading.Timer(6 * DECODE_TIME, runtime.scheduler.stop)
+    timer.start()
+    runtime.scheduler.run()
+    runtime.marker_stop.set()
+    runtime.marker_thread.join(timeout=1)
+
+    stats = runtime.scheduler.stats()
+    assert stats['markers']['exec_ms_max'] < DECODE_TIME * 1000 / 5
+    assert stats['capture']['jitter_ms_max'] < DECODE_TIME * 1000 / 3
+    assert runtime.marker_reader.scans >= 2
+    assert runtime.marker_dropped > 0            # 인식 중에 들어온 프레임은 최신 것만 남김
+    assert runtime.agv_messenger.sent[0] == "ID:007"
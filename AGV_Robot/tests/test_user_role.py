@@ -0,0 +1,78 @@
+""" UserRole 쇼핑 정지 동작 - 실제 런타임 대신 송신 명령만 기록하는 스텁 사용 """
+
+from runtime import UserRole
+from sim import FakeLineTracer
+
+
+class StubRuntime:
+    def __init__(self):
+        self.start_position = (6, 0)
+        self.start_dir = 'U'
+        self.tracer = FakeLineTracer()
+        self.pose_estimator = None
+        self.frame = None
+        self.now = 0.0
+        self.clock = lambda: self.now
+        self.sent = []
+        self.motion_tx = self
+        self.stopped = False
+
+    def put(self, msg):
+        self.sent.append(msg.strip())
+
+    def send(self, cmd):
+        self.sent.append(cmd)
+
+    def call_soon(self, func, *args):
+        func(*args)
+
+    def stop(self):
+        self.stopped = True
+
+
+class StubController:
+    def __init__(self):
+        self.positions = []
+        self.cleared = 0
+
+    def set_position(self, x, y, next_x, next_y):
+        self.positions.append((x, y, next_x, next_y))
+
+    def clear_move_request(self):
+        self.cleared += 1
+
+    def close(self):
+        pass
+
+
+def parked_role():
+    runtime = StubRuntime()
+    role = UserRole(shopping_list=[[0, 0], [0, 6]], use_controller=False, exit_position=None)
+    role.setup(runtime)
+    role.controller = StubController()
+    role.on_position(0, 0)
+    assert role.state == 'shopping'
+    assert runtime.sent[-1] == 'S'
+    return role, runtime
+
+
+def test_repeated_fix_while_shopping_does_not_drive():
+    role, runtime = parked_role()
+    sent_before = list(runtime.sent)
+
+    role.on_position(0, 0)  # 마커 쿨다운 만료 후 같은 위치 재응답
+
+    assert role.state == 'shopping'
+    assert runtime.sent == sent_before
+    assert role.pending_position == (0, 0)
+
+
+def test_move_request_resumes_route():
+    role, runtime = parked_role()
+    sent_before = len(runtime.sent)
+
+    role._on_move()
+
+    assert role.state == 'driving'
+    assert role.controller.positions[-1][:2] == (0, 0)
+    assert role.executor.command_queue or len(runtime.sent) > sent_before
@@ -0,0 +1,109 @@
+""" AgvToControll 다중 컨트롤러 벤치마크 - N개 가상 컨트롤러 연결 후 위치 방송/이동 요청 처리량과 지연 측정 """
+
+import argparse
+import selectors
+import socket
+import threading
+import time
+
+from communication.agv_to_controll import AgvToControll
+from communication.framing import FrameDecoder, encode_cart, encode_move, encode_disconnect
+
+
+def run(clients=50, updates=2000, requests=200, slow_clients=1, timeout=10.0):
+    """
+    :param clients: 정상적으로 수신하는 가상 컨트롤러 수
+    :param updates: AGV가 방송할 위치 갱신 횟수
+    :param requests: 컨트롤러마다 보낼 이동 요청 수
+    :param slow_clients: 연결만 하고 수신하지 않는 컨트롤러 수 (다른 연결을 막지 않는지 확인)
+    """
+    server = AgvToControll("benchAGV", host='127.0.0.1', port=0)
+    moves = []
+    server.on_move_requested(lambda: moves.append(time.perf_counter()))
+    threading.Thread(target=server.start, daemon=True).start()
+    server.ready.wait()
+
+    selector = selectors.DefaultSelector()
+    decoders = {}
+    last_position = {}
+    for _ in range(clients):
+        sock = socket.create_connection(('127.0.0.1', server.port))
+        sock.setblocking(False)
+        decoders[sock] = FrameDecoder()
+        selector.register(sock, selectors.EVENT_READ)
+    slow = [socket.create_connection(('127.0.0.1', server.port)) for _ in range(slow_clients)]
+    for sock in slow:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+
+    deadline = time.perf_counter() + timeout
+    while server.client_count < clients + slow_clients and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    threads_connected = threading.active_count()  # 연결 수와 무관해야 함 (메인 + 서버 스레드)
+
+    def pump(until):
+        """until()이 참이 될 때까지 모든 가상 컨트롤러 수신"""
+        while not until() and time.perf_counter() < deadline:
+            for key, _ in selector.select(0.05):
+                data = key.fileobj.recv(65536)
+                for message in decoders[key.fileobj].feed(data):
+                    last_position[key.fileobj] = message['x']
+
+    # 1) 위치 방송: 마지막 갱신이 모든 컨트롤러에 도착할 때까지의 시간
+    pump(lambda: len(last_position) == clients)  # 연결 시 보내는 현재 위치
+    final = updates
+    start = time.perf_counter()
+    for i in range(1, updates + 1):
+        server.set_position(i, 0, 0, 0)
+    pump(lambda: all(x == final for x in last_position.values()))
+    broadcast_time = time.perf_counter() - start
+    delivered = sum(1 for x in last_position.values() if x == final)
+
+    # 2) 이동 요청: 모든 컨트롤러가 동시에 보낸 요청을 서버가 처리하는 시간
+    burst = encode_cart([[1, 2], [3, 4]]) + encode_move() * requests
+    start = time.perf_counter()
+    for sock in decoders:
+        sock.setblocking(True)
+        sock.sendall(burst)
+    expected = clients * requests
+    while len(moves) < expected and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    request_time = (moves[-1] if moves else time.perf_counter()) - start
+
+    for sock in list(decoders) + slow:
+        try:
+            sock.sendall(encode_disconnect())
+        except OSError:
+            pass
+        sock.close()
+    server.close()
+
+    return {
+        'clients': clients,
+        'slow_clients': slow_clients,
+        'broadcast_ms': broadcast_time * 1000,
+        'latest_delivered': f"{delivered}/{clients}",
+        'requests_handled': f"{len(moves)}/{expected}",
+        'requests_per_s': len(moves) / request_time if request_time > 0 else 0.0,
+        'threads_connected': threads_connected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgvToControll 다중 컨트롤러 벤치마크")
+    parser.add_argument("--clients", type=int, nargs="*", default=[1, 10, 50, 200])
+    parser.add_argument("--updates", type=int, default=2000, help="위치 방송 횟수")
+    parser.add_argument("--requests", type=int, default=200, help="컨트롤러당 이동 요청 수")
+    parser.add_argument("--slow", type=int, default=1, help="수신하지 않는 컨트롤러 수")
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        result = run(clients, args.updates, args.requests, args.slow)
+        print(f"📊 컨트롤러 {result['clients']}개 (+느린 {result['slow_clients']}개): "
+              f"위치 {args.updates}회 방송 {result['broadcast_ms']:.1f}ms, 최신 위치 수신 {result['latest_delivered']}, "
+              f"이동 요청 {result['requests_handled']} ({result['requests_per_s']:,.0f}/s), "
+              f"연결 중 스레드 {result['threads_connected']}개")
+
+
+# python -m utils.controller_server_benchmark
+if __name__ == "__main__":
+    main()
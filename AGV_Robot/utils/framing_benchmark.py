@@ -0,0 +1,108 @@
+""" AGV <--> 컨트롤러 프레이밍 퍼즈/처리량 벤치마크 - socketpair로 연속 송신 후 임의로 쪼개/붙여 수신해 검증 """
+
+import argparse
+import random
+import socket
+import threading
+import time
+
+from communication.framing import (
+    FrameDecoder, FramingError, MessageReader, HEADER,
+    encode_position, encode_cart, encode_move, encode_disconnect
+)
+
+
+def random_message(rng):
+    """(인코딩된 프레임, 기대하는 디코딩 결과) 임의 생성"""
+    kind = rng.random()
+    if kind < 0.7:
+        name = rng.choice(["userAGV1", "userAGV2", "managerAGV"])
+        values = [rng.randint(-1, 20) for _ in range(4)]
+        expected = {"name": name, "x": values[0], "y": values[1], "target_x": values[2], "target_y": values[3]}
+        return encode_position(name, *values), expected
+    if kind < 0.9:
+        cart = [[rng.randint(0, 1000), rng.randint(0, 1000)] for _ in range(rng.randint(0, 12))]
+        return encode_cart(cart), {"snack_cart": cart}
+    return encode_move(), {"move_flag": True}
+
+
+def fuzz_split(iterations=2000, seed=0):
+    """같은 바이트 스트림을 임의 경계로 나눠 feed해도 같은 메시지가 나오는지 확인"""
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        frames, expected = zip(*(random_message(rng) for _ in range(rng.randint(1, 20))))
+        stream = b"".join(frames)
+
+        decoder = FrameDecoder()
+        decoded = []
+        pos = 0
+        while pos < len(stream):
+            step = rng.randint(1, 64)
+            decoded.extend(decoder.feed(stream[pos:pos + step]))
+            pos += step
+        assert decoded == list(expected), "분할 수신 결과 불일치"
+        assert not decoder.buffer, "남은 바이트가 있음"
+
+
+def fuzz_corrupt(iterations=2000, seed=1):
+    """임의 바이트 스트림은 FramingError로 거부되거나 덜 받은 상태로 남아야 함 (다른 예외 금지)"""
+    rng = random.Random(seed)
+    rejected = 0
+    for _ in range(iterations):
+        garbage = bytes(rng.randrange(256) for _ in range(rng.randint(HEADER.size, 64)))
+        try:
+            FrameDecoder().feed(garbage)
+        except FramingError:
+            rejected += 1
+    return rejected
+
+
+def burst(count=100000, chunk=4096, seed=2):
+    """socketpair로 count개 메시지를 연속 송신하고 MessageReader로 수신 → (msgs/s, MB/s)"""
+    rng = random.Random(seed)
+    messages = [random_message(rng) for _ in range(count)]
+    stream = b"".join(frame for frame, _ in messages) + encode_disconnect()
+
+    tx, rx = socket.socketpair()
+    sender = threading.Thread(target=tx.sendall, args=(stream,), daemon=True)
+    reader = MessageReader(rx, bufsize=chunk)
+
+    received = []
+    start = time.perf_counter()
+    sender.start()
+    while True:
+        batch = reader.read()
+        if batch is None:
+            break
+        if batch[-1].get("disconnect"):
+            received.extend(batch[:-1])
+            break
+        received.extend(batch)
+    elapsed = time.perf_counter() - start
+    sender.join()
+    tx.close()
+    rx.close()
+
+    assert received == [expected for _, expected in messages], "연속 수신 결과 불일치"
+    return count / elapsed, len(stream) / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AGV <--> 컨트롤러 메시지 프레이밍 퍼즈/벤치마크")
+    parser.add_argument("--iterations", type=int, default=2000, help="퍼즈 반복 횟수")
+    parser.add_argument("--count", type=int, default=100000, help="연속 송신 메시지 수")
+    parser.add_argument("--chunk", type=int, default=4096, help="recv 버퍼 크기")
+    args = parser.parse_args()
+
+    fuzz_split(args.iterations)
+    print(f"✅ 분할 수신 퍼즈 {args.iterations}회 통과")
+    rejected = fuzz_corrupt(args.iterations)
+    print(f"✅ 손상 스트림 퍼즈 {args.iterations}회 통과 (거부 {rejected}회, 나머지는 수신 대기)")
+
+    msgs_per_s, mb_per_s = burst(args.count, args.chunk)
+    print(f"📊 연속 송신 {args.count}개: {msgs_per_s:,.0f} msgs/s, {mb_per_s:.1f} MB/s (recv {args.chunk} bytes)")
+
+
+# python -m utils.framing_benchmark
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+""" 경로 계획/주행 벤치마크 - 헤드리스 시뮬레이터로 임의 매장 맵에서 계획 지연, 경로 길이, 회전 수, 임무 시간을 측정하여 기록 """
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+AGV_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(AGV_ROOT, "benchmarks", "planner_history.jsonl")
+
+
+def store_for_size(size, seed):
+    """size 7은 실제 매장 맵 (maps/store_map.json), 그 외에는 size×size 임의 매장"""
+    from sim import random_store_layout
+    from vision import load_store_map
+
+    if size == 7:
+        return load_store_map().to_list()
+    return random_store_layout(size, size, seed=seed)
+
+
+def measure_planning(grid, start, shopping_list, start_dir='U'):
+    """
+    PathPlanner(가장 가까운 상품 순) + DirectionResolver로 전체 경로를 미리 계산
+    :return: (계획 시간 리스트 (초), 경로 셀 수, 회전 명령 수)
+    """
+    from vision import PathPlanner, DirectionResolver
+
+    planner = PathPlanner(grid)
+    planner.set_now_position(*start)
+    planner.set_shopping_list([list(item) for item in shopping_list])
+    current_dir = start_dir
+    times, cells, turns = [], 0, 0
+    while planner.get_shopping_list():
+        started = time.perf_counter()
+        path = planner.path_find()
+        times.append(time.perf_counter() - started)
+        if not path:
+            break
+        abs_dirs = DirectionResolver.get_movement_directions(path)
+        commands = DirectionResolver.convert_to_relative_commands(abs_dirs, current_dir)
+        cells += len(path) - 1
+        turns += sum(1 for cmd in commands if cmd != 'F')
+        if abs_dirs:
+            current_dir = abs_dirs[-1]
+        planner.shopping_list.remove([planner.next_pos_x, planner.next_pos_y])
+        planner.set_now_position(planner.next_pos_x, planner.next_pos_y)
+    return times, cells, turns
+
+
+def measure_manager_bfs(grid, start, targets):
+    """ManagerPlanner.bfs 단일 목표 탐색 시간 (초)"""
+    from manager.manager_planner import ManagerPlanner
+
+    planner = ManagerPlanner(grid)
+    planner.set_now_position(*start)
+    times = []
+    for x, y in targets:
+        started = time.perf_counter()
+        planner.bfs(x, y)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def run_size(size, missions=5, items=5, timings=None, simulate=True):
+    from sim import random_shopping_list, run_user_mission
+
+    plan_ms, plan_cells, plan_turns, bfs_ms = [], [], [], []
+    sims = []
+    for seed in range(missions):
+        grid = store_for_size(size, seed)
+        start = (len(grid) - 1, 0)
+        shopping_list = random_shopping_list(grid, items, seed=seed, exclude=[start])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            times, cells, turns = measure_planning(grid, start, shopping_list)
+            bfs_times = measure_manager_bfs(grid, start, shopping_list)
+        plan_ms.extend(t * 1000 for t in times)
+        bfs_ms.extend(t * 1000 for t in bfs_times)
+        plan_cells.append(cells)
+        plan_turns.append(turns)
+
+        if simulate:
+            sims.append(run_user_mission(grid, shopping_list, start, 'U', timings=timings,
+                                         max_time=60.0 * size * items))
+
+    result = {
+        'size': size,
+        'missions': missions,
+        'items': items,
+        'plan_ms_mean': round(statistics.mean(plan_ms), 3),
+        'plan_ms_max': round(max(plan_ms), 3),
+        'manager_bfs_ms_mean': round(statistics.mean(bfs_ms), 3),
+        'route_cells_mean': round(statistics.mean(plan_cells), 1),
+        'planned_turns_mean': round(statistics.mean(plan_turns), 1),
+    }
+    if sims:
+        done = [s for s in sims if s['completed']]
+        result.update({
+            'completion_rate': round(len(done) / len(sims), 2),
+            'mission_time_s_mean': round(statistics.mean(s['mission_time_s'] for s in done), 1) if done else None,
+            'driven_turns_mean': round(statistics.mean(s['turns'] for s in sims), 1),
+            'turn_offset_mean': round(statistics.mean(s['turn_offset_mean'] for s in sims), 3),
+            'collisions': sum(s['collisions'] for s in sims),
+            'replan_ms_mean': round(statistics.mean(s['plan_ms_mean'] for s in sims), 3),
+            'replan_ms_max': round(max(s['plan_ms_max'] for s in sims), 3),
+            'sim_wall_s': round(sum(s['wall_s'] for s in sims), 2),
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 계획/주행 시뮬레이션 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[7, 25, 50, 100], help="맵 크기 (7 = 실제 매장)")
+    parser.add_argument("--missions", type=int, default=5, help="크기별 임무 수 (seed 0..N-1)")
+    parser.add_argument("--items", type=int, default=5, help="임무당 상품 수")
+    parser.add_argument("--timings", default=None, help="SIM_TIMINGS 덮어쓰기 JSON (예: '{\"marker_lead\": 0.2}')")
+    parser.add_argument("--plan-only", action="store_true", help="주행 시뮬레이션 없이 계획만 측정")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="결과를 누적할 JSONL 파일")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+    timings = json.loads(args.timings) if args.timings else None
+
+    for size in args.sizes:
+        result = run_size(size, args.missions, args.items, timings, simulate=not args.plan_only)
+        result.update({'timestamp': datetime.now().isoformat(), 'python': sys.version.split()[0], 'timings': timings})
+
+        print(f"\n🗺️  {size}×{size} (임무 {args.missions}개, 상품 {args.items}개)")
+        print(f"  계획: 평균 {result['plan_ms_mean']:.2f}ms / 최대 {result['plan_ms_max']:.2f}ms, "
+              f"ManagerPlanner BFS 평균 {result['manager_bfs_ms_mean']:.2f}ms")
+        print(f"  경로: 평균 {result['route_cells_mean']}칸, 회전 {result['planned_turns_mean']}회")
+        if 'completion_rate' in result:
+            mission_time = f"{result['mission_time_s_mean']}s" if result['mission_time_s_mean'] is not None else "-"
+            print(f"  주행: 완료율 {result['completion_rate'] * 100:.0f}%, 임무 시간 {mission_time}, "
+                  f"회전 {result['driven_turns_mean']}회 (중심 이탈 {result['turn_offset_mean']}칸), 충돌 {result['collisions']}회")
+            print(f"  재계획: 평균 {result['replan_ms_mean']:.2f}ms / 최대 {result['replan_ms_max']:.2f}ms "
+                  f"(시뮬레이션 {result['sim_wall_s']}s)")
+
+        if not args.no_save:
+            os.makedirs(os.path.dirname(args.history), exist_ok=True)
+            with open(args.history, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    if not args.no_save:
+        print(f"\n📄 기록 추가: {args.history}")
+
+
+# python -m utils.planner_benchmark --sizes 7 25 50 100
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+""" AGV 시작 시간 벤치마크 - python -X importtime으로 import 비용과 RSS를 측정하여 기록 """
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+AGV_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(AGV_ROOT, "benchmarks", "startup_history.jsonl")
+
+# 주행만 하는 세션에서 로드되면 안 되는 무거운 모듈
+HEAVY_MODULES = ['torch', 'ultralytics', 'onnxruntime', 'tflite_runtime', 'tensorflow']
+
+# 대상 모듈 import 후 RSS와 로드된 무거운 모듈 목록을 JSON으로 출력하는 스크립트
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{
+    'import_wall_s': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'heavy_modules_loaded': heavy,
+    'modules_loaded': len(sys.modules)
+}}))
+"""
+
+
+def parse_importtime(stderr, top=15):
+    """-X importtime 출력 파싱 → (총 누적 시간 us, 누적 시간 상위 모듈)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|", 2)
+        except ValueError:
+            continue
+        # 들여쓰기 깊이 = 중첩 import 단계 (" | " 뒤 공백 1칸 제외)
+        name = name[1:].rstrip()
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_us': int(head.split(":", 1)[1]),
+            'cumulative_us': int(cumulative_us)
+        })
+
+    total_us = sum(e['cumulative_us'] for e in entries if e['depth'] == 0)
+    slowest = sorted(entries, key=lambda e: e['cumulative_us'], reverse=True)[:top]
+    return total_us, [{'module': e['module'], 'cumulative_ms': round(e['cumulative_us'] / 1000, 2)} for e in slowest]
+
+
+def measure(module, repeat=3, top=15):
+    """새 인터프리터에서 module을 import하며 시간/메모리 측정 (repeat회 중 최솟값)"""
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            cwd=AGV_ROOT, capture_output=True, text=True
+        )
+        process_wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(f"{module} import 실패:\n{proc.stderr[-2000:]}")
+
+        probe_result = json.loads(proc.stdout.strip().splitlines()[-1])
+        total_us, slowest = parse_importtime(proc.stderr, top)
+        probe_result.update({
+            'process_wall_s': process_wall,
+            'importtime_total_ms': round(total_us / 1000, 2),
+            'slowest_imports': slowest
+        })
+        runs.append(probe_result)
+
+    best = min(runs, key=lambda r: r['import_wall_s'])
+    return {
+        'module': module,
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'import_wall_s': round(best['import_wall_s'], 4),
+        'process_wall_s': round(best['process_wall_s'], 4),
+        'importtime_total_ms': best['importtime_total_ms'],
+        'max_rss_mb': round(best['max_rss_kb'] / 1024, 1),
+        'modules_loaded': best['modules_loaded'],
+        'heavy_modules_loaded': best['heavy_modules_loaded'],
+        'slowest_imports': best['slowest_imports']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AGV 시작 import 시간/RSS 벤치마크")
+    parser.add_argument("modules", nargs="*", default=["main_manager"], help="측정할 모듈 (AGV_Robot 기준)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="출력할 느린 import 개수")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="결과를 누적할 JSONL 파일")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        result = measure(module, args.repeat, args.top)
+
+        print(f"\n📦 {module}")
+        print(f"  import 시간: {result['import_wall_s'] * 1000:.1f}ms (importtime 합계 {result['importtime_total_ms']}ms)")
+        print(f"  프로세스 전체: {result['process_wall_s'] * 1000:.1f}ms, RSS: {result['max_rss_mb']}MB")
+        if result['heavy_modules_loaded']:
+            print(f"  ⚠️ 무거운 모듈 로드됨: {', '.join(result['heavy_modules_loaded'])}")
+        for entry in result['slowest_imports'][:5]:
+            print(f"    {entry['cumulative_ms']:>8.1f}ms  {entry['module']}")
+
+        if not args.no_save:
+            os.makedirs(os.path.dirname(args.history), exist_ok=True)
+            with open(args.history, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    if not args.no_save:
+        print(f"\n📄 기록 추가: {args.history}")
+
+
+# python -m utils.startup_benchmark main_manager main
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
 from .path_executor import PathExecutor
 from .path_planner import PathPlanner
-from .path_planner import DirectionResolver
\ No newline at end of file
+from .path_planner import DirectionResolver
+from .pose_estimator import PoseEstimator, CommandTap
+from .maneuver import ManeuverRunner
+from .store_map import StoreMap, load_store_map, as_store_map
@@ -0,0 +1,157 @@
+import time
+
+# 기동 단계별 최대 시간 (위치 추정기가 없으면 기존 고정 대기 시간과 동일하게 동작)
+MANEUVER_CONFIG = {
+    'align_timeout': 1.2,           # 'F' 라인 중심 정렬 최대 시간
+    'align_interval': 0.05,         # 정렬 보정 명령 전송 간격
+    'turn_advance_time': 0.85,      # L90/R90 전 교차로까지 전진 시간
+    'turn_time': 0.9,               # L90/R90 회전 시간
+    'reverse_time': 3.0,            # B(반전) 시간 - 펌웨어 R180 (정지 0.1초 + 제자리 회전 2.9초)
+    'other_time': 1.0,              # B 등 기타 명령 대기 시간
+    'turn_center_tolerance': 0.05,  # 셀 중심까지 이 거리(셀) 이내면 회전 시작
+    'turn_heading_tolerance': 8.0,  # 목표 방향까지 이 각도(도) 이내면 회전 완료
+    'estimate_timeout_scale': 1.5,  # 추정기 사용 시 최대 시간 = 고정 시간 × 배율
+}
+
+
+class ManeuverStep:
+    """기동의 한 단계: 시작할 때 명령 전송, 완료 조건을 만족하거나 시간이 지나면 다음 단계로"""
+
+    def __init__(self, name, command=None, timeout=0.0, update=None):
+        """
+        :param command: 단계 시작 시 STM32로 보낼 명령 (없으면 None)
+        :param timeout: 단계 최대 시간 (초)
+        :param update: update(frame, now) → True면 단계 완료 (None이면 시간만으로 완료)
+        """
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+        self.update = update
+
+
+class ManeuverRunner:
+    """
+    회전/정렬 기동을 블로킹 없이 실행하는 tick 기반 상태 머신
+    메인 루프가 프레임마다 tick(frame)을 호출하면 마감 시간 또는 센서/추정값 조건으로 다음 단계로 진행
+    (PathExecutor, ManagerExecutor 공용)
+    """
+
+    def __init__(self, send, tracer, pose_estimator=None, name="Maneuver", config=None, clock=None):
+        """
+        :param send: 명령 전송 함수 (예: executor.send_uart)
+        :param tracer: LineTracer 인스턴스 ('F' 정렬용)
+        :param pose_estimator: PoseEstimator (있으면 추정 위치/방향으로 단계 완료 판단)
+        :param clock: 현재 시각 함수 (기본값 time.time, 시뮬레이터는 가상 시계 사용)
+        """
+        self.send = send
+        self.clock = clock or time.time
+        self.tracer = tracer
+        self.pose_estimator = pose_estimator
+        self.name = name
+        self.config = dict(MANEUVER_CONFIG, **(config or {}))
+
+        self.command = None     # 진행 중인 기동 명령
+        self.steps = []         # 남은 단계
+        self.step = None        # 현재 단계
+        self.deadline = 0.0
+        self.last_align_send = 0.0
+
+    def is_busy(self):
+        return self.step is not None
+
+    def cancel(self):
+        if self.step is not None:
+            print(f"[{self.name}] 기동 취소: {self.command} ({self.step.name})")
+        self.command = None
+        self.steps = []
+        self.step = None
+
+    # ==================== 기동 구성 ====================
+
+    def _estimated_timeout(self, fixed_time):
+        if self.pose_estimator is None:
+            return fixed_time
+        return fixed_time * self.config['estimate_timeout_scale']
+
+    def _build_steps(self, cmd, turn_point, target_dir):
+        if cmd == 'F':
+            return [ManeuverStep('align', 'F', self.config['align_timeout'], self._align)]
+
+        if cmd in ('L90', 'R90'):
+            advance_done = turn_done = None
+            turn_time = self.config['turn_time']
+            if self.pose_estimator is not None and turn_point is not None:
+                # 펌웨어 L90/R90은 회전 전에 스스로 조금 전진하므로 그만큼 앞에서 명령 전송
+                x, y = turn_point
+                tolerance = self.config['turn_center_tolerance'] + self.pose_estimator.turn_lead()
+                advance_done = lambda frame, now: self.pose_estimator.distance_to(x, y) <= tolerance
+            if self.pose_estimator is not None and target_dir is not None:
+                tolerance = self.config['turn_heading_tolerance']
+                turn_done = lambda frame, now: abs(self.pose_estimator.heading_error(target_dir)) <= tolerance
+            if self.pose_estimator is not None:
+                turn_time = self.pose_estimator.turn_duration(cmd)  # 전진 + 회전 전체 (펌웨어가 블로킹하는 시간)
+            return [
+                ManeuverStep('advance', 'F', self._estimated_timeout(self.config['turn_advance_time']), advance_done),
+                ManeuverStep('turn', cmd, self._estimated_timeout(turn_time), turn_done),
+            ]
+
+        if cmd == 'B':
+            # 경로의 'B'는 제자리 반전 - 펌웨어의 'B'는 후진이므로 R180으로 전송
+            turn_done = None
+            if self.pose_estimator is not None and target_dir is not None:
+                tolerance = self.config['turn_heading_tolerance']
+                turn_done = lambda frame, now: abs(self.pose_estimator.heading_error(target_dir)) <= tolerance
+            reverse_time = self.config['reverse_time']
+            if self.pose_estimator is not None:
+                reverse_time = self.pose_estimator.turn_duration('R180')
+            return [ManeuverStep('reverse', 'R180', self._estimated_timeout(reverse_time), turn_done)]
+
+        return [ManeuverStep('settle', cmd, self.config['other_time'])]
+
+    def _align(self, frame, now):
+        """'F' 동안 라인트레이서로 중심 보정 (정렬되면 완료)"""
+        if frame is None:
+            return False
+        direction, offset, _, _, found = self.tracer.get_direction(frame)
+        if direction == 'F':
+            return True
+        if now - self.last_align_send >= self.config['align_interval']:
+            self.send(direction + '\n')
+            self.last_align_send = now
+        return False
+
+    # ==================== 실행 ====================
+
+    def start(self, cmd, turn_point=None, target_dir=None, now=None):
+        """
+        기동 시작 (즉시 반환)
+        :param turn_point: 회전할 교차로 셀 (x, y) - 추정기로 회전 시점 판단
+        :param target_dir: 회전 후 절대 방향 (U/R/D/L) - 추정기로 회전 완료 판단
+        """
+        self.command = cmd
+        self.steps = self._build_steps(cmd, turn_point, target_dir)
+        self._enter_next(self.clock() if now is None else now)
+
+    def _enter_next(self, now):
+        if not self.steps:
+            self.step = None
+            self.command = None
+            return
+        self.step = self.steps.pop(0)
+        self.deadline = now + self.step.timeout
+        if self.step.command:
+            self.send(self.step.command + '\n')
+            print(f"[{self.name}] 전송: {self.step.command} ({self.step.name})")
+
+    def tick(self, frame=None, now=None):
+        """
+        프레임마다 호출 - 현재 단계의 완료 조건/마감 시간 확인 후 다음 단계로 진행
+        :return: 기동이 아직 진행 중이면 True
+        """
+        now = self.clock() if now is None else now
+        while self.step is not None:
+            done = self.step.update(frame, now) if self.step.update else False
+            if not done and now < self.deadline:
+                break
+            self._enter_next(now)
+        return self.is_busy()
@@ -1,5 +1,5 @@
-import time
 from .path_planner import DirectionResolver
+from .maneuver import ManeuverRunner
 
 class PathExecutor:
     """
@@ -7,12 +7,14 @@ class PathExecutor:
     LineTracer와 연동하여 'F' 명령 중 실시간 라인 중심 보정도 수행.
     """
 
-    def __init__(self, planner, uart, tracer, start_dir='U'):
+    def __init__(self, planner, uart, tracer, start_dir='U', pose_estimator=None, clock=None):
         """
         :param planner: PathPlanner 인스턴스
         :param uart: UARTHandler 또는 tx_queue 객체
         :param tracer: LineTracer 인스턴스
         :param start_dir: 초기 방향 (기본값 'U')
+        :param pose_estimator: PoseEstimator (있으면 고정 대기 대신 추정 위치/방향으로 회전 시점 판단)
+        :param clock: 기동 시간 기준 시계 (기본값 time.time)
         """
         self.planner = planner
         self.uart = uart
@@ -21,6 +23,9 @@ class PathExecutor:
         self.command_queue = []
         self.executing = False
         self.turning = False  # 회전 중 플래그
+        self.pose_estimator = pose_estimator
+        # 회전/정렬 기동은 메인 루프의 tick()으로 진행 (프레임 처리를 막지 않음)
+        self.maneuver = ManeuverRunner(self.send_uart, tracer, pose_estimator, name="PathExecutor", clock=clock)
 
     def stm32_format_command(self, cmd):
         if cmd in ('F', 'B', 'L90', 'R90'):
@@ -37,23 +42,20 @@ class PathExecutor:
         else:
             self.uart.put(msg)
 
-    def follow_line_until_aligned(self, frame_getter, timeout=1.2):
+    def tick(self, frame=None):
         """
-        'F' 명령어 동안 라인트레이서를 이용해 라인을 따라가며 중심 보정
-        :param frame_getter: 프레임을 리턴하는 함수 (예: picam2.capture_array)
-        :param timeout: 최대 보정 시간
+        진행 중인 기동을 한 단계 진행 (메인 루프에서 프레임마다 호출)
+        :param frame: 현재 프레임 또는 프레임을 리턴하는 함수
+        :return: 기동이 아직 진행 중이면 True
         """
-        start_time = time.time()
-        while True:
-            frame = frame_getter()
-            direction, offset, _, _, found = self.tracer.get_direction(frame)
+        if callable(frame):
+            frame = frame()
+        self.turning = self.maneuver.tick(frame)
+        return self.turning
 
-            # 중심 정렬 성공 or 시간 초과 시 종료
-            if direction == 'F' or time.time() - start_time > timeout:
-                break
-
-            self.send_uart(direction + '\n')
-            time.sleep(0.05)
+    def is_maneuvering(self):
+        """회전/정렬 기동 중이면 True (이때는 라인트레이싱 명령을 보내지 않음)"""
+        return self.maneuver.is_busy()
 
     def run_to_next_target(self, frame_getter):
         """
@@ -85,7 +87,14 @@ class PathExecutor:
         self.executing = True
         return True
 
-    def execute_next_command(self, frame_getter):
+    def execute_next_command(self, frame=None):
+        """
+        다음 명령의 기동을 시작하고 바로 반환 (이후 진행은 tick()에서)
+        :param frame: 현재 프레임 또는 프레임을 리턴하는 함수 (있으면 첫 tick까지 수행)
+        """
+        if self.maneuver.is_busy():
+            return  # 이전 기동 진행 중
+
         if not self.command_queue:
             if self.executing:
                 print("[PathExecutor]  경로 주행 완료")
@@ -93,29 +102,21 @@ class PathExecutor:
             return
 
         cmd = self.command_queue.pop(0)  # peek!
-
-        if cmd == 'F': # F는 current_dir은 그대로 진행
-            self.send_uart('F\n')
-            self.follow_line_until_aligned(frame_getter)
-
-        elif cmd in ('L90', 'R90'):
+        if cmd in ('L90', 'R90'):
             print("[PathExecutor] L90/R90: 먼저 전진 후 회전")
-            self.send_uart('F\n')
-            time.sleep(0.85)
-            self.send_uart(cmd+'\n')
-            print(f"[PathExecutor] 전송: {cmd}")
-            time.sleep(0.9)
 
-            # 회전 후 current_dir 갱신
-            self.current_dir = self._get_next_direction(self.current_dir, cmd)
-
-        else:
-            self.send_uart(cmd+'\n')
-            print(f"[PathExecutor] 전송: {cmd}")
-            time.sleep(1)
-            # 기타 회전류 명령도 current_dir 갱신 필요 시 처리
-            if cmd in ('L90', 'R90', 'B'):
-                self.current_dir = self._get_next_direction(self.current_dir, cmd)
+        # F는 current_dir 그대로, 회전류 명령은 기동 시작과 함께 current_dir 갱신
+        next_dir = self._get_next_direction(self.current_dir, cmd)
+        self.maneuver.start(
+            cmd,
+            turn_point=(self.planner.now_pos_x, self.planner.now_pos_y),
+            target_dir=next_dir
+        )
+        if cmd in ('L90', 'R90', 'B'):
+            self.current_dir = next_dir
+
+        if frame is not None:
+            self.tick(frame)
 
     def _get_next_direction(self, current_dir, cmd):
         dirs = ['U', 'R', 'D', 'L']
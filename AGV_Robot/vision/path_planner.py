@@ -1,8 +1,9 @@
-from collections import deque
+from .store_map import as_store_map
 
 class PathPlanner:
     def __init__(self, position_map):
-        self.position_map = position_map             # AGV 위치 맵
+        self.position_map = position_map             # AGV 위치 맵 (StoreMap 또는 list-of-lists)
+        self.store_map = as_store_map(position_map)  # 배열 기반 BFS용
         self.now_pos_x, self.now_pos_y = [5, 0]      # 현재 위치
         self.next_pos_x, self.next_pos_y = [0, 0]    # 다음 위치
         self.shopping_list = [[0, 1], [0, 3], [0, 5]]  # 쇼핑을 해야할 위치 (리스트)
@@ -23,47 +24,18 @@ class PathPlanner:
 
     def bfs(self, target_x, target_y):
         print(f"[BFS] BFS 탐색 시작: 현재=({self.now_pos_x},{self.now_pos_y}) → 목표=({target_x},{target_y})")
-        move = [[-1, 0], [0, 1], [1, 0], [0, -1]]   # AGV 이동방향 (상, 우, 하, 좌 순서로)
-        
-        n, m = len(self.position_map), len(self.position_map[0])
-        visited = [[False]*m for _ in range(n)]         # 방문했는지 확인하는 맵
-        prev = [[None]*m for _ in range(n)] # 방문 경로를 저장하는 맵 
-        queue = deque()
-
-        # 현재의 위치를 방문처리
-        sx, sy = self.now_pos_x, self.now_pos_y
-        queue.append((sx, sy))
-        visited[sx][sy] = 1
-
-        while queue:
-            x, y = queue.popleft()
-
-            if (x, y) == (target_x, target_y): # 목표 위치도달하면 경로를 복원
-                path = []
-                while (x, y) != (sx, sy):
-                    path.append([x, y])
-                    x, y = prev[x][y]
-                path.append([sx, sy])
-                path.reverse()
-                return path
-
-            for dx, dy in move:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < n and 0 <= ny < m and self.position_map[nx][ny] == 0:
-                    if not visited[nx][ny]:
-                        visited[nx][ny] = True
-                        prev[nx][ny] = (x, y)
-                        queue.append((nx, ny))
-        
-        return None # 경로가 없는 경우 None 반환
+        return self.store_map.bfs((self.now_pos_x, self.now_pos_y), (target_x, target_y))  # 경로가 없으면 None
 
     # 쇼핑 리스트 중에 가장 최소 거리를 찾기 => 만약 쇼핑해야할 위치가 3개면 가장 짧은 거리의 위치 1개를 반환함
     def path_find(self):
         min_dist = float('inf') # 최소 거리
         best_path = None        # 최소 거리의 경로
         best_next_path = None   # AGV가 다음 가야할 과자의 위치
+        # 현재 위치에서 한 번만 탐색하고 모든 상품 위치까지의 경로를 복원
+        start = (self.now_pos_x, self.now_pos_y)
+        prev = self.store_map.bfs_tree(start, self.shopping_list)
         for x, y in self.shopping_list:
-            path = self.bfs(x, y)
+            path = self.store_map.path_from_tree(prev, start, (x, y))
 
             if path:
                 if len(path) < min_dist: # 최소 경로라면
@@ -0,0 +1,369 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque, namedtuple
+
+# 좌표계: planner와 동일한 격자 좌표 (x=행, y=열, 셀 단위 연속값)
+# heading: 도 단위, 시계 방향 (U=0, R=90, D=180, L=270)
+POSE_CONFIG = {
+    'forward_speed': 0.45,      # 'F' 명령 시 전진 속도 (셀/초) - 실측 필요
+    # 회전은 펌웨어(stm_controller/App/ap.c) 복합 명령 순서대로 예측 (시간은 펌웨어 값, 속도는 실측 필요)
+    'turn_advance_time': 1.8,   # L90/R90: 회전 전 저속 전진 시간 (HAL_Delay(1800))
+    'turn_advance_speed': 0.2,  # L90/R90 저속 전진 속도 (셀/초, Set_Speed(30))
+    'turn_rotate_time': 1.45,   # L90/R90 제자리 회전 시간 (HAL_Delay(1450))
+    'reverse_stop_time': 0.1,   # R180: 회전 전 정지 시간 (HAL_Delay(100))
+    'reverse_rotate_time': 2.9, # R180 제자리 회전 시간 (HAL_Delay(2900))
+    'cell_size_m': 0.30,        # 격자 한 칸 실제 거리 (m)
+    'marker_size_m': 0.05,      # ArUco 마커 한 변 길이 (m)
+    'camera_offset_m': 0.08,    # 카메라 시야 중심이 차체 회전 중심보다 앞선 거리 (m)
+    'marker_gain': 0.8,         # 마커 관측 보정 비율 (1이면 관측값으로 교체)
+    'heading_gain': 0.5,        # 마커 기울기로 방향 보정 비율
+    'ticks_per_cell': 1200,     # 엔코더 틱 / 셀
+    'wheel_base_cells': 0.5,    # 바퀴 간격 (셀 단위)
+    'sensor_timeout': 0.2,      # 이 시간 동안 엔코더/IMU 줄이 없으면 명령 기반 예측으로 복귀 (초)
+    'history_seconds': 5.0,     # 지연된 위치 보정을 위해 보관할 추정 이력 (초)
+}
+
+DIR_HEADING = {'U': 0.0, 'R': 90.0, 'D': 180.0, 'L': 270.0}
+
+Pose = namedtuple('Pose', ['x', 'y', 'heading', 'stamp'])
+
+
+def _wrap(angle):
+    """각도를 [-180, 180) 범위로"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def _heading_vector(heading):
+    """heading 방향 단위 벡터 (격자 x, y)"""
+    rad = math.radians(heading)
+    return -math.cos(rad), math.sin(rad)
+
+
+def parse_marker_id(qr_info):
+    """'ID:003' 형식 → 3 (형식이 다르면 None)"""
+    if isinstance(qr_info, int):
+        return qr_info
+    try:
+        return int(str(qr_info).split(':')[-1])
+    except ValueError:
+        return None
+
+
+class PoseEstimator:
+    """
+    마커 관측 + 명령 기반 움직임 + STM32 엔코더/IMU로 (x, y, heading)을 연속 추정하는 클래스
+    - 명령/센서로 예측하고, 마커를 볼 때마다 그 프레임 시점 기준으로 보정
+    - 관제센터 위치 응답(MQTT)이 늦게 와도 마커를 본 프레임 시점의 추정값에 보정을 적용
+    - 모든 메서드는 스레드 안전 (메인 루프, ArUco 스레드, UART 수신 스레드에서 동시에 호출)
+
+    STM32 줄 형식 (보내는 경우에만 사용):
+        ENC,<왼쪽 누적 틱>,<오른쪽 누적 틱>
+        IMU,<누적 yaw 도, 시계 방향>
+    """
+
+    def __init__(self, start_x=0, start_y=0, start_dir='U', config=None):
+        self.config = dict(POSE_CONFIG, **(config or {}))
+        self.lock = threading.Lock()
+
+        now = time.monotonic()
+        self.x = float(start_x)
+        self.y = float(start_y)
+        self.heading = DIR_HEADING[start_dir]
+        self.stamp = now
+
+        # 명령 기반 움직임
+        self.speed = 0.0            # 셀/초
+        self.turn_target = None     # 회전 목표 heading (회전 중이 아니면 None)
+        self.turn_start = 0.0       # 제자리 회전을 시작하는 시각 (그 전까지는 turn_advance_speed로 전진)
+        self.turn_advance_speed = 0.0
+        self.turn_rate = 0.0        # 이번 회전의 회전 속도 (도/초)
+
+        # 센서
+        self.last_ticks = None
+        self.last_encoder_time = 0.0
+        self.imu_offset = None      # heading = imu_yaw + imu_offset
+        self.last_imu_time = 0.0
+
+        # 마커
+        self.marker_cells = {}      # {marker_id: (x, y)} - 관제센터 응답으로 학습
+        self.sightings = {}         # {marker_id: (stamp, 전방 오프셋, 측방 오프셋, 기울기)}
+        self.history = deque()      # [(stamp, x, y, heading)]
+        self.fix_count = 0
+
+    # ==================== 예측 ====================
+
+    def _sensor_active(self, last_time, now):
+        return now - last_time < self.config['sensor_timeout']
+
+    def _advance(self, speed, dt):
+        vx, vy = _heading_vector(self.heading)
+        self.x += vx * speed * dt
+        self.y += vy * speed * dt
+
+    def _predict(self, now):
+        """마지막 추정 시점부터 now까지 명령 기반으로 적분 (엔코더/IMU가 살아 있으면 해당 축은 센서가 담당)"""
+        if now <= self.stamp:
+            return
+        encoder_active = self._sensor_active(self.last_encoder_time, now)
+        t = self.stamp
+
+        if self.turn_target is not None and t < self.turn_start:
+            # 복합 회전의 회전 전 구간 (L90/R90 저속 전진, R180 정지)
+            advance_dt = min(now, self.turn_start) - t
+            if not encoder_active:
+                self._advance(self.turn_advance_speed, advance_dt)
+            t += advance_dt
+
+        if self.turn_target is not None and t < now and not self._sensor_active(self.last_imu_time, now):
+            remaining = _wrap(self.turn_target - self.heading)
+            step = self.turn_rate * (now - t)
+            if abs(remaining) <= step:
+                self.heading = self.turn_target % 360.0
+                self.turn_target = None
+                t += abs(remaining) / self.turn_rate  # 회전이 끝난 뒤 남은 시간은 아래에서 전진
+            else:
+                self.heading = (self.heading + math.copysign(step, remaining)) % 360.0
+
+        if self.turn_target is None and t < now and not encoder_active:
+            self._advance(self.speed, now - t)
+
+        self.stamp = now
+        self._record()
+
+    def _record(self):
+        self.history.append((self.stamp, self.x, self.y, self.heading))
+        limit = self.stamp - self.config['history_seconds']
+        while self.history and self.history[0][0] < limit:
+            self.history.popleft()
+
+    def _pose_at(self, stamp):
+        """이력에서 stamp에 가장 가까운 추정값 (인덱스, x, y, heading)"""
+        if not self.history:
+            return None
+        stamps = [entry[0] for entry in self.history]
+        idx = min(bisect_left(stamps, stamp), len(stamps) - 1)
+        if idx > 0 and abs(stamps[idx - 1] - stamp) < abs(stamps[idx] - stamp):
+            idx -= 1
+        return (idx,) + self.history[idx][1:]
+
+    # ==================== 입력 ====================
+
+    def on_command(self, cmd, stamp=None):
+        """STM32로 보낸 주행 명령 반영 (F/L/R: 라인 추종 전진, B: 후진, S: 정지, L90/R90/R180: 회전)"""
+        cmd = cmd.strip()
+        now = stamp or time.monotonic()
+        with self.lock:
+            self._predict(now)
+            if cmd in ('F', 'L', 'R'):
+                self.speed = self.config['forward_speed']
+            elif cmd == 'B':
+                self.speed = -self.config['forward_speed']
+            elif cmd == 'S':
+                self.speed = 0.0
+            elif cmd in ('L90', 'R90', 'R180', 'B90'):
+                # 펌웨어 복합 명령: L90/R90은 저속 전진 후 회전, R180은 잠시 정지 후 반전 (끝나면 다음 명령까지 정지로 봄)
+                config = self.config
+                if cmd in ('L90', 'R90'):
+                    delta = -90.0 if cmd == 'L90' else 90.0
+                    pre_time, rotate_time = config['turn_advance_time'], config['turn_rotate_time']
+                    self.turn_advance_speed = config['turn_advance_speed']
+                else:
+                    delta = 180.0
+                    pre_time, rotate_time = config['reverse_stop_time'], config['reverse_rotate_time']
+                    self.turn_advance_speed = 0.0
+                base = self.turn_target if self.turn_target is not None else round(self.heading / 90.0) * 90.0
+                self.turn_target = (base + delta) % 360.0
+                self.turn_start = now + pre_time
+                self.turn_rate = abs(delta) / rotate_time
+                self.speed = 0.0
+
+    def on_uart_line(self, line, stamp=None):
+        """STM32 수신 줄 처리 (ENC/IMU가 아니면 무시)"""
+        parts = line.strip().split(',')
+        now = stamp or time.monotonic()
+        try:
+            if parts[0] == 'ENC' and len(parts) >= 3:
+                self._on_encoder(int(parts[1]), int(parts[2]), now)
+            elif parts[0] == 'IMU' and len(parts) >= 2:
+                self._on_imu(float(parts[1]), now)
+        except ValueError:
+            pass
+
+    def _on_encoder(self, left, right, now):
+        with self.lock:
+            self._predict(now)
+            if self.last_ticks is not None:
+                d_left = (left - self.last_ticks[0]) / self.config['ticks_per_cell']
+                d_right = (right - self.last_ticks[1]) / self.config['ticks_per_cell']
+                distance = (d_left + d_right) / 2.0
+                if not self._sensor_active(self.last_imu_time, now):
+                    d_heading = math.degrees((d_left - d_right) / self.config['wheel_base_cells'])
+                    self.heading = (self.heading + d_heading) % 360.0
+                    if self.turn_target is not None and abs(_wrap(self.turn_target - self.heading)) < 5.0:
+                        self.turn_target = None
+                vx, vy = _heading_vector(self.heading)
+                self.x += vx * distance
+                self.y += vy * distance
+            self.last_ticks = (left, right)
+            self.last_encoder_time = now
+            self._record()
+
+    def _on_imu(self, yaw, now):
+        with self.lock:
+            self._predict(now)
+            if self.imu_offset is None:
+                self.imu_offset = self.heading - yaw
+            self.heading = (yaw + self.imu_offset) % 360.0
+            if self.turn_target is not None and abs(_wrap(self.turn_target - self.heading)) < 5.0:
+                self.turn_target = None
+            self.last_imu_time = now
+            self._record()
+
+    def consume_uart(self, rx_queue):
+        """UART 수신 큐를 계속 비우며 센서 줄 반영 (별도 스레드에서 실행)"""
+        while True:
+            line = rx_queue.get()
+            self.on_uart_line(line)
+
+    def marker_offset(self, marker, frame_shape):
+        """
+        마커 꼭짓점 → 차체 기준 (전방, 측방) 거리(셀)와 기울기(도)
+        바닥을 내려다보는 카메라 기준: 마커 한 변 픽셀 길이로 m/px를 구하고, 화면 위쪽을 전방으로 봄
+        """
+        corners = marker['corners']
+        side_px = sum(
+            math.dist(corners[i], corners[(i + 1) % 4]) for i in range(4)
+        ) / 4.0
+        if side_px <= 0:
+            return None
+
+        height, width = frame_shape[:2]
+        center_x = sum(c[0] for c in corners) / 4.0
+        center_y = sum(c[1] for c in corners) / 4.0
+        meters_per_px = self.config['marker_size_m'] / side_px
+
+        forward = (height / 2.0 - center_y) * meters_per_px + self.config['camera_offset_m']
+        lateral = (center_x - width / 2.0) * meters_per_px
+        # 윗변 기울기 (마커는 격자 축에 맞춰 붙어 있으므로 ±45도 안의 값이 방향 오차)
+        (x0, y0), (x1, y1) = corners[0], corners[1]
+        skew = (math.degrees(math.atan2(y1 - y0, x1 - x0)) + 45.0) % 90.0 - 45.0
+
+        cell = self.config['cell_size_m']
+        return forward / cell, lateral / cell, skew
+
+    def on_marker(self, marker, frame_shape, stamp):
+        """
+        ArUco 관측 반영 (마커를 본 프레임의 타임스탬프 기준)
+        마커 위치를 이미 알고 있으면 바로 보정, 모르면 관제센터 응답이 올 때 보정
+        """
+        offset = self.marker_offset(marker, frame_shape)
+        if offset is None:
+            return
+        marker_id = int(marker['id'])
+        with self.lock:
+            self.sightings[marker_id] = (stamp,) + offset
+            cell = self.marker_cells.get(marker_id)
+            if cell is not None:
+                self._apply_fix(cell, stamp, offset)
+
+    def on_position_fix(self, x, y, qr_info=None, stamp=None):
+        """
+        관제센터 위치 응답 반영
+        해당 마커를 본 프레임이 있으면 그 시점 기준으로 보정하고, 없으면 지금 위치를 셀 중심으로 보정
+        """
+        marker_id = parse_marker_id(qr_info) if qr_info is not None else None
+        with self.lock:
+            self._predict(time.monotonic())
+            sighting = self.sightings.get(marker_id) if marker_id is not None else None
+            if marker_id is not None:
+                self.marker_cells[marker_id] = (x, y)
+            if sighting is not None:
+                self._apply_fix((x, y), sighting[0], sighting[1:])
+            else:
+                self._apply_fix((x, y), stamp or self.stamp, (0.0, 0.0, 0.0))
+
+    def _apply_fix(self, cell, stamp, offset):
+        """stamp 시점의 추정값과 관측값의 차이를 그 이후 이력과 현재 추정값에 적용"""
+        past = self._pose_at(stamp)
+        if past is None:
+            return
+        idx, past_x, past_y, past_heading = past
+        forward, lateral, skew = offset
+
+        # 관측 시점 heading: 격자 축으로 맞춘 뒤 마커 기울기만큼 보정
+        axis_heading = round(past_heading / 90.0) * 90.0
+        observed_heading = axis_heading - skew
+        d_heading = _wrap(observed_heading - past_heading) * self.config['heading_gain']
+
+        # 마커(셀 중심)에서 관측 오프셋만큼 되돌린 위치가 관측 시점의 차체 위치
+        fx, fy = _heading_vector(observed_heading)
+        rx, ry = _heading_vector(observed_heading + 90.0)
+        observed_x = cell[0] - fx * forward - rx * lateral
+        observed_y = cell[1] - fy * forward - ry * lateral
+
+        gain = self.config['marker_gain']
+        dx = (observed_x - past_x) * gain
+        dy = (observed_y - past_y) * gain
+
+        for i in range(idx, len(self.history)):
+            t, hx, hy, hh = self.history[i]
+            self.history[i] = (t, hx + dx, hy + dy, (hh + d_heading) % 360.0)
+        self.x += dx
+        self.y += dy
+        self.heading = (self.heading + d_heading) % 360.0
+        if self.turn_target is None and self.imu_offset is not None:
+            self.imu_offset += d_heading
+        self.fix_count += 1
+
+    # ==================== 출력 ====================
+
+    def update(self, now=None):
+        """현재 시각까지 예측한 추정값 (메인 루프에서 프레임마다 호출)"""
+        with self.lock:
+            self._predict(now or time.monotonic())
+            return Pose(self.x, self.y, self.heading, self.stamp)
+
+    get_pose = update
+
+    def cell(self):
+        """추정 위치의 가장 가까운 셀"""
+        pose = self.update()
+        return int(round(pose.x)), int(round(pose.y))
+
+    def distance_to(self, x, y):
+        """현재 진행 방향 기준 (x, y) 셀 중심까지 남은 전방 거리 (지나쳤으면 음수)"""
+        pose = self.update()
+        vx, vy = _heading_vector(pose.heading)
+        return (x - pose.x) * vx + (y - pose.y) * vy
+
+    def heading_error(self, direction):
+        """목표 방향(U/R/D/L)까지 남은 회전 각도"""
+        return _wrap(DIR_HEADING[direction] - self.update().heading)
+
+    def turn_lead(self):
+        """L90/R90 복합 명령이 회전 전에 스스로 전진하는 거리 (셀)"""
+        return self.config['turn_advance_speed'] * self.config['turn_advance_time']
+
+    def turn_duration(self, cmd):
+        """복합 회전 명령(L90/R90/R180)의 펌웨어 소요 시간 (초)"""
+        if cmd in ('L90', 'R90'):
+            return self.config['turn_advance_time'] + self.config['turn_rotate_time']
+        return self.config['reverse_stop_time'] + self.config['reverse_rotate_time']
+
+    def is_turning(self):
+        with self.lock:
+            return self.turn_target is not None
+
+
+class CommandTap:
+    """tx_queue 대신 넘겨서 STM32로 나가는 명령을 PoseEstimator에도 전달하는 래퍼"""
+
+    def __init__(self, tx_queue, pose_estimator):
+        self.tx_queue = tx_queue
+        self.pose_estimator = pose_estimator
+
+    def put(self, msg):
+        self.pose_estimator.on_command(msg)
+        self.tx_queue.put(msg)
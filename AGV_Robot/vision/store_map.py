@@ -0,0 +1,167 @@
+import json
+import os
+
+import numpy as np
+
+# 저장소 공용 매장 맵 (AGV, 관제센터 GUI, 사용자 컨트롤러가 같은 파일 사용)
+DEFAULT_MAP_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "maps", "store_map.json"
+)
+
+
+class StoreMap:
+    """
+    매장 맵
+    - occupancy: (rows, cols) uint8 배열 (0: 이동 가능, 1: 매대/벽)
+    - neighbors: (rows*cols, 4) int32 배열, 셀 번호(x*cols+y)별 상/우/하/좌 이동 가능 셀 번호 (없으면 -1)
+    기존 list-of-lists 맵처럼 grid[x][y], len(grid)로도 접근 가능
+    """
+
+    def __init__(self, occupancy, shelves=None, detection_poses=None, checkout=None,
+                 markers=None, start=None, start_dir='U', name=None):
+        self.occupancy = np.ascontiguousarray(occupancy, dtype=np.uint8)
+        self.rows, self.cols = self.occupancy.shape
+        self.shelves = shelves or []                    # [{cell, pick, label, product}, ...]
+        self.detection_poses = detection_poses or []    # 관리자 AGV 재고 관찰 위치
+        self.checkout = checkout                        # 계산대 위치
+        self.markers = markers or {}                    # {"ID:001": (x, y)} - 관제센터 qr_table과 같은 내용
+        self.start = start
+        self.start_dir = start_dir
+        self.name = name
+        self.neighbors = self._build_neighbors()
+
+    # ==================== 생성 ====================
+
+    @classmethod
+    def from_grid(cls, grid, **kwargs):
+        """기존 list-of-lists 맵 → StoreMap"""
+        return cls(np.array(grid, dtype=np.uint8), **kwargs)
+
+    def _build_neighbors(self):
+        rows, cols = self.rows, self.cols
+        index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+        neighbors = np.full((rows, cols, 4), -1, dtype=np.int32)
+        neighbors[1:, :, 0] = index[:-1, :]    # 상
+        neighbors[:, :-1, 1] = index[:, 1:]    # 우
+        neighbors[:-1, :, 2] = index[1:, :]    # 하
+        neighbors[:, 1:, 3] = index[:, :-1]    # 좌
+        neighbors = neighbors.reshape(-1, 4)
+
+        free = (self.occupancy.ravel() == 0)
+        reachable = free[np.maximum(neighbors, 0)] & (neighbors >= 0)
+        return np.where(reachable, neighbors, -1).astype(np.int32)
+
+    # ==================== 조회 ====================
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, x):
+        return self.occupancy[x]
+
+    def index(self, x, y):
+        return x * self.cols + y
+
+    def cell(self, index):
+        return [int(index // self.cols), int(index % self.cols)]
+
+    def is_free(self, x, y):
+        return 0 <= x < self.rows and 0 <= y < self.cols and self.occupancy[x, y] == 0
+
+    def marker_cell(self, marker_id):
+        return self.markers.get(marker_id)
+
+    def pick_positions(self):
+        return [list(shelf['pick']) for shelf in self.shelves]
+
+    def to_list(self):
+        return self.occupancy.tolist()
+
+    # ==================== 경로 탐색 ====================
+
+    def bfs_tree(self, start, targets=()):
+        """
+        start에서 너비 우선 탐색 (한 단계씩 배열 연산으로 확장)
+        발견 순서가 큐 기반 BFS(상/우/하/좌 순)와 같으므로 같은 최단 경로를 돌려줌
+        :param targets: 셀 리스트 - 모두 발견되면 조기 종료 (비어 있으면 전체 탐색)
+        :return: prev 배열 (셀 번호 → 이전 셀 번호, 미방문 -1, 시작 셀은 자기 자신)
+        """
+        prev = np.full(self.rows * self.cols, -1, dtype=np.int32)
+        source = self.index(*start)
+        prev[source] = source
+        target_index = np.array([self.index(x, y) for x, y in targets if self.is_free(x, y)], dtype=np.int64)
+
+        frontier = np.array([source], dtype=np.int32)
+        while frontier.size:
+            if target_index.size and (prev[target_index] != -1).all():
+                break
+            candidates = self.neighbors[frontier].ravel()
+            parents = np.repeat(frontier, 4)
+            keep = candidates >= 0
+            candidates, parents = candidates[keep], parents[keep]
+            keep = prev[candidates] == -1
+            candidates, parents = candidates[keep], parents[keep]
+            if not candidates.size:
+                break
+            # 같은 셀을 여러 부모가 발견하면 먼저 발견한 쪽 (큐 순서) 유지
+            _, first = np.unique(candidates, return_index=True)
+            first.sort()
+            frontier = candidates[first]
+            prev[frontier] = parents[first]
+        return prev
+
+    def path_from_tree(self, prev, start, target):
+        """bfs_tree 결과로 start → target 경로 복원 ([[x, y], ...], 도달 불가면 None)"""
+        tx, ty = target
+        if not self.is_free(tx, ty) and (tx, ty) != tuple(start):
+            return None
+        node = self.index(tx, ty)
+        if prev[node] == -1:
+            return None
+        source = self.index(*start)
+        path = [self.cell(node)]
+        while node != source:
+            node = int(prev[node])
+            path.append(self.cell(node))
+        path.reverse()
+        return path
+
+    def bfs(self, start, target):
+        return self.path_from_tree(self.bfs_tree(start, [target]), start, target)
+
+
+def as_store_map(grid):
+    """StoreMap 또는 list-of-lists 맵을 StoreMap으로"""
+    return grid if isinstance(grid, StoreMap) else StoreMap.from_grid(grid)
+
+
+def load_store_map(path=None, agv_name=None):
+    """
+    맵 파일 로드 (경로 우선순위: path → 환경변수 STORE_MAP → maps/store_map.json)
+    :param agv_name: agv_overrides에 있는 AGV면 해당 AGV 전용 차단 셀 적용
+    """
+    path = path or os.environ.get("STORE_MAP") or DEFAULT_MAP_PATH
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    # 행 문자열 ("0101...") → 배열 (큰 매장도 list-of-lists 없이 바로 변환)
+    occupancy = np.array([np.frombuffer(row.encode(), dtype=np.uint8) - ord('0') for row in data["rows"]],
+                         dtype=np.uint8)
+    override = data.get("agv_overrides", {}).get(agv_name, {}) if agv_name else {}
+    for x, y in override.get("blocked", []):
+        occupancy[x, y] = 1
+    for x, y in override.get("open", []):
+        occupancy[x, y] = 0
+
+    start = data.get("start", {})
+    start = dict(start, **override.get("start", {}))
+    return StoreMap(
+        occupancy,
+        shelves=data.get("shelves", []),
+        detection_poses=[list(p) for p in data.get("detection_poses", [])],
+        checkout=data.get("checkout"),
+        markers={k: tuple(v) for k, v in data.get("markers", {}).items()},
+        start=tuple(start["position"]) if "position" in start else None,
+        start_dir=start.get("dir", 'U'),
+        name=data.get("name"),
+    )
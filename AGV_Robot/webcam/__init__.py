@@ -0,0 +1,24 @@
+""" 재고 탐지 패키지 - 무거운 모듈(모델 백엔드, 웹캠)은 처음 접근할 때 import """
+
+import importlib
+
+# 공개 이름 → 정의된 모듈 (from webcam import SnackDetector 시점에 import)
+_LAZY_ATTRS = {
+    'SnackDetector': 'webcam.detection',
+    'detect_start': 'webcam.detection',
+    'DetectionService': 'webcam.detection_service',
+    'get_detection_service': 'webcam.detection_service',
+    'stop_detection_service': 'webcam.detection_service',
+    'create_backend': 'webcam.backends',
+    'available_backends': 'webcam.backends',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,74 @@
+""" 추론 백엔드 레지스트리 - create_backend(name)으로 생성 (처음 사용할 때만 import) """
+
+import importlib
+
+from webcam.config import BACKEND_CONFIG, CLASS_NAMES
+
+# 백엔드 이름 → "모듈:클래스" (torch, onnxruntime, tflite는 선택된 백엔드 생성 시에만 import)
+BACKEND_REGISTRY = {
+    'ultralytics': 'webcam.backends.ultralytics_backend:UltralyticsBackend',
+    'onnx': 'webcam.backends.onnx_backend:OnnxBackend',
+    'tflite': 'webcam.backends.tflite_backend:TFLiteBackend',
+}
+
+# 한 번 import한 백엔드 클래스 캐시
+_loaded_classes = {}
+
+
+def register_backend(name, target):
+    """
+    백엔드 등록
+
+    Args:
+        name: 백엔드 이름
+        target: "모듈:클래스" 문자열 또는 InferenceBackend 하위 클래스
+    """
+    if isinstance(target, str):
+        BACKEND_REGISTRY[name] = target
+        _loaded_classes.pop(name, None)
+    else:
+        BACKEND_REGISTRY[name] = f"{target.__module__}:{target.__name__}"
+        _loaded_classes[name] = target
+
+
+def available_backends():
+    """등록된 백엔드 이름 목록"""
+    return sorted(BACKEND_REGISTRY)
+
+
+def get_backend_class(name):
+    """백엔드 클래스 반환 (첫 호출 시 모듈 import)"""
+    if name not in BACKEND_REGISTRY:
+        raise ValueError(f"지원하지 않는 백엔드: {name} (등록된 백엔드: {available_backends()})")
+
+    if name not in _loaded_classes:
+        module_name, class_name = BACKEND_REGISTRY[name].split(':')
+        module = importlib.import_module(module_name)
+        _loaded_classes[name] = getattr(module, class_name)
+    return _loaded_classes[name]
+
+
+def create_backend(name=None, model_path=None, load=True, **options):
+    """
+    이름으로 추론 백엔드 생성
+
+    Args:
+        name: 레지스트리에 등록된 이름 (None이면 BACKEND_CONFIG['name'])
+        model_path: 모델 경로 (None이면 BACKEND_CONFIG['model_paths'][name])
+        load: True면 모델까지 로드
+        options: input_size, iou_threshold, num_threads 오버라이드
+    """
+    name = name or BACKEND_CONFIG['name']
+    backend_class = get_backend_class(name)
+
+    params = {
+        'input_size': BACKEND_CONFIG['input_size'],
+        'iou_threshold': BACKEND_CONFIG['iou_threshold'],
+        'num_threads': BACKEND_CONFIG['num_threads'],
+    }
+    params.update(options)
+
+    backend = backend_class(model_path or BACKEND_CONFIG['model_paths'][name], CLASS_NAMES, **params)
+    if load:
+        backend.load()
+    return backend
@@ -0,0 +1,119 @@
+""" 추론 백엔드 공통 인터페이스 및 YOLO 출력 후처리 """
+
+import cv2
+import numpy as np
+
+
+class InferenceBackend:
+    """
+    SnackDetector가 사용하는 추론 백엔드 인터페이스
+    infer()는 SnackDetector.detect_objects와 같은
+    [{'bbox': (x1, y1, x2, y2), 'name': str, 'confidence': float}, ...] 형태를 반환
+    """
+
+    name = "base"
+
+    def __init__(self, model_path, class_names, input_size=320, iou_threshold=0.45, num_threads=4):
+        self.model_path = model_path
+        self.class_names = class_names
+        self.input_size = input_size
+        self.iou_threshold = iou_threshold
+        self.num_threads = num_threads
+
+    def load(self):
+        """모델 로드 (무거운 import는 여기서 수행)"""
+        raise NotImplementedError
+
+    def infer(self, frame, conf_threshold):
+        """한 프레임 추론"""
+        raise NotImplementedError
+
+    def infer_batch(self, frames, conf_threshold):
+        """여러 프레임 추론 (배치를 지원하지 않는 백엔드는 순차 실행)"""
+        return [self.infer(frame, conf_threshold) for frame in frames]
+
+    def close(self):
+        """자원 해제"""
+        pass
+
+    def class_name(self, class_id):
+        if class_id < len(self.class_names):
+            return self.class_names[class_id]
+        return f"Unknown_{class_id}"
+
+
+def letterbox(frame, size, color=(114, 114, 114)):
+    """
+    비율을 유지하며 size x size로 리사이즈 + 패딩 (Ultralytics 전처리와 동일)
+
+    Returns:
+        (padded, scale, (pad_x, pad_y))
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    pad_x = (size - new_w) // 2
+    pad_y = (size - new_h) // 2
+    padded = cv2.copyMakeBorder(
+        frame, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+        cv2.BORDER_CONSTANT, value=color
+    )
+    return padded, scale, (pad_x, pad_y)
+
+
+def decode_yolo_output(output, backend, orig_shape, scale, pad, conf_threshold):
+    """
+    Ultralytics YOLOv8/v11 export 출력([1, 4+nc, N] 또는 [1, N, 4+nc]) 디코딩 + NMS
+
+    Args:
+        output: 모델 출력 텐서 (float, 역양자화 완료)
+        backend: 클래스명/입력 크기/IoU 임계값을 가진 InferenceBackend
+        orig_shape: 원본 프레임 (h, w)
+        scale, pad: letterbox() 반환값
+    """
+    predictions = np.squeeze(output, axis=0)
+    num_classes = len(backend.class_names)
+    if predictions.shape[0] == 4 + num_classes and predictions.shape[1] != 4 + num_classes:
+        predictions = predictions.T  # [N, 4+nc]
+
+    boxes_xywh = predictions[:, :4].astype(np.float32)
+    class_scores = predictions[:, 4:]
+    class_ids = np.argmax(class_scores, axis=1)
+    confidences = class_scores[np.arange(len(class_ids)), class_ids]
+
+    keep = confidences >= conf_threshold
+    if not np.any(keep):
+        return []
+    boxes_xywh, class_ids, confidences = boxes_xywh[keep], class_ids[keep], confidences[keep]
+
+    # TFLite export는 0~1 정규화 좌표를 출력
+    if boxes_xywh.max() <= 1.5:
+        boxes_xywh *= backend.input_size
+
+    # letterbox 좌표 → 원본 프레임 좌표
+    orig_h, orig_w = orig_shape
+    pad_x, pad_y = pad
+    x1 = (boxes_xywh[:, 0] - boxes_xywh[:, 2] / 2 - pad_x) / scale
+    y1 = (boxes_xywh[:, 1] - boxes_xywh[:, 3] / 2 - pad_y) / scale
+    w = boxes_xywh[:, 2] / scale
+    h = boxes_xywh[:, 3] / scale
+
+    nms_boxes = np.stack([x1, y1, w, h], axis=1).tolist()
+    indices = cv2.dnn.NMSBoxes(nms_boxes, confidences.astype(float).tolist(), conf_threshold, backend.iou_threshold)
+
+    detections = []
+    for i in np.array(indices).flatten():
+        bx1 = int(max(0, min(x1[i], orig_w)))
+        by1 = int(max(0, min(y1[i], orig_h)))
+        bx2 = int(max(0, min(x1[i] + w[i], orig_w)))
+        by2 = int(max(0, min(y1[i] + h[i], orig_h)))
+        detections.append({
+            'bbox': (bx1, by1, bx2, by2),
+            'name': backend.class_name(int(class_ids[i])),
+            'confidence': float(confidences[i])
+        })
+    return detections
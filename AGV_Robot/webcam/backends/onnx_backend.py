@@ -0,0 +1,49 @@
+""" ONNX Runtime CPU 추론 백엔드 (Ultralytics ONNX export 모델) """
+
+import cv2
+import numpy as np
+
+from webcam.backends.base import InferenceBackend, letterbox, decode_yolo_output
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def load(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # 동적 배치 export 여부 (첫 번째 차원이 문자열이면 배치 가능)
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        if isinstance(model_input.shape[2], int):
+            self.input_size = model_input.shape[2]
+
+    def preprocess(self, frame):
+        padded, scale, pad = letterbox(frame, self.input_size)
+        rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+        tensor = rgb.transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, scale, pad
+
+    def infer(self, frame, conf_threshold):
+        tensor, scale, pad = self.preprocess(frame)
+        output = self.session.run(None, {self.input_name: tensor[np.newaxis]})[0]
+        return decode_yolo_output(output, self, frame.shape[:2], scale, pad, conf_threshold)
+
+    def infer_batch(self, frames, conf_threshold):
+        if not self.dynamic_batch or len(frames) <= 1:
+            return super().infer_batch(frames, conf_threshold)
+
+        prepared = [self.preprocess(frame) for frame in frames]
+        batch = np.stack([tensor for tensor, _, _ in prepared])
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+
+        return [
+            decode_yolo_output(outputs[i:i + 1], self, frame.shape[:2], scale, pad, conf_threshold)
+            for i, (frame, (_, scale, pad)) in enumerate(zip(frames, prepared))
+        ]
@@ -0,0 +1,82 @@
+""" 멀티 프로세스 추론 풀 - 프레임을 코어별 워커 프로세스에 분배 """
+
+import multiprocessing as mp
+import os
+
+from webcam.config import BACKEND_CONFIG
+
+# 워커 프로세스마다 하나씩 생성되는 백엔드
+_worker_backend = None
+
+
+def _init_worker(name, model_path, options):
+    global _worker_backend
+    from webcam.backends import create_backend
+
+    _worker_backend = create_backend(name, model_path=model_path, **options)
+
+
+def _infer_chunk(args):
+    frames, conf_threshold = args
+    return _worker_backend.infer_batch(frames, conf_threshold)
+
+
+class InferencePool:
+    """
+    백엔드를 워커 프로세스마다 로드해 두고 프레임을 샤딩하여 병렬 추론
+    (GIL 및 단일 세션 스레드 한계를 넘어 코어 수만큼 처리량 확보)
+
+    SnackDetector는 BACKEND_CONFIG['pool_tiles']가 켜져 있으면 ROI 타일 추론에 사용하고,
+    webcam.benchmark_backends는 단일 프로세스 대비 처리량 비교에 사용
+    """
+
+    def __init__(self, backend_name=None, model_path=None, workers=None, chunk_size=1, **backend_options):
+        self.backend_name = backend_name or BACKEND_CONFIG['name']
+        self.model_path = model_path
+        self.workers = workers or BACKEND_CONFIG['pool_workers'] or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+
+        # 워커끼리 코어를 나눠 쓰므로 워커당 스레드는 1개가 기본
+        self.backend_options = {'num_threads': 1}
+        self.backend_options.update(backend_options)
+        self.pool = None
+
+    def start(self):
+        if self.pool is None:
+            # torch/onnxruntime 스레드 풀을 fork로 복제하지 않도록 spawn 사용
+            ctx = mp.get_context('spawn')
+            self.pool = ctx.Pool(
+                processes=self.workers,
+                initializer=_init_worker,
+                initargs=(self.backend_name, self.model_path, self.backend_options)
+            )
+        return self
+
+    def _chunks(self, frames, conf_threshold):
+        for i in range(0, len(frames), self.chunk_size):
+            yield frames[i:i + self.chunk_size], conf_threshold
+
+    def map(self, frames, conf_threshold):
+        """프레임 리스트 추론 (입력 순서대로 결과 반환)"""
+        self.start()
+        results = []
+        for chunk_result in self.pool.imap(_infer_chunk, self._chunks(list(frames), conf_threshold)):
+            results.extend(chunk_result)
+        return results
+
+    def submit(self, frame, conf_threshold):
+        """단일 프레임 비동기 추론 (AsyncResult.get()은 탐지 리스트의 리스트 반환)"""
+        self.start()
+        return self.pool.apply_async(_infer_chunk, (([frame], conf_threshold),))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
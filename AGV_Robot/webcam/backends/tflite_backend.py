@@ -0,0 +1,58 @@
+""" TFLite CPU 추론 백엔드 (CoralDetector의 INT8 모델을 EdgeTPU 없이 실행) """
+
+import cv2
+import numpy as np
+
+from webcam.backends.base import InferenceBackend, letterbox, decode_yolo_output
+
+
+def _load_interpreter_class():
+    """tflite_runtime 우선, 없으면 tensorflow.lite 사용"""
+    try:
+        import tflite_runtime.interpreter as tflite
+        return tflite.Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+
+class TFLiteBackend(InferenceBackend):
+    name = "tflite"
+
+    def load(self):
+        if "_edgetpu" in self.model_path:
+            # EdgeTPU 컴파일 모델은 TPU 없이 실행할 수 없으므로 원본 INT8 모델 사용
+            self.model_path = self.model_path.replace("_edgetpu", "")
+            print(f"⚠️ EdgeTPU 전용 모델 대신 CPU용 INT8 모델 사용: {self.model_path}")
+
+        interpreter_class = _load_interpreter_class()
+        self.interpreter = interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_size = int(self.input_detail['shape'][1])
+
+    def preprocess(self, frame):
+        padded, scale, pad = letterbox(frame, self.input_size)
+        rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+
+        # INT8/UINT8 양자화 모델은 입력 스케일/제로포인트로 양자화
+        dtype = self.input_detail['dtype']
+        if dtype in (np.int8, np.uint8):
+            in_scale, in_zero = self.input_detail['quantization']
+            info = np.iinfo(dtype)
+            rgb = np.clip(np.round(rgb / in_scale + in_zero), info.min, info.max).astype(dtype)
+        return rgb[np.newaxis], scale, pad
+
+    def infer(self, frame, conf_threshold):
+        input_data, scale, pad = self.preprocess(frame)
+        self.interpreter.set_tensor(self.input_detail['index'], input_data)
+        self.interpreter.invoke()
+
+        output = self.interpreter.get_tensor(self.output_detail['index'])
+        if output.dtype in (np.int8, np.uint8):
+            out_scale, out_zero = self.output_detail['quantization']
+            output = (output.astype(np.float32) - out_zero) * out_scale
+
+        return decode_yolo_output(output, self, frame.shape[:2], scale, pad, conf_threshold)
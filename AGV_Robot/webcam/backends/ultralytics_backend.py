@@ -0,0 +1,53 @@
+""" Ultralytics(PyTorch) CPU 추론 백엔드 - 기존 SnackDetector 방식 """
+
+import os
+
+from webcam.backends.base import InferenceBackend
+
+
+class UltralyticsBackend(InferenceBackend):
+    name = "ultralytics"
+
+    def __init__(self, model_path, class_names, imgsz=None, **options):
+        super().__init__(model_path, class_names, **options)
+        self.imgsz = imgsz  # 추론 입력 크기 (None이면 모델 학습 크기, 평가 시 해상도 비교용)
+
+    def load(self):
+        # PyTorch 호환성 설정 (torch import 전에 적용되어야 함)
+        os.environ.setdefault('PYTORCH_DISABLE_WEIGHTS_ONLY', '1')
+        from ultralytics import YOLO
+
+        self.model = YOLO(self.model_path)
+        # 라즈베리파이 최적화
+        self.model.to('cpu')  # CPU 명시적 설정
+
+    def _to_detections(self, result):
+        detections = []
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return detections
+
+        for box in boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            detections.append({
+                'bbox': (x1, y1, x2, y2),
+                'name': self.class_name(int(box.cls[0])),
+                'confidence': float(box.conf[0])
+            })
+        return detections
+
+    def _predict(self, source, conf_threshold):
+        options = {'imgsz': self.imgsz} if self.imgsz else {}
+        return self.model(source, conf=conf_threshold, iou=self.iou_threshold, verbose=False, device='cpu', **options)
+
+    def infer(self, frame, conf_threshold):
+        results = self._predict(frame, conf_threshold)
+        if not results:
+            return []
+        return self._to_detections(results[0])
+
+    def infer_batch(self, frames, conf_threshold):
+        if not frames:
+            return []
+        results = self._predict(list(frames), conf_threshold)
+        return [self._to_detections(result) for result in results]
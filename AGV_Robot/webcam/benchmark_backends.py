@@ -0,0 +1,200 @@
+""" 추론 백엔드 벤치마크 - 같은 매대 녹화 영상으로 지연시간/정확도 비교 """
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from webcam.config import CONFIDENCE_THRESHOLD
+from webcam.utils import calculate_iou
+from webcam.backends import create_backend
+from webcam.backends.pool import InferencePool
+
+
+def load_clip_frames(clip_dir, frame_step=5, max_frames=200):
+    """녹화 영상에서 frame_step 간격으로 프레임 추출 (SnackDetector의 detection_interval과 동일)"""
+    clips = {}
+    paths = sorted(glob.glob(os.path.join(clip_dir, "*.mp4")) + glob.glob(os.path.join(clip_dir, "*.avi")))
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        index = 0
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % frame_step == 0:
+                frames.append(frame)
+            index += 1
+        cap.release()
+        if frames:
+            clips[os.path.basename(path)] = frames
+    return clips
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """같은 클래스끼리 IoU 기준 탐욕 매칭 → (TP, FP, FN)"""
+    used = set()
+    true_positive = 0
+    for ref in reference:
+        best_iou, best_idx = 0.0, None
+        for idx, cand in enumerate(candidate):
+            if idx in used or cand['name'] != ref['name']:
+                continue
+            iou = calculate_iou(ref['bbox'], cand['bbox'])
+            if iou > best_iou:
+                best_iou, best_idx = iou, idx
+        if best_idx is not None and best_iou >= iou_threshold:
+            used.add(best_idx)
+            true_positive += 1
+    return true_positive, len(candidate) - true_positive, len(reference) - true_positive
+
+
+def count_error(reference, candidate):
+    """프레임의 클래스별 개수 절대 오차 합"""
+    ref_counts = Counter(d['name'] for d in reference)
+    cand_counts = Counter(d['name'] for d in candidate)
+    return sum(abs(ref_counts[name] - cand_counts[name]) for name in set(ref_counts) | set(cand_counts))
+
+
+def run_backend(name, clips, conf_threshold, warmup=3):
+    """백엔드 하나로 모든 클립 추론 → (detections, 통계)"""
+    load_start = time.perf_counter()
+    backend = create_backend(name)
+    load_time = time.perf_counter() - load_start
+
+    first_frame = next(iter(clips.values()))[0]
+    for _ in range(warmup):
+        backend.infer(first_frame, conf_threshold)
+
+    latencies = []
+    detections = {}
+    for clip_name, frames in clips.items():
+        detections[clip_name] = []
+        for frame in frames:
+            start = time.perf_counter()
+            detections[clip_name].append(backend.infer(frame, conf_threshold))
+            latencies.append(time.perf_counter() - start)
+    backend.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    stats = {
+        'load_time_s': round(load_time, 3),
+        'frames': len(latencies),
+        'latency_ms_mean': round(float(latencies_ms.mean()), 2),
+        'latency_ms_p50': round(float(np.percentile(latencies_ms, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies_ms, 95)), 2),
+        'fps': round(len(latencies) / float(np.sum(latencies)), 2),
+    }
+    return detections, stats
+
+
+def run_pool(name, clips, conf_threshold, workers, chunk_size):
+    """멀티 프로세스 풀 처리량 측정"""
+    frames = [frame for clip_frames in clips.values() for frame in clip_frames]
+    with InferencePool(name, workers=workers, chunk_size=chunk_size) as pool:
+        pool.map(frames[:workers], conf_threshold)  # 워커별 모델 로딩/워밍업
+        start = time.perf_counter()
+        pool.map(frames, conf_threshold)
+        elapsed = time.perf_counter() - start
+    return {'workers': workers, 'chunk_size': chunk_size, 'fps': round(len(frames) / elapsed, 2)}
+
+
+def compare_accuracy(reference, candidate, expected_counts=None):
+    """기준 백엔드 대비 탐지 일치도 + (선택) 정답 매대 개수 대비 정확도"""
+    tp = fp = fn = 0
+    errors = []
+    for clip_name, ref_frames in reference.items():
+        for ref, cand in zip(ref_frames, candidate[clip_name]):
+            t, f_p, f_n = match_detections(ref, cand)
+            tp, fp, fn = tp + t, fp + f_p, fn + f_n
+            errors.append(count_error(ref, cand))
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    result = {
+        'agreement_precision': round(precision, 4),
+        'agreement_recall': round(recall, 4),
+        'agreement_f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'count_error_per_frame': round(float(np.mean(errors)), 3) if errors else 0.0,
+    }
+
+    if expected_counts:
+        exact = 0
+        total = 0
+        for clip_name, frames in candidate.items():
+            expected = expected_counts.get(clip_name)
+            if expected is None:
+                continue
+            for detections in frames:
+                counts = Counter(d['name'] for d in detections)
+                exact += int(all(counts[name] == count for name, count in expected.items())
+                             and set(counts) <= set(expected))
+                total += 1
+        result['shelf_count_exact_ratio'] = round(exact / total, 4) if total else None
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SnackDetector 추론 백엔드 벤치마크")
+    parser.add_argument("--clips", required=True, help="매대 녹화 영상(.mp4/.avi) 폴더")
+    parser.add_argument("--backends", nargs="+", default=['ultralytics', 'onnx', 'tflite'])
+    parser.add_argument("--reference", default='ultralytics', help="정확도 비교 기준 백엔드")
+    parser.add_argument("--expected", help="클립별 정답 개수 JSON ({clip: {class: count}})")
+    parser.add_argument("--frame-step", type=int, default=5)
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=0, help="0보다 크면 멀티 프로세스 풀 처리량도 측정")
+    parser.add_argument("--chunk-size", type=int, default=1)
+    parser.add_argument("--output", default="backend_benchmark.json")
+    args = parser.parse_args()
+
+    clips = load_clip_frames(args.clips, args.frame_step, args.max_frames)
+    if not clips:
+        print(f"❌ 영상이 없습니다: {args.clips}")
+        return
+    print(f"🎞️ {len(clips)}개 클립, {sum(len(f) for f in clips.values())}프레임 로드")
+
+    expected_counts = None
+    if args.expected:
+        with open(args.expected, 'r', encoding='utf-8') as f:
+            expected_counts = json.load(f)
+
+    all_detections = {}
+    report = {'conf_threshold': args.conf, 'reference': args.reference, 'backends': {}}
+
+    for name in args.backends:
+        print(f"\n⏱️ 백엔드 측정: {name}")
+        try:
+            detections, stats = run_backend(name, clips, args.conf)
+        except Exception as e:
+            print(f"⚠️ {name} 실행 실패: {e}")
+            report['backends'][name] = {'error': str(e)}
+            continue
+
+        if args.workers > 0:
+            stats['pool'] = run_pool(name, clips, args.conf, args.workers, args.chunk_size)
+
+        all_detections[name] = detections
+        report['backends'][name] = stats
+        print(f"  p50 {stats['latency_ms_p50']}ms, p95 {stats['latency_ms_p95']}ms, {stats['fps']} FPS")
+
+    reference = all_detections.get(args.reference)
+    for name, detections in all_detections.items():
+        if reference is not None:
+            report['backends'][name]['accuracy'] = compare_accuracy(reference, detections, expected_counts)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 결과 저장: {args.output}")
+
+
+# python -m webcam.benchmark_backends --clips recordings/shelf --workers 4
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
-# PyTorch 호환성 설정
 import os
-os.environ['PYTORCH_DISABLE_WEIGHTS_ONLY'] = '1'
 
 # 모델 설정
+# (PyTorch 호환성 환경변수는 import 시가 아니라 ultralytics 백엔드 로드 시 설정)
 MODEL_PATH = "./epoch60.pt"
 CONFIDENCE_THRESHOLD = 0.4  # 라즈베리파이 최적화를 위해 높임
 
+# 추론 백엔드 설정
+BACKEND_CONFIG = {
+    'name': 'ultralytics',      # 'ultralytics' (PyTorch) | 'onnx' (ONNX Runtime) | 'tflite' (INT8, TPU 없이)
+    'model_paths': {
+        'ultralytics': MODEL_PATH,
+        'onnx': "./epoch60.onnx",
+        'tflite': "webcam/best_full_integer_quant.tflite"
+    },
+    'input_size': 320,          # 모델 입력 크기 (ONNX/TFLite는 모델에서 자동 확인)
+    'iou_threshold': 0.7,       # NMS IoU 임계값 (Ultralytics 기본값과 동일)
+    'num_threads': 4,           # 단일 프로세스 추론 스레드 수
+    'pool_workers': 0,          # 멀티 프로세스 풀 워커 수 (0이면 CPU 코어 수)
+    'pool_tiles': False         # ROI 타일을 워커 프로세스 풀에 나눠 추론 (코어 수가 많을 때)
+}
+
 # 클래스명 정의
 CLASS_NAMES = [
     'crown_BigPie_Strawberry_324G', 'crown_ChocoHaim_142G', 'crown_Concho_66G',
@@ -27,8 +41,19 @@ TRACKER_CONFIG = {
 
 # 15회 관찰 설정
 OBSERVATION_CONFIG = {
-    'max_observations': 10,     # 총 관찰 횟수
-    'show_progress': True       # 진행상황 표시
+    'max_observations': 10,     # 총 관찰 횟수 (조기 종료 시에도 상한)
+    'show_progress': True,      # 진행상황 표시
+
+    # 조기 종료 (투표 수렴 시 관찰 중단)
+    'early_stop': True,         # 조기 종료 사용 여부
+    'min_observations': 3,      # 판정에 사용할 최소 관찰 횟수 (추적기 워밍업 제외)
+    'mode_confidence': 0.8,     # 클래스별 최빈 개수의 빈도 비율이 이 값 이상이면 수렴
+    'stability_threshold': 0.8, # 안정화 객체가 모두 추적 창(max_history)의 이 비율 이상 프레임에서 보이고 (vote_score)
+    'stable_window': 3,         # 최근 N회 관찰의 클래스별 개수가 동일하면 수렴
+
+    # 관찰 중단 (웹캠 오류로 무한 대기하지 않도록)
+    'max_duration': 25,         # 관찰 한 번의 최대 시간 (초, 관리자 AGV 결과 대기 30초보다 짧게)
+    'max_read_failures': 30     # 연속 프레임 읽기 실패 허용 횟수 (0.1초 간격 재시도)
 }
 
 # 카메라 설정 (라즈베리파이 최적화)
@@ -41,6 +66,24 @@ CAMERA_CONFIG = {
     'warmup_frames': 3          # 3 (빠른 시작)
 }
 
+# 매대 ROI 설정 (Detection 포인트별 매대 영역만 잘라서 탐지)
+# 프로필은 저장소 공용 maps 폴더에 저장 (실행 위치와 관계없이 vision/store_map.py의 맵 파일과 같은 폴더)
+ROI_PROFILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "maps", "shelf_rois.json"
+)
+ROI_CONFIG = {
+    'enabled': True,                        # 프로필이 있는 Detection 포인트는 ROI 타일로 탐지
+    'profile_path': ROI_PROFILE_PATH,       # python -m webcam.shelf_roi로 보정
+    'batch': True,                          # 타일을 한 번에 추론 (백엔드가 배치를 지원하는 경우)
+    'merge_iou': 0.5                        # 겹치는 타일 경계의 중복 박스 제거 IoU
+}
+
+# 상주 탐지 서비스 설정 (모델/카메라를 한 번만 로드)
+SERVICE_CONFIG = {
+    'ready_timeout': 60,        # 모델 로딩 + 카메라 워밍업 최대 대기 시간 (초)
+    'flush_frames': 3           # 관찰 시작 전 버릴 오래된 프레임 수
+}
+
 # 간단한 실행 설정
 SIMPLE_CONFIG = {
     'auto_stats_interval': 100,     # 자동 통계 출력 간격 (프레임)
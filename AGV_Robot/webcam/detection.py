@@ -1,19 +1,24 @@
 import cv2
 import time
 import os
+import threading
 from datetime import datetime
-from ultralytics import YOLO
 import numpy as np
 from collections import deque, Counter
 
 from webcam.tracker import ObjectTracker
 from webcam.count_reports import print_final_report
 from webcam.config import *
+from webcam.backends import create_backend
+from webcam.backends.pool import InferencePool
+from webcam.shelf_roi import ShelfRoiProfiles, crop_tiles, stitch_detections
 
 class SnackDetector:
-    def __init__(self, model_path=MODEL_PATH):
-        self.model_path = model_path
-        self.model = None
+    def __init__(self, model_path=None, backend=None):
+        self.backend_name = backend or BACKEND_CONFIG['name']
+        self.model_path = model_path or BACKEND_CONFIG['model_paths'][self.backend_name]
+        self.model = None  # 추론 백엔드 (webcam.backends.InferenceBackend)
+        self.pool = None   # ROI 타일 병렬 추론용 프로세스 풀 (BACKEND_CONFIG['pool_tiles'])
         self.class_names = CLASS_NAMES
         
         # 초기화
@@ -26,17 +31,28 @@ class SnackDetector:
         self.observation_count = 0  # 현재 관찰 횟수
         self.observation_results = []  # 각 관찰의 결과 저장
         self.max_observations = OBSERVATION_CONFIG['max_observations']
+        self.stop_reason = None  # 조기 종료 사유 (None이면 max_observations까지 관찰)
+        self.error = None  # 관찰 실패 사유 (카메라 읽기 실패, 시간 초과, 중지 요청)
+        self.stop_event = threading.Event()  # request_stop()으로 진행 중인 관찰 중단
+        self.count_confidence = {}  # 클래스별 판정 신뢰도 (델타 보고용)
         
         # 최종 결과 저장
         self.final_results = None
         
+        # 매대 ROI (Detection 포인트별 매대 영역)
+        self.roi_profiles = ShelfRoiProfiles() if ROI_CONFIG['enabled'] else None
+        self.current_shelf_id = None
+        
     def initialize_model(self):
         """모델 초기화"""
-        print("🤖 모델 로딩 중...")
-        self.model = YOLO(self.model_path)
-        # 라즈베리파이 최적화
-        self.model.to('cpu')  # CPU 명시적 설정
-        print("✅ 모델 로드 완료 (CPU 모드)")
+        print(f"🤖 모델 로딩 중... (백엔드: {self.backend_name})")
+        self.model = create_backend(self.backend_name, model_path=self.model_path)
+        print(f"✅ 모델 로드 완료 (CPU 모드, {self.backend_name})")
+        
+        # 타일은 풀 워커가, 전체 프레임은 프로세스 내 백엔드가 추론
+        if BACKEND_CONFIG['pool_tiles'] and self.roi_profiles is not None:
+            self.pool = InferencePool(self.backend_name, model_path=self.model_path).start()
+            print(f"🧵 ROI 타일 추론 풀 시작 (워커 {self.pool.workers}개)")
         
     def initialize_camera(self):
         """카메라 초기화"""
@@ -44,9 +60,12 @@ class SnackDetector:
         self.cap = cv2.VideoCapture(0)
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG['buffer_size'])
         
-        # 라즈베리파이 최적화된 해상도
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_CONFIG['width'])
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_CONFIG['height'])
+        # 라즈베리파이 최적화된 해상도 (ROI 프로필이 있으면 보정 해상도로 캡처하여 타일을 원본 해상도로 탐지)
+        width, height = CAMERA_CONFIG['width'], CAMERA_CONFIG['height']
+        if self.roi_profiles is not None and self.roi_profiles.resolution:
+            width, height = self.roi_profiles.resolution
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         
         # MJPEG 코덱으로 압축 효율 향상
         fourcc = cv2.VideoWriter_fourcc('M', 'J', 'P', 'G')
@@ -81,45 +100,38 @@ class SnackDetector:
         try:
             start_time = time.time()
             
-            # YOLO 탐지 (전처리 단순화)
-            results = self.model(frame, conf=self.conf_threshold, verbose=False, device='cpu')
+            # 현재 Detection 포인트의 매대 ROI (없으면 전체 프레임)
+            rois = None
+            if self.roi_profiles is not None:
+                rois = self.roi_profiles.get_rois(self.current_shelf_id, frame.shape)
+            
+            # 백엔드 추론 (Ultralytics / ONNX Runtime / TFLite)
+            if rois:
+                tiles = crop_tiles(frame, rois)
+                if self.pool is not None:
+                    tile_detections = self.pool.map(tiles, self.conf_threshold)
+                elif ROI_CONFIG['batch']:
+                    tile_detections = self.model.infer_batch(tiles, self.conf_threshold)
+                else:
+                    tile_detections = [self.model.infer(tile, self.conf_threshold) for tile in tiles]
+                current_detections = stitch_detections(tile_detections, rois)
+            else:
+                current_detections = self.model.infer(frame, self.conf_threshold)
             
             inference_time = time.time() - start_time
             
             if TERMINAL_CONFIG['show_inference_time']:
                 print(f"⏱️ 추론 시간: {inference_time:.3f}초")
             
-            # 현재 프레임 탐지 결과
-            current_detections = []
-            
-            if results and len(results) > 0:
-                boxes = results[0].boxes
-                
-                if boxes is not None and len(boxes) > 0:
-                    for box in boxes:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        confidence = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        
-                        if class_id < len(self.class_names):
-                            class_name = self.class_names[class_id]
-                        else:
-                            class_name = f"Unknown_{class_id}"
-                        
-                        current_detections.append({
-                            'bbox': (x1, y1, x2, y2),
-                            'name': class_name,
-                            'confidence': confidence
-                        })
-                        
-                        if TERMINAL_CONFIG['verbose_detection']:
-                            # 브랜드_제품명까지 표시 (예: orion_Pocachip)
-                            name_parts = class_name.split('_')
-                            if len(name_parts) >= 2:
-                                display_name = f"{name_parts[0]}_{name_parts[1]}"
-                            else:
-                                display_name = class_name
-                            print(f"🎯 탐지: {display_name} (신뢰도: {confidence:.2f})")
+            if TERMINAL_CONFIG['verbose_detection']:
+                for detection in current_detections:
+                    # 브랜드_제품명까지 표시 (예: orion_Pocachip)
+                    name_parts = detection['name'].split('_')
+                    if len(name_parts) >= 2:
+                        display_name = f"{name_parts[0]}_{name_parts[1]}"
+                    else:
+                        display_name = detection['name']
+                    print(f"🎯 탐지: {display_name} (신뢰도: {detection['confidence']:.2f})")
             
             return current_detections
             
@@ -184,10 +196,81 @@ class SnackDetector:
         self.observation_results.append(observation_result)
         print(f"📝 관찰 {self.observation_count} 결과 기록 완료")
     
+    def get_voting_observations(self):
+        """빈도 판정에 사용할 관찰 결과 (추적기 워밍업 구간 제외)"""
+        # 추적기는 min_votes회 업데이트 전까지 항상 빈 결과를 내므로 판정에서 제외
+        warmup = self.tracker.min_votes - 1 if self.tracker else 0
+        voting = [r for r in self.observation_results if r['observation_number'] > warmup]
+        return voting if voting else self.observation_results
+
+    def get_count_frequencies(self, observations):
+        """클래스별 개수 빈도 (Counter) 계산"""
+        all_classes = set()
+        for result in observations:
+            all_classes.update(result['class_counts'].keys())
+        
+        frequencies = {}
+        for class_name in all_classes:
+            count_frequency = Counter()
+            for result in observations:
+                count_frequency[result['class_counts'].get(class_name, 0)] += 1
+            frequencies[class_name] = count_frequency
+        return frequencies
+
+    def check_convergence(self):
+        """
+        관찰 조기 종료 판정 (순차 판정 규칙)
+        
+        Returns:
+            str: 수렴 사유 ('decided', 'confident', 'stable') 또는 None
+        """
+        if not OBSERVATION_CONFIG['early_stop'] or not self.tracker:
+            return None
+        
+        voting = self.get_voting_observations()
+        num_voting = len(voting)
+        if num_voting < OBSERVATION_CONFIG['min_observations'] or voting is self.observation_results:
+            return None
+        
+        frequencies = self.get_count_frequencies(voting)
+        remaining = self.max_observations - self.observation_count
+        
+        # 1) 확정: 남은 관찰이 모두 2위 개수로 나와도 최빈 개수가 바뀌지 않음 (전체 관찰과 동일한 결과)
+        #    아직 안 보인 클래스도 남은 관찰로 최빈값이 바뀔 수 없어야 함
+        decided = num_voting > remaining
+        # 2) 신뢰: 모든 클래스의 최빈 개수 빈도 비율이 mode_confidence 이상
+        confident = True
+        for count_frequency in frequencies.values():
+            top = count_frequency.most_common(2)
+            lead = top[0][1] - (top[1][1] if len(top) > 1 else 0)
+            if lead <= remaining:
+                decided = False
+            if top[0][1] / num_voting < OBSERVATION_CONFIG['mode_confidence']:
+                confident = False
+        
+        if decided:
+            return 'decided'
+        if confident:
+            return 'confident'
+        
+        # 3) 추적기 안정: 안정화 객체가 모두 추적 창의 대부분 프레임에서 보이고 최근 관찰의 개수가 동일
+        #    (stability는 min_votes 이상이면 항상 1.0이므로 창 전체 대비 투표 비율 vote_score로 판단,
+        #     관찰끼리 추적 창을 공유하므로 창이 다 찰 때까지는 판정하지 않음)
+        window = OBSERVATION_CONFIG['stable_window']
+        stable_objects = self.tracker.stable_objects
+        window_full = len(self.tracker.detection_history) >= self.tracker.max_history
+        if stable_objects and window_full and len(voting) >= window:
+            recent_counts = [r['class_counts'] for r in voting[-window:]]
+            if (all(obj['vote_score'] >= OBSERVATION_CONFIG['stability_threshold'] for obj in stable_objects)
+                    and all(counts == recent_counts[-1] for counts in recent_counts)):
+                return 'stable'
+        
+        return None
+    
     def analyze_final_results(self):
         """관찰 완료 후 빈도 기반 최종 분석"""
         print("\n" + "="*60)
-        print(f"📊 {self.max_observations}회 관찰 완료 - 빈도 기반 최종 분석")
+        print(f"📊 {self.observation_count}회 관찰 완료 - 빈도 기반 최종 분석")
         print("="*60)
         
         if not self.observation_results:
@@ -195,32 +278,26 @@ class SnackDetector:
             self.final_results = {}
             return self.final_results
         
-        # 모든 등장한 클래스 수집
-        all_classes = set()
-        for result in self.observation_results:
-            all_classes.update(result['class_counts'].keys())
+        voting = self.get_voting_observations()
+        frequencies = self.get_count_frequencies(voting)
         
         final_results = {}
+        count_confidence = {}  # 0개로 판정된 클래스 포함, 최빈 개수의 빈도 비율
         total_products = 0
         
         print("🔍 클래스별 빈도 분석:")
         
-        for class_name in all_classes:
-            # 각 클래스의 개수별 빈도 계산
-            count_frequency = Counter()
-            for result in self.observation_results:
-                count = result['class_counts'].get(class_name, 0)
-                count_frequency[count] += 1
-            
+        for class_name, count_frequency in frequencies.items():
             # 가장 빈번한 개수 선택
             most_frequent_count = count_frequency.most_common(1)[0][0]
-            frequency_score = count_frequency[most_frequent_count] / len(self.observation_results)
+            frequency_score = count_frequency[most_frequent_count] / len(voting)
+            count_confidence[class_name] = frequency_score
             
             if most_frequent_count > 0:  # 0개가 아닌 경우만
                 final_results[class_name] = {
                     'count': most_frequent_count,
                     'frequency_score': frequency_score,
-                    'appeared_in': sum(1 for r in self.observation_results if r['class_counts'].get(class_name, 0) > 0)
+                    'appeared_in': sum(1 for r in voting if r['class_counts'].get(class_name, 0) > 0)
                 }
                 total_products += most_frequent_count
                 
@@ -228,7 +305,7 @@ class SnackDetector:
                 name_parts = class_name.split('_')
                 display_name = f"{name_parts[0]}_{name_parts[1]}" if len(name_parts) >= 2 else class_name
                 
-                print(f"  ✅ {display_name}: {most_frequent_count}개 (빈도: {frequency_score:.2f}, 등장: {final_results[class_name]['appeared_in']}/{self.max_observations}회)")
+                print(f"  ✅ {display_name}: {most_frequent_count}개 (빈도: {frequency_score:.2f}, 등장: {final_results[class_name]['appeared_in']}/{len(voting)}회)")
         
         print(f"\n📋 최종 결과:")
         print(f"  총 제품 수: {total_products}개")
@@ -236,6 +313,7 @@ class SnackDetector:
 
         # 최종 결과 저장
         self.final_results = final_results
+        self.count_confidence = count_confidence
         return final_results
     
     # ==================== 결과 반환 함수들 ====================
@@ -266,6 +344,7 @@ class SnackDetector:
                 'total_products': 0,
                 'product_types': 0,
                 'is_complete': False,
+                'error': self.error,
                 'observation_results': self.observation_results
             }
         
@@ -276,6 +355,9 @@ class SnackDetector:
             'total_products': total_products,
             'product_types': len(self.final_results),
             'is_complete': True,
+            'observation_count': self.observation_count,
+            'stop_reason': self.stop_reason,
+            'count_confidence': dict(self.count_confidence),
             'observation_results': self.observation_results,
             'detailed_results': self.final_results
         }
@@ -294,23 +376,50 @@ class SnackDetector:
     
     def is_detection_complete(self):
         """탐지 완료 여부 반환"""
-        return self.observation_count >= self.max_observations and self.final_results is not None
+        return self.is_observation_complete() and self.final_results is not None
         
     def is_observation_complete(self):
-        """관찰 완료 여부 확인"""
-        return self.observation_count >= self.max_observations
-        
-    def run(self):
-        """메인 실행 함수 (터미널 전용)"""
-        print("🍪 Level 2 Multi-frame Voting 관찰 시스템 (터미널 모드)")
-        print(f"🎯 총 {self.max_observations}회 관찰 후 빈도 기반 최종 판정")
-        print("=" * 60)
+        """관찰 완료 여부 확인 (상한 도달 또는 투표 수렴)"""
+        return self.observation_count >= self.max_observations or self.stop_reason is not None
         
-        # 초기화
+    def initialize(self):
+        """모델/카메라/추적기 초기화 (서비스 모드에서는 한 번만 호출)"""
+        if self.roi_profiles is not None and not self.roi_profiles.load():
+            self.roi_profiles = None  # 보정된 프로필이 없으면 전체 프레임 탐지
         self.initialize_model()
         actual_width, actual_height = self.initialize_camera()
         self.initialize_tracker()
-        
+        return actual_width, actual_height
+
+    def reset_observation(self):
+        """새 매대 관찰을 위해 관찰 상태 초기화 (모델/카메라는 유지)"""
+        self.frame_count = 0
+        self.observation_count = 0
+        self.observation_results = []
+        self.final_results = None
+        self.count_confidence = {}
+        self.stop_reason = None
+        self.error = None
+        self.stop_event.clear()
+        self.initialize_tracker()
+
+    def request_stop(self):
+        """진행 중인 관찰 중단 요청 (다른 스레드에서 호출, observe()는 실패 결과를 반환)"""
+        self.stop_event.set()
+
+    def flush_camera(self, num_frames=SERVICE_CONFIG['flush_frames']):
+        """이동 중 쌓인 오래된 프레임 버리기"""
+        for _ in range(num_frames):
+            self.cap.grab()
+
+    def observe(self, shelf_id=None):
+        """
+        관찰 루프 실행 후 최종 결과 반환 (모델/카메라가 초기화되어 있어야 함)
+        
+        Args:
+            shelf_id: Detection 좌표 (매대 ROI 프로필 선택용, None이면 전체 프레임)
+        """
+        self.current_shelf_id = shelf_id
         print(f"\n🎯 {self.max_observations}회 관찰 시작!")
         print(f"  detection 간격: 매 {CAMERA_CONFIG['detection_interval']}프레임")
         print(f"  종료: {self.max_observations}회 관찰 완료 또는 Ctrl+C")
@@ -321,14 +430,32 @@ class SnackDetector:
         fps_counter = 0
         current_fps = 0
         
+        # 중지 요청/시간 초과/연속 읽기 실패 시 실패 결과 반환 (서비스 스레드가 멈추지 않도록)
+        deadline = time.monotonic() + OBSERVATION_CONFIG['max_duration']
+        read_failures = 0
+        
         try:
             while True:
+                if self.stop_event.is_set():
+                    self.error = "중지 요청"
+                    print("\n🛑 관찰 중지 요청됨")
+                    break
+                if time.monotonic() > deadline:
+                    self.error = f"관찰 시간 초과 ({OBSERVATION_CONFIG['max_duration']}초)"
+                    print(f"\n⏰ {self.error}")
+                    break
+                
                 ret, frame = self.cap.read()
                 
                 if not ret or frame is None:
-                    print(f"❌ 프레임 {self.frame_count + 1} 읽기 실패")
+                    read_failures += 1
+                    print(f"❌ 프레임 {self.frame_count + 1} 읽기 실패 ({read_failures}/{OBSERVATION_CONFIG['max_read_failures']})")
+                    if read_failures >= OBSERVATION_CONFIG['max_read_failures']:
+                        self.error = f"카메라 프레임 읽기 실패 (연속 {read_failures}회)"
+                        break
                     time.sleep(0.1)
                     continue
+                read_failures = 0
                 
                 self.frame_count += 1
                 fps_counter += 1
@@ -342,11 +469,6 @@ class SnackDetector:
                 
                 # 탐지는 설정된 간격마다
                 if self.frame_count % CAMERA_CONFIG['detection_interval'] == 0:
-                    # 관찰 완료 체크
-                    if self.is_observation_complete():
-                        print(f"\n🎉 {self.max_observations}회 관찰 완료! 최종 분석을 시작합니다.")
-                        break
-                    
                     print(f"\n🔍 탐지 실행... (프레임 {self.frame_count})")
                     current_detections = self.detect_objects(frame)
                     
@@ -364,6 +486,17 @@ class SnackDetector:
                     
                     # 관찰 결과 기록
                     self.record_observation_result()
+                    
+                    # 투표 수렴 여부 확인 (조기 종료)
+                    self.stop_reason = self.check_convergence()
+                    
+                    # 관찰 완료 체크 (다음 탐지 간격까지 기다리지 않고 바로 종료)
+                    if self.is_observation_complete():
+                        if self.stop_reason:
+                            print(f"\n🎉 투표 수렴({self.stop_reason}) - {self.observation_count}회 관찰로 조기 종료! 최종 분석을 시작합니다.")
+                        else:
+                            print(f"\n🎉 {self.max_observations}회 관찰 완료! 최종 분석을 시작합니다.")
+                        break
                 
                 # 자동 통계 출력
                 if self.frame_count % SIMPLE_CONFIG['auto_stats_interval'] == 0:
@@ -382,13 +515,39 @@ class SnackDetector:
         except KeyboardInterrupt:
             print("\n🔚 Ctrl+C로 종료 요청됨")
         
-        # 최종 분석 수행
-        if self.observation_results:
+        # 최종 분석 수행 (실패한 관찰은 분석하지 않음 - get_final_results()의 error로 사유 전달)
+        if self.error is not None:
+            print(f"❌ 관찰 실패: {self.error}")
+        elif self.observation_results:
             self.analyze_final_results()
             print_final_report(self.observation_results)
+
+        return self.get_final_results()
+
+    def release(self):
+        """카메라 및 추론 백엔드 해제"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self.model is not None:
+            self.model.close()
+            self.model = None
+
+    def run(self):
+        """메인 실행 함수 (터미널 전용)"""
+        print("🍪 Level 2 Multi-frame Voting 관찰 시스템 (터미널 모드)")
+        print(f"🎯 총 {self.max_observations}회 관찰 후 빈도 기반 최종 판정")
+        print("=" * 60)
+        
+        # 초기화
+        self.initialize()
+        self.observe()
         
         # 정리
-        self.cap.release()
+        self.release()
         print("🔚 Level 2 객체 개수 파악 시스템 종료")
 
 # ==================== 전역 함수들 ====================
@@ -396,11 +555,11 @@ class SnackDetector:
 # 전역 detector 인스턴스
 _global_detector = None
 
-def detect_start(model_path=MODEL_PATH):
+def detect_start(model_path=None, backend=None):
     """웹캠 객체 탐지 시작 - 터미널 모드"""
     global _global_detector
     print("🚀 웹캠 객체 탐지 시스템 시작 (터미널 모드)...")
-    _global_detector = SnackDetector(model_path=model_path)
+    _global_detector = SnackDetector(model_path=model_path, backend=backend)
     _global_detector.run()
     return _global_detector
 
@@ -0,0 +1,155 @@
+""" 상주 탐지 서비스 - 모델/웹캠을 한 번만 로드하고 매대별 관찰 요청을 처리 """
+
+import queue
+import threading
+from concurrent.futures import Future
+
+from webcam.config import SERVICE_CONFIG
+
+
+class DetectionService:
+    """
+    SnackDetector를 전용 스레드에서 계속 살려두는 탐지 서비스
+    모델 로딩과 웹캠 워밍업은 start() 시 한 번만 수행하고,
+    request_count(shelf_id)는 관찰 결과를 담을 Future를 즉시 반환
+    """
+
+    def __init__(self, model_path=None, backend=None):
+        self.model_path = model_path
+        self.backend = backend
+        self.detector = None
+
+        self.request_queue = queue.Queue()
+        self.ready_event = threading.Event()
+        self.worker_thread = None
+        self.running = False
+        self.init_error = None
+
+    def start(self):
+        """서비스 스레드 시작 (모델 로딩은 백그라운드에서 진행)"""
+        if self.running:
+            return
+
+        self.running = True
+        self.ready_event.clear()
+        self.worker_thread = threading.Thread(target=self._worker_loop, name="DetectionService", daemon=True)
+        self.worker_thread.start()
+
+    def wait_until_ready(self, timeout=SERVICE_CONFIG['ready_timeout']):
+        """모델/카메라 준비 완료까지 대기"""
+        if not self.ready_event.wait(timeout):
+            return False
+        return self.init_error is None
+
+    def is_ready(self):
+        return self.ready_event.is_set() and self.init_error is None
+
+    def request_count(self, shelf_id=None):
+        """
+        매대 재고 관찰 요청
+
+        Args:
+            shelf_id: 관찰할 매대 식별자 (예: Detection 좌표 (x, y))
+
+        Returns:
+            Future: 완료 시 SnackDetector.get_final_results() 형태의 dict
+        """
+        future = Future()
+        if not self.running:
+            future.set_exception(RuntimeError("탐지 서비스가 시작되지 않았습니다. start()를 먼저 호출하세요."))
+            return future
+
+        self.request_queue.put((shelf_id, future))
+        return future
+
+    def stop(self, timeout=5.0):
+        """서비스 종료 및 웹캠 해제"""
+        if not self.running:
+            return
+
+        self.running = False
+        self.cancel_current()         # 진행 중인 관찰도 중단
+        self.request_queue.put(None)  # 대기 중인 워커 깨우기
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.worker_thread.join(timeout)
+        self.worker_thread = None
+
+    def cancel_current(self):
+        """진행 중인 관찰 중단 (실행 중인 Future는 cancel()로 멈출 수 없으므로 탐지기에 중지 요청)"""
+        if self.detector is not None:
+            self.detector.request_stop()
+
+    def _initialize(self):
+        # 무거운 import는 서비스 스레드에서 처음 필요할 때만 수행
+        from webcam.detection import SnackDetector
+
+        self.detector = SnackDetector(model_path=self.model_path, backend=self.backend)
+        self.detector.initialize()
+
+    def _worker_loop(self):
+        try:
+            self._initialize()
+            print("[DetectionService] ✅ 모델/웹캠 준비 완료 - 관찰 요청 대기")
+        except Exception as e:
+            self.init_error = e
+            print(f"[DetectionService] ❌ 초기화 실패: {e}")
+        finally:
+            self.ready_event.set()
+
+        while self.running:
+            request = self.request_queue.get()
+            if request is None:
+                break
+
+            shelf_id, future = request
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if self.init_error is not None:
+                future.set_exception(self.init_error)
+                continue
+
+            try:
+                print(f"[DetectionService] 🔍 매대 {shelf_id} 관찰 시작")
+                self.detector.reset_observation()
+                self.detector.flush_camera()
+                results = self.detector.observe(shelf_id)
+                if not results['is_complete']:
+                    raise RuntimeError(results.get('error') or "관찰 결과 없음")
+                results['shelf_id'] = shelf_id
+                future.set_result(results)
+            except Exception as e:
+                print(f"[DetectionService] ❌ 매대 {shelf_id} 관찰 실패: {e}")
+                future.set_exception(e)
+
+        # 종료 시 남은 요청 취소
+        while True:
+            try:
+                request = self.request_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request[1].cancel()
+
+        if self.detector is not None:
+            self.detector.release()
+        print("[DetectionService] 🔚 탐지 서비스 종료")
+
+
+# 전역 서비스 인스턴스
+_global_service = None
+
+def get_detection_service(model_path=None, backend=None):
+    """프로세스 전체에서 공유하는 탐지 서비스 반환 (없으면 생성 후 시작)"""
+    global _global_service
+    if _global_service is None:
+        _global_service = DetectionService(model_path=model_path, backend=backend)
+    _global_service.start()
+    return _global_service
+
+def stop_detection_service():
+    """전역 탐지 서비스 종료"""
+    global _global_service
+    if _global_service is not None:
+        _global_service.stop()
+        _global_service = None
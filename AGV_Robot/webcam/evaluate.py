@@ -0,0 +1,445 @@
+""" 오프라인 평가 - 백엔드/해상도별 mAP, 클래스별 매대 개수 오차, 지연시간, 메모리를 JSON으로 기록 """
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from webcam.config import CONFIDENCE_THRESHOLD
+from webcam.backends import create_backend
+from webcam.benchmark_backends import load_clip_frames
+
+AGV_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(AGV_ROOT, "benchmarks", "eval_history.jsonl")
+
+# mAP50-95 IoU 임계값 (COCO / Ultralytics와 동일)
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+# 추론 해상도를 바꿀 수 있는 백엔드 (ONNX/TFLite는 export된 모델의 입력 크기로 고정)
+RESIZABLE_BACKENDS = {'ultralytics'}
+
+
+# ==================== 데이터 로드 ====================
+
+def load_holdout(dataset_dir, max_images=None):
+    """
+    YOLO 형식 평가셋 (images/, labels/) → [(이미지 경로, 클래스 배열, xywhn 배열)]
+    라벨 파일이 없으면 객체가 없는 이미지로 취급
+    """
+    image_dir = os.path.join(dataset_dir, "images")
+    label_dir = os.path.join(dataset_dir, "labels")
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png")))
+    if max_images:
+        paths = paths[:max_images]
+
+    samples = []
+    for path in paths:
+        label_path = os.path.join(label_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+        rows = []
+        if os.path.exists(label_path):
+            with open(label_path, 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 5:
+                        rows.append([float(value) for value in parts[:5]])
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        samples.append((path, rows[:, 0].astype(np.int64), rows[:, 1:5]))
+    return samples
+
+
+# ==================== 지표 ====================
+
+def box_iou(boxes1, boxes2):
+    """(N, 4) x (M, 4) xyxy → (N, M) IoU"""
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area1 = (boxes1[:, 2:] - boxes1[:, :2]).prod(axis=1)
+    area2 = (boxes2[:, 2:] - boxes2[:, :2]).prod(axis=1)
+    union = area1[:, None] + area2[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def match_predictions(pred_classes, pred_boxes, pred_conf, gt_classes, gt_boxes):
+    """
+    이미지 하나의 예측을 정답에 매칭 (신뢰도 높은 예측부터, 같은 클래스의 남은 정답 중 IoU 최대)
+    Returns: (예측 수, IoU 임계값 수) TP 여부
+    """
+    tp = np.zeros((len(pred_classes), len(IOU_THRESHOLDS)), dtype=bool)
+    if not len(pred_classes) or not len(gt_classes):
+        return tp
+
+    iou = box_iou(pred_boxes, gt_boxes) * (pred_classes[:, None] == gt_classes[None, :])
+    order = np.argsort(-pred_conf, kind='stable')
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        taken = np.zeros(len(gt_classes), dtype=bool)
+        for p in order:
+            candidates = np.where(taken, 0.0, iou[p])
+            g = int(np.argmax(candidates))
+            if candidates[g] >= threshold:
+                taken[g] = True
+                tp[p, t] = True
+    return tp
+
+
+def average_precision(recall, precision):
+    """101점 보간 AP (Ultralytics와 동일)"""
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    points = np.interp(np.linspace(0, 1, 101), recall, precision)
+    return float((points[1:] + points[:-1]).sum() / 2 / 100)
+
+
+def detection_metrics(tp, conf, pred_classes, gt_counts, class_names):
+    """전체 평가셋 TP/신뢰도/클래스 → mAP50, mAP50-95, 클래스별 AP50 (정답이 있는 클래스만)"""
+    order = np.argsort(-conf, kind='stable')
+    tp, pred_classes = tp[order], pred_classes[order]
+
+    ap = {}
+    for class_id in np.flatnonzero(gt_counts):
+        class_tp = tp[pred_classes == class_id].astype(np.float64)
+        if not len(class_tp):
+            ap[class_id] = np.zeros(len(IOU_THRESHOLDS))
+            continue
+        cum_tp = np.cumsum(class_tp, axis=0)
+        cum_fp = np.cumsum(1 - class_tp, axis=0)
+        recall = cum_tp / gt_counts[class_id]
+        precision = cum_tp / (cum_tp + cum_fp)
+        ap[class_id] = np.array([average_precision(recall[:, t], precision[:, t]) for t in range(len(IOU_THRESHOLDS))])
+
+    if not ap:
+        return {'map50': None, 'map50_95': None, 'ap50_per_class': {}}
+    values = np.stack(list(ap.values()))
+    return {
+        'map50': round(float(values[:, 0].mean()), 4),
+        'map50_95': round(float(values.mean()), 4),
+        'ap50_per_class': {class_names[c] if c < len(class_names) else str(c): round(float(v[0]), 4)
+                           for c, v in ap.items()}
+    }
+
+
+def count_error_report(pairs):
+    """
+    [(예측 {클래스: 개수}, 정답 {클래스: 개수})] → 개수 오차 요약
+    per_class_mae: 클래스별 평균 절대 오차, per_class_bias: 클래스별 평균 (예측 - 정답), 음수면 덜 셈
+    """
+    if not pairs:
+        return None
+    classes = sorted(set().union(*(set(pred) | set(truth) for pred, truth in pairs)))
+    diffs = np.array([[pred.get(name, 0) - truth.get(name, 0) for name in classes] for pred, truth in pairs],
+                     dtype=np.float64).reshape(len(pairs), len(classes))
+    per_sample = np.abs(diffs).sum(axis=1)
+    return {
+        'samples': len(pairs),
+        'mean_abs_error': round(float(per_sample.mean()), 4),
+        'exact_ratio': round(float((per_sample == 0).mean()), 4),
+        'per_class_mae': {name: round(float(v), 4) for name, v in zip(classes, np.abs(diffs).mean(axis=0))},
+        'per_class_bias': {name: round(float(v), 4) for name, v in zip(classes, diffs.mean(axis=0))}
+    }
+
+
+def latency_report(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'frames': len(latencies),
+        'latency_ms_mean': round(float(latencies_ms.mean()), 2),
+        'latency_ms_p50': round(float(np.percentile(latencies_ms, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies_ms, 95)), 2),
+        'fps': round(len(latencies) / float(np.sum(latencies)), 2)
+    }
+
+
+def current_rss_mb():
+    """현재 RSS (리눅스 /proc 기준, 없으면 None)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """프로세스 최대 RSS (resource 모듈이 없는 OS면 None)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+# ==================== 평가 ====================
+
+def name_counts(detections, conf_threshold):
+    return dict(Counter(d['name'] for d in detections if d['confidence'] >= conf_threshold))
+
+
+def evaluate_holdout(backend, samples, conf_threshold, map_conf):
+    """평가셋 추론 → mAP, 이미지별 클래스 개수 오차, 지연시간 (추론은 map_conf로 한 번, 개수는 conf_threshold 이상만)"""
+    class_index = {name: i for i, name in enumerate(backend.class_names)}
+    num_classes = len(backend.class_names)
+    gt_counts = np.zeros(num_classes, dtype=np.int64)
+    tps, confs, classes = [], [], []
+    count_pairs = []
+    latencies = []
+
+    for path, gt_classes, gt_xywhn in samples:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        start = time.perf_counter()
+        detections = backend.infer(frame, map_conf)
+        latencies.append(time.perf_counter() - start)
+
+        h, w = frame.shape[:2]
+        gt_boxes = np.stack([(gt_xywhn[:, 0] - gt_xywhn[:, 2] / 2) * w, (gt_xywhn[:, 1] - gt_xywhn[:, 3] / 2) * h,
+                             (gt_xywhn[:, 0] + gt_xywhn[:, 2] / 2) * w, (gt_xywhn[:, 1] + gt_xywhn[:, 3] / 2) * h], axis=1)
+        known = (gt_classes >= 0) & (gt_classes < num_classes)
+        gt_classes, gt_boxes = gt_classes[known], gt_boxes[known]
+        gt_counts += np.bincount(gt_classes, minlength=num_classes)
+
+        pred_classes = np.array([class_index.get(d['name'], -1) for d in detections], dtype=np.int64)
+        pred_boxes = np.array([d['bbox'] for d in detections], dtype=np.float64).reshape(-1, 4)
+        pred_conf = np.array([d['confidence'] for d in detections], dtype=np.float64)
+        tps.append(match_predictions(pred_classes, pred_boxes, pred_conf, gt_classes, gt_boxes))
+        confs.append(pred_conf)
+        classes.append(pred_classes)
+
+        truth = dict(Counter(backend.class_names[c] for c in gt_classes))
+        count_pairs.append((name_counts(detections, conf_threshold), truth))
+
+    if not latencies:
+        return None
+    result = {'images': len(latencies), 'conf': map_conf, 'count_conf': conf_threshold}
+    result.update(detection_metrics(np.concatenate(tps), np.concatenate(confs), np.concatenate(classes),
+                                    gt_counts, backend.class_names))
+    result['count'] = count_error_report(count_pairs)
+    result['latency'] = latency_report(latencies)
+    return result
+
+
+def vote_clip(frame_detections):
+    """
+    매대 녹화 한 클립을 SnackDetector 투표/조기 종료 규칙 그대로 재생 (카메라/모델 없이 탐지 결과만 사용)
+    Returns: (최종 {클래스: 개수}, 관찰 횟수, 조기 종료 사유)
+    """
+    from webcam.detection import SnackDetector
+
+    detector = SnackDetector()
+    detector.roi_profiles = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector.reset_observation()
+        for detections in frame_detections:
+            detector.tracker.update(detections)
+            detector.observation_count += 1
+            detector.record_observation_result()
+            detector.stop_reason = detector.check_convergence()
+            if detector.is_observation_complete():
+                break
+        if detector.observation_results:
+            detector.analyze_final_results()
+    return detector.get_final_results()['final_counts'], detector.observation_count, detector.stop_reason
+
+
+def evaluate_clips(backend, clips, conf_threshold, expected_counts=None, tracker=False):
+    """매대 녹화 클립 추론 → 지연시간, (정답이 있으면) 프레임별/투표 결과 클래스별 개수 오차"""
+    latencies = []
+    frame_pairs = []
+    voted_pairs = []
+    observations = []
+
+    for clip_name, frames in clips.items():
+        frame_detections = []
+        for frame in frames:
+            start = time.perf_counter()
+            frame_detections.append(backend.infer(frame, conf_threshold))
+            latencies.append(time.perf_counter() - start)
+
+        expected = (expected_counts or {}).get(clip_name)
+        if expected is not None:
+            frame_pairs.extend((name_counts(detections, conf_threshold), expected) for detections in frame_detections)
+        if tracker:
+            final_counts, observation_count, _ = vote_clip(frame_detections)
+            observations.append(observation_count)
+            if expected is not None:
+                voted_pairs.append((final_counts, expected))
+
+    if not latencies:
+        return None
+    result = {'clips': len(clips), 'conf': conf_threshold, 'latency': latency_report(latencies),
+              'frame_count': count_error_report(frame_pairs)}
+    if tracker:
+        result['voted_count'] = count_error_report(voted_pairs)
+        result['observations_mean'] = round(float(np.mean(observations)), 2)
+    return result
+
+
+def run_evaluation(spec, options):
+    """
+    평가 1회 (백엔드 + 모델 + 해상도) - 메모리를 따로 재도록 보통 별도 프로세스에서 실행
+    Returns: JSON으로 저장할 결과 dict
+    """
+    samples = load_holdout(options['dataset'], options['max_images']) if options['dataset'] else []
+    clips = load_clip_frames(options['clips'], options['frame_step'], options['max_frames']) if options['clips'] else {}
+    expected_counts = None
+    if options['expected']:
+        with open(options['expected'], 'r', encoding='utf-8') as f:
+            expected_counts = json.load(f)
+
+    backend_options = {'imgsz': spec['input_size']} if spec['input_size'] else {}
+    rss_before = current_rss_mb()
+    load_start = time.perf_counter()
+    backend = create_backend(spec['name'], model_path=spec['model_path'], **backend_options)
+    load_time = time.perf_counter() - load_start
+    rss_loaded = current_rss_mb()
+
+    # 워밍업 (첫 추론의 지연 할당/그래프 최적화 제외)
+    warmup_frame = next(iter(clips.values()))[0] if clips else (cv2.imread(samples[0][0]) if samples else None)
+    if warmup_frame is not None:
+        for _ in range(options['warmup']):
+            backend.infer(warmup_frame, options['conf'])
+
+    result = {
+        'backend': spec['name'],
+        'model_path': backend.model_path,
+        'input_size': spec['input_size'] if spec['name'] in RESIZABLE_BACKENDS else backend.input_size,
+        'load_time_s': round(load_time, 3)
+    }
+    if samples:
+        result['holdout'] = evaluate_holdout(backend, samples, options['conf'], options['map_conf'])
+    if clips:
+        result['clips'] = evaluate_clips(backend, clips, options['conf'], expected_counts, options['tracker'])
+    backend.close()
+
+    result['memory'] = {
+        'rss_mb_before_load': rss_before,
+        'model_rss_mb': round(rss_loaded - rss_before, 1) if rss_before is not None and rss_loaded is not None else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    return result
+
+
+def parse_runs(backends, sizes):
+    """
+    --backends 항목 ('이름' 또는 '이름=모델 경로') x --sizes → 평가 목록
+    해상도를 바꿀 수 없는 백엔드는 모델 입력 크기로 한 번만 평가
+    """
+    runs = []
+    for item in backends:
+        name, _, model_path = item.partition('=')
+        for size in (sizes or [None]) if name in RESIZABLE_BACKENDS else [None]:
+            runs.append({'name': name, 'model_path': model_path or None, 'input_size': size})
+    return runs
+
+
+def run_key(result, report):
+    """결과 저장 키 (백엔드@해상도, 같은 키가 있으면 모델 파일명 추가)"""
+    key = f"{result['backend']}@{result['input_size'] or 'auto'}"
+    if key in report:
+        key += f"[{os.path.splitext(os.path.basename(result['model_path']))[0]}]"
+    return key
+
+
+def print_result(key, result):
+    holdout, clips, memory = result.get('holdout'), result.get('clips'), result['memory']
+    print(f"\n📊 {key} ({result['model_path']}, 로드 {result['load_time_s']}초)")
+    if holdout:
+        count = holdout['count']
+        print(f"  평가셋 {holdout['images']}장: mAP50 {holdout['map50']}, mAP50-95 {holdout['map50_95']}, "
+              f"개수 오차 {count['mean_abs_error']}/장 (완전 일치 {count['exact_ratio'] * 100:.1f}%)")
+        print(f"  지연시간: p50 {holdout['latency']['latency_ms_p50']}ms, p95 {holdout['latency']['latency_ms_p95']}ms")
+    if clips:
+        print(f"  클립 {clips['clips']}개: p50 {clips['latency']['latency_ms_p50']}ms, "
+              f"p95 {clips['latency']['latency_ms_p95']}ms, {clips['latency']['fps']} FPS")
+        if clips['frame_count']:
+            print(f"  프레임별 개수 오차 {clips['frame_count']['mean_abs_error']}/프레임 "
+                  f"(완전 일치 {clips['frame_count']['exact_ratio'] * 100:.1f}%)")
+        if clips.get('voted_count'):
+            print(f"  투표 결과 개수 오차 {clips['voted_count']['mean_abs_error']}/매대 "
+                  f"(완전 일치 {clips['voted_count']['exact_ratio'] * 100:.1f}%, 평균 관찰 {clips['observations_mean']}회)")
+    print(f"  메모리: 모델 {memory['model_rss_mb']}MB, 최대 RSS {memory['peak_rss_mb']}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SnackDetector 오프라인 평가 (mAP/개수 오차/지연시간/메모리)")
+    parser.add_argument("--dataset", help="YOLO 형식 평가셋 폴더 (images/, labels/) - 학습에 쓰지 않은 test 세트")
+    parser.add_argument("--clips", help="매대 녹화 영상(.mp4/.avi) 폴더")
+    parser.add_argument("--expected", help="클립별 정답 개수 JSON ({clip: {class: count}})")
+    parser.add_argument("--backends", nargs="+", default=['ultralytics', 'tflite'],
+                        help="평가할 백엔드 ('이름' 또는 '이름=모델 경로', 같은 백엔드를 여러 모델로 반복 가능)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[], help="해상도를 바꿀 수 있는 백엔드의 추론 크기 (예: 320 640)")
+    parser.add_argument("--tracker", action="store_true", help="클립을 추적기 투표/조기 종료 단계까지 재생")
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD, help="개수 판정 신뢰도 (배포 설정)")
+    parser.add_argument("--map-conf", type=float, default=0.001, help="mAP 계산용 추론 신뢰도")
+    parser.add_argument("--max-images", type=int, default=None)
+    parser.add_argument("--frame-step", type=int, default=5)
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--in-process", action="store_true", help="별도 프로세스 없이 실행 (메모리는 프로세스 전체 기준)")
+    parser.add_argument("--output", default="eval_report.json")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="결과를 누적할 JSONL 파일")
+    parser.add_argument("--no-save", action="store_true", help="누적 기록에 추가하지 않음")
+    args = parser.parse_args()
+
+    if not args.dataset and not args.clips:
+        parser.error("--dataset 또는 --clips가 필요합니다")
+
+    options = vars(args)
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'dataset': args.dataset,
+        'clips': args.clips,
+        'conf_threshold': args.conf,
+        'map_conf': args.map_conf,
+        'tracker': args.tracker,
+        'runs': {}
+    }
+
+    for spec in parse_runs(args.backends, args.sizes):
+        label = f"{spec['name']}@{spec['input_size']}" if spec['input_size'] else spec['name']
+        print(f"\n⏱️ 평가: {label}")
+        try:
+            if args.in_process:
+                result = run_evaluation(spec, options)
+            else:
+                # 백엔드마다 새 프로세스 (모델 메모리를 따로 측정, torch/tflite 런타임이 서로 섞이지 않음)
+                with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as executor:
+                    result = executor.submit(run_evaluation, spec, options).result()
+        except Exception as e:
+            print(f"⚠️ {label} 평가 실패: {e}")
+            report['runs'][label] = {'backend': spec['name'], 'model_path': spec['model_path'], 'error': str(e)}
+            continue
+
+        key = run_key(result, report['runs'])
+        report['runs'][key] = result
+        print_result(key, result)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 결과 저장: {args.output}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        print(f"📄 기록 추가: {args.history}")
+
+
+# python -m webcam.evaluate --dataset ../model/snack_data/test --clips recordings/shelf --expected recordings/shelf/expected.json --tracker --sizes 320 640
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+""" Detection 포인트별 매대 ROI 프로필 - 매대 영역만 잘라서 원본 해상도로 탐지 """
+
+import json
+import os
+
+from webcam.config import ROI_CONFIG
+from webcam.utils import calculate_iou
+
+
+def shelf_key(shelf_id):
+    """Detection 좌표 (x, y) → 프로필 키 "x,y" """
+    if isinstance(shelf_id, str):
+        return shelf_id
+    return ",".join(str(int(v)) for v in shelf_id)
+
+
+class ShelfRoiProfiles:
+    """
+    Detection 포인트별 매대 ROI 목록 (맵 파일과 같은 폴더에 JSON으로 저장)
+
+    {
+      "resolution": [width, height],          # 보정 시 웹캠 해상도
+      "points": {"2,0": [[x1, y1, x2, y2], ...], ...}
+    }
+    """
+
+    def __init__(self, path=ROI_CONFIG['profile_path']):
+        self.path = path
+        self.resolution = None
+        self.points = {}
+
+    def load(self):
+        """프로필 로드 (파일이 없으면 False → 전체 프레임 탐지)"""
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.resolution = tuple(data.get('resolution')) if data.get('resolution') else None
+        self.points = {key: [tuple(roi) for roi in rois] for key, rois in data.get('points', {}).items()}
+        print(f"🗂️ 매대 ROI 프로필 로드: {len(self.points)}개 Detection 포인트 ({self.path})")
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            'resolution': list(self.resolution) if self.resolution else None,
+            'points': {key: [list(roi) for roi in rois] for key, rois in sorted(self.points.items())}
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"💾 매대 ROI 프로필 저장: {self.path}")
+
+    def set_rois(self, shelf_id, rois, resolution):
+        self.resolution = tuple(resolution)
+        self.points[shelf_key(shelf_id)] = [tuple(int(v) for v in roi) for roi in rois]
+
+    def get_rois(self, shelf_id, frame_shape=None):
+        """
+        매대 ROI 반환 (보정 해상도와 프레임 크기가 다르면 비율 변환)
+
+        Returns:
+            [(x1, y1, x2, y2), ...] 또는 None (프로필 없음 → 전체 프레임)
+        """
+        if shelf_id is None:
+            return None
+        rois = self.points.get(shelf_key(shelf_id))
+        if not rois:
+            return None
+
+        if frame_shape is None or self.resolution is None:
+            return list(rois)
+
+        frame_h, frame_w = frame_shape[:2]
+        sx = frame_w / self.resolution[0]
+        sy = frame_h / self.resolution[1]
+        return [
+            (int(x1 * sx), int(y1 * sy), min(frame_w, int(x2 * sx)), min(frame_h, int(y2 * sy)))
+            for x1, y1, x2, y2 in rois
+        ]
+
+
+def crop_tiles(frame, rois):
+    """ROI별 타일 잘라내기 (복사 없이 view)"""
+    return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in rois]
+
+
+def stitch_detections(tile_detections, rois, iou_threshold=ROI_CONFIG['merge_iou']):
+    """
+    타일 좌표 탐지 결과를 프레임 좌표로 되돌리고,
+    겹치는 ROI 경계에서 중복된 같은 클래스 박스는 신뢰도 높은 것만 유지
+    """
+    merged = []
+    for detections, (x1, y1, _, _) in zip(tile_detections, rois):
+        for detection in detections:
+            bx1, by1, bx2, by2 = detection['bbox']
+            merged.append({
+                'bbox': (bx1 + x1, by1 + y1, bx2 + x1, by2 + y1),
+                'name': detection['name'],
+                'confidence': detection['confidence']
+            })
+
+    merged.sort(key=lambda d: d['confidence'], reverse=True)
+    kept = []
+    for detection in merged:
+        duplicate = any(
+            k['name'] == detection['name'] and calculate_iou(k['bbox'], detection['bbox']) > iou_threshold
+            for k in kept
+        )
+        if not duplicate:
+            kept.append(detection)
+    return kept
+
+
+def calibrate(shelf_id, camera_index=0, width=None, height=None, path=ROI_CONFIG['profile_path']):
+    """웹캠 화면에서 매대 ROI를 마우스로 지정하여 프로필에 저장 (Detection 포인트에 AGV를 세운 상태에서 실행)"""
+    import cv2
+
+    profiles = ShelfRoiProfiles(path)
+    profiles.load()
+
+    cap = cv2.VideoCapture(camera_index)
+    if width and height:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    for _ in range(5):  # 자동 노출 안정화
+        ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        raise RuntimeError("❌ 웹캠 프레임 읽기 실패")
+
+    print(f"🖱️ 매대 {shelf_key(shelf_id)}: 드래그로 ROI 선택 후 Enter, 모두 선택했으면 Esc")
+    boxes = cv2.selectROIs(f"Shelf ROI {shelf_key(shelf_id)}", frame, showCrosshair=False)
+    cv2.destroyAllWindows()
+
+    rois = [(x, y, x + w, y + h) for x, y, w, h in boxes if w > 0 and h > 0]
+    if not rois:
+        print("⚠️ 선택된 ROI가 없습니다. 저장하지 않습니다.")
+        return None
+
+    profiles.set_rois(shelf_id, rois, (frame.shape[1], frame.shape[0]))
+    profiles.save()
+    return rois
+
+
+# python -m webcam.shelf_roi --shelf 2,0 --width 640 --height 480
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detection 포인트 매대 ROI 보정")
+    parser.add_argument("--shelf", required=True, help="Detection 좌표 (예: 2,0)")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--path", default=ROI_CONFIG['profile_path'])
+    args = parser.parse_args()
+
+    calibrate(args.shelf, args.camera, args.width, args.height, args.path)
@@ -4,8 +4,14 @@ userAGV1, userAGV2, managerAGV로부터 위치데이터를 받아오는 코드
 '''
 import paho.mqtt.client as mqtt
 import json
+import os
 import mysql.connector
 
+from store_map import load_store_map
+
+# AGV별 마지막으로 반영한 델타 (epoch, seq) - 관제센터를 재시작해도 이미 반영한 델타를 다시 적용하지 않도록 저장
+DETECTION_SEQ_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "detection_seq.json")
+
 class RecvFromAgv:
     def __init__(self, manager_gui):
 
@@ -35,6 +41,10 @@ class RecvFromAgv:
 
 
         self.snack_num = None
+        self.last_detection_seq = self.load_detection_seq()   # {AGV 이름: [epoch, seq]} (중복/역순 무시)
+
+        # 맵 파일에 등록된 마커 좌표 (qr_table이 기준, DB에 없거나 DB 오류일 때만 사용)
+        self.map_markers = {marker_id: tuple(cell) for marker_id, cell in load_store_map().get("markers", {}).items()}
         
     #---------DB 연결 설정--------#
         self.db_config = {
@@ -65,11 +75,52 @@ class RecvFromAgv:
             print(f"[DB RESULT] {result}")  # DB 결과 로그
             if result:
                 return result['x'], result['y']
-            else:
-                return None, None
         except mysql.connector.Error as err:
             print(f"[DB ERROR] {err}")
-            return None, None
+        return self.map_markers.get(qr_id, (None, None))
+
+    #===========재고 델타 반영==============#
+    def load_detection_seq(self):
+        if not os.path.exists(DETECTION_SEQ_PATH):
+            return {}
+        try:
+            with open(DETECTION_SEQ_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DETECTION] 델타 시퀀스 로드 실패 (초기화): {e}")
+            return {}
+
+    def save_detection_seq(self):
+        tmp_path = DETECTION_SEQ_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.last_detection_seq, f)
+        os.replace(tmp_path, DETECTION_SEQ_PATH)
+
+    def apply_detection_delta(self, agv_name, data):
+        """
+        managerAGV가 보낸 재고 델타 반영 (바뀐 제품만)
+        {"QR_info": "detection_delta", "epoch": 3, "seq": 12, "shelf": [2, 0], "d": {product_name: [count, confidence]}}
+        epoch이 커지면 (AGV 재시작마다 1씩 증가) seq를 처음부터 다시 받음
+        """
+        epoch = data.get("epoch", 0)
+        seq = data.get("seq", 0)
+        last_epoch, last_seq = self.last_detection_seq.get(agv_name, (0, 0))
+        if (epoch, seq) <= (last_epoch, last_seq):
+            print(f"[DETECTION] 중복/지난 델타 무시: {agv_name} epoch={epoch} seq={seq}")
+            return
+        if epoch != last_epoch:
+            print(f"[DETECTION] {agv_name} 새 epoch {epoch} - 시퀀스 다시 시작")
+
+        changes = {product_name: value[0] for product_name, value in data.get("d", {}).items()}
+        if self.snack_num is None:
+            self.snack_num = {}
+        self.snack_num.update(changes)
+
+        self.manager_gui.db_manager.update_snack_stocks(changes)
+        # DB 반영 후 기록 (반영 전에 종료되면 같은 델타를 다시 받아 반영)
+        self.last_detection_seq[agv_name] = [epoch, seq]
+        self.save_detection_seq()
+        print(f"[DETECTION] 매대 {data.get('shelf')} 재고 {len(changes)}건 반영 (seq={seq}): {changes}")
 
     # 데이터가 수신될 때마다 호출되는 함수
     # AGV가 QR 정보를 송신하면 관제센터는 그에 맞는 위치정보를 송신해줘야함
@@ -81,18 +132,22 @@ class RecvFromAgv:
         print(f"수신 데이터: [{target_agv_name}]{data}")
         
         if target_agv_name in self.agv_name:
-            self.agv_idx = self.agv_name.index(target_agv_name) # 어떤 AGV가 보냈는지 저장
-            self.agv_qr[self.agv_idx] = data.get("QR_info")     # QR 정보를 저장
-            qr_id = self.agv_qr[self.agv_idx]
-
-            if "snack_num" in data: # 재고 갯수를 저장
+            # Detection 재고 메시지는 QR 위치 조회 없이 재고만 반영
+            if data.get("QR_info") == "detection_delta":
+                self.apply_detection_delta(target_agv_name, data)
+                return
+            if "snack_num" in data: # 재고 갯수를 저장 (전체 결과 - 이전 방식)
                 self.snack_num = data["snack_num"] # {'haetae_Osajjeu_60G': 1}
 
                 # # GUI에 재고 갱신
                 # self.manager_gui.snack_updated.emit(idx, data['snack_num'])
-                for product_name, count in detection_results.items():
-                    self.manager_gui.db_manager.update_snack_stock(product_name, count)
-                    print(f"DB 업데이트: {product_name} → {count}개")
+                self.manager_gui.db_manager.update_snack_stocks(self.snack_num)
+                print(f"DB 업데이트: {self.snack_num}")
+                return
+
+            self.agv_idx = self.agv_name.index(target_agv_name) # 어떤 AGV가 보냈는지 저장
+            self.agv_qr[self.agv_idx] = data.get("QR_info")     # QR 정보를 저장
+            qr_id = self.agv_qr[self.agv_idx]
 
             # --- MariaDB에서 해당 QR ID로 x, y 좌표를 조회 ---
             x, y = self.lookup_coordinates(qr_id)
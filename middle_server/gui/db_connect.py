@@ -49,3 +49,25 @@ class DbConnect:
         for product_name, count in detection_results.items():
             self.update_snack_stock(product_name, count)
             print(f"DB 업데이트: {product_name} → {count}개")
+
+    def update_snack_stocks(self, changes):
+        """
+        바뀐 제품 재고만 한 번의 연결/트랜잭션으로 업데이트
+        changes: {product_name: count}
+        """
+        if not changes:
+            return
+        conn = pymysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            db=self.db,
+            charset=self.charset
+        )
+        try:
+            with conn.cursor() as cursor:
+                sql = "UPDATE snack_stock SET stock_count = %s WHERE qr_info = %s"
+                cursor.executemany(sql, [(count, product_name) for product_name, count in changes.items()])
+            conn.commit()
+        finally:
+            conn.close()
@@ -8,14 +8,7 @@ from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal
 
 import pymysql
 
-    PRODUCT_MAPPING = {
-    0: "crown_Potto_Cheese_Tart_322G",  # 뽀또
-    1: "haetae_Osajjeu_60G",            # 오사쯔  
-    2: "crown_Concho_66G",              # 콘초
-    3: "crown_ChocoHaim_142G",          # 초쿄하임
-    4: "orion_Pocachip_Original_66G",   # 포카칩
-    5: "orion_Gosomi_80G"               # 고소미
-}
+from store_map import load_store_map, wall_cells
 
 
 class ManagerGUI(QWidget):
@@ -46,6 +39,7 @@ class ManagerGUI(QWidget):
         self.graphicsView.setScene(self.scene)
 
         # 맵 그리기
+        self.store_map = load_store_map()
         self.cell_size = 60
         self.draw_map()
 
@@ -54,21 +48,14 @@ class ManagerGUI(QWidget):
         self.agv2 = self.draw_agv(0, 5, Qt.blue)
         self.agv_admin = self.draw_agv(0, 4, Qt.green)
 
-        self.snack_name = ["뽀또", "오사쯔", "콘초", "초쿄하임", "포카칩", "고소미"] # 과자 재고 이름
-        self.snack_position = [[0, 1], [0, 3], [0, 5], [4, 1], [4, 3], [4, 5]] # 과자 재고 위치
-        self.snack_num = [0, 0, 0, 0, 0, 0] # 과자 재고 갯수
+        # 매대 정보는 maps/store_map.json의 shelves 순서를 따름
+        shelves = self.store_map["shelves"]
+        self.snack_name = [shelf["label"] for shelf in shelves]      # 과자 재고 이름
+        self.snack_position = [shelf["pick"] for shelf in shelves]   # 과자 재고 위치
+        self.snack_num = [0] * len(shelves)                          # 과자 재고 갯수
 
-
-         # ✅ 여기에 매핑 테이블 추가
         # 인덱스 → DB 제품명 매핑
-        self.PRODUCT_MAPPING = {
-            0: "crown_Potto_Cheese_Tart_322G",  # 뽀또
-            1: "haetae_Osajjeu_60G",            # 오사쯔  
-            2: "crown_Concho_66G",              # 콘초
-            3: "crown_ChocoHaim_142G",          # 초쿄하임
-            4: "orion_Pocachip_Original_66G",   # 포카칩
-            5: "orion_Gosomi_80G"               # 고소미
-        }
+        self.PRODUCT_MAPPING = {idx: shelf["product"] for idx, shelf in enumerate(shelves)}
 
         # DB 제품명 → 인덱스 매핑 (역방향)
         self.PRODUCT_REVERSE_MAPPING = {v: k for k, v in self.PRODUCT_MAPPING.items()}
@@ -152,8 +139,9 @@ class ManagerGUI(QWidget):
 
     def draw_map(self):
         # 격자맵 생성
-        for row in range(7):
-            for col in range(7):
+        rows, cols = len(self.store_map["rows"]), len(self.store_map["rows"][0])
+        for row in range(rows):
+            for col in range(cols):
                 rect = QGraphicsRectItem(col * self.cell_size, row * self.cell_size,
                                          self.cell_size, self.cell_size)
                 rect.setBrush(QBrush(Qt.white))
@@ -161,12 +149,7 @@ class ManagerGUI(QWidget):
                 self.scene.addItem(rect)
 
         # 벽 생성
-        wall = [(1, 1), (1, 3), (1, 5),
-                (3, 1), (3, 3), (3, 5),
-                (5, 1), (5, 2), (5, 3), (5, 4), (5, 5),
-                (6, 1), (6, 2), (6, 3), (6, 4), (6, 5), (6, 6)]
-        # 벽 생성
-        for row, col in wall:
+        for row, col in wall_cells(self.store_map):
             block = QGraphicsRectItem(col * self.cell_size, row * self.cell_size,
                                       self.cell_size, self.cell_size)
             block.setBrush(QBrush(Qt.black))
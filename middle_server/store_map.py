@@ -0,0 +1,23 @@
+'''
+매장 맵 파일 (maps/store_map.json) 읽기
+AGV(AGV_Robot/vision/store_map.py)와 같은 파일을 사용해서 맵/매대/마커 정보를 한 곳에서 관리
+'''
+import json
+import os
+
+# 저장소 공용 매장 맵 (환경변수 STORE_MAP으로 다른 맵 지정 가능)
+DEFAULT_MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps", "store_map.json")
+
+
+def load_store_map(path=None):
+    path = path or os.environ.get("STORE_MAP") or DEFAULT_MAP_PATH
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wall_cells(store_map):
+    """벽/매대 셀 [(row, col), ...] - AGV별 차단 셀(agv_overrides)도 함께 표시"""
+    walls = {(row, col) for row, line in enumerate(store_map["rows"]) for col, cell in enumerate(line) if cell == "1"}
+    for override in store_map.get("agv_overrides", {}).values():
+        walls.update(tuple(cell) for cell in override.get("blocked", []))
+    return sorted(walls)
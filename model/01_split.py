@@ -2,123 +2,154 @@
 import os
 import shutil
 import yaml
-import random
-from collections import defaultdict, Counter
-from sklearn.model_selection import train_test_split
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
-def read_label_file(label_path):
-    """라벨 파일에서 클래스 정보를 읽어옴"""
-    classes = []
-    if os.path.exists(label_path):
-        with open(label_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    class_id = int(line.split()[0])
-                    classes.append(class_id)
-    return classes
+from artifact_cache import link_or_copy
+from dataset_index import DatasetIndex
 
-def analyze_dataset(images_dir, labels_dir):
-    """데이터셋의 클래스 분포를 분석"""
-    class_counts = Counter()
-    file_class_mapping = {}
-    
-    # 이미지 파일 목록 가져오기
-    image_files = [f for f in os.listdir(images_dir) 
-                   if f.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp'))]
-    
-    print(f"총 이미지 파일 수: {len(image_files)}")
-    
-    for img_file in image_files:
-        # 라벨 파일명 생성 (확장자를 .txt로 변경)
-        base_name = os.path.splitext(img_file)[0]
-        label_file = base_name + '.txt'
-        label_path = os.path.join(labels_dir, label_file)
-        
-        # 라벨 파일에서 클래스 정보 읽기
-        classes = read_label_file(label_path)
-        
-        if classes:
-            # 해당 이미지의 주요 클래스 (첫 번째 클래스 사용)
-            main_class = classes[0]
-            file_class_mapping[img_file] = main_class
-            class_counts[main_class] += 1
-        else:
-            print(f"Warning: 라벨 파일이 없거나 비어있음: {label_file}")
-    
-    return file_class_mapping, class_counts
+SPLIT_NAMES = ('train', 'val', 'test')
 
-def create_stratified_split(file_class_mapping, train_ratio=0.7, val_ratio=0.2, test_ratio=0.1):
-    """클래스별로 균등하게 분할"""
-    # 클래스별로 파일들을 그룹화
-    class_files = defaultdict(list)
-    for file_name, class_id in file_class_mapping.items():
-        class_files[class_id].append(file_name)
-    
-    train_files = []
-    val_files = []
-    test_files = []
-    
-    print("\n클래스별 분할 현황:")
-    print("-" * 60)
-    
-    for class_id, files in class_files.items():
-        files = sorted(files)  # 일관된 결과를 위해 정렬
-        n_files = len(files)
-        
-        # 각 세트별 파일 수 계산
-        n_train = max(1, int(n_files * train_ratio))
-        n_val = max(1, int(n_files * val_ratio)) if n_files > 2 else 0
-        n_test = n_files - n_train - n_val
-        
-        # 파일이 너무 적은 경우 조정
-        if n_test < 0:
-            n_test = 0
-            n_val = n_files - n_train
-        
-        # 랜덤 시드 설정으로 재현 가능한 분할
-        random.seed(42)
-        random.shuffle(files)
-        
-        # 분할 수행
-        train_split = files[:n_train]
-        val_split = files[n_train:n_train+n_val]
-        test_split = files[n_train+n_val:]
-        
-        train_files.extend(train_split)
-        val_files.extend(val_split)
-        test_files.extend(test_split)
-        
-        print(f"클래스 {class_id:2d}: 총 {n_files:3d}개 -> train: {len(train_split):3d}, val: {len(val_split):3d}, test: {len(test_split):3d}")
-    
-    return train_files, val_files, test_files
+def analyze_dataset(base_dir, split='train'):
+    """
+    데이터셋의 클래스 분포를 분석 (데이터셋 인덱스 사용 - 바뀐 라벨만 다시 읽음)
+    :return: (이미지 파일명 목록, (이미지 수, 클래스 수) 이미지별 클래스 인스턴스 수)
+    """
+    index = DatasetIndex(base_dir).refresh()
+    file_ids = np.flatnonzero(index.split_mask(split) & (index.files['image_name'] != ''))
+    
+    print(f"총 이미지 파일 수: {len(file_ids)}")
+    
+    num_classes = len(index.class_counts(split))
+    histogram = index.image_class_histogram(file_ids, num_classes)
+    
+    # 라벨이 없거나 비어 있는 이미지는 분할하지 않음 (train에 그대로)
+    labeled = histogram.sum(axis=1) > 0
+    for file_id in file_ids[~labeled]:
+        print(f"Warning: 라벨 파일이 없거나 비어있음: {index.files['stem'][file_id]}.txt")
+    
+    file_names = [str(name) for name in index.files['image_name'][file_ids[labeled]]]
+    return file_names, histogram[labeled]
+
+def iterative_stratification(histogram, ratios, seed=42):
+    """
+    다중 라벨 반복 층화 분할 (Sechidis et al., 2011) - 이미지의 모든 클래스 인스턴스 수를 사용
+    - 남은 인스턴스가 가장 적은 클래스부터, 그 클래스가 있는 이미지를 그 클래스가 가장 부족한 split에 배정
+    - 동률이면 이미지 수가 가장 부족한 split, 그래도 같으면 난수 (seed 고정)
+    :return: (이미지 수,) split 번호 배열 (ratios 순서)
+    """
+    rng = np.random.default_rng(seed)
+    histogram = np.asarray(histogram, dtype=np.int64)
+    ratios = np.asarray(ratios, dtype=np.float64) / np.sum(ratios)
+    
+    desired = np.outer(ratios, histogram.sum(axis=0))    # (split, 클래스) 남은 목표 인스턴스 수
+    desired_images = ratios * len(histogram)             # split별 남은 목표 이미지 수
+    remaining = histogram.sum(axis=0)
+    assignment = np.full(len(histogram), -1, dtype=np.int64)
+    
+    def assign(rows, column):
+        for row in rows:
+            candidates = np.arange(len(ratios))
+            if column is not None:
+                need = desired[:, column]
+                candidates = np.flatnonzero(need == need.max())
+            if len(candidates) > 1:
+                need = desired_images[candidates]
+                candidates = candidates[need == need.max()]
+            split = candidates[rng.integers(len(candidates))] if len(candidates) > 1 else candidates[0]
+            assignment[row] = split
+            desired[split] -= histogram[row]
+            desired_images[split] -= 1
+            remaining[:] -= histogram[row]
+    
+    while (remaining > 0).any():
+        present = np.flatnonzero(remaining > 0)
+        column = present[np.argmin(remaining[present])]
+        rows = np.flatnonzero((assignment < 0) & (histogram[:, column] > 0))
+        assign(rng.permutation(rows), column)
+    
+    # 클래스가 하나도 없는 이미지는 이미지 수만 맞춤
+    assign(rng.permutation(np.flatnonzero(assignment < 0)), None)
+    return assignment
+
+def create_stratified_split(file_names, histogram, train_ratio=0.7, val_ratio=0.2, test_ratio=0.1, seed=42):
+    """클래스별로 균등하게 분할 (이미지에 있는 모든 클래스 기준)"""
+    ratios = np.array([train_ratio, val_ratio, test_ratio])
+    order = np.argsort(file_names, kind='stable')  # 일관된 결과를 위해 파일명 순서로
+    assignment = np.empty(len(file_names), dtype=np.int64)
+    assignment[order] = iterative_stratification(histogram[order], ratios, seed)
+    
+    splits = [[file_names[i] for i in np.flatnonzero(assignment == s)] for s in range(len(ratios))]
+    print_split_balance(histogram, assignment, ratios)
+    return splits[0], splits[1], splits[2]
+
+def print_split_balance(histogram, assignment, ratios):
+    """클래스별 split 인스턴스 비율과 목표 비율 대비 편차 출력, 최대 편차(%p) 반환"""
+    ratios = np.asarray(ratios, dtype=np.float64) / np.sum(ratios)
+    counts = np.stack([histogram[assignment == s].sum(axis=0) for s in range(len(ratios))])  # (split, 클래스)
+    images = np.stack([(histogram[assignment == s] > 0).sum(axis=0) for s in range(len(ratios))])
+    totals = counts.sum(axis=0)
+    share = counts / np.maximum(totals, 1)
+    deviation = np.abs(share - ratios[:, None]).max(axis=0) * 100
+    
+    print("\n클래스별 분할 현황 (인스턴스 수, 비율 / 이미지 수):")
+    print("-" * 78)
+    for class_id in np.flatnonzero(totals):
+        parts = ", ".join(f"{SPLIT_NAMES[s]}: {counts[s, class_id]:4d} ({share[s, class_id] * 100:4.1f}%) / {images[s, class_id]:3d}"
+                          for s in range(len(ratios)))
+        print(f"클래스 {class_id:2d}: 총 {totals[class_id]:4d}개 -> {parts}  편차 {deviation[class_id]:4.1f}%p")
+    
+    used = deviation[totals > 0]
+    image_share = np.bincount(assignment, minlength=len(ratios)) / max(len(assignment), 1) * 100
+    print("-" * 78)
+    print("이미지 비율: " + ", ".join(f"{SPLIT_NAMES[s]} {image_share[s]:.1f}%" for s in range(len(ratios))))
+    if len(used):
+        print(f"클래스 비율 편차: 평균 {used.mean():.2f}%p, 최대 {used.max():.2f}%p")
+    return float(used.max()) if len(used) else 0.0
+
+def link_file(src, dst):
+    """dst를 src 하드링크로 만들기, 다른 파일시스템이면 False (복사 필요)"""
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        link_or_copy(src, dst)  # 다시 분할할 때 기존 파일 교체
+    except OSError:
+        return False
+    return True
 
-def copy_files(file_list, source_images_dir, source_labels_dir, dest_images_dir, dest_labels_dir):
-    """파일들을 목적지 디렉토리로 복사"""
+def copy_files(file_list, source_images_dir, source_labels_dir, dest_images_dir, dest_labels_dir, workers=None):
+    """파일들을 목적지 디렉토리에 하드링크 (다른 파일시스템이면 병렬 복사)"""
     os.makedirs(dest_images_dir, exist_ok=True)
     os.makedirs(dest_labels_dir, exist_ok=True)
     
+    to_copy = []
     copied_count = 0
     for img_file in file_list:
-        # 이미지 파일 복사
         src_img = os.path.join(source_images_dir, img_file)
-        dst_img = os.path.join(dest_images_dir, img_file)
-        
         if os.path.exists(src_img):
-            shutil.copy2(src_img, dst_img)
+            dst_img = os.path.join(dest_images_dir, img_file)
+            if not link_file(src_img, dst_img):
+                to_copy.append((src_img, dst_img))
             
-            # 라벨 파일 복사
-            base_name = os.path.splitext(img_file)[0]
-            label_file = base_name + '.txt'
+            # 라벨 파일
+            label_file = os.path.splitext(img_file)[0] + '.txt'
             src_label = os.path.join(source_labels_dir, label_file)
-            dst_label = os.path.join(dest_labels_dir, label_file)
-            
             if os.path.exists(src_label):
-                shutil.copy2(src_label, dst_label)
+                dst_label = os.path.join(dest_labels_dir, label_file)
+                if not link_file(src_label, dst_label):
+                    to_copy.append((src_label, dst_label))
             
             copied_count += 1
     
+    workers = workers or min(8, os.cpu_count() or 1)
+    if workers > 1 and len(to_copy) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(lambda pair: shutil.copy2(*pair), to_copy):
+                pass
+    else:
+        for src, dst in to_copy:
+            shutil.copy2(src, dst)
+    
     return copied_count
 
 def update_yaml_file(yaml_path, base_dir):
@@ -165,13 +196,13 @@ def main():
     
     # 1. 데이터셋 분석
     print("\n1. 데이터셋 분석 중...")
-    file_class_mapping, class_counts = analyze_dataset(train_images_dir, train_labels_dir)
+    file_names, histogram = analyze_dataset(base_dir)
     
-    print(f"\n클래스별 분포:")
-    for class_id in sorted(class_counts.keys()):
-        print(f"클래스 {class_id}: {class_counts[class_id]}개")
+    print(f"\n클래스별 분포 (인스턴스 / 이미지):")
+    for class_id in np.flatnonzero(histogram.sum(axis=0)):
+        print(f"클래스 {class_id}: {histogram[:, class_id].sum()}개 / {(histogram[:, class_id] > 0).sum()}장")
     
-    if not file_class_mapping:
+    if not file_names:
         print("Error: 분석할 데이터가 없습니다.")
         return
     
@@ -182,7 +213,7 @@ def main():
     
     print(f"\n2. 데이터 분할 (train: {train_ratio*100}%, val: {val_ratio*100}%, test: {test_ratio*100}%)")
     train_files, val_files, test_files = create_stratified_split(
-        file_class_mapping, train_ratio, val_ratio, test_ratio
+        file_names, histogram, train_ratio, val_ratio, test_ratio
     )
     
     print(f"\n분할 결과:")
@@ -192,21 +223,21 @@ def main():
     print(f"Total: {len(train_files) + len(val_files) + len(test_files)}개")
     
     # 3. 새로운 디렉토리 생성 및 파일 복사
-    print("\n3. 파일 복사 중...")
+    print("\n3. 파일 링크 중 (다른 파일시스템이면 복사)...")
     
     # val 폴더 생성 및 복사
     val_images_dir = os.path.join(base_dir, "val", "images")
     val_labels_dir = os.path.join(base_dir, "val", "labels")
     val_copied = copy_files(val_files, train_images_dir, train_labels_dir, 
                            val_images_dir, val_labels_dir)
-    print(f"Val 세트: {val_copied}개 파일 복사 완료")
+    print(f"Val 세트: {val_copied}개 파일 링크/복사 완료")
     
     # test 폴더 생성 및 복사
     test_images_dir = os.path.join(base_dir, "test", "images")
     test_labels_dir = os.path.join(base_dir, "test", "labels")
     test_copied = copy_files(test_files, train_images_dir, train_labels_dir,
                             test_images_dir, test_labels_dir)
-    print(f"Test 세트: {test_copied}개 파일 복사 완료")
+    print(f"Test 세트: {test_copied}개 파일 링크/복사 완료")
     
     # 4. train 폴더에서 이동된 파일들 제거
     print("\n4. Train 폴더에서 이동된 파일 제거 중...")
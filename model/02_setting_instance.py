@@ -13,6 +13,11 @@ import yaml
 import time
 import math
 
+from artifact_cache import ArtifactCache, mirror_file
+from augment_engine import AugmentationEngine
+from dataset_index import DatasetIndex, INDEX_FILENAME
+from label_io import format_boxes
+
 try:
     import matplotlib.pyplot as plt
     import matplotlib.patches as patches
@@ -24,10 +29,21 @@ from datetime import datetime
 class BalancedDatasetManager:
     """YOLO 데이터셋 클래스 균형 조절 관리자 (단순 증폭 방식)"""
     
-    def __init__(self, dataset_path, target_instances=600, min_instances=100):
+    def __init__(self, dataset_path, target_instances=600, min_instances=100,
+                 output_path=None, cache_path=None, seed=42, workers=1):
         self.dataset_path = Path(dataset_path)
         self.target_instances = target_instances
         self.min_instances = min_instances
+        self.seed = seed
+        self.workers = max(1, workers)  # 증강 워커 스레드 수 (결과는 워커 수와 관계없이 동일)
+        
+        # 📦 출력 폴더 + 산출물 캐시 (output_path가 없으면 기존처럼 train 폴더에 직접 추가)
+        self.output_path = Path(output_path) if output_path else None
+        if self.output_path and self.output_path.resolve() == self.dataset_path.resolve():
+            self.output_path = None
+        self.cache = None
+        if self.output_path:
+            self.cache = ArtifactCache(cache_path or self.output_path.parent / ".artifact_cache")
         
         # data.yaml 로드
         self.load_dataset_config()
@@ -37,6 +53,8 @@ class BalancedDatasetManager:
         print(f"🎯 목표: {target_instances}개/클래스")
         print(f"📝 클래스: {len(self.class_names)}개")
         print(f"🔧 방식: 전체 이미지 증강 (라벨 정확성 보장)")
+        if self.output_path:
+            print(f"📦 출력 폴더: {self.output_path} (원본은 수정하지 않음)")
 
     def load_dataset_config(self):
         """data.yaml 설정 로드"""
@@ -59,90 +77,43 @@ class BalancedDatasetManager:
         """클래스별 인스턴스 분포 분석"""
         print("\n📊 클래스별 인스턴스 분포 분석...")
         
-        instance_counts = Counter()
-        image_sources = defaultdict(list)  # 이미지 기반 소스로 변경
-        bbox_data = defaultdict(list)
-        all_bboxes = []
-        
-        # train 폴더만 분석 (증강은 train에서만 수행)
-        labels_dir = self.dataset_path / "train" / "labels"
-        images_dir = self.dataset_path / "train" / "images"
-        
-        if not labels_dir.exists():
-            raise FileNotFoundError(f"Train labels directory not found: {labels_dir}")
-        
-        total_files = 0
-        for label_file in labels_dir.glob("*.txt"):
-            # 해당 이미지 파일 찾기
-            image_file = None
-            for ext in ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']:
-                potential_image = images_dir / (label_file.stem + ext)
-                if potential_image.exists():
-                    image_file = potential_image
-                    break
-            
-            if not image_file:
+        # train 폴더만 분석 (증강은 train에서만 수행) - 데이터셋 인덱스에서 조회 (바뀐 파일만 다시 읽음)
+        if not (self.dataset_path / "train" / "labels").exists():
+            raise FileNotFoundError(f"Train labels directory not found: {self.dataset_path / 'train' / 'labels'}")
+        
+        index = DatasetIndex(self.dataset_path).refresh()
+        file_ids = index.labeled_images('train')
+        total_files = len(file_ids)
+        
+        counts = index.class_counts('train', self.num_classes)
+        instance_counts = Counter({class_id: int(count) for class_id, count in enumerate(counts) if count})
+        
+        # 이미지별 소스 정보 (클래스별로) - 라벨은 6자리 정밀도 줄로 전달 (전체 박스를 한 번에 포맷)
+        histogram = index.image_class_histogram(file_ids, self.num_classes)
+        box_lines = format_boxes(index.box_class, index.box_xywh)
+        image_sources = defaultdict(list)
+        for row, file_id in enumerate(file_ids):
+            classes, xywh = index.file_boxes(file_id)
+            valid = (classes >= 0) & (classes < self.num_classes)
+            image_classes = np.flatnonzero(histogram[row])
+            if not len(image_classes):
                 continue
-                
-            total_files += 1
             
-            try:
-                with open(label_file, 'r') as f:
-                    lines = f.readlines()
-                
-                # 이 이미지에 포함된 클래스들 수집
-                image_classes = set()
-                image_bbox_data = []
-                
-                for line_idx, line in enumerate(lines):
-                    line = line.strip()
-                    if line:
-                        parts = line.split()
-                        if len(parts) >= 5:
-                            try:
-                                class_id = int(parts[0])
-                                x, y, w, h = map(float, parts[1:5])
-                                
-                                # 유효한 클래스 ID 체크
-                                if 0 <= class_id < self.num_classes:
-                                    instance_counts[class_id] += 1
-                                    image_classes.add(class_id)
-                                    
-                                    # 바운딩박스 데이터 수집
-                                    bbox_info = {
-                                        'class_id': class_id,
-                                        'x_center': x,
-                                        'y_center': y,
-                                        'width': w,
-                                        'height': h,
-                                        'area': w * h
-                                    }
-                                    bbox_data[class_id].append(bbox_info)
-                                    all_bboxes.append(bbox_info)
-                                    image_bbox_data.append(bbox_info)
-                                    
-                            except (ValueError, IndexError):
-                                continue
-                
-                # 이미지별 소스 정보 저장 (클래스별로)
-                for class_id in image_classes:
-                    class_bboxes = [bbox for bbox in image_bbox_data if bbox['class_id'] == class_id]
-                    
-                    image_info = {
-                        'image_path': str(image_file),
-                        'label_path': str(label_file),
-                        'labels': lines,
-                        'target_class': class_id,
-                        'class_count': len(class_bboxes),
-                        'total_objects': len(image_bbox_data),
-                        'is_single_class': len(image_classes) == 1,
-                        'has_small_objects': any(bbox['area'] < 0.01 for bbox in class_bboxes)
-                    }
-                    image_sources[class_id].append(image_info)
-                    
-            except Exception as e:
-                print(f"⚠️ 파일 처리 오류 {label_file.name}: {e}")
-                continue
+            start = index.files['box_start'][file_id]
+            labels = [line + "\n" for line in box_lines[start:start + len(classes)]]
+            areas = xywh[:, 2] * xywh[:, 3]
+            for class_id in image_classes:
+                class_mask = classes == class_id
+                image_sources[int(class_id)].append({
+                    'image_path': str(index.image_path(file_id)),
+                    'label_path': str(index.label_path(file_id)),
+                    'labels': labels,
+                    'target_class': int(class_id),
+                    'class_count': int(histogram[row, class_id]),
+                    'total_objects': int(valid.sum()),
+                    'is_single_class': len(image_classes) == 1,
+                    'has_small_objects': bool((areas[class_mask] < 0.01).any())
+                })
         
         total_instances = sum(instance_counts.values())
         avg_instances = total_instances / self.num_classes if self.num_classes > 0 else 0
@@ -153,8 +124,16 @@ class BalancedDatasetManager:
         print(f"   평균: {avg_instances:.1f}개/클래스")
         print(f"   목표: {self.target_instances}개/클래스")
         
-        # 시각화 생성
+        # 시각화 생성 (박스 dict 목록은 그릴 때만 생성)
         if MATPLOTLIB_AVAILABLE:
+            bbox_data = defaultdict(list)
+            all_bboxes = []
+            box_mask = index.box_mask('train', self.num_classes) & np.isin(index.box_file, file_ids)
+            for class_id, (x, y, w, h) in zip(index.box_class[box_mask], index.box_xywh[box_mask]):
+                bbox_info = {'class_id': int(class_id), 'x_center': x, 'y_center': y,
+                             'width': w, 'height': h, 'area': w * h}
+                bbox_data[int(class_id)].append(bbox_info)
+                all_bboxes.append(bbox_info)
             self.create_distribution_analysis(instance_counts, bbox_data, all_bboxes)
         else:
             print("⚠️ matplotlib이 없어 시각화를 건너뜁니다. 설치: pip install matplotlib")
@@ -410,29 +389,6 @@ class BalancedDatasetManager:
                 
             ], bbox_params=A.BboxParams(format='yolo', label_fields=['class_labels']))
 
-    def normalize_label_precision(self, labels):
-        """라벨 좌표를 6자리 정밀도로 통일"""
-        normalized_labels = []
-        for label in labels:
-            line = label.strip()
-            if not line:
-                continue
-                
-            parts = line.split()
-            if len(parts) >= 5:
-                try:
-                    class_id = int(parts[0])
-                    x, y, w, h = map(float, parts[1:5])
-                    
-                    # 6자리 정밀도로 통일
-                    normalized_line = f"{class_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}"
-                    normalized_labels.append(normalized_line)
-                    
-                except (ValueError, IndexError):
-                    continue
-        
-        return normalized_labels
-
     def perform_data_augmentation(self, augmentation_plans):
         """단순 증폭 데이터 증강 수행"""
         if not augmentation_plans:
@@ -443,9 +399,16 @@ class BalancedDatasetManager:
         print(f"📋 증강 대상: {len(augmentation_plans)}개 클래스")
         print(f"🔧 방식: 전체 이미지 증강 (라벨 정확성 보장)")
         
+        # 출력 폴더 모드: 원본을 복사해 두고 증강 이미지는 캐시에서 복사 (백업 불필요)
+        if self.output_path:
+            self.prepare_output_tree()
+            train_dir = self.output_path / "train"
+        else:
+            train_dir = self.dataset_path / "train"
+        
         # 백업 디렉토리 생성
         backup_dir = self.dataset_path / "backup_before_augmentation"
-        if not backup_dir.exists():
+        if not self.output_path and not backup_dir.exists():
             backup_dir.mkdir()
             train_backup = backup_dir / "train"
             train_backup.mkdir()
@@ -453,128 +416,64 @@ class BalancedDatasetManager:
             shutil.copytree(self.dataset_path / "train" / "labels", train_backup / "labels")
             print(f"📦 백업 생성: {backup_dir}")
         
-        total_created = 0
-        
         for class_id, plan in augmentation_plans.items():
-            class_name = plan['name']
-            needed = plan['needed']
-            sources = plan['sources']
-            strategy = plan['strategy']
-            
-            print(f"\n🎯 {class_name} (ID: {class_id})")
-            print(f"   현재: {plan['current']}개, 필요: {needed}개")
-            print(f"   소스 이미지: {len(sources)}개")
-            print(f"   전략: {strategy}")
+            print(f"\n🎯 {plan['name']} (ID: {class_id})")
+            print(f"   현재: {plan['current']}개, 필요: {plan['needed']}개")
+            print(f"   소스 이미지: {len(plan['sources'])}개")
+            print(f"   전략: {plan['strategy']}")
             
-            if not sources:
+            if not plan['sources']:
                 print(f"   ❌ 소스 이미지 없음")
-                continue
-            
-            # 변환 생성
-            transform = self.create_augmentation_transform(strategy)
-            
-            created = 0
-            
-            # 필요한 만큼 증강 이미지 생성
-            while created < needed:
-                try:
-                    # 랜덤 소스 이미지 선택
-                    source_image = random.choice(sources)
-                    
-                    # 이미지 로드
-                    image = cv2.imread(source_image['image_path'])
-                    if image is None:
-                        continue
-                    
-                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    h, w = image_rgb.shape[:2]
-                    
-                    # 라벨 로드 및 정규화
-                    normalized_labels = self.normalize_label_precision(source_image['labels'])
-                    
-                    if not normalized_labels:
-                        continue
-                    
-                    # YOLO 형식 바운딩박스 준비
-                    bboxes = []
-                    class_labels = []
-                    
-                    for label_line in normalized_labels:
-                        parts = label_line.split()
-                        if len(parts) >= 5:
-                            try:
-                                label_class_id = int(parts[0])
-                                x, y, bbox_w, bbox_h = map(float, parts[1:5])
-                                
-                                # 바운딩박스 범위 체크
-                                if (0 <= x <= 1 and 0 <= y <= 1 and 
-                                    0 < bbox_w <= 1 and 0 < bbox_h <= 1):
-                                    bboxes.append([x, y, bbox_w, bbox_h])
-                                    class_labels.append(label_class_id)
-                                    
-                            except (ValueError, IndexError):
-                                continue
-                    
-                    if not bboxes:
-                        continue
-                    
-                    # 증강 적용 (라벨과 동기화)
-                    augmented = transform(image=image_rgb, bboxes=bboxes, class_labels=class_labels)
-                    aug_image = augmented['image']
-                    aug_bboxes = augmented['bboxes']
-                    aug_class_labels = augmented['class_labels']
-                    
-                    # 증강 후에도 바운딩박스가 유효한지 확인
-                    if not aug_bboxes or len(aug_bboxes) != len(aug_class_labels):
-                        continue
-                    
-                    # 파일명 생성
-                    base_name = Path(source_image['image_path']).stem
-                    aug_name = f"{base_name}_aug_{class_name}_{created:04d}"
-                    
-                    # 이미지 저장
-                    aug_img_path = self.dataset_path / "train" / "images" / f"{aug_name}.jpg"
-                    aug_image_bgr = cv2.cvtColor(aug_image, cv2.COLOR_RGB2BGR)
-                    cv2.imwrite(str(aug_img_path), aug_image_bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                    
-                    # 라벨 저장 (6자리 정밀도)
-                    aug_label_path = self.dataset_path / "train" / "labels" / f"{aug_name}.txt"
-                    
-                    with open(aug_label_path, 'w') as f:
-                        for bbox, label_id in zip(aug_bboxes, aug_class_labels):
-                            x, y, bbox_w, bbox_h = bbox
-                            # 범위 재확인 후 저장
-                            x = max(0.0, min(1.0, x))
-                            y = max(0.0, min(1.0, y))
-                            bbox_w = max(0.001, min(1.0, bbox_w))
-                            bbox_h = max(0.001, min(1.0, bbox_h))
-                            
-                            f.write(f"{int(label_id)} {x:.6f} {y:.6f} {bbox_w:.6f} {bbox_h:.6f}\n")
-                    
-                    created += 1
-                    
-                    if created % 50 == 0:
-                        print(f"   📈 진행: {created}/{needed}")
-                
-                except Exception as e:
-                    # 실패한 경우 다른 소스로 다시 시도
-                    continue
-            
-            print(f"   ✅ {class_name} 완료: {created}개 이미지 생성")
-            total_created += created
+        
+        # 스트리밍 증강 (소스 디코딩 1회 + 워커 풀 + 비동기 쓰기, 클래스별 시도 예산으로 반드시 종료)
+        engine = AugmentationEngine(self.create_augmentation_transform, workers=self.workers,
+                                    seed=self.seed, cache=self.cache)
+        created_counts = engine.run(augmentation_plans, train_dir)
+        total_created = sum(created_counts.values())
+        if self.output_path:
+            self.produced.update(engine.produced)
+            self.finalize_output_tree()
         
         print(f"\n🎉 단순 증폭 데이터 증강 완료! 총 생성: {total_created}개")
         print(f"💡 라벨 정확성: 100% 보장 (전체 이미지 증강)")
         print(f"🎯 Copy-Paste/Mosaic: 훈련 단계에서 YOLO 내장 기능 활용 예정")
         return True
 
+    def prepare_output_tree(self):
+        """원본 데이터셋을 출력 폴더로 복사 (바뀐 파일만), 이전 실행의 산출물은 기억했다가 마지막에 정리"""
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self.stale_files = {path for path in self.output_path.rglob('*')
+                            if path.is_file() and path.name != INDEX_FILENAME}
+        self.produced = set()
+        
+        copied = 0
+        sources = [self.dataset_path / "data.yaml"]
+        for split in ['train', 'val', 'valid', 'test']:
+            for kind in ['images', 'labels']:
+                src_dir = self.dataset_path / split / kind
+                if src_dir.exists():
+                    sources.extend(sorted(path for path in src_dir.iterdir() if path.is_file()))
+        for src in sources:
+            dest = self.output_path / src.relative_to(self.dataset_path)
+            copied += mirror_file(src, dest)
+            self.produced.add(dest)
+        print(f"📦 출력 폴더 준비: {self.output_path} (원본 복사 {copied}개)")
+
+    def finalize_output_tree(self):
+        """이번 실행에서 만들지 않은 이전 산출물 정리 + 캐시 기록 저장"""
+        stale = [path for path in self.stale_files if path not in self.produced]
+        for path in stale:
+            path.unlink()
+        self.cache.save()
+        print(f"📦 이전 산출물 정리: {len(stale)}개 | ♻️ {self.cache.summary()}")
+
     def update_yaml_file(self):
         """data.yaml 파일 업데이트 (경로 정보 등)"""
         yaml_path = self.dataset_path / "data.yaml"
         
-        # 백업
+        # 백업 (출력 폴더 모드에서는 원본 data.yaml이 그대로 남으므로 불필요)
         backup_path = yaml_path.with_suffix('.yaml.backup')
-        if not backup_path.exists():
+        if not self.output_path and not backup_path.exists():
             shutil.copy2(yaml_path, backup_path)
         
         # 절대 경로로 업데이트
@@ -601,6 +500,7 @@ class BalancedDatasetManager:
         issues = []
         total_images = 0
         total_labels = 0
+        summary = DatasetIndex(self.dataset_path).refresh().split_summary()
         
         for split in ['train', 'val', 'test']:
             images_dir = self.dataset_path / split / "images"
@@ -614,22 +514,14 @@ class BalancedDatasetManager:
                 issues.append(f"❌ {split}/labels 폴더 없음")
                 continue
             
-            images = list(images_dir.glob("*"))
-            labels = list(labels_dir.glob("*.txt"))
-            
-            total_images += len(images)
-            total_labels += len(labels)
+            info = summary.get(split, {'images': 0, 'labels': 0, 'unlabeled': 0})
+            total_images += info['images']
+            total_labels += info['labels']
             
-            print(f"📁 {split}: 이미지 {len(images)}개, 라벨 {len(labels)}개")
+            print(f"📁 {split}: 이미지 {info['images']}개, 라벨 {info['labels']}개")
             
             # 이미지-라벨 매칭 확인
-            unmatched = 0
-            for img_file in images:
-                if img_file.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                    label_file = labels_dir / (img_file.stem + '.txt')
-                    if not label_file.exists():
-                        unmatched += 1
-            
+            unmatched = info['unlabeled']
             if unmatched > 0:
                 issues.append(f"⚠️ {split}: {unmatched}개 이미지에 라벨 없음")
         
@@ -687,6 +579,10 @@ class BalancedDatasetManager:
                 print("❌ 데이터 증강 실패")
                 return False
             
+            # 이후 분석/YAML 업데이트/검사는 출력 데이터셋 기준
+            if self.output_path:
+                self.dataset_path = self.output_path
+            
             # 7. 결과 분석
             print("\n4️⃣ 증강 후 분포 재분석")
             final_plans, final_counts = self.analyze_instance_distribution()
@@ -756,7 +652,7 @@ class BalancedDatasetManager:
         print(f"\n📷 클래스별 샘플 이미지 생성 중... (클래스당 {samples_per_class}개)")
         
         # 샘플 저장 폴더 생성
-        samples_dir = self.dataset_path / "sample_images"
+        samples_dir = (self.output_path or self.dataset_path) / "sample_images"
         if samples_dir.exists():
             shutil.rmtree(samples_dir)
         samples_dir.mkdir()
@@ -917,6 +813,8 @@ if __name__ == "__main__":
     dataset_path = "/home/team06/workspace/jonghui/model/snack_data"
     target_instances = 600  # 클래스당 목표 인스턴스 수
     min_instances = 50     # 증강을 위한 최소 인스턴스 수
+    output_path = dataset_path + "_balanced"  # None이면 원본 train 폴더에 직접 추가 (백업 생성)
+    workers = os.cpu_count() or 1  # 증강 워커 스레드 수
     
     print(f"📂 데이터셋: {dataset_path}")
     print(f"🎯 목표: {target_instances}개/클래스")
@@ -929,7 +827,9 @@ if __name__ == "__main__":
         manager = BalancedDatasetManager(
             dataset_path=dataset_path,
             target_instances=target_instances,
-            min_instances=min_instances
+            min_instances=min_instances,
+            output_path=output_path,
+            workers=workers
         )
         
         # 파이프라인 실행
@@ -939,7 +839,7 @@ if __name__ == "__main__":
             print(f"\n🎊 클래스 균형 조절 성공!")
             print(f"🎯 이제 모든 클래스가 균형잡힌 상태입니다!")
             print(f"\n📷 생성된 파일들:")
-            print(f"   📁 샘플 이미지: {dataset_path}/sample_images/")
+            print(f"   📁 샘플 이미지: {output_path or dataset_path}/sample_images/")
             print(f"   💡 각 클래스별 폴더에서 바운딩박스가 그려진 샘플 확인")
             
             print(f"\n🎯 다음 단계 권장:")
@@ -947,12 +847,15 @@ if __name__ == "__main__":
             print(f"   📈 YOLO 내장 기능으로 정교한 객체 합성 수행")
             print(f"   💯 라벨 정확성은 이미 100% 보장됨")
             
-            # 복원 옵션
-            restore = input("\n백업에서 복원하시겠습니까? (y/N): ").strip().lower()
-            if restore in ['y', 'yes']:
-                manager.restore_backup()
+            if output_path:
+                print(f"\n📦 균형 데이터셋: {output_path} (원본은 그대로)")
             else:
-                print("📊 균형잡힌 데이터셋 유지")
+                # 복원 옵션
+                restore = input("\n백업에서 복원하시겠습니까? (y/N): ").strip().lower()
+                if restore in ['y', 'yes']:
+                    manager.restore_backup()
+                else:
+                    print("📊 균형잡힌 데이터셋 유지")
         else:
             print(f"❌ 클래스 균형 조절 실패")
             
@@ -14,6 +14,7 @@ YAML수정 → 전처리 → 훈련 → 테스트
 - test_model.py: 테스트 모듈
 """
 
+import os
 import sys
 import time
 from pathlib import Path
@@ -57,8 +58,18 @@ def main():
     skip_preprocess = input("⏭️ 전처리 건너뛰기? (이미 완료된 경우) (y/N): ").strip().lower()
     skip_preprocess = skip_preprocess in ['y', 'yes']
     
+    workers = 1
+    output_path = None
+    if not skip_preprocess:
+        workers_input = input(f"🧵 전처리 워커 수 (CPU {os.cpu_count()}개) [1]: ").strip()
+        workers = int(workers_input) if workers_input.isdigit() and int(workers_input) > 0 else 1
+        
+        default_output = f"{dataset_path.rstrip('/')}_webcam"
+        output_input = input(f"📦 전처리 결과 폴더 ('-' = 원본 직접 수정) [{default_output}]: ").strip()
+        output_path = None if output_input == '-' else (output_input or default_output)
+    
     # 설정 객체 생성
-    config = Config(dataset_path, enable_320_support)
+    config = Config(dataset_path, enable_320_support, workers=workers, output_path=output_path)
     
     if not config.yaml_path:
         print("\n❌ data.yaml을 찾을 수 없습니다")
@@ -71,6 +82,9 @@ def main():
     print(f"  📱 320 지원: {enable_320_support}")
     print(f"  📋 클래스: {len(config.classes)}개")
     print(f"  ⏭️ 전처리 건너뛰기: {skip_preprocess}")
+    if not skip_preprocess:
+        print(f"  🧵 전처리 워커: {workers}개")
+        print(f"  📦 전처리 결과: {output_path or '원본 직접 수정'}")
     print(f"  🔄 에포크: 70")
     print(f"  🎨 색상 보존: 최대")
     
@@ -126,6 +140,11 @@ def main():
             
             if preprocessor.run_preprocessing():
                 print(f"✅ 1단계 완료: 전처리 성공!")
+                
+                # 이후 훈련/테스트는 전처리 결과 데이터셋 기준
+                if preprocessor.output_path:
+                    fix_yaml_paths(preprocessor.output_path)
+                    config = Config(preprocessor.output_path, enable_320_support, workers=workers)
             else:
                 print(f"❌ 1단계 실패: 전처리 오류")
                 return
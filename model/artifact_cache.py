@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+artifact_cache.py
+전처리/증강 산출물 내용 주소 캐시 (입력 이미지/라벨 해시 + 변환 파라미터 + seed → 결과 파일)
+같은 입력과 파라미터면 다시 계산하지 않고 캐시 파일을 출력 폴더에 복사
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+from pathlib import Path
+
+# 변환 코드를 바꿔서 같은 파라미터라도 결과가 달라지면 올려서 기존 캐시 무효화
+CACHE_VERSION = 1
+
+
+def link_or_copy(src, dest):
+    """dest를 src 하드링크로 교체 (다른 파일시스템이면 복사), 교체는 원자적으로"""
+    dest = Path(dest)
+    if dest.exists() and os.path.samefile(src, dest):
+        return  # 이미 같은 파일 (같은 inode끼리 rename은 아무 것도 하지 않음)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp{os.getpid()}")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
+def mirror_file(src, dest, force=False):
+    """
+    파일을 출력 폴더로 복사 (크기/수정시각이 같은 별도 파일이 있으면 건너뜀)
+    원본/캐시 보호를 위해 링크하지 않음 - 출력 파일을 직접 수정하는 도구가 같은 inode를 덮어쓰지 않도록
+    :param force: 크기/수정시각 비교 없이 항상 복사 (내용 확인이 아니므로 같은 경로를 여러 단계가 쓰는 경우)
+    """
+    src, dest = Path(src), Path(dest)
+    src_stat = src.stat()
+    if dest.exists() and not force:
+        dest_stat = dest.stat()
+        linked = (dest_stat.st_ino, dest_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev)
+        if not linked and dest_stat.st_size == src_stat.st_size and int(dest_stat.st_mtime) == int(src_stat.st_mtime):
+            return False
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp{os.getpid()}")
+    shutil.copy2(src, tmp)
+    os.chmod(tmp, src_stat.st_mode | stat.S_IWUSR)  # 읽기 전용 캐시 객체를 복사해도 출력 파일은 수정 가능
+    os.replace(tmp, dest)
+    return True
+
+
+class ArtifactCache:
+    """
+    내용 주소 산출물 캐시
+    - objects/<키 앞 2자리>/<키>/ 아래에 결과 파일들 + meta.json (작업 반환값) 저장
+    - 키 = sha256(단계, 입력 (파일명, 내용 해시) 목록, 변환 파라미터, CACHE_VERSION)
+    - 원본 파일 해시는 (크기, mtime) 기준으로 file_hashes.json에 기억해서 바뀌지 않은 파일은 다시 읽지 않음
+    - 결과는 임시 폴더에 쓴 뒤 rename으로 등록 → 여러 프로세스가 동시에 써도 안전
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.staging_dir = self.root / "staging"
+        self.index_path = self.root / "file_hashes.json"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+        self.file_hashes = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.file_hashes = json.load(f)
+            except (OSError, ValueError):
+                self.file_hashes = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== 키 ====================
+
+    def file_hash(self, path):
+        """파일 내용 sha256 (크기/mtime이 그대로면 기억한 값 사용)"""
+        path = Path(path)
+        stat = path.stat()
+        entry_key = str(path.resolve())
+        entry = self.file_hashes.get(entry_key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.file_hashes[entry_key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                       'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def key(self, stage, inputs, params):
+        """
+        :param inputs: [(이름, 내용 식별자), ...] - 식별자는 file_hash 값 또는 캐시 산출물 "키/파일명"
+        :param params: 변환 파라미터 dict (JSON 직렬화 가능해야 함)
+        """
+        payload = json.dumps({'version': CACHE_VERSION, 'stage': stage, 'inputs': inputs, 'params': params},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ==================== 조회 / 등록 ====================
+
+    def object_dir(self, key):
+        return self.objects_dir / key[:2] / key
+
+    def lookup(self, key):
+        """캐시된 작업의 meta dict (없으면 None)"""
+        meta_path = self.object_dir(key) / "meta.json"
+        if not meta_path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def staging(self, key):
+        """결과를 쓸 임시 폴더 (commit 전까지는 다른 프로세스에 보이지 않음)"""
+        staging = self.staging_dir / f"{key}.{os.getpid()}"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+        return staging
+
+    def commit(self, key, staging, result):
+        """임시 폴더를 캐시 객체로 등록 (결과 파일은 읽기 전용 - 출력 폴더에는 복사본만 내보냄)"""
+        with open(staging / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({'result': result}, f, ensure_ascii=False)
+        for path in staging.iterdir():
+            path.chmod(0o444)
+
+        target = self.object_dir(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # 다른 프로세스가 먼저 등록함 (같은 키 = 같은 결과)
+            shutil.rmtree(staging, ignore_errors=True)
+        return target
+
+    def materialize(self, key, name, dest):
+        """
+        캐시 결과 파일을 출력 경로에 복사 (파일이 없으면 False)
+        출력 폴더는 직접 수정 모드(preprocess '-')나 라벨 정규화로 다시 쓰일 수 있으므로 캐시 객체와 inode를 공유하지 않음
+        앞 단계가 같은 경로에 방금 쓴 파일은 크기/수정시각(초 단위)이 같아도 내용이 다를 수 있으므로 항상 복사
+        """
+        src = self.object_dir(key) / name
+        if not src.exists():
+            return False
+        mirror_file(src, dest, force=True)
+        return True
+
+    def save(self):
+        """원본 파일 해시 기록 저장"""
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.file_hashes, f)
+        os.replace(tmp, self.index_path)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return f"캐시 적중 {self.hits}/{total} ({rate:.1f}%)"
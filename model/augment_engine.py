@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+augment_engine.py
+클래스 균형 증강 스트리밍 엔진 (BalancedDatasetManager에서 사용)
+
+- 소스 이미지는 한 번만 디코딩해서 LRU 캐시에 보관 (같은 소스를 여러 번 뽑아도 다시 읽지 않음)
+- 변환/인코딩은 워커 스레드 풀에서 실행, 파일 쓰기는 별도 쓰기 스레드가 담당
+- 클래스별 목표 수(quota) + 시도 예산 → 모든 변환이 박스를 잃어도 반드시 끝남
+- 시도 i의 소스/난수는 (seed, 클래스, i)로 결정되고 결과는 시도 순서대로 반영 → 워커 수와 관계없이 같은 결과
+"""
+
+import hashlib
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def parse_yolo_boxes(lines):
+    """YOLO 라벨 줄 → (bboxes, class_labels), 좌표는 6자리 정밀도로 맞추고 범위를 벗어난 박스는 제외"""
+    bboxes = []
+    class_labels = []
+    for line in lines:
+        parts = line.strip().split()
+        if len(parts) < 5:
+            continue
+        try:
+            class_id = int(parts[0])
+            x, y, w, h = (float(f"{float(v):.6f}") for v in parts[1:5])
+        except ValueError:
+            continue
+        if 0 <= x <= 1 and 0 <= y <= 1 and 0 < w <= 1 and 0 < h <= 1:
+            bboxes.append([x, y, w, h])
+            class_labels.append(class_id)
+    return bboxes, class_labels
+
+
+def format_yolo_boxes(bboxes, class_labels):
+    """증강 결과 박스 → 라벨 파일 내용 (범위 재확인 + 6자리 정밀도)"""
+    lines = []
+    for bbox, label_id in zip(bboxes, class_labels):
+        x, y, w, h = bbox[:4]
+        x = max(0.0, min(1.0, x))
+        y = max(0.0, min(1.0, y))
+        w = max(0.001, min(1.0, w))
+        h = max(0.001, min(1.0, h))
+        lines.append(f"{int(label_id)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n")
+    return "".join(lines)
+
+
+class DecodeCache:
+    """
+    디코딩한 소스 이미지 LRU 캐시 (스레드 안전, 메모리 상한 기준으로 오래된 것부터 제거)
+    값 = (RGB 이미지, bboxes, class_labels) 또는 None (읽기 실패/유효 박스 없음)
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.decodes = 0
+
+    def get(self, source):
+        path = source['image_path']
+        with self.lock:
+            if path in self.entries:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return self.entries[path]
+
+        # 디코딩은 잠금 밖에서 (cv2는 GIL을 놓으므로 워커끼리 동시에 진행)
+        entry = None
+        image = cv2.imread(path)
+        if image is not None:
+            bboxes, class_labels = parse_yolo_boxes(source['labels'])
+            if bboxes:
+                entry = (cv2.cvtColor(image, cv2.COLOR_BGR2RGB), bboxes, class_labels)
+
+        size = entry[0].nbytes if entry else 0
+        with self.lock:
+            self.decodes += 1
+            if path not in self.entries:
+                self.entries[path] = entry
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                    _, old = self.entries.popitem(last=False)
+                    self.total_bytes -= old[0].nbytes if old else 0
+        return entry
+
+
+class AsyncWriter:
+    """쓰기 전용 스레드 - 작업(함수)을 큐로 받아 순서대로 실행, 큐가 차면 생산 쪽이 기다림"""
+
+    def __init__(self, max_pending=64):
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.errors = []
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="augment-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                job()
+                self.written += 1
+            except Exception as e:
+                self.errors.append(e)
+
+    def submit(self, job):
+        self.jobs.put(job)
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+
+class ClassQuota:
+    """클래스 하나의 증강 진행 상태"""
+
+    def __init__(self, class_id, class_name, strategy, sources, needed, max_attempts, seed):
+        self.class_id = class_id
+        self.class_name = class_name
+        self.strategy = strategy
+        self.sources = sources
+        self.needed = needed
+        self.max_attempts = max_attempts
+        self.rng = random.Random(f"{seed}:{class_id}")  # 시도별 소스 선택
+        self.attempts = 0
+        self.created = 0
+        self.pending = deque()  # (시도 번호, 소스, 캐시 키, Future) - 시도 순서대로
+
+    @property
+    def done(self):
+        return self.created >= self.needed or (self.attempts >= self.max_attempts and not self.pending)
+
+    def can_submit(self):
+        # 진행 중인 시도가 모두 성공해도 목표를 넘지 않을 만큼만 미리 제출 (낭비 없음)
+        return (self.created + len(self.pending) < self.needed
+                and self.attempts < self.max_attempts)
+
+
+class AugmentationEngine:
+    """
+    클래스별 증강 스트림 실행기
+    :param make_transform: 전략 이름 → albumentations Compose (워커 스레드마다 따로 생성)
+    :param cache: ArtifactCache (있으면 시도 결과를 캐시에서 재사용하고 출력 폴더에 복사)
+    :param retry_factor: 클래스당 시도 예산 = 필요 수 × retry_factor + 10
+    """
+
+    def __init__(self, make_transform, workers=1, seed=42, cache=None,
+                 decode_cache_mb=512, retry_factor=3, max_pending_writes=64):
+        self.make_transform = make_transform
+        self.workers = max(1, workers)
+        self.seed = seed
+        self.cache = cache
+        self.retry_factor = retry_factor
+        self.decode_cache = DecodeCache(decode_cache_mb * 1024 * 1024)
+        self.max_pending_writes = max_pending_writes
+        self.local = threading.local()
+        self.global_rng_lock = threading.Lock()
+        self.produced = set()   # 출력 폴더에 만든 파일 (출력 폴더 정리용)
+
+    # ==================== 워커 ====================
+
+    def _transform_for(self, strategy):
+        transforms = getattr(self.local, 'transforms', None)
+        if transforms is None:
+            transforms = self.local.transforms = {}
+        if strategy not in transforms:
+            transforms[strategy] = self.make_transform(strategy)
+        return transforms[strategy]
+
+    def augment(self, source, strategy, aug_seed):
+        """
+        시도 하나 실행 (워커 스레드)
+        :return: (JPEG 바이트, 라벨 내용) 또는 None (유효한 결과 없음)
+        """
+        try:
+            entry = self.decode_cache.get(source)
+            if entry is None:
+                return None
+            image_rgb, bboxes, class_labels = entry
+
+            task_seed = int.from_bytes(hashlib.sha256(aug_seed.encode()).digest()[:4], 'little')
+            transform = self._transform_for(strategy)
+            if hasattr(transform, 'set_random_seed'):
+                # 변환별 난수 상태 → 스레드끼리 간섭 없음
+                transform.set_random_seed(task_seed)
+                augmented = transform(image=image_rgb.copy(), bboxes=bboxes, class_labels=class_labels)
+            else:
+                # 전역 random/np.random을 쓰는 구버전 albumentations → 시드 고정 + 변환을 직렬로
+                with self.global_rng_lock:
+                    random.seed(task_seed)
+                    np.random.seed(task_seed)
+                    augmented = transform(image=image_rgb.copy(), bboxes=bboxes, class_labels=class_labels)
+
+            aug_bboxes = augmented['bboxes']
+            aug_class_labels = augmented['class_labels']
+            if len(aug_bboxes) == 0 or len(aug_bboxes) != len(aug_class_labels):
+                return None
+
+            aug_image_bgr = cv2.cvtColor(augmented['image'], cv2.COLOR_RGB2BGR)
+            ok, encoded = cv2.imencode('.jpg', aug_image_bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            if not ok:
+                return None
+            return encoded.tobytes(), format_yolo_boxes(aug_bboxes, aug_class_labels)
+        except Exception:
+            return None
+
+    # ==================== 캐시 / 쓰기 ====================
+
+    def cache_key(self, source, strategy, aug_seed):
+        """키 = 소스 이미지 해시 + 라벨 내용 + 전략 + 시도 seed"""
+        label_text = "".join(source['labels'])
+        inputs = [(Path(source['image_path']).name, self.cache.file_hash(source['image_path'])),
+                  ('labels', hashlib.sha256(label_text.encode('utf-8')).hexdigest())]
+        return self.cache.key('balance', inputs, {'strategy': strategy, 'seed': aug_seed})
+
+    @staticmethod
+    def _write_files(result, img_path, label_path):
+        jpeg, label_text = result
+        with open(img_path, 'wb') as f:
+            f.write(jpeg)
+        with open(label_path, 'w') as f:
+            f.write(label_text)
+
+    def _commit_job(self, key, result):
+        """계산 결과를 캐시에 등록 (실패한 시도도 등록해서 다시 실행할 때 계산하지 않음)"""
+        def job():
+            staging = self.cache.staging(key)
+            if result is not None:
+                self._write_files(result, staging / "image.jpg", staging / "label.txt")
+            self.cache.commit(key, staging, result is not None)
+        return job
+
+    def _output_job(self, key, result, img_path, label_path):
+        def job():
+            if self.cache:
+                self.cache.materialize(key, "image.jpg", img_path)
+                self.cache.materialize(key, "label.txt", label_path)
+            else:
+                self._write_files(result, img_path, label_path)
+        return job
+
+    # ==================== 실행 ====================
+
+    def run(self, plans, train_dir):
+        """
+        :param plans: {class_id: {'name', 'needed', 'sources', 'strategy', ...}} (analyze_instance_distribution 결과)
+        :param train_dir: 증강 이미지를 쓸 train 폴더 (images/, labels/)
+        :return: {class_id: 생성 수}
+        """
+        train_dir = Path(train_dir)
+        quotas = [ClassQuota(class_id, plan['name'], plan['strategy'], plan['sources'], plan['needed'],
+                             plan['needed'] * self.retry_factor + 10, self.seed)
+                  for class_id, plan in plans.items() if plan['sources'] and plan['needed'] > 0]
+        window = self.workers * 4  # 동시에 진행하는 시도 수 상한
+        writer = AsyncWriter(self.max_pending_writes)
+        started = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="augment") as pool:
+            active = list(quotas)
+            while active:
+                # 1. 클래스 순서대로 빈 자리만큼 시도 제출 (캐시에 있으면 바로 완료된 Future)
+                in_flight = sum(len(q.pending) for q in active)
+                for quota in active:
+                    while in_flight < window and quota.can_submit():
+                        quota.attempts += 1
+                        source = quota.rng.choice(quota.sources)
+                        aug_seed = f"{self.seed}:{quota.class_id}:{quota.attempts}"
+                        key = self.cache_key(source, quota.strategy, aug_seed) if self.cache else None
+                        meta = self.cache.lookup(key) if self.cache else None
+                        if meta is not None:
+                            future = Future()
+                            future.set_result(('cached', meta['result']))
+                        else:
+                            future = pool.submit(self.augment, source, quota.strategy, aug_seed)
+                        quota.pending.append((quota.attempts, source, key, future))
+                        in_flight += 1
+
+                # 2. 각 클래스의 가장 오래된 시도가 끝날 때까지 대기 후 순서대로 반영
+                heads = [q.pending[0][3] for q in active if q.pending]
+                if heads:
+                    wait(heads, return_when=FIRST_COMPLETED)
+                for quota in active:
+                    while quota.pending and quota.pending[0][3].done():
+                        attempt, source, key, future = quota.pending.popleft()
+                        self._consume(quota, source, key, future.result(), train_dir, writer)
+
+                for quota in [q for q in active if q.done]:
+                    active.remove(quota)
+                    # 목표를 채운 뒤 남은 시도는 버림 (결과는 순서 기준이라 버려도 재현성 유지)
+                    for _, _, _, future in quota.pending:
+                        future.cancel()
+                    quota.pending.clear()
+                    self._report(quota)
+
+        writer.close()
+        elapsed = time.time() - started
+        total = sum(q.created for q in quotas)
+        attempts = sum(q.attempts for q in quotas)
+        print(f"\n⚡ 증강 처리량: {total / elapsed if elapsed > 0 else 0:.1f}장/초 "
+              f"({total}장 / 시도 {attempts}회 / {elapsed:.1f}초, 워커 {self.workers}개)")
+        print(f"🗂️ 디코딩: {self.decode_cache.decodes}회 (캐시 재사용 {self.decode_cache.hits}회)")
+        if writer.errors:
+            print(f"⚠️ 쓰기 실패 {len(writer.errors)}건: {writer.errors[0]}")
+        return {q.class_id: q.created for q in quotas}
+
+    def _consume(self, quota, source, key, result, train_dir, writer):
+        """시도 결과 하나를 시도 순서대로 반영 (성공이면 다음 파일 번호 부여 후 쓰기 예약)"""
+        if isinstance(result, tuple) and result and result[0] == 'cached':
+            success = result[1]
+        else:
+            success = result is not None
+            if self.cache:
+                writer.submit(self._commit_job(key, result))
+        if not success:
+            return
+
+        base_name = Path(source['image_path']).stem
+        aug_name = f"{base_name}_aug_{quota.class_name}_{quota.created:04d}"
+        img_path = train_dir / "images" / f"{aug_name}.jpg"
+        label_path = train_dir / "labels" / f"{aug_name}.txt"
+        writer.submit(self._output_job(key, result, img_path, label_path))
+        self.produced.update({img_path, label_path})
+        quota.created += 1
+        if quota.created % 50 == 0:
+            print(f"   📈 {quota.class_name} 진행: {quota.created}/{quota.needed}")
+
+    @staticmethod
+    def _report(quota):
+        if quota.created >= quota.needed:
+            print(f"   ✅ {quota.class_name} 완료: {quota.created}개 이미지 생성 (시도 {quota.attempts}회)")
+        else:
+            print(f"   ⚠️ {quota.class_name}: 시도 예산 {quota.max_attempts}회 소진, "
+                  f"{quota.created}/{quota.needed}개만 생성 (소스 이미지/변환 확인 필요)")
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+background_atlas.py
+배경 다양화용 해상도별 배경 아틀라스 + 객체 마스크 합성
+
+- 해상도(h, w)마다 배경 변형들을 미리 리사이즈해서 uint8 파일 하나 (n, h, w, 3)에 이어 쓰고 np.memmap으로 열어 씀
+  → 변형 목록을 프로세스마다 메모리에 들고 있지 않고, 워커 프로세스들이 OS 페이지 캐시를 공유
+- 열어 둔 아틀라스는 바이트 합계 기준 LRU로 닫고, 디스크의 아틀라스도 용량을 넘으면 오래 안 쓴 것부터 삭제
+- 아틀라스 이름 = 해상도 + 배경 원본/seed 서명 → 배경 이미지나 seed가 바뀌면 새로 생성
+- CompositeMask: 블러한 객체 마스크에서 안쪽/경계 띠 인덱스를 한 번 계산해 두고
+  안쪽은 원본, 바깥은 배경 그대로, 경계 띠만 실수 혼합 (기존 채널별 float 혼합과 같은 픽셀 값)
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 변형 생성 코드를 바꿔서 같은 배경/seed라도 결과가 달라지면 올려서 기존 아틀라스 무효화
+ATLAS_VERSION = 1
+
+
+class AtlasEntry:
+    """
+    해상도 하나의 배경 변형 목록
+    random.choice 등에 그대로 쓰는 시퀀스 (항목 = (종류, (h, w, 3) 이미지 뷰))
+    """
+
+    def __init__(self, data_path, types, shape):
+        self.data_path = data_path
+        self.types = types
+        self.images = np.memmap(data_path, dtype=np.uint8, mode='r', shape=(len(types),) + tuple(shape))
+
+    @property
+    def nbytes(self):
+        return self.images.size
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i):
+        return self.types[i], self.images[i]
+
+
+class BackgroundAtlas:
+    """
+    해상도별 배경 아틀라스 관리
+    사용 예:
+        atlas = BackgroundAtlas(root, BackgroundAtlas.source_signature(paths, seed))
+        bg_type, background = rng.choice(atlas.get(h, w, make_variants))
+    - make_variants(): (종류, (h, w, 3) uint8 이미지)를 하나씩 내는 이터러블 (디스크에 없을 때만 호출)
+    - 파일은 임시 이름으로 쓴 뒤 rename으로 등록 → 여러 워커가 동시에 만들어도 안전 (내용은 같음)
+    """
+
+    def __init__(self, root, signature, max_open_mb=1024, max_disk_mb=4096, verbose=True):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.signature = signature
+        self.max_open_bytes = int(max_open_mb * 1024 * 1024)
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.verbose = verbose
+        self.entries = OrderedDict()    # (h, w) → AtlasEntry (최근 사용 순)
+        self.built = 0
+        self.loaded = 0
+
+    @staticmethod
+    def source_signature(paths, seed):
+        """배경 원본 목록 (순서, 이름, 크기, 수정시각) + seed 서명"""
+        digest = hashlib.sha256(f"{ATLAS_VERSION}:{seed}".encode())
+        for path in paths:
+            stat = os.stat(path)
+            digest.update(f"|{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+
+    def atlas_paths(self, h, w):
+        stem = f"bg_{w}x{h}_{self.signature}"
+        return self.root / f"{stem}.u8", self.root / f"{stem}.json"
+
+    def get(self, h, w, make_variants):
+        """해상도 (h, w) 아틀라스 (열려 있으면 그대로, 디스크에 있으면 열기, 없으면 생성)"""
+        key = (h, w)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        data_path, meta_path = self.atlas_paths(h, w)
+        meta = self._read_meta(meta_path, data_path)
+        if meta is None:
+            meta = self._build(data_path, meta_path, (h, w, 3), make_variants())
+        else:
+            self.loaded += 1
+            os.utime(meta_path)    # 디스크 LRU용 최근 사용 시각
+
+        entry = AtlasEntry(data_path, meta['types'], meta['shape'])
+        self.entries[key] = entry
+        self._evict_open()
+        return entry
+
+    @staticmethod
+    def _read_meta(meta_path, data_path):
+        """완성된 아틀라스 메타 (없거나 깨졌으면 None)"""
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            expected = len(meta['types']) * int(np.prod(meta['shape']))
+            if meta.get('version') != ATLAS_VERSION or not meta['types'] or data_path.stat().st_size != expected:
+                return None
+            return meta
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, data_path, meta_path, shape, variants):
+        """변형을 하나씩 파일에 이어 쓰기 (메모리에는 변형 1개만)"""
+        started = time.time()
+        tmp = data_path.with_name(f".{data_path.name}.tmp{os.getpid()}")
+        types = []
+        with open(tmp, 'wb') as f:
+            for kind, image in variants:
+                if image.shape != shape or image.dtype != np.uint8:
+                    raise ValueError(f"배경 변형 크기 불일치: {image.shape} (기대 {shape})")
+                f.write(np.ascontiguousarray(image).data)
+                types.append(kind)
+        if not types:
+            tmp.unlink()
+            raise ValueError("배경 변형이 없습니다")
+
+        meta = {'version': ATLAS_VERSION, 'shape': list(shape), 'types': types}
+        os.replace(tmp, data_path)
+        tmp_meta = meta_path.with_name(f".{meta_path.name}.tmp{os.getpid()}")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+        self.built += 1
+
+        if self.verbose:
+            size_mb = data_path.stat().st_size / 1024 / 1024
+            print(f"✅ 배경 아틀라스 {shape[1]}x{shape[0]}: {len(types)}개 ({size_mb:.0f}MB, "
+                  f"{time.time() - started:.1f}초)")
+        self._evict_disk(keep=meta_path)
+        return meta
+
+    def _evict_open(self):
+        """열어 둔 아틀라스 합계가 상한을 넘으면 오래 안 쓴 것부터 닫기 (가장 최근 1개는 유지)"""
+        while len(self.entries) > 1 and sum(entry.nbytes for entry in self.entries.values()) > self.max_open_bytes:
+            self.entries.popitem(last=False)
+
+    def disk_atlases(self):
+        """디스크의 아틀라스 [(메타 경로, 데이터 경로, 바이트, 최근 사용 시각)] (오래된 순)"""
+        atlases = []
+        for meta_path in self.root.glob("bg_*.json"):
+            data_path = meta_path.with_suffix('.u8')
+            try:
+                atlases.append((meta_path, data_path, data_path.stat().st_size, meta_path.stat().st_mtime))
+            except OSError:
+                continue
+        return sorted(atlases, key=lambda atlas: atlas[3])
+
+    def _evict_disk(self, keep):
+        """디스크 아틀라스 합계가 상한을 넘으면 오래 안 쓴 것부터 삭제 (열린 memmap은 삭제 후에도 유효)"""
+        atlases = self.disk_atlases()
+        total = sum(size for _, _, size, _ in atlases)
+        for meta_path, data_path, size, _ in atlases:
+            if total <= self.max_disk_bytes:
+                break
+            if meta_path == keep:
+                continue
+            try:
+                meta_path.unlink()
+                data_path.unlink()
+            except OSError:
+                continue
+            total -= size
+            if self.verbose:
+                print(f"🧹 배경 아틀라스 정리: {data_path.name}")
+
+    def summary(self):
+        """디스크 아틀라스 현황 (워커 프로세스가 만든 것 포함)"""
+        atlases = self.disk_atlases()
+        disk_mb = sum(size for _, _, size, _ in atlases) / 1024 / 1024
+        return (f"배경 아틀라스: 해상도 {len(atlases)}개, 디스크 {disk_mb:.0f}MB "
+                f"(상한 {self.max_disk_bytes // 1024 // 1024}MB, 열어 두기 상한 {self.max_open_bytes // 1024 // 1024}MB)")
+
+
+class CompositeMask:
+    """
+    객체 마스크 (0/255) → 합성용 인덱스
+    - 5x5 가우시안 블러 후 255인 픽셀(inside)은 원본, 0인 픽셀은 배경 그대로
+    - 0과 255 사이 경계 띠(band)만 원본 * a + 배경 * (1 - a) (float32, 소수점 버림)
+    """
+
+    def __init__(self, object_mask):
+        blurred = cv2.GaussianBlur(object_mask, (5, 5), 0).ravel()
+        self.shape = object_mask.shape
+        self.inside = np.flatnonzero(blurred == 255)
+        self.band = np.flatnonzero((blurred > 0) & (blurred < 255))
+        alpha = blurred[self.band].astype(np.float32) / 255.0
+        self.alpha = alpha[:, None]
+        self.inverse = (1 - alpha)[:, None]
+
+    def apply(self, image, background):
+        """(h, w, 3) 원본 + 배경 → 합성 결과 (새 배열, 배경은 memmap이어도 됨)"""
+        source = image.reshape(-1, 3)
+        result = np.array(background, dtype=np.uint8).reshape(-1, 3)
+        result[self.inside] = source[self.inside]
+        result[self.band] = (source[self.band] * self.alpha + result[self.band] * self.inverse).astype(np.uint8)
+        return result.reshape(image.shape)
+
+
+# ==================== 벤치마크 ====================
+
+def _legacy_composite(image, object_mask, new_background):
+    """기존 방식 (전체 결과 복사 + 채널별 float 혼합)"""
+    result = new_background.copy()
+    object_area = object_mask > 0
+    result[object_area] = image[object_area]
+    object_mask_blur = cv2.GaussianBlur(object_mask, (5, 5), 0)
+    object_mask_norm = object_mask_blur.astype(np.float32) / 255.0
+    for c in range(3):
+        result[:, :, c] = (image[:, :, c] * object_mask_norm +
+                           new_background[:, :, c] * (1 - object_mask_norm)).astype(np.uint8)
+    return result
+
+
+def benchmark(h=960, w=1280, variants=40, images=20, seed=0):
+    """합성 속도 (기존 vs 마스크 인덱스) + 배경 변형 보관 메모리 (리스트 vs 아틀라스) 비교"""
+    import tempfile
+    import tracemalloc
+
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    background = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    masks = []
+    for _ in range(images):
+        mask = np.zeros((h, w), dtype=np.uint8)
+        for _ in range(rng.integers(1, 6)):
+            x1, y1 = rng.integers(0, w - 100), rng.integers(0, h - 100)
+            mask[y1:y1 + rng.integers(40, 300), x1:x1 + rng.integers(40, 300)] = 255
+        masks.append(mask)
+
+    started = time.perf_counter()
+    legacy = [_legacy_composite(image, mask, background) for mask in masks]
+    legacy_time = time.perf_counter() - started
+    started = time.perf_counter()
+    vector = [CompositeMask(mask).apply(image, background) for mask in masks]
+    vector_time = time.perf_counter() - started
+    assert all((a == b).all() for a, b in zip(legacy, vector)), "합성 결과가 기존 방식과 다릅니다"
+
+    def make_variants():
+        for i in range(variants):
+            yield 'synthetic', np.full((h, w, 3), i % 256, dtype=np.uint8)
+
+    tracemalloc.start()
+    kept = list(make_variants())
+    list_peak = tracemalloc.get_traced_memory()[1]
+    del kept
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as root:
+        tracemalloc.start()
+        atlas = BackgroundAtlas(root, 'bench', verbose=False)
+        entry = atlas.get(h, w, make_variants)
+        picked = [entry[int(i)][1].mean() for i in rng.integers(0, variants, images)]
+        atlas_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del entry, atlas, picked
+
+    print(f"🎨 배경 합성 {w}x{h} × {images}장 (결과 동일 확인)")
+    print(f"  합성: 기존 {legacy_time / images * 1000:.1f}ms → 마스크 인덱스 {vector_time / images * 1000:.1f}ms/장 "
+          f"({legacy_time / vector_time:.1f}배)")
+    print(f"  변형 {variants}개 보관 최대 메모리: 리스트 {list_peak / 1024 / 1024:.0f}MB → "
+          f"아틀라스 {atlas_peak / 1024 / 1024:.0f}MB (나머지는 memmap 페이지 캐시)")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="배경 아틀라스 확인 / 합성 벤치마크")
+    parser.add_argument("root", nargs="?", help="아틀라스 폴더 (예: <출력 폴더 옆>/.artifact_cache/backgrounds)")
+    parser.add_argument("--bench", action="store_true", help="합성 속도/메모리 비교")
+    parser.add_argument("--clear", action="store_true", help="아틀라스 파일 모두 삭제")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+        return
+    if not args.root:
+        parser.error("아틀라스 폴더를 지정하세요")
+
+    atlas = BackgroundAtlas(args.root, signature='', verbose=False)
+    atlases = atlas.disk_atlases()
+    for meta_path, data_path, size, used in atlases:
+        print(f"  {data_path.name}: {size / 1024 / 1024:.0f}MB (최근 사용 {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))})")
+        if args.clear:
+            meta_path.unlink()
+            data_path.unlink()
+    print(f"🗂️ 아틀라스 {len(atlases)}개{' 삭제' if args.clear else ''}")
+
+
+if __name__ == "__main__":
+    main()
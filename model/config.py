@@ -9,9 +9,15 @@ import yaml
 from pathlib import Path
 
 class Config:
-    def __init__(self, dataset_path, enable_320=True):
+    def __init__(self, dataset_path, enable_320=True, workers=1, seed=42, output_path=None, cache_path=None,
+                 background_cache_mb=1024):
         self.dataset_path = Path(dataset_path)
         self.enable_320 = enable_320
+        self.workers = workers  # 전처리 프로세스 수 (1이면 직렬)
+        self.seed = seed        # 전처리 난수 시드 (재현성)
+        self.output_path = output_path  # 전처리 결과 폴더 (None이면 데이터셋 직접 수정)
+        self.cache_path = cache_path    # 전처리 산출물 캐시 폴더 (None이면 출력 폴더 옆 .artifact_cache)
+        self.background_cache_mb = background_cache_mb  # 배경 아틀라스를 열어 둘 최대 용량 (MB)
         self.classes = []
         self.yaml_path = None
         self.load_yaml()
@@ -77,6 +83,7 @@ class Config:
         print(f"\n📊 현재 설정:")
         print(f"  📂 데이터셋: {self.dataset_path}")
         print(f"  📱 320 지원: {self.enable_320}")
+        print(f"  🧵 전처리 워커: {self.workers}개 (seed {self.seed})")
         print(f"  📋 클래스 수: {len(self.classes)}")
         print(f"  📄 YAML: {self.yaml_path}")
         
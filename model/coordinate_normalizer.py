@@ -13,6 +13,11 @@ import shutil
 from pathlib import Path
 import time
 
+import numpy as np
+
+from dataset_index import DatasetIndex
+from label_io import files_text, read_label_files, write_label_files
+
 class CoordinateNormalizer:
     def __init__(self, dataset_path):
         self.dataset_path = Path(dataset_path)
@@ -21,53 +26,14 @@ class CoordinateNormalizer:
         """현재 라벨들의 정밀도 분석"""
         print("📊 좌표 정밀도 분석 중...")
         
-        precision_stats = {}
-        total_files = 0
-        total_coords = 0
-        
-        for split in ["train", "val", "valid", "test"]:
-            labels_dir = self.dataset_path / split / "labels"
-            
-            if not labels_dir.exists():
-                continue
-                
+        # 데이터셋 인덱스에서 조회 (바뀐 라벨만 다시 읽음)
+        index = DatasetIndex(self.dataset_path).refresh()
+        for split in index.split_summary():
             print(f"📁 {split} 분석 중...")
-            
-            for label_file in labels_dir.glob("*.txt"):
-                try:
-                    with open(label_file, 'r') as f:
-                        lines = f.readlines()
-                    
-                    total_files += 1
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        parts = line.split()
-                        if len(parts) >= 5:
-                            try:
-                                # 좌표 4개 체크
-                                coords = parts[1:5]
-                                
-                                for coord_str in coords:
-                                    total_coords += 1
-                                    
-                                    # 소수점 자릿수 계산
-                                    if '.' in coord_str:
-                                        decimal_places = len(coord_str.split('.')[1])
-                                    else:
-                                        decimal_places = 0
-                                    
-                                    precision_stats[decimal_places] = precision_stats.get(decimal_places, 0) + 1
-                                    
-                            except (ValueError, IndexError):
-                                continue
-                                
-                except Exception as e:
-                    print(f"⚠️ 분석 오류 {label_file.name}: {e}")
-                    continue
+        
+        precision_stats = index.precision_stats()
+        total_files = int((index.files['label_mtime'] >= 0).sum())
+        total_coords = sum(precision_stats.values())
         
         print(f"\n📈 정밀도 분석 결과:")
         print(f"  📄 총 파일: {total_files}개")
@@ -128,78 +94,20 @@ class CoordinateNormalizer:
                     shutil.copytree(src_labels, dst_labels)
             print(f"✅ 백업 생성: {backup_dir}")
         
-        total_files = 0
-        normalized_files = 0
-        total_coords = 0
-        normalized_coords = 0
+        # 인덱스로 정규화가 필요한 파일만 골라서 다시 씀 (나머지는 읽지도 않음)
+        index = DatasetIndex(self.dataset_path).refresh()
+        total_files = int((index.files['label_mtime'] >= 0).sum())
+        total_coords = len(index.box_class) * 4
+        targets = index.files_needing_precision(target_precision)
+        normalized_coords = int((index.box_decimals != target_precision).any(axis=1).sum()) * 4
         
-        for split in ["train", "val", "valid", "test"]:
-            labels_dir = self.dataset_path / split / "labels"
-            
-            if not labels_dir.exists():
-                continue
-                
-            print(f"📁 {split} 정규화 중...")
-            
-            for label_file in labels_dir.glob("*.txt"):
-                try:
-                    with open(label_file, 'r') as f:
-                        lines = f.readlines()
-                    
-                    total_files += 1
-                    new_lines = []
-                    file_changed = False
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        parts = line.split()
-                        if len(parts) >= 5:
-                            try:
-                                class_id = int(parts[0])
-                                x, y, w, h = map(float, parts[1:5])
-                                
-                                total_coords += 4
-                                
-                                # 원본 정밀도 체크
-                                original_precision = []
-                                for coord_str in parts[1:5]:
-                                    if '.' in coord_str:
-                                        original_precision.append(len(coord_str.split('.')[1]))
-                                    else:
-                                        original_precision.append(0)
-                                
-                                # 정규화 필요한지 체크
-                                if any(p != target_precision for p in original_precision):
-                                    file_changed = True
-                                    normalized_coords += 4
-                                
-                                # 새 라인 생성 (target_precision 자리)
-                                format_str = f"{{}} {{:.{target_precision}f}} {{:.{target_precision}f}} {{:.{target_precision}f}} {{:.{target_precision}f}}"
-                                new_line = format_str.format(class_id, x, y, w, h)
-                                new_lines.append(new_line)
-                                
-                            except (ValueError, IndexError):
-                                # 잘못된 형식은 그대로 유지
-                                new_lines.append(line)
-                        else:
-                            # 5개 미만의 파트는 그대로 유지
-                            new_lines.append(line)
-                    
-                    # 파일이 변경된 경우에만 저장
-                    if file_changed:
-                        with open(label_file, 'w') as f:
-                            f.write('\n'.join(new_lines) + '\n')
-                        normalized_files += 1
-                    
-                    if total_files % 100 == 0:
-                        print(f"  📈 처리: {total_files}개 파일, {normalized_files}개 정규화")
-                        
-                except Exception as e:
-                    print(f"⚠️ 정규화 오류 {label_file.name}: {e}")
-                    continue
+        print(f"📁 정규화 대상: {len(targets)}개 파일 / 전체 {total_files}개")
+        
+        # 대상 라벨을 한 번에 읽어 배열로 정규화한 뒤 파일별로 한 번씩 씀 (잘못된 형식의 줄은 그대로 유지)
+        label_files = [index.label_path(file_id) for file_id in targets]
+        table = read_label_files(label_files)
+        write_label_files(label_files, files_text(table, target_precision, keep_invalid=True))
+        normalized_files = len(label_files)
         
         print(f"\n✅ 좌표 정규화 완료!")
         print(f"  📄 총 파일: {total_files}개")
@@ -214,57 +122,19 @@ class CoordinateNormalizer:
         """정규화 결과 검증"""
         print(f"\n🔍 정규화 결과 검증...")
         
-        valid_files = 0
-        invalid_files = 0
-        sample_errors = []
+        # 정규화로 바뀐 파일만 인덱스에 다시 반영
+        index = DatasetIndex(self.dataset_path).refresh()
+        invalid = index.files_needing_precision(target_precision)
+        invalid_files = len(invalid)
+        valid_files = int((index.files['label_mtime'] >= 0).sum()) - invalid_files
         
-        for split in ["train", "val", "valid", "test"]:
-            labels_dir = self.dataset_path / split / "labels"
-            
-            if not labels_dir.exists():
-                continue
-            
-            for label_file in labels_dir.glob("*.txt"):
-                try:
-                    with open(label_file, 'r') as f:
-                        lines = f.readlines()
-                    
-                    file_valid = True
-                    
-                    for line_idx, line in enumerate(lines):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        parts = line.split()
-                        if len(parts) >= 5:
-                            try:
-                                # 좌표 정밀도 체크
-                                coords = parts[1:5]
-                                
-                                for coord_str in coords:
-                                    if '.' in coord_str:
-                                        decimal_places = len(coord_str.split('.')[1])
-                                        if decimal_places != target_precision:
-                                            file_valid = False
-                                            if len(sample_errors) < 5:
-                                                sample_errors.append(f"{label_file.name}:{line_idx+1} -> {coord_str} ({decimal_places}자리)")
-                                            break
-                                
-                                if not file_valid:
-                                    break
-                                    
-                            except (ValueError, IndexError):
-                                continue
-                    
-                    if file_valid:
-                        valid_files += 1
-                    else:
-                        invalid_files += 1
-                        
-                except Exception as e:
-                    invalid_files += 1
-                    continue
+        sample_errors = []
+        for file_id in invalid[:5]:
+            start = index.files['box_start'][file_id]
+            decimals = index.box_decimals[start:start + index.files['box_count'][file_id]]
+            box, coord = np.argwhere(decimals != target_precision)[0]
+            sample_errors.append(f"{index.label_path(file_id).name}: 박스 {box + 1} 좌표 {coord + 1} "
+                                 f"({decimals[box, coord]}자리)")
         
         total_files = valid_files + invalid_files
         success_rate = (valid_files / total_files) * 100 if total_files > 0 else 0
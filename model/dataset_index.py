@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+dataset_index.py
+YOLO 데이터셋 인덱스 - 폴더를 한 번 훑어서 열 단위 NumPy 배열로 저장 (split 분할, 분포 분석, 좌표 정규화, YAML 수정이 공유)
+
+- 파일 표: split, 파일명, 이미지 크기, 이미지/라벨 수정시각, 박스 범위
+- 박스 표: 파일 번호, 클래스, x/y/w/h, 좌표별 소수점 자릿수
+- <데이터셋>/.dataset_index.npz 에 저장, 다음 실행에서는 크기/수정시각이 바뀐 파일만 다시 읽음
+"""
+
+import os
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+from label_io import read_label_files
+
+INDEX_FILENAME = ".dataset_index.npz"
+INDEX_VERSION = 1
+SPLITS = ["train", "val", "valid", "test"]
+
+# 같은 이름의 이미지가 여러 확장자로 있으면 이 순서로 선택
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.JPG', '.JPEG', '.PNG', '.BMP']
+EXTENSION_PRIORITY = {ext: i for i, ext in enumerate(IMAGE_EXTENSIONS)}
+
+FILE_COLUMNS = {
+    'split': str, 'stem': str, 'image_name': str,
+    'image_mtime': np.int64, 'image_bytes': np.int64,
+    'label_mtime': np.int64, 'label_bytes': np.int64,
+    'width': np.int32, 'height': np.int32,
+    'box_start': np.int64, 'box_count': np.int32,
+}
+
+
+def read_image_size(path):
+    """이미지 헤더만 읽어서 (너비, 높이) 반환 (JPEG/PNG, 그 외/실패는 (-1, -1))"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(26)
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                width, height = struct.unpack('>II', head[16:24])
+                return int(width), int(height)
+            if head[:2] != b'\xff\xd8':
+                return -1, -1
+            # JPEG: SOFn 마커까지 세그먼트 건너뛰기
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return -1, -1
+                code = marker[1]
+                if code == 0xFF:
+                    f.seek(-1, 1)
+                    continue
+                length = struct.unpack('>H', f.read(2))[0]
+                if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack('>xHH', f.read(5))
+                    return int(width), int(height)
+                f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return -1, -1
+
+
+class DatasetIndex:
+    """
+    데이터셋 인덱스
+    사용 예:
+        index = DatasetIndex(dataset_path).refresh()
+        counts = index.class_counts('train', num_classes)
+    """
+
+    def __init__(self, dataset_path, index_path=None):
+        self.dataset_path = Path(dataset_path)
+        self.index_path = Path(index_path) if index_path else self.dataset_path / INDEX_FILENAME
+        self.files = {name: np.empty(0, dtype=dtype) for name, dtype in FILE_COLUMNS.items()}
+        self.box_file = np.empty(0, dtype=np.int64)
+        self.box_class = np.empty(0, dtype=np.int32)
+        self.box_xywh = np.empty((0, 4), dtype=np.float64)
+        self.box_decimals = np.empty((0, 4), dtype=np.int8)
+        self.load()
+
+    def __len__(self):
+        return len(self.files['stem'])
+
+    # ==================== 저장 / 로드 ====================
+
+    def load(self):
+        if not self.index_path.exists():
+            return False
+        try:
+            with np.load(self.index_path) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    return False
+                self.files = {name: data[f"file_{name}"] for name in FILE_COLUMNS}
+                self.box_class = data['box_class']
+                self.box_xywh = data['box_xywh']
+                self.box_decimals = data['box_decimals']
+        except (OSError, KeyError, ValueError):
+            return False
+        self.box_file = np.repeat(np.arange(len(self), dtype=np.int64), self.files['box_count'])
+        return True
+
+    def save(self):
+        arrays = {f"file_{name}": column for name, column in self.files.items()}
+        arrays.update(version=INDEX_VERSION, box_class=self.box_class,
+                      box_xywh=self.box_xywh, box_decimals=self.box_decimals)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.index_path)
+
+    # ==================== 스캔 ====================
+
+    @staticmethod
+    def _scan_dir(directory):
+        """{이름: (수정시각 ns, 크기)} (폴더가 없으면 빈 dict)"""
+        entries = {}
+        if not directory.is_dir():
+            return entries
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return entries
+
+    def _scan(self):
+        """폴더 스캔 → 파일 표 열 (이름/수정시각/크기만, 내용은 읽지 않음)"""
+        rows = {name: [] for name in ('split', 'stem', 'image_name', 'image_mtime', 'image_bytes',
+                                      'label_mtime', 'label_bytes')}
+        for split in SPLITS:
+            images = self._scan_dir(self.dataset_path / split / "images")
+            labels = self._scan_dir(self.dataset_path / split / "labels")
+            if not images and not labels:
+                continue
+
+            by_stem = {}    # 이름 → (확장자 우선순위, 파일명)
+            for name in images:
+                stem, dot, ext = name.rpartition('.')
+                priority = EXTENSION_PRIORITY.get(dot + ext)
+                if priority is not None and (stem not in by_stem or priority < by_stem[stem][0]):
+                    by_stem[stem] = (priority, name)
+            stems = sorted(set(by_stem) | {name[:-4] for name in labels if name.endswith('.txt')})
+
+            missing = (-1, -1)
+            for stem in stems:
+                image_name = by_stem[stem][1] if stem in by_stem else ''
+                image_stat = images.get(image_name, missing)
+                label_stat = labels.get(stem + '.txt', missing)
+                rows['stem'].append(stem)
+                rows['image_name'].append(image_name)
+                rows['image_mtime'].append(image_stat[0])
+                rows['image_bytes'].append(image_stat[1])
+                rows['label_mtime'].append(label_stat[0])
+                rows['label_bytes'].append(label_stat[1])
+            rows['split'].extend([split] * len(stems))
+        return {name: np.array(values, dtype=FILE_COLUMNS[name]) for name, values in rows.items()}
+
+    def refresh(self, verbose=True):
+        """폴더와 인덱스를 비교해서 바뀐 파일만 다시 읽고 저장 (변경 없으면 저장도 생략)"""
+        started = time.time()
+        files = self._scan()
+        count = len(files['stem'])
+
+        # 이전 인덱스에서 같은 (split, 이름) 행 찾기 → 이름/크기/수정시각이 모두 같으면 재사용
+        previous = {key: i for i, key in enumerate(zip(self.files['split'].tolist(), self.files['stem'].tolist()))}
+        old = np.array([previous.get(key, -1) for key in zip(files['split'].tolist(), files['stem'].tolist())],
+                       dtype=np.int64)
+        same = old >= 0
+        safe_old = np.where(same, old, 0)
+        if len(self):
+            for name in ('image_name', 'image_mtime', 'image_bytes', 'label_mtime', 'label_bytes'):
+                same &= self.files[name][safe_old] == files[name]
+        else:
+            same[:] = False
+
+        changed = np.flatnonzero(~same)
+        removed = len(self) - int(same.sum())
+        if not len(changed) and not removed and count == len(self) and (old == np.arange(count)).all():
+            if verbose:
+                print(f"🗂️ 데이터셋 인덱스: 파일 {count}개, 박스 {len(self.box_class)}개 "
+                      f"(변경 없음, {time.time() - started:.2f}초)")
+            return self
+
+        # 바뀐 파일만 읽기 (라벨은 한 번에 모아서 배열로 파싱, 읽을 수 없는 줄은 건너뜀)
+        width = np.where(same, self.files['width'][safe_old] if len(self) else -1, -1).astype(np.int32)
+        height = np.where(same, self.files['height'][safe_old] if len(self) else -1, -1).astype(np.int32)
+        box_count = np.where(same, self.files['box_count'][safe_old] if len(self) else 0, 0).astype(np.int32)
+        for i in changed:
+            if files['image_name'][i]:
+                width[i], height[i] = read_image_size(self.dataset_path / files['split'][i] / "images" / files['image_name'][i])
+        labeled = changed[files['label_mtime'][changed] >= 0]
+        table = read_label_files([self.dataset_path / files['split'][i] / "labels" / (files['stem'][i] + '.txt')
+                                  for i in labeled])
+        box_count[changed] = 0
+        box_count[labeled] = np.bincount(table.line_file[table.valid], minlength=len(labeled))
+
+        box_start = np.zeros(count, dtype=np.int64)
+        if count:
+            box_start[1:] = np.cumsum(box_count, dtype=np.int64)[:-1]
+        total = int(box_count.sum())
+        box_file = np.repeat(np.arange(count, dtype=np.int64), box_count)
+
+        # 재사용 박스는 이전 배열에서 한 번에 복사
+        box_class = np.empty(total, dtype=np.int32)
+        box_xywh = np.empty((total, 4), dtype=np.float64)
+        box_decimals = np.empty((total, 4), dtype=np.int8)
+        reused_boxes = same[box_file]
+        if reused_boxes.any():
+            offset = (self.files['box_start'][safe_old] - box_start)[box_file[reused_boxes]]
+            src = np.flatnonzero(reused_boxes) + offset
+            box_class[reused_boxes] = self.box_class[src]
+            box_xywh[reused_boxes] = self.box_xywh[src]
+            box_decimals[reused_boxes] = self.box_decimals[src]
+        # 새로 읽은 박스는 파일 순서 그대로 나머지 자리에
+        box_class[~reused_boxes] = table.classes[table.valid]
+        box_xywh[~reused_boxes] = table.xywh[table.valid]
+        box_decimals[~reused_boxes] = table.decimals[table.valid]
+
+        files.update(width=width, height=height, box_start=box_start, box_count=box_count)
+        self.files = files
+        self.box_file, self.box_class, self.box_xywh, self.box_decimals = box_file, box_class, box_xywh, box_decimals
+        self.save()
+
+        if verbose:
+            print(f"🗂️ 데이터셋 인덱스: 파일 {count}개, 박스 {total}개 "
+                  f"(새로 읽음 {len(changed)}개, 재사용 {count - len(changed)}개, {time.time() - started:.2f}초)")
+        return self
+
+    # ==================== 조회 ====================
+
+    def split_mask(self, split=None):
+        """split 파일 마스크 (None이면 전체, 리스트도 가능)"""
+        if split is None:
+            return np.ones(len(self), dtype=bool)
+        if isinstance(split, str):
+            return self.files['split'] == split
+        return np.isin(self.files['split'], list(split))
+
+    def split_summary(self):
+        """{split: {'images', 'labels', 'unlabeled'}} - 이미지 수, 라벨 수, 라벨 없는 이미지 수"""
+        summary = {}
+        has_image = self.files['image_name'] != ''
+        has_label = self.files['label_mtime'] >= 0
+        for split in SPLITS:
+            mask = self.split_mask(split)
+            if mask.any():
+                summary[split] = {'images': int((mask & has_image).sum()),
+                                  'labels': int((mask & has_label).sum()),
+                                  'unlabeled': int((mask & has_image & ~has_label).sum())}
+        return summary
+
+    def labeled_images(self, split=None):
+        """이미지와 라벨이 모두 있는 파일 번호"""
+        mask = self.split_mask(split) & (self.files['image_name'] != '') & (self.files['label_mtime'] >= 0)
+        return np.flatnonzero(mask)
+
+    def box_mask(self, split=None, num_classes=None):
+        """split의 박스 마스크 (num_classes를 주면 0 <= 클래스 < num_classes 인 박스만)"""
+        mask = self.split_mask(split)[self.box_file] if len(self.box_file) else np.zeros(0, dtype=bool)
+        if num_classes is not None:
+            mask &= (self.box_class >= 0) & (self.box_class < num_classes)
+        return mask
+
+    def class_counts(self, split=None, num_classes=None, labeled_only=True):
+        """클래스별 인스턴스 수 배열"""
+        mask = self.box_mask(split, num_classes)
+        if labeled_only:
+            mask &= (self.files['image_name'] != '')[self.box_file]
+        classes = self.box_class[mask]
+        minlength = num_classes or (int(classes.max()) + 1 if len(classes) else 0)
+        return np.bincount(classes[classes >= 0], minlength=minlength)
+
+    def image_class_histogram(self, file_ids, num_classes):
+        """(len(file_ids), num_classes) 이미지별 클래스 인스턴스 수"""
+        file_ids = np.asarray(file_ids, dtype=np.int64)
+        histogram = np.zeros((len(file_ids), num_classes), dtype=np.int32)
+        row_of = np.full(len(self), -1, dtype=np.int64)
+        row_of[file_ids] = np.arange(len(file_ids))
+        rows = row_of[self.box_file]
+        keep = (rows >= 0) & (self.box_class >= 0) & (self.box_class < num_classes)
+        np.add.at(histogram, (rows[keep], self.box_class[keep]), 1)
+        return histogram
+
+    def file_boxes(self, file_id):
+        """(클래스 배열, xywh 배열) - 파일 하나의 박스"""
+        start, count = self.files['box_start'][file_id], self.files['box_count'][file_id]
+        return self.box_class[start:start + count], self.box_xywh[start:start + count]
+
+    def precision_stats(self, split=None):
+        """{소수점 자릿수: 좌표 수}"""
+        decimals = self.box_decimals[self.box_mask(split)].ravel()
+        values, counts = np.unique(decimals, return_counts=True)
+        return {int(v): int(c) for v, c in zip(values, counts)}
+
+    def files_needing_precision(self, target_precision, split=None):
+        """target_precision 자리가 아닌 좌표가 있는 파일 번호"""
+        mask = self.box_mask(split) & (self.box_decimals != target_precision).any(axis=1)
+        return np.unique(self.box_file[mask])
+
+    def image_path(self, file_id):
+        return self.dataset_path / self.files['split'][file_id] / "images" / self.files['image_name'][file_id]
+
+    def label_path(self, file_id):
+        return self.dataset_path / self.files['split'][file_id] / "labels" / (self.files['stem'][file_id] + '.txt')
+
+
+def main():
+    """독립 실행용 - 인덱스 갱신 후 split/클래스 요약 출력"""
+    import argparse
+    parser = argparse.ArgumentParser(description="YOLO 데이터셋 인덱스 갱신")
+    parser.add_argument("dataset_path")
+    args = parser.parse_args()
+
+    index = DatasetIndex(args.dataset_path).refresh()
+    for split, info in index.split_summary().items():
+        counts = index.class_counts(split)
+        print(f"📁 {split}: 이미지 {info['images']}개, 라벨 {info['labels']}개, 라벨 없음 {info['unlabeled']}개, "
+              f"박스 {int(counts.sum())}개")
+    stats = index.precision_stats()
+    print(f"📐 좌표 자릿수: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+export_model.py
+학습된 YOLO 모델 → ONNX / TFLite FP16 / TFLite INT8 변환 + 검증 (Colab 없이 CPU 장비에서 실행)
+
+1. 데이터셋 인덱스로 클래스가 고르게 섞인 보정(calibration) 이미지와 고정 검증 이미지 선택
+   → 산출물 캐시에 저장 (같은 이미지/설정이면 다시 만들지 않음)
+2. 형식별 export (INT8은 보정 이미지로 양자화)
+3. 원본(.pt)과 같은 검증 이미지로 mAP 비교 + 모델 크기 + 지연시간 → export_report.json
+
+사용법:
+    python export_model.py --weights best.pt --dataset snack_data --imgsz 320
+"""
+
+import json
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from artifact_cache import ArtifactCache
+from dataset_index import DatasetIndex
+
+# 형식 이름 → Ultralytics export 인자 / 배포 파일 접미사
+EXPORT_FORMATS = {
+    'onnx': {'format': 'onnx', 'args': {'simplify': True}, 'suffix': '.onnx'},
+    'tflite_fp16': {'format': 'tflite', 'args': {'half': True}, 'suffix': '_float16.tflite'},
+    # Ultralytics의 *_int8.tflite는 입출력이 float인 동적 범위 양자화 → 배포(TFLiteBackend)는 완전 정수 모델 사용
+    'tflite_int8': {'format': 'tflite', 'args': {'int8': True}, 'suffix': '_int8.tflite',
+                    'prefer': '_full_integer_quant.tflite'},
+}
+
+VAL_SPLITS = ["val", "valid", "test"]
+
+
+class ModelExporter:
+    def __init__(self, weights, dataset_path, imgsz=320, output_dir=None, cache_path=None,
+                 calib_size=300, val_size=200, calib_split="train", val_split=None, seed=42, verbose=True):
+        self.weights = Path(weights)
+        self.dataset_path = Path(dataset_path)
+        self.imgsz = imgsz
+        self.output_dir = Path(output_dir) if output_dir else Path("exports") / f"{self.weights.stem}_{imgsz}"
+        self.cache = ArtifactCache(cache_path or self.dataset_path.parent / ".artifact_cache")
+        self.calib_size = calib_size
+        self.val_size = val_size
+        self.calib_split = calib_split
+        self.val_split = val_split
+        self.seed = seed
+        self.verbose = verbose
+        self.names = None
+
+    # ==================== 보정 / 검증 이미지 ====================
+
+    def select_images(self, index, split, count):
+        """
+        split에서 클래스가 고르게 섞이도록 이미지 선택 (seed 고정)
+        희귀 클래스부터 돌아가며 그 클래스가 있는 아직 안 뽑은 이미지를 하나씩 선택
+        """
+        file_ids = index.labeled_images(split)
+        if len(file_ids) <= count:
+            return file_ids
+
+        num_classes = len(index.class_counts(split))
+        present = index.image_class_histogram(file_ids, num_classes) > 0
+        order = np.random.default_rng(self.seed).permutation(len(file_ids))
+        classes = np.argsort(present.sum(axis=0), kind='stable')
+        queues = [list(order[present[order, c]]) for c in classes if present[:, c].any()]
+
+        taken = np.zeros(len(file_ids), dtype=bool)
+        chosen = []
+        while len(chosen) < count and queues:
+            for queue in queues:
+                row = next((r for r in queue if not taken[r]), None)
+                if row is None:
+                    continue
+                taken[row] = True
+                chosen.append(row)
+                if len(chosen) == count:
+                    break
+            queues = [[r for r in queue if not taken[r]] for queue in queues]
+            queues = [queue for queue in queues if queue]
+        return np.sort(file_ids[chosen])
+
+    def build_image_set(self, index, stage, split, count):
+        """
+        선택한 이미지+라벨을 캐시에 저장하고 YOLO 데이터셋 폴더(images/, labels/ + data.yaml)로 복사
+        :return: (data.yaml 경로, 이미지 수)
+        """
+        file_ids = self.select_images(index, split, count)
+        if not len(file_ids):
+            raise ValueError(f"{split} split에 라벨이 있는 이미지가 없습니다")
+
+        files = []
+        for file_id in file_ids:
+            image_path, label_path = index.image_path(file_id), index.label_path(file_id)
+            files.append((image_path, label_path))
+        inputs = [(path.name, self.cache.file_hash(path)) for pair in files for path in pair]
+        key = self.cache.key(stage, inputs, {'split': split, 'count': count, 'seed': self.seed})
+
+        if self.cache.lookup(key) is None:
+            staging = self.cache.staging(key)
+            for image_path, label_path in files:
+                shutil.copy2(image_path, staging / image_path.name)
+                shutil.copy2(label_path, staging / label_path.name)
+            self.cache.commit(key, staging, {'images': len(files)})
+            status = "생성"
+        else:
+            status = "캐시 사용"
+        self.cache.save()
+
+        set_dir = self.cache.root / "sets" / f"{stage}_{key[:12]}"
+        for image_path, label_path in files:
+            self.cache.materialize(key, image_path.name, set_dir / "images" / image_path.name)
+            self.cache.materialize(key, label_path.name, set_dir / "labels" / label_path.name)
+
+        yaml_path = set_dir / "data.yaml"
+        with open(yaml_path, 'w', encoding='utf-8') as f:
+            yaml.dump({'path': str(set_dir.resolve()), 'train': 'images', 'val': 'images',
+                       'nc': len(self.names), 'names': self.names}, f, default_flow_style=False, allow_unicode=True)
+
+        if self.verbose:
+            print(f"📦 {stage} 이미지 {len(files)}장 ({split}, {status}): {set_dir}")
+        return yaml_path, len(files)
+
+    # ==================== export / 검증 ====================
+
+    def export_format(self, name, calib_yaml):
+        """형식 하나 export → 출력 폴더의 배포 파일 경로"""
+        from ultralytics import YOLO
+
+        spec = EXPORT_FORMATS[name]
+        args = dict(spec['args'])
+        if args.get('int8'):
+            args['data'] = str(calib_yaml)
+
+        exported = Path(YOLO(str(self.weights)).export(format=spec['format'], imgsz=self.imgsz, device='cpu', **args))
+        suffix = spec['suffix']
+        if 'prefer' in spec:
+            # 완전 정수 모델이 없으면 동적 범위 모델을 같은 이름으로 내보내지 않고 실패 처리
+            preferred = exported.with_name(exported.name.replace(spec['suffix'], spec['prefer']))
+            if not preferred.exists():
+                raise RuntimeError(f"{preferred.name}이 생성되지 않았습니다 ({exported.name}은 입출력이 float인 동적 범위 양자화 모델)")
+            exported, suffix = preferred, spec['prefer']
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        target = self.output_dir / f"{self.weights.stem}_{self.imgsz}{suffix}"
+        shutil.copy2(exported, target)
+        return target
+
+    def validate(self, model_path, val_yaml, latency_images=50, warmup=3):
+        """검증 이미지로 mAP + 이미지 1장 지연시간 (전처리~후처리, batch 1, CPU)"""
+        from ultralytics import YOLO
+
+        model = YOLO(str(model_path), task='detect')
+        metrics = model.val(data=str(val_yaml), imgsz=self.imgsz, batch=1, device='cpu',
+                            plots=False, verbose=False)
+
+        with open(val_yaml, 'r', encoding='utf-8') as f:
+            image_dir = Path(yaml.safe_load(f)['path']) / "images"
+        images = sorted(image_dir.iterdir())[:latency_images]
+        for image in images[:warmup]:
+            model.predict(str(image), imgsz=self.imgsz, device='cpu', verbose=False)
+        latencies = []
+        for image in images:
+            start = time.perf_counter()
+            model.predict(str(image), imgsz=self.imgsz, device='cpu', verbose=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        return {
+            'map50': round(float(metrics.box.map50), 4),
+            'map50_95': round(float(metrics.box.map), 4),
+            'precision': round(float(metrics.box.mp), 4),
+            'recall': round(float(metrics.box.mr), 4),
+            'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+            'latency_ms_p95': round(float(np.percentile(latencies, 95)), 2),
+        }
+
+    # ==================== 전체 실행 ====================
+
+    def run(self, formats, max_map_drop=0.02):
+        """보정/검증 세트 준비 → 형식별 export + 검증 → 보고서 (원본 대비 mAP50 하락이 max_map_drop 이하면 통과)"""
+        import ultralytics
+        from ultralytics import YOLO
+
+        start_time = time.time()
+        self.names = list(YOLO(str(self.weights)).names.values())
+
+        index = DatasetIndex(self.dataset_path).refresh()
+        summary = index.split_summary()
+        val_split = self.val_split or next((s for s in VAL_SPLITS if s in summary), self.calib_split)
+        calib_yaml, calib_count = self.build_image_set(index, 'calibration', self.calib_split, self.calib_size)
+        val_yaml, val_count = self.build_image_set(index, 'validation', val_split, self.val_size)
+
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'weights': str(self.weights),
+            'weights_sha256': self.cache.file_hash(self.weights),
+            'imgsz': self.imgsz,
+            'ultralytics': ultralytics.__version__,
+            'python': sys.version.split()[0],
+            'calibration': {'split': self.calib_split, 'images': calib_count, 'data': str(calib_yaml)},
+            'validation': {'split': val_split, 'images': val_count, 'data': str(val_yaml)},
+            'max_map50_drop': max_map_drop,
+            'models': {}
+        }
+
+        print(f"\n📊 원본 모델 검증: {self.weights}")
+        reference = self.validate(self.weights, val_yaml)
+        reference['size_mb'] = round(self.weights.stat().st_size / 1024 / 1024, 2)
+        report['models']['pytorch'] = reference
+
+        for name in formats:
+            print(f"\n🔄 {name} 변환 중...")
+            export_start = time.time()
+            try:
+                path = self.export_format(name, calib_yaml)
+                export_time = time.time() - export_start
+                result = self.validate(path, val_yaml)
+            except Exception as e:
+                print(f"❌ {name} 실패: {e}")
+                report['models'][name] = {'error': str(e), 'passed': False}
+                continue
+
+            result.update({
+                'path': str(path),
+                'size_mb': round(path.stat().st_size / 1024 / 1024, 2),
+                'export_time_s': round(export_time, 1),
+                'map50_delta': round(result['map50'] - reference['map50'], 4),
+                'map50_95_delta': round(result['map50_95'] - reference['map50_95'], 4),
+            })
+            result['passed'] = result['map50_delta'] >= -max_map_drop
+            report['models'][name] = result
+
+        report['elapsed_s'] = round(time.time() - start_time, 1)
+        self.cache.save()
+
+        report_path = self.output_dir / "export_report.json"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        self.print_report(report)
+        print(f"\n📄 보고서 저장: {report_path}")
+        return report
+
+    @staticmethod
+    def print_report(report):
+        print(f"\n📋 변환 결과 (imgsz {report['imgsz']}, 검증 {report['validation']['images']}장)")
+        print(f"  {'모델':<12} {'크기(MB)':>9} {'mAP50':>7} {'Δ':>8} {'mAP50-95':>9} {'Δ':>8} {'p50(ms)':>8} {'p95(ms)':>8}")
+        for name, result in report['models'].items():
+            if 'error' in result:
+                print(f"  {name:<12} ❌ {result['error']}")
+                continue
+            status = "" if result.get('passed', True) else "  ⚠️ 정확도 하락 초과"
+            print(f"  {name:<12} {result['size_mb']:>9.2f} {result['map50']:>7.4f} {result.get('map50_delta', 0):>+8.4f} "
+                  f"{result['map50_95']:>9.4f} {result.get('map50_95_delta', 0):>+8.4f} "
+                  f"{result['latency_ms_p50']:>8.1f} {result['latency_ms_p95']:>8.1f}{status}")
+
+
+def main():
+    """독립 실행용"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="YOLO 모델 ONNX/TFLite 변환 + 양자화 검증")
+    parser.add_argument("--weights", required=True, help="학습된 모델 (.pt)")
+    parser.add_argument("--dataset", required=True, help="데이터셋 폴더 (보정/검증 이미지 선택)")
+    parser.add_argument("--imgsz", type=int, default=320, help="export 입력 크기 (배포 해상도)")
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    parser.add_argument("--output", default=None, help="배포 파일/보고서 폴더 (기본: exports/<모델>_<imgsz>)")
+    parser.add_argument("--cache-dir", default=None, help="산출물 캐시 폴더 (기본: 데이터셋 옆 .artifact_cache)")
+    parser.add_argument("--calib-size", type=int, default=300, help="INT8 보정 이미지 수")
+    parser.add_argument("--calib-split", default="train")
+    parser.add_argument("--val-size", type=int, default=200, help="검증 이미지 수")
+    parser.add_argument("--val-split", default=None, help="검증 split (기본: val/valid/test 중 있는 것)")
+    parser.add_argument("--max-map-drop", type=float, default=0.02, help="허용 mAP50 하락 (원본 대비)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    exporter = ModelExporter(args.weights, args.dataset, imgsz=args.imgsz, output_dir=args.output,
+                             cache_path=args.cache_dir, calib_size=args.calib_size, val_size=args.val_size,
+                             calib_split=args.calib_split, val_split=args.val_split, seed=args.seed)
+    report = exporter.run(args.formats, args.max_map_drop)
+
+    failed = [name for name, result in report['models'].items() if not result.get('passed', True)]
+    if failed:
+        print(f"⚠️ 검증 실패: {', '.join(failed)}")
+        sys.exit(1)
+    print("🎉 모든 형식 검증 통과!")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ data.yaml 경로 문제 수정
 import yaml
 from pathlib import Path
 
+from dataset_index import DatasetIndex
+
 def fix_yaml_paths(dataset_path):
     """YAML 파일의 경로 문제 수정"""
     dataset_path = Path(dataset_path)
@@ -35,18 +37,26 @@ def fix_yaml_paths(dataset_path):
         val_dir = dataset_path / "val" / "images"
         test_dir = dataset_path / "test" / "images"
         
+        # 폴더별 이미지 수는 데이터셋 인덱스에서 조회 (분석/정규화 단계와 공유)
+        summary = DatasetIndex(dataset_path).refresh(verbose=False).split_summary()
+        
+        def folder_status(split, folder):
+            if not folder.exists():
+                return '❌'
+            return f"✅ ({summary.get(split, {}).get('images', 0)}개)"
+        
         print(f"\n📁 실제 폴더 구조:")
-        print(f"  train/images: {'✅' if train_dir.exists() else '❌'}")
-        print(f"  valid/images: {'✅' if valid_dir.exists() else '❌'}")
-        print(f"  val/images: {'✅' if val_dir.exists() else '❌'}")
-        print(f"  test/images: {'✅' if test_dir.exists() else '❌'}")
+        print(f"  train/images: {folder_status('train', train_dir)}")
+        print(f"  valid/images: {folder_status('valid', valid_dir)}")
+        print(f"  val/images: {folder_status('val', val_dir)}")
+        print(f"  test/images: {folder_status('test', test_dir)}")
         
         # 경로 수정
         config['path'] = str(dataset_path.resolve())
         config['train'] = 'train/images'
         
-        # val vs valid 확인
-        if valid_dir.exists():
+        # val vs valid 확인 (둘 다 있으면 이미지가 있는 쪽)
+        if valid_dir.exists() and (summary.get('valid') or not summary.get('val')):
             config['val'] = 'valid/images'
             print(f"📝 val → valid로 수정")
         elif val_dir.exists():
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+label_io.py
+YOLO 라벨 일괄 읽기/정규화/쓰기 (NumPy 배열 기반)
+
+- 여러 라벨 파일을 한 버퍼로 합쳐서 바이트 배열 연산으로 토큰/줄 분리, 숫자 변환, 소수점 자릿수 계산
+- 정밀도 통일은 고정소수점 정수 연산으로 문자 행렬을 만들어 한 번에 텍스트로 변환
+- 결과는 기존 줄 단위 방식(int()/float() + f"{x:.6f}")과 바이트 단위로 같음
+  (지수 표기, 15자리 초과, 반올림 경계값 등 드문 경우만 줄 단위로 처리)
+- 256줄 미만 입력(이미지 1장 라벨 등)은 배열 준비 비용이 더 커서 줄 단위로 처리
+- 파일은 바이너리로 읽고 써서 텍스트 래퍼 생성/디코딩 비용을 줄이고,
+  정규화할 때는 이미 목표 자릿수인 파일을 정규식 한 번으로 걸러서 파싱하지 않음
+- python label_io.py --bench 로 10만 줄 기준 기존 방식과 속도 비교 (문자열 / 라벨 폴더)
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# str.split()이 공백으로 보는 ASCII 문자
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+_TRIPLETS = np.array([list(b"%03d" % i) for i in range(1000)], dtype=np.uint8)    # 000 ~ 999 문자
+_BULK_MIN_LINES = 256    # 이보다 짧으면 배열 준비 비용이 더 커서 줄 단위로 처리
+_MAX_DIGITS = 15    # 배열로 계산하는 정수 가수 최대 자릿수 (float64로 정확히 표현)
+
+
+class LabelTable:
+    """
+    라벨 줄 표 (빈 줄 제외, 파일 순서 → 줄 순서)
+    - line_file: 줄별 파일 번호
+    - valid: 클래스/좌표 4개를 읽을 수 있는 줄
+    - classes / xywh / decimals: valid 줄의 값 (나머지는 0)
+    - raw: 읽을 수 없는 줄의 원문 {줄 번호: 문자열}
+    """
+
+    def __init__(self, num_files, line_file, valid, classes, xywh, decimals, raw):
+        self.num_files = num_files
+        self.line_file = line_file
+        self.valid = valid
+        self.classes = classes
+        self.xywh = xywh
+        self.decimals = decimals
+        self.raw = raw
+
+    def __len__(self):
+        return len(self.line_file)
+
+    def file_counts(self):
+        """파일별 줄 수"""
+        return np.bincount(self.line_file, minlength=self.num_files)
+
+
+# ==================== 읽기 ====================
+
+def _parse_python(text, line_file_of):
+    """줄 단위 파서 (짧은 입력, ASCII가 아닌 문자가 섞인 경우)"""
+    rows = []
+    for line_no, line in enumerate(text.split('\n')):
+        parts = line.split()
+        if not parts:
+            continue
+        rows.append((line_file_of(line_no), line.strip(), parts))
+
+    count = len(rows)
+    valid = np.zeros(count, dtype=bool)
+    classes = np.zeros(count, dtype=np.int64)
+    xywh = np.zeros((count, 4), dtype=np.float64)
+    decimals = np.zeros((count, 4), dtype=np.int8)
+    raw = {}
+    for i, (_, line, parts) in enumerate(rows):
+        if not _parse_fields(parts, i, classes, xywh, decimals, valid):
+            raw[i] = line
+    line_file = np.array([row[0] for row in rows], dtype=np.int64)
+    return line_file, valid, classes, xywh, decimals, raw
+
+
+def _parse_fields(parts, i, classes, xywh, decimals, valid):
+    """토큰 리스트 하나를 i번째 줄에 기록 (읽을 수 없으면 False)"""
+    if len(parts) < 5:
+        return False
+    try:
+        class_id = int(parts[0])
+        values = [float(v) for v in parts[1:5]]
+    except ValueError:
+        return False
+    classes[i] = class_id
+    xywh[i] = values
+    decimals[i] = [min(len(v) - v.index('.') - 1, 127) if '.' in v else 0 for v in parts[1:5]]
+    valid[i] = True
+    return True
+
+
+def _token_values(text, buf, starts, ends, dot_first, signed, bad):
+    """
+    숫자 토큰 값 (bad 토큰은 0)
+    길이/점 위치/부호가 같은 토큰끼리 묶어서 문자 행렬 × 자릿값 벡터로 정수 가수를 구함
+    가수가 15자리 이하면 가수 / 10^소수 자릿수 가 float()와 같은 값 (더 긴 토큰만 float()로)
+    """
+    length = ends - starts
+    dot_at = np.where(dot_first >= 0, dot_first - starts, -1)
+    digits = length - signed - (dot_at >= 0)
+    fast = ~bad & (digits <= _MAX_DIGITS)
+    key = np.where(fast, (length * 32 + dot_at + 1) * 2 + signed, -1).astype(np.int16)
+    order = np.argsort(key, kind='stable')
+    sorted_key = key[order]
+    bounds = np.flatnonzero(np.diff(sorted_key, prepend=-2, append=-2))
+
+    windows = sliding_window_view(np.concatenate([buf, np.zeros(_MAX_DIGITS + 2, dtype=np.uint8)]), _MAX_DIGITS + 2)
+    values = np.zeros(len(starts), dtype=np.float64)
+    for begin, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        group_key = int(sorted_key[begin])
+        if group_key < 0:
+            continue
+        tokens = order[begin:end]
+        width, dot = (group_key >> 1) // 32, (group_key >> 1) % 32 - 1
+        place = np.zeros(width)
+        digit_cols = [c for c in range(group_key & 1, width) if c != dot]
+        place[digit_cols] = 10.0 ** np.arange(len(digit_cols) - 1, -1, -1)
+        chars = windows[starts[tokens], :width]
+        mantissa = chars @ place - 48 * place.sum()
+        values[tokens] = mantissa / 10.0 ** (width - dot - 1 if dot >= 0 else 0)
+
+    negative = buf[starts] == 45
+    values = np.where(negative, -values, values)
+    for i in np.flatnonzero(~bad & ~fast).tolist():
+        values[i] = float(text[starts[i]:ends[i]])
+    return values
+
+
+def parse_label_text(text, file_starts=None, num_files=1):
+    """
+    라벨 텍스트 (여러 파일을 이어 붙인 것) → LabelTable
+    :param file_starts: 파일별 시작 줄 번호 (텍스트 줄 기준, None이면 한 파일)
+    """
+    if not text.endswith('\n'):
+        text += '\n'
+    file_starts = np.asarray([0] if file_starts is None else file_starts, dtype=np.int64)
+
+    def line_file_of(line_numbers):
+        return np.searchsorted(file_starts, line_numbers, side='right') - 1
+
+    if text.count('\n') < _BULK_MIN_LINES or not text.isascii():
+        line_file, valid, classes, xywh, decimals, raw = _parse_python(text, lambda n: int(line_file_of(n)))
+        return LabelTable(num_files, line_file, valid, classes, xywh, decimals, raw)
+
+    buf = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+
+    # 토큰 경계 (공백이 아닌 문자 구간, 제어 문자가 줄바꿈뿐이면 비교 연산만으로)
+    if np.count_nonzero(buf < 32) == np.count_nonzero(buf == 10):
+        is_token = buf > 32
+    else:
+        is_token = ~_SPACE[buf]
+    padded = np.concatenate(([False], is_token, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    token_count = len(starts)
+
+    # 토큰 → 텍스트 줄 → 비어 있지 않은 줄
+    newlines = np.flatnonzero(buf == 10)
+    breaks_before = np.bincount(np.searchsorted(starts, newlines), minlength=token_count + 1)
+    token_text_line = np.cumsum(breaks_before[:token_count])
+    first_token = np.flatnonzero(np.diff(token_text_line, prepend=-1))
+    tokens_per_line = np.diff(first_token, append=token_count)
+    text_lines = token_text_line[first_token]
+    count = len(text_lines)
+
+    # 숫자 형식 검사는 드문 문자 위치만 모아서 (점, 부호, 그 밖의 문자)
+    def token_of(positions):
+        return np.searchsorted(starts, positions, side='right') - 1
+
+    dot_pos = np.flatnonzero(buf == 46)
+    dot_token = token_of(dot_pos)
+    dots = np.bincount(dot_token, minlength=token_count)
+    dot_first = np.full(token_count, -1, dtype=np.int64)
+    dot_first[dot_token[::-1]] = dot_pos[::-1]
+    token_decimals = np.minimum(np.where(dot_first >= 0, ends - dot_first - 1, 0), 127)
+
+    sign_pos = np.flatnonzero((buf == 43) | (buf == 45))
+    sign_token = token_of(sign_pos)
+    signs = np.bincount(sign_token, minlength=token_count)
+    other_char = (buf > 57) | (buf < 43) | (buf == 44) | (buf == 47)     # 숫자 . + - 가 아닌 문자
+    other_token = token_of(np.flatnonzero(is_token & other_char))
+
+    bad = np.zeros(token_count, dtype=bool)
+    bad[other_token] = True
+    bad[sign_token[sign_pos != starts[sign_token]]] = True
+    bad |= (dots > 1) | (ends - starts <= dots + signs)
+
+    values = _token_values(text, buf, starts, ends, dot_first, signs > 0, bad)
+
+    # 5개 이상 토큰 줄의 앞 5개 (클래스 + 좌표 4개)
+    valid = tokens_per_line >= 5
+    fields = first_token[valid, None] + np.arange(5)
+    class_tokens = fields[:, 0]
+    field_bad = bad[fields].any(axis=1) | (dots[class_tokens] > 0) | ((ends - starts)[class_tokens] > _MAX_DIGITS)
+
+    classes = np.zeros(count, dtype=np.int64)
+    xywh = np.zeros((count, 4), dtype=np.float64)
+    decimals = np.zeros((count, 4), dtype=np.int8)
+    classes[valid] = values[class_tokens].astype(np.int64)
+    xywh[valid] = values[fields[:, 1:]]
+    decimals[valid] = token_decimals[fields[:, 1:]]
+
+    # 형식이 맞지 않는 토큰이 있는 줄만 int()/float()로 다시 확인
+    raw = {}
+    line_start = np.concatenate(([0], newlines + 1))
+    slow_lines = np.flatnonzero(valid)[field_bad]
+    for i in np.concatenate([slow_lines, np.flatnonzero(~valid)]).tolist():
+        text_line = text_lines[i]
+        line = text[line_start[text_line]:newlines[text_line]]
+        valid[i] = False
+        if not _parse_fields(line.split(), i, classes, xywh, decimals, valid):
+            classes[i] = 0
+            xywh[i] = 0
+            decimals[i] = 0
+            raw[i] = line.strip()
+
+    return LabelTable(num_files, line_file_of(text_lines), valid, classes, xywh, decimals, raw)
+
+
+def parse_label_lines(lines):
+    """라벨 줄 리스트 (readlines 결과 등) → LabelTable (한 파일)"""
+    return parse_label_text("\n".join(lines))   # 줄 끝 \n 과 겹쳐 생기는 빈 줄은 무시됨
+
+
+def _read_bytes(path):
+    """라벨 파일 원본 바이트 (없는 파일은 빈 파일로 취급)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return b''
+
+
+def _decode(data):
+    """바이트 → 텍스트 (텍스트 모드 읽기와 같게 CRLF/CR 줄바꿈은 LF로)"""
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_label_files(paths):
+    """여러 라벨 파일을 한 번에 읽어 하나의 LabelTable로 (없는 파일은 빈 파일로 취급)"""
+    return _parse_file_texts([_decode(_read_bytes(path)) for path in paths])
+
+
+def _parse_file_texts(texts):
+    """파일별 텍스트 리스트 → 하나의 LabelTable"""
+    file_starts = []
+    line_count = 0
+    for i, text in enumerate(texts):
+        if text and not text.endswith('\n'):
+            texts[i] = text = text + '\n'
+        file_starts.append(line_count)
+        line_count += text.count('\n')
+    return parse_label_text("".join(texts), file_starts, len(texts))
+
+
+# ==================== 쓰기 ====================
+
+def _put_digits(out, numbers, keep_zeros=False):
+    """(n, width) uint8 행렬 뷰에 음이 아닌 정수의 숫자 문자 채우기 (세 자리씩 표 조회, 앞자리 0은 0 바이트 = 생략)"""
+    col = out.shape[1]
+    rest = numbers
+    while col > 0:
+        quotient = rest // 1000
+        take = min(3, col)
+        out[:, col - take:col] = _TRIPLETS.take(rest - quotient * 1000, axis=0)[:, 3 - take:]
+        col -= take
+        rest = quotient
+    if not keep_zeros:
+        for col in range(out.shape[1] - 1):
+            out[numbers < 10 ** (out.shape[1] - 1 - col), col] = 0
+
+
+def _width(numbers):
+    return len(str(int(numbers.max()))) if len(numbers) else 1
+
+
+def _fixed_parts(values, precision):
+    """
+    실수 배열 → '%.{precision}f' 재료 (음수 부호, 정수부, 소수부, 정확히 만들 수 없는 값 마스크)
+    10^precision 배 후 반올림 경계(.5)에 너무 가까운 값, 너무 큰 값, nan/inf는 마스크로 돌려줌
+    """
+    scaled = np.abs(values) * 10.0 ** precision
+    finite = np.isfinite(scaled) & (scaled < 2.0 ** 50)
+    scaled = np.where(finite, scaled, 0)
+    floor = np.floor(scaled)
+    remainder = scaled - floor
+    ambiguous = np.abs(remainder - 0.5) <= scaled * 4e-16 + 1e-12
+
+    rounded = floor.astype(np.int64) + (remainder > 0.5)
+    integer = rounded // 10 ** precision
+    return np.signbit(values), integer, rounded - integer * 10 ** precision, ~finite | ambiguous
+
+
+def format_boxes(classes, xywh, precision=6):
+    """
+    (클래스 배열, xywh 배열) → 라벨 줄 문자열 리스트 (줄바꿈 없음)
+    결과는 f"{class_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}" 와 같음
+    """
+    count = len(classes)
+    line_format = f"%d %.{precision}f %.{precision}f %.{precision}f %.{precision}f"
+    if count < _BULK_MIN_LINES:
+        return [line_format % (c, x, y, w, h) for c, (x, y, w, h) in zip(classes.tolist(), xywh.tolist())]
+
+    # 줄마다 같은 칸 배치의 문자 행렬을 채운 뒤 0 바이트를 빼고 한 번에 텍스트로
+    class_abs = np.abs(classes)
+    class_width = _width(class_abs)
+    axes = [_fixed_parts(xywh[:, axis], precision) for axis in range(4)]
+    fraction_width = precision + 1 if precision > 0 else 0
+    total = 1 + class_width + sum(2 + _width(integer) + fraction_width for _, integer, _, _ in axes) + 1
+    matrix = np.zeros((count, total), dtype=np.uint8)
+
+    matrix[classes < 0, 0] = 45
+    _put_digits(matrix[:, 1:1 + class_width], class_abs)
+    col = 1 + class_width
+    for negative, integer, fraction, _ in axes:
+        matrix[:, col] = 32
+        matrix[negative, col + 1] = 45
+        col += 2
+        width = _width(integer)
+        _put_digits(matrix[:, col:col + width], integer)
+        col += width
+        if precision > 0:
+            matrix[:, col] = 46
+            _put_digits(matrix[:, col + 1:col + fraction_width], fraction, keep_zeros=True)
+            col += fraction_width
+    matrix[:, col] = 10
+
+    lines = matrix[matrix != 0].tobytes().decode('ascii').split('\n')[:-1]
+    fallback = np.logical_or.reduce([axis[3] for axis in axes])
+    for i in np.flatnonzero(fallback).tolist():
+        lines[i] = line_format % (classes[i], *xywh[i].tolist())
+    return lines
+
+
+def format_valid_lines(table, precision=6):
+    """valid 줄을 precision 자리로 포맷한 문자열 리스트 (table.valid 순서)"""
+    return format_boxes(table.classes[table.valid], table.xywh[table.valid], precision)
+
+
+def _normalize_lines_python(labels, precision=6):
+    """줄 단위 정밀도 통일 (기존 normalize_label_precision 방식, 짧은 입력용)"""
+    line_format = f"%d %.{precision}f %.{precision}f %.{precision}f %.{precision}f"
+    normalized_labels = []
+    for label in labels:
+        parts = label.split()
+        if len(parts) >= 5:
+            try:
+                class_id = int(parts[0])
+                x, y, w, h = map(float, parts[1:5])
+            except ValueError:
+                continue
+            normalized_labels.append(line_format % (class_id, x, y, w, h))
+    return normalized_labels
+
+
+def normalize_label_lines(labels, precision=6):
+    """라벨 줄 리스트의 좌표를 precision 자리로 통일 (읽을 수 없는 줄은 제외)"""
+    if len(labels) < _BULK_MIN_LINES:
+        return _normalize_lines_python(labels, precision)
+    return format_valid_lines(parse_label_lines(labels), precision)
+
+
+def files_text(table, precision=6, keep_invalid=True):
+    """LabelTable → 파일별 텍스트 리스트 (valid 줄은 정밀도 통일, 읽을 수 없는 줄은 원문 유지 또는 제외)"""
+    lines = np.empty(len(table), dtype=object)
+    lines[table.valid] = format_valid_lines(table, precision)
+    keep = table.valid.copy()
+    if keep_invalid and table.raw:
+        raw_lines = np.fromiter(table.raw, dtype=np.int64, count=len(table.raw))
+        lines[raw_lines] = list(table.raw.values())
+        keep[raw_lines] = True
+
+    lines = lines[keep].tolist()
+    bounds = np.cumsum(np.bincount(table.line_file[keep], minlength=table.num_files)).tolist()
+    return ["\n".join(lines[begin:end]) + "\n" if end > begin else ""
+            for begin, end in zip([0] + bounds[:-1], bounds)]
+
+
+def write_label_files(paths, texts):
+    """파일별 텍스트를 한 번에 쓰기 (줄마다 write하지 않음, 줄바꿈은 텍스트 모드와 같게 os.linesep)"""
+    for path, text in zip(paths, texts):
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        with open(path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+
+
+def _settled_pattern(precision):
+    """모든 줄이 '클래스 + precision자리 좌표 4개' 또는 빈 줄인 파일 (정규화해도 바뀌지 않음)"""
+    number = rb'-?\d+\.\d{%d}' % precision if precision > 0 else rb'-?\d+'
+    return re.compile(rb'(?:[ \t]*(?:-?\d+(?:[ \t]+%s){4}[ \t]*)?\r?\n)*' % number)
+
+
+def normalize_label_files(paths, precision=6):
+    """
+    라벨 파일 일괄 정밀도 통일 (읽을 수 없는 줄은 원문 유지, 자릿수가 다른 좌표가 있는 파일만 다시 씀)
+    이미 precision자리인 파일은 바이트 정규식으로 먼저 걸러서 나머지 파일만 파싱
+    :return: (다시 쓴 파일 수, 바뀐 좌표 수)
+    """
+    paths = list(paths)
+    settled = _settled_pattern(precision)
+    pending = []
+    texts = []
+    for i, path in enumerate(paths):
+        data = _read_bytes(path)
+        if data and not data.endswith(b'\n'):
+            data += b'\n'
+        if not settled.fullmatch(data):
+            pending.append(i)
+            texts.append(_decode(data))
+    if not pending:
+        return 0, 0
+
+    table = _parse_file_texts(texts)
+    off_precision = table.valid & (table.decimals != precision).any(axis=1)
+    changed_files = np.unique(table.line_file[off_precision])
+    if not len(changed_files):
+        return 0, 0
+
+    texts = files_text(table, precision, keep_invalid=True)
+    write_label_files([paths[pending[i]] for i in changed_files], [texts[i] for i in changed_files])
+    return len(changed_files), int(off_precision.sum()) * 4
+
+
+# ==================== 벤치마크 ====================
+
+def _legacy_precision_stats(lines):
+    """기존 줄 단위 자릿수 계산 (CoordinateNormalizer.analyze_precision)"""
+    stats = {}
+    for line in lines:
+        parts = line.strip().split()
+        if len(parts) >= 5:
+            try:
+                int(parts[0])
+                [float(v) for v in parts[1:5]]
+            except ValueError:
+                continue
+            for coord_str in parts[1:5]:
+                places = len(coord_str.split('.')[1]) if '.' in coord_str else 0
+                stats[places] = stats.get(places, 0) + 1
+    return stats
+
+
+def _write_corpus(directory, lines, lines_per_file):
+    paths = []
+    for start in range(0, len(lines), lines_per_file):
+        path = Path(directory) / f"{len(paths):06d}.txt"
+        path.write_text("".join(lines[start:start + lines_per_file]))
+        paths.append(path)
+    return paths
+
+
+def benchmark(num_lines=100_000, repeat=3, seed=0, lines_per_file=10):
+    """
+    무작위 라벨 num_lines줄로 기존 줄 단위 방식과 비교 (결과가 같은지도 확인)
+    - 파일 절반은 이미 6자리, 나머지는 4/6/9자리 혼합
+    - 파일 단위: lines_per_file줄씩 나눈 라벨 폴더를 파일별 읽기/쓰기 vs 일괄 읽기 + 바뀐 파일만 쓰기
+    """
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    places = rng.choice([4, 6, 9], size=(num_lines, 4))
+    places[np.repeat(rng.random(-(-num_lines // lines_per_file)) < 0.5, lines_per_file)[:num_lines]] = 6
+    values = rng.random((num_lines, 4))
+    classes = rng.integers(0, 21, num_lines)
+    lines = [f"{c} " + " ".join(f"{v:.{p}f}" for v, p in zip(row, row_places)) + "\n"
+             for c, row, row_places in zip(classes.tolist(), values.tolist(), places.tolist())]
+
+    def best(fn, setup=None):
+        times = []
+        for _ in range(repeat):
+            args = setup() if setup else ()
+            started = time.perf_counter()
+            result = fn(*args)
+            times.append(time.perf_counter() - started)
+        return min(times), result
+
+    def report(name, legacy_time, vector_time):
+        print(f"  {name}: 기존 {legacy_time * 1000:.0f}ms → 배열 {vector_time * 1000:.0f}ms "
+              f"({legacy_time / vector_time:.1f}배)")
+
+    print(f"📐 라벨 {num_lines:,}줄 (최소 {repeat}회 기준, 결과 동일 확인)")
+
+    legacy_time, legacy = best(lambda: _normalize_lines_python(lines))
+    vector_time, vector = best(lambda: normalize_label_lines(lines))
+    assert legacy == vector, "정규화 결과가 기존 방식과 다릅니다"
+    report("정밀도 통일", legacy_time, vector_time)
+
+    def vector_stats():
+        table = parse_label_lines(lines)
+        found, counts = np.unique(table.decimals[table.valid], return_counts=True)
+        return {int(p): int(c) for p, c in zip(found, counts)}
+
+    legacy_time, legacy_stats = best(lambda: _legacy_precision_stats(lines))
+    vector_time, stats = best(vector_stats)
+    assert legacy_stats == stats, "자릿수 통계가 기존 방식과 다릅니다"
+    report("자릿수 통계", legacy_time, vector_time)
+
+    def legacy_files(paths):
+        for path in paths:
+            with open(path, 'r') as f:
+                normalized_labels = _normalize_lines_python(f.readlines())
+            with open(path, 'w') as f:
+                for label in normalized_labels:
+                    f.write(label + '\n')
+        return paths
+
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as vector_dir:
+        legacy_time, legacy_paths = best(legacy_files, lambda: (_write_corpus(legacy_dir, lines, lines_per_file),))
+        vector_time, _ = best(normalize_label_files, lambda: (_write_corpus(vector_dir, lines, lines_per_file),))
+        vector_paths = sorted(Path(vector_dir).glob("*.txt"))
+        assert all(a.read_text() == b.read_text() for a, b in zip(legacy_paths, vector_paths)), \
+            "파일 정규화 결과가 기존 방식과 다릅니다"
+        report(f"파일 {len(vector_paths):,}개 정규화", legacy_time, vector_time)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="YOLO 라벨 일괄 정밀도 통일")
+    parser.add_argument("paths", nargs="*", help="라벨 파일 또는 labels 폴더")
+    parser.add_argument("--precision", type=int, default=6)
+    parser.add_argument("--bench", action="store_true", help="기존 방식과 속도 비교")
+    parser.add_argument("--lines", type=int, default=100_000, help="벤치마크 줄 수")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.lines)
+        return
+
+    paths = []
+    for path in map(Path, args.paths):
+        paths.extend(sorted(path.glob("*.txt")) if path.is_dir() else [path])
+    files, coords = normalize_label_files(paths, args.precision)
+    print(f"✅ {len(paths)}개 파일 중 {files}개 정규화 (좌표 {coords:,}개)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,43 +12,65 @@ from pathlib import Path
 import random
 import time
 import math
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from artifact_cache import ArtifactCache, mirror_file
+from background_atlas import BackgroundAtlas, CompositeMask
+from dataset_index import INDEX_FILENAME
+from label_io import normalize_label_lines
+
+# 워커 프로세스별 전처리기 (ProcessPoolExecutor initializer에서 1회 생성)
+_worker_preprocessor = None
+
+
+def _init_worker(config):
+    """워커 프로세스 초기화 - OpenCV 내부 스레드는 1개로 (프로세스 수만큼 코어 사용)"""
+    global _worker_preprocessor
+    cv2.setNumThreads(1)
+    _worker_preprocessor = WebcamPreprocessor(config, verbose=False)
+
+
+def _run_worker_task(task):
+    stage, args = task
+    return _worker_preprocessor.process_item(stage, *args)
 
 class WebcamPreprocessor:
-    def __init__(self, config):
+    def __init__(self, config, verbose=True):
         self.config = config
         self.dataset_path = config.dataset_path
         self.enable_320 = config.enable_320
         self.background_path = Path("background")  # 실제 배경 이미지 경로
+        self.verbose = verbose
+        
+        # 🧵 병렬 처리 설정 (같은 seed면 워커 수와 관계없이 같은 결과)
+        self.workers = max(1, getattr(config, 'workers', 1))
+        self.seed = getattr(config, 'seed', 42)
+        
+        # 📦 출력 폴더 + 산출물 캐시 (output_path가 없으면 기존처럼 데이터셋을 직접 수정)
+        output_path = getattr(config, 'output_path', None)
+        self.output_path = Path(output_path) if output_path else None
+        if self.output_path and self.output_path.resolve() == Path(self.dataset_path).resolve():
+            self.output_path = None
+        self.cache = None
+        if self.output_path:
+            cache_path = getattr(config, 'cache_path', None) or self.output_path.parent / ".artifact_cache"
+            self.cache = ArtifactCache(cache_path)
+        self.produced = {}      # 이번 실행에서 출력 폴더에 만든 파일 → 캐시 식별자 ("키/파일명")
+        self.stale_files = set()
         
         # 배경 이미지 로드
         self.background_images = self.load_background_images()
         
-        # 🚀 배경 캐시 추가 (성능 최적화)
-        self.background_cache = {}  # {(h, w): [backgrounds]}
+        # 🚀 해상도별 배경 아틀라스 (디스크 memmap, 워커끼리 공유, 열어 두는 용량은 LRU로 제한)
+        atlas_root = self.cache.root if self.cache else Path(
+            getattr(config, 'cache_path', None) or Path(self.dataset_path).parent / ".artifact_cache")
+        self.background_atlas = BackgroundAtlas(
+            atlas_root / "backgrounds",
+            BackgroundAtlas.source_signature(self.background_images, self.seed),
+            max_open_mb=getattr(config, 'background_cache_mb', 1024),
+            verbose=verbose)
         
-    def normalize_label_precision(self, labels):
-        """라벨 좌표를 6자리 정밀도로 통일"""
-        normalized_labels = []
-        for label in labels:
-            line = label.strip()
-            if not line:
-                continue
-                
-            parts = line.split()
-            if len(parts) >= 5:
-                try:
-                    class_id = int(parts[0])
-                    x, y, w, h = map(float, parts[1:5])
-                    
-                    # 6자리 정밀도로 통일
-                    normalized_line = f"{class_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}"
-                    normalized_labels.append(normalized_line)
-                    
-                except (ValueError, IndexError):
-                    continue
-        
-        return normalized_labels
-
     def load_background_images(self):
         """실제 배경 이미지 파일들 로드"""
         background_images = []
@@ -75,27 +97,175 @@ class WebcamPreprocessor:
                     print(f"⚠️ 이미지 로드 오류 {bg_file.name}: {e}")
                     continue
         
-        print(f"✅ 배경 이미지 로드 완료: {len(background_images)}장")
+        if self.verbose:
+            print(f"✅ 배경 이미지 로드 완료: {len(background_images)}장")
         return background_images
 
+    # ==================== 병렬 처리 / 재현성 ====================
+
+    def task_rng(self, stage, key):
+        """
+        작업 단위 난수 생성기 (seed, 단계, 파일 키로 결정)
+        이미지마다 독립된 시드를 쓰므로 어느 워커가 처리하든 직렬 실행과 같은 결과
+        """
+        digest = hashlib.sha256(f"{self.seed}:{stage}:{key}".encode()).digest()
+        task_seed = int.from_bytes(digest[:8], 'little')
+        return random.Random(task_seed), np.random.default_rng(task_seed)
+
+    def process_item(self, stage, *args):
+        """단계 이름으로 이미지 1장 처리 함수 호출 (워커 진입점)"""
+        handlers = {
+            'background': self.background_item,
+            'webcam': self.webcam_item,
+            '320': self.res320_item,
+            'cached': self.cached_item,
+        }
+        return handlers[stage](*args)
+
+    def cached_item(self, stage, key, args, outputs):
+        """캐시에 없는 작업 실행 - 임시 폴더에 결과를 쓰고 캐시에 등록 (워커에서도 실행)"""
+        staging = self.cache.staging(key)
+        out_paths = [staging / name if name else None for name in outputs]
+        result = self.process_item(stage, *args, *out_paths)
+        self.cache.commit(key, staging, result)
+        return result
+
+    def run_tasks(self, stage, tasks):
+        """
+        작업 목록 실행 (workers > 1이면 프로세스 풀, 결과는 작업 순서대로 반환)
+        - 청크 단위로 나눠 보내서 작은 이미지가 많아도 IPC 오버헤드 최소화
+        """
+        if self.workers <= 1 or len(tasks) < 2:
+            for args in tasks:
+                yield self.process_item(stage, *args)
+            return
+
+        chunksize = max(1, len(tasks) // (self.workers * 8))
+        print(f"🧵 병렬 처리: 워커 {self.workers}개, 청크 {chunksize}개씩")
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.config,)) as executor:
+            yield from executor.map(_run_worker_task, [(stage, args) for args in tasks], chunksize=chunksize)
+
+    def run_stage(self, stage, tasks, params=None):
+        """
+        단계 실행 (결과는 작업 순서대로 반환)
+        :param tasks: [(args, dests)] - dests는 출력 폴더에 만들 파일 경로 (없는 출력은 None)
+        출력 폴더 모드에서는 입력 내용 + 파라미터 + seed로 캐시를 찾아서 없는 작업만 계산하고,
+        결과 파일을 출력 폴더에 복사
+        """
+        if self.cache is None:
+            yield from self.run_tasks(stage, [args for args, _ in tasks])
+            return
+
+        params = dict(params or {}, seed=self.seed)
+        lookups, misses = [], []
+        for args, dests in tasks:
+            inputs = [(arg.name, self.file_identity(arg)) for arg in args if isinstance(arg, Path)]
+            task_params = dict(params, args=[arg for arg in args if not isinstance(arg, Path)])
+            key = self.cache.key(stage, inputs, task_params)
+            meta = self.cache.lookup(key)
+            lookups.append((key, meta))
+            if meta is None:
+                misses.append((stage, key, args, [dest.name if dest else None for dest in dests]))
+
+        if misses:
+            print(f"♻️ 캐시: {len(tasks) - len(misses)}개 재사용, {len(misses)}개 계산")
+        computed = self.run_tasks('cached', misses)
+        for (args, dests), (key, meta) in zip(tasks, lookups):
+            result = next(computed) if meta is None else meta['result']
+            for dest in dests:
+                if dest and self.cache.materialize(key, dest.name, dest):
+                    self.produced[str(dest)] = f"{key}/{dest.name}"
+            yield result
+        for _ in computed:  # 프로세스 풀 정리
+            pass
+
+    def file_identity(self, path):
+        """캐시 키용 입력 식별자 (이번 실행에서 만든 파일은 만든 작업 키, 원본은 내용 해시)"""
+        return self.produced.get(str(path)) or self.cache.file_hash(path)
+
+    # ==================== 출력 폴더 ====================
+
+    def output_file(self, path):
+        """데이터셋 안의 경로 → 출력 폴더의 같은 위치 (직접 수정 모드면 원래 경로)"""
+        if not self.output_path:
+            return path
+        return self.output_path / Path(path).relative_to(self.dataset_path)
+
+    def stage_input(self, path):
+        """앞 단계가 이번 실행에서 만든 파일이 있으면 그 파일, 없으면 원본"""
+        out = self.output_file(path)
+        return out if str(out) in self.produced else path
+
+    def make_task(self, args, outputs):
+        """
+        (작업 인자, 출력 폴더 경로) 생성
+        :param args: 데이터셋 경로가 들어있는 인자 - 앞 단계 결과로 바꿔서 전달
+        :param outputs: 데이터셋 기준 결과 파일 경로 (없는 출력은 None)
+        """
+        args = tuple(self.stage_input(arg) if isinstance(arg, Path) else arg for arg in args)
+        return args, [self.output_file(out) if out else None for out in outputs]
+
+    def prepare_output_tree(self):
+        """출력 폴더 준비 - 기존 파일은 기억했다가 이번 실행에서 다시 만들지 않으면 마지막에 정리"""
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self.stale_files = {path for path in self.output_path.rglob('*')
+                            if path.is_file() and path.name != INDEX_FILENAME}
+        self.produced = {}
+        print(f"📦 출력 폴더: {self.output_path} (원본은 수정하지 않음)")
+
+    def finalize_output_tree(self):
+        """처리하지 않은 원본 파일(val 이미지, test 등)을 출력 폴더로 복사하고 이전 실행의 남은 산출물 정리"""
+        copied = 0
+        sources = [self.dataset_path / "data.yaml"]
+        for split in ["train", "val", "valid", "test"]:
+            for kind in ["images", "labels"]:
+                src_dir = self.dataset_path / split / kind
+                if src_dir.exists():
+                    sources.extend(sorted(path for path in src_dir.iterdir() if path.is_file()))
+
+        for src in sources:
+            if not src.exists():
+                continue
+            dest = self.output_file(src)
+            if str(dest) not in self.produced:
+                copied += mirror_file(src, dest)
+            self.stale_files.discard(dest)
+        for dest in self.produced:
+            self.stale_files.discard(Path(dest))
+
+        for stale in self.stale_files:
+            stale.unlink()
+        self.cache.save()
+
+        print(f"📦 출력 폴더 완료: 원본 복사 {copied}개, 이전 산출물 정리 {len(self.stale_files)}개")
+        print(f"♻️ {self.cache.summary()}")
+        self.stale_files = set()
+
+    @staticmethod
+    def list_images(images_dir):
+        """이미지 목록 (정렬해서 파일시스템 순서와 관계없이 같은 작업 순서)"""
+        return sorted(list(images_dir.glob("*.jpg")) + list(images_dir.glob("*.png")))
+
     def get_cached_backgrounds(self, h, w):
-        """배경 캐시에서 가져오기 (없으면 생성)"""
-        cache_key = (h, w)
-        
-        if cache_key not in self.background_cache:
-            print(f"🎨 새 해상도 {w}x{h} 배경 생성 중...")
-            self.background_cache[cache_key] = self.create_background_variants(h, w)
-            print(f"✅ 배경 캐시 완료: {len(self.background_cache[cache_key])}개")
-        
-        return self.background_cache[cache_key]
+        """해상도별 배경 아틀라스 (디스크에 없으면 생성, 항목 = (종류, 이미지))"""
+        def make_variants():
+            if self.verbose:
+                print(f"🎨 새 해상도 {w}x{h} 배경 생성 중...")
+            rng, _ = self.task_rng('backgrounds', f"{w}x{h}")
+            return self.create_background_variants(h, w, rng)
+        
+        return self.background_atlas.get(h, w, make_variants)
 
-    def create_background_variants(self, h, w):
-        """실제 배경 이미지들로 다양한 배경 생성"""
-        backgrounds = []
+    def create_background_variants(self, h, w, rng=random):
+        """실제 배경 이미지들로 다양한 배경 생성 (하나씩 내보내서 아틀라스에 바로 기록)"""
+        count = 0
         
         if not self.background_images:
-            print("⚠️ 배경 이미지가 없어 프로그래밍 배경 사용")
-            return self.create_fallback_backgrounds(h, w)
+            if self.verbose:
+                print("⚠️ 배경 이미지가 없어 프로그래밍 배경 사용")
+            yield from self.create_fallback_backgrounds(h, w)
+            return
         
         # 각 배경 이미지에 대해 다양화 적용
         for bg_path in self.background_images:
@@ -107,23 +277,25 @@ class WebcamPreprocessor:
                 
                 # 기본 리사이즈
                 base_bg = cv2.resize(bg_img, (w, h))
-                backgrounds.append(('original', base_bg))
+                count += 1
+                yield ('original', base_bg)
                 
                 # 1. 회전 변형들
                 for angle in [90, 180, 270]:
-                    if random.random() < 0.3:  # 30% 확률
+                    if rng.random() < 0.3:  # 30% 확률
                         center = (w//2, h//2)
                         matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
                         rotated = cv2.warpAffine(base_bg, matrix, (w, h), 
                                                borderMode=cv2.BORDER_REFLECT)
-                        backgrounds.append(('rotated', rotated))
+                        count += 1
+                        yield ('rotated', rotated)
                 
                 # 2. 크롭 및 스케일 변형들
                 for _ in range(2):
-                    if random.random() < 0.4:  # 40% 확률
+                    if rng.random() < 0.4:  # 40% 확률
                         # 랜덤 크롭 후 리사이즈
                         orig_h, orig_w = bg_img.shape[:2]
-                        crop_ratio = random.uniform(0.8, 1.2)
+                        crop_ratio = rng.uniform(0.8, 1.2)
                         
                         new_w = int(orig_w * crop_ratio)
                         new_h = int(orig_h * crop_ratio)
@@ -131,51 +303,53 @@ class WebcamPreprocessor:
                         if new_w > orig_w or new_h > orig_h:
                             # 확대하여 크롭
                             temp_img = cv2.resize(bg_img, (new_w, new_h))
-                            start_x = random.randint(0, max(0, new_w - orig_w))
-                            start_y = random.randint(0, max(0, new_h - orig_h))
+                            start_x = rng.randint(0, max(0, new_w - orig_w))
+                            start_y = rng.randint(0, max(0, new_h - orig_h))
                             cropped = temp_img[start_y:start_y+orig_h, start_x:start_x+orig_w]
                         else:
                             # 원본에서 크롭
-                            start_x = random.randint(0, max(0, orig_w - new_w))
-                            start_y = random.randint(0, max(0, orig_h - new_h))
+                            start_x = rng.randint(0, max(0, orig_w - new_w))
+                            start_y = rng.randint(0, max(0, orig_h - new_h))
                             cropped = bg_img[start_y:start_y+new_h, start_x:start_x+new_w]
                         
                         scaled_bg = cv2.resize(cropped, (w, h))
-                        backgrounds.append(('cropped', scaled_bg))
+                        count += 1
+                        yield ('cropped', scaled_bg)
                 
                 # 3. 색상 조정 변형들
                 for _ in range(2):
-                    if random.random() < 0.3:  # 30% 확률
+                    if rng.random() < 0.3:  # 30% 확률
                         # 밝기/대비 조정
-                        brightness = random.uniform(0.8, 1.2)
-                        contrast = random.uniform(0.9, 1.1)
+                        brightness = rng.uniform(0.8, 1.2)
+                        contrast = rng.uniform(0.9, 1.1)
                         
                         adjusted = base_bg.astype(np.float32)
                         adjusted = adjusted * contrast + (brightness - 1) * 127
                         adjusted = np.clip(adjusted, 0, 255).astype(np.uint8)
                         
-                        backgrounds.append(('adjusted', adjusted))
+                        count += 1
+                        yield ('adjusted', adjusted)
                 
                 # 4. 블러 효과 (약간만)
-                if random.random() < 0.2:  # 20% 확률
+                if rng.random() < 0.2:  # 20% 확률
                     blurred = cv2.GaussianBlur(base_bg, (3, 3), 0.5)
-                    backgrounds.append(('blurred', blurred))
+                    count += 1
+                    yield ('blurred', blurred)
                     
             except Exception as e:
                 print(f"⚠️ 배경 처리 오류 {bg_path}: {e}")
                 continue
         
-        if not backgrounds:
+        if not count:
             print("⚠️ 배경 처리 실패, 프로그래밍 배경 사용")
-            return self.create_fallback_backgrounds(h, w)
+            yield from self.create_fallback_backgrounds(h, w)
+            return
         
-        print(f"🎨 실제 배경 변형 생성: {len(backgrounds)}개")
-        return backgrounds
+        if self.verbose:
+            print(f"🎨 실제 배경 변형 생성: {count}개")
 
     def create_fallback_backgrounds(self, h, w):
         """실제 이미지 없을 때 프로그래밍 방식 백업"""
-        backgrounds = []
-        
         # 단순한 단색 배경들만
         solid_colors = [
             (200, 190, 180),  # 베이지 (BGR)
@@ -187,9 +361,7 @@ class WebcamPreprocessor:
         
         for color in solid_colors:
             bg = np.full((h, w, 3), color, dtype=np.uint8)
-            backgrounds.append(('solid', bg))
-        
-        return backgrounds
+            yield ('solid', bg)
 
     # 🔥 수정 1: 다중 감지 방식으로 교체
     def detect_bright_background_multi(self, image):
@@ -257,40 +429,85 @@ class WebcamPreprocessor:
         
         return mask
 
-    def replace_background(self, image, labels, new_background):
-        """배경 교체 (객체는 유지)"""
+    def replace_background(self, image, labels, new_background, is_bright=None):
+        """
+        배경 교체 (객체는 유지)
+        :param is_bright: 이미 감지한 밝은 배경 여부 (None이면 여기서 감지)
+        """
         h, w = image.shape[:2]
         
         # 새 배경을 이미지 크기에 맞게 조정
         if new_background.shape[:2] != (h, w):
             new_background = cv2.resize(new_background, (w, h))
         
-        # 객체 마스크 생성
-        object_mask = self.create_object_mask(image, labels)
-        
         # 밝은 배경 감지
-        is_bright, white_mask = self.detect_bright_background_multi(image)
+        if is_bright is None:
+            is_bright, _ = self.detect_bright_background_multi(image)
+        
+        if not is_bright:
+            # 밝은 배경이 아니면 원본 반환
+            return image
         
-        if is_bright:
-            # 결과 이미지 생성
-            result = new_background.copy()
+        # 객체 영역은 원본, 경계만 부드럽게 혼합, 나머지는 새 배경
+        composite = CompositeMask(self.create_object_mask(image, labels))
+        return composite.apply(image, new_background)
+
+    def background_item(self, img_file, label_file, out_img=None, out_label=None):
+        """
+        이미지 1장 배경 다양화
+        :param out_img, out_label: 결과 경로 (None이면 원본 위치에 덮어씀)
+        :return: (밝은 배경 여부, 교체 여부) 또는 건너뛰면 None
+        """
+        out_img, out_label = out_img or img_file, out_label or label_file
+        try:
+            # 이미지와 라벨 로드
+            image = cv2.imread(str(img_file))
+            if image is None:
+                return None
             
-            # 객체 영역은 원본 이미지 유지
-            object_area = object_mask > 0
-            result[object_area] = image[object_area]
+            with open(label_file, 'r') as f:
+                labels = f.readlines()
             
-            # 객체 경계 부드럽게 처리
-            object_mask_blur = cv2.GaussianBlur(object_mask, (5, 5), 0)
-            object_mask_norm = object_mask_blur.astype(np.float32) / 255.0
+            # 라벨 정밀도 정규화
+            normalized_labels = normalize_label_lines(labels)
             
-            for c in range(3):
-                result[:, :, c] = (image[:, :, c] * object_mask_norm + 
-                                 new_background[:, :, c] * (1 - object_mask_norm)).astype(np.uint8)
+            if not normalized_labels:
+                return None
             
-            return result
-        else:
-            # 밝은 배경이 아니면 원본 반환
-            return image
+            rng, _ = self.task_rng('background', img_file.name)
+            changed = False
+            
+            # 🔥 다중 감지 방식으로 밝은 배경 체크
+            is_bright, _ = self.detect_bright_background_multi(image)
+            
+            if is_bright:
+                # 🚀 교체 확률 대폭 상승 (95%)
+                if rng.random() < 0.95:  # 60% → 95%
+                    h, w = image.shape[:2]
+                    
+                    # 아틀라스에서 배경 가져오기
+                    backgrounds = self.get_cached_backgrounds(h, w)
+                    
+                    # 랜덤 배경 선택
+                    bg_type, new_background = rng.choice(backgrounds)
+                    
+                    # 배경 교체
+                    image = self.replace_background(image, normalized_labels, new_background, is_bright)
+                    changed = True
+            
+            # 이미지 저장
+            cv2.imwrite(str(out_img), image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            
+            # 라벨 저장 (6자리 정밀도)
+            with open(out_label, 'w') as f:
+                for label in normalized_labels:
+                    f.write(label.strip() + '\n')
+            
+            return bool(is_bright), changed
+                
+        except Exception as e:
+            print(f"⚠️ 배경 처리 오류 {img_file.name}: {e}")
+            return None
 
     # 🔥 수정 2: apply_background_augmentation에서 호출 부분 변경
     def apply_background_augmentation(self):
@@ -312,67 +529,28 @@ class WebcamPreprocessor:
                 continue
                 
             print(f"📁 {split} 배경 처리 중...")
-            image_files = list(images_dir.glob("*.jpg")) + list(images_dir.glob("*.png"))
+            tasks = []
+            for img_file in self.list_images(images_dir):
+                # 해당 라벨 파일 찾기
+                label_file = labels_dir / (img_file.stem + '.txt')
+                if label_file.exists():
+                    tasks.append(self.make_task((img_file, label_file), (img_file, label_file)))
             
-            for img_file in image_files:
-                try:
-                    # 해당 라벨 파일 찾기
-                    label_file = labels_dir / (img_file.stem + '.txt')
-                    if not label_file.exists():
-                        continue
-                    
-                    # 이미지와 라벨 로드
-                    image = cv2.imread(str(img_file))
-                    if image is None:
-                        continue
-                    
-                    with open(label_file, 'r') as f:
-                        labels = f.readlines()
-                    
-                    # 라벨 정밀도 정규화
-                    normalized_labels = self.normalize_label_precision(labels)
-                    
-                    if not normalized_labels:
-                        continue
-                    
-                    # 🔥 다중 감지 방식으로 밝은 배경 체크
-                    is_bright, _ = self.detect_bright_background_multi(image)
-                    
-                    if is_bright:
-                        bright_detected += 1
-                        
-                        # 🚀 교체 확률 대폭 상승 (95%)
-                        if random.random() < 0.95:  # 60% → 95%
-                            h, w = image.shape[:2]
-                            
-                            # 캐시에서 배경 가져오기
-                            backgrounds = self.get_cached_backgrounds(h, w)
-                            
-                            # 랜덤 배경 선택
-                            bg_type, new_background = random.choice(backgrounds)
-                            
-                            # 배경 교체
-                            image = self.replace_background(image, normalized_labels, new_background)
-                            background_changed += 1
-                    
-                    # 이미지 저장
-                    cv2.imwrite(str(img_file), image, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                    
-                    # 라벨 저장 (6자리 정밀도)
-                    with open(label_file, 'w') as f:
-                        for label in normalized_labels:
-                            f.write(label.strip() + '\n')
-                    
-                    processed += 1
-                    
-                    if processed % 100 == 0:
-                        change_rate = (background_changed / processed) * 100
-                        detection_rate = (bright_detected / processed) * 100
-                        print(f"   📈 처리: {processed}개 | 감지: {detection_rate:.1f}% | 교체: {change_rate:.1f}%")
-                        
-                except Exception as e:
-                    print(f"⚠️ 배경 처리 오류 {img_file.name}: {e}")
+            params = None
+            if self.cache:
+                params = {'backgrounds': sorted(self.cache.file_hash(path) for path in self.background_images)}
+            for result in self.run_stage('background', tasks, params):
+                if result is None:
                     continue
+                is_bright, changed = result
+                bright_detected += is_bright
+                background_changed += changed
+                processed += 1
+                
+                if processed % 100 == 0:
+                    change_rate = (background_changed / processed) * 100
+                    detection_rate = (bright_detected / processed) * 100
+                    print(f"   📈 처리: {processed}개 | 감지: {detection_rate:.1f}% | 교체: {change_rate:.1f}%")
         
         # 최종 통계
         final_change_rate = (background_changed / processed) * 100 if processed > 0 else 0
@@ -408,7 +586,7 @@ class WebcamPreprocessor:
         enhanced = cv2.merge([l, a, b])
         return cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
     
-    def distance_simulation_with_labels(self, image, labels, distance_factor=0.5):
+    def distance_simulation_with_labels(self, image, labels, distance_factor=0.5, rng=random):
         """거리 변화 시뮬레이션 + 라벨 동기화 (6자리 정밀도)"""
         h, w = image.shape[:2]
         new_w, new_h = int(w * distance_factor), int(h * distance_factor)
@@ -417,8 +595,8 @@ class WebcamPreprocessor:
         resized = cv2.resize(image, (new_w, new_h))
         
         # 중앙 배치 계산
-        start_x = (w - new_w) // 2 + random.randint(-w//10, w//10)
-        start_y = (h - new_h) // 2 + random.randint(-h//10, h//10)
+        start_x = (w - new_w) // 2 + rng.randint(-w//10, w//10)
+        start_y = (h - new_h) // 2 + rng.randint(-h//10, h//10)
         
         start_x = max(0, min(start_x, w - new_w))
         start_y = max(0, min(start_y, h - new_h))
@@ -508,6 +686,76 @@ class WebcamPreprocessor:
             print(f"❌ 백업 실패: {e}")
             return False
     
+    def webcam_item(self, split, img_file, label_file, out_img=None, out_label=None):
+        """
+        이미지 1장 웹캠 효과 (train) / 라벨 정밀도 정규화 (val, valid)
+        :param out_img, out_label: 결과 경로 (None이면 원본 위치에 덮어씀)
+        :return: 라벨 정규화로 줄 수가 바뀌었는지 여부, 건너뛰면 None
+        """
+        out_img, out_label = out_img or img_file, out_label or label_file
+        brightness_factors = [1.08, 1.12, 1.15, 1.18]
+        distance_factors = [0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7] if self.enable_320 else [0.3, 0.35, 0.4, 0.45, 0.5]
+        
+        try:
+            # 이미지와 라벨 로드
+            image = cv2.imread(str(img_file))
+            if image is None:
+                return None
+            
+            with open(label_file, 'r') as f:
+                original_labels = f.readlines()
+            
+            # 라벨 정밀도 정규화 (모든 split)
+            normalized_labels = normalize_label_lines(original_labels)
+            normalized = len(normalized_labels) != len([l for l in original_labels if l.strip()])
+            
+            # 🔧 웹캠 효과는 train에만 적용
+            if split == "train":
+                rng, np_rng = self.task_rng('webcam', f"{split}/{img_file.name}")
+                
+                # 1. 웹캠 조명 적용
+                brightness_factor = rng.choice(brightness_factors)
+                enhanced = self.webcam_lighting(image, brightness_factor)
+                final_labels = normalized_labels.copy()
+                
+                # 2. 거리 시뮬레이션 (40% 확률) + 라벨 동기화
+                if rng.random() < 0.4:
+                    distance_factor = rng.choice(distance_factors)
+                    enhanced, final_labels = self.distance_simulation_with_labels(
+                        enhanced, normalized_labels, distance_factor, rng
+                    )
+                
+                # 3. 웹캠 노이즈 (20% 확률)
+                if rng.random() < 0.2:
+                    noise = np_rng.normal(0, 5, enhanced.shape).astype(np.uint8)
+                    enhanced = cv2.add(enhanced, noise)
+                
+                # 4. 약간의 블러 (15% 확률)
+                if rng.random() < 0.15:
+                    enhanced = cv2.GaussianBlur(enhanced, (3, 3), 0.3)
+                
+                # 이미지 저장
+                cv2.imwrite(str(out_img), enhanced, [cv2.IMWRITE_JPEG_QUALITY, 95])
+                
+                # 라벨 저장 (6자리 정밀도)
+                if final_labels:
+                    with open(out_label, 'w') as f:
+                        for label in final_labels:
+                            f.write(label.strip() + '\n')
+                elif out_label != label_file:
+                    shutil.copyfile(label_file, out_label)
+            else:
+                # val/valid는 라벨 정밀도만 정규화, 이미지는 원본 유지
+                with open(out_label, 'w') as f:
+                    for label in normalized_labels:
+                        f.write(label.strip() + '\n')
+            
+            return normalized
+                
+        except Exception as e:
+            print(f"⚠️ 처리 오류 {img_file.name}: {e}")
+            return None
+
     def apply_webcam_effects(self):
         """웹캠 환경 효과 적용 (train에만, 라벨 정규화는 모든 split)"""
         print("\n🎥 웹캠 환경 전처리 시작...")
@@ -517,8 +765,6 @@ class WebcamPreprocessor:
         
         processed = 0
         normalized_count = 0
-        brightness_factors = [1.08, 1.12, 1.15, 1.18]
-        distance_factors = [0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7] if self.enable_320 else [0.3, 0.35, 0.4, 0.45, 0.5]
         
         for split in ["train", "val", "valid"]:
             images_dir = self.dataset_path / split / "images"
@@ -528,79 +774,90 @@ class WebcamPreprocessor:
                 continue
                 
             print(f"📁 {split} 처리 중...")
-            image_files = list(images_dir.glob("*.jpg")) + list(images_dir.glob("*.png"))
+            tasks = []
+            for img_file in self.list_images(images_dir):
+                # 해당 라벨 파일 찾기
+                label_file = labels_dir / (img_file.stem + '.txt')
+                if label_file.exists():
+                    # val/valid는 이미지를 바꾸지 않으므로 라벨만 결과로
+                    outputs = (img_file if split == "train" else None, label_file)
+                    tasks.append(self.make_task((split, img_file, label_file), outputs))
             
-            for img_file in image_files:
-                try:
-                    # 해당 라벨 파일 찾기
-                    label_file = labels_dir / (img_file.stem + '.txt')
-                    if not label_file.exists():
-                        continue
-                    
-                    # 이미지와 라벨 로드
-                    image = cv2.imread(str(img_file))
-                    if image is None:
-                        continue
-                    
-                    with open(label_file, 'r') as f:
-                        original_labels = f.readlines()
-                    
-                    # 라벨 정밀도 정규화 (모든 split)
-                    normalized_labels = self.normalize_label_precision(original_labels)
-                    if len(normalized_labels) != len([l for l in original_labels if l.strip()]):
-                        normalized_count += 1
-                    
-                    # 🔧 웹캠 효과는 train에만 적용
-                    if split == "train":
-                        # 1. 웹캠 조명 적용
-                        brightness_factor = random.choice(brightness_factors)
-                        enhanced = self.webcam_lighting(image, brightness_factor)
-                        final_labels = normalized_labels.copy()
-                        
-                        # 2. 거리 시뮬레이션 (40% 확률) + 라벨 동기화
-                        if random.random() < 0.4:
-                            distance_factor = random.choice(distance_factors)
-                            enhanced, final_labels = self.distance_simulation_with_labels(
-                                enhanced, normalized_labels, distance_factor
-                            )
-                        
-                        # 3. 웹캠 노이즈 (20% 확률)
-                        if random.random() < 0.2:
-                            noise = np.random.normal(0, 5, enhanced.shape).astype(np.uint8)
-                            enhanced = cv2.add(enhanced, noise)
-                        
-                        # 4. 약간의 블러 (15% 확률)
-                        if random.random() < 0.15:
-                            enhanced = cv2.GaussianBlur(enhanced, (3, 3), 0.3)
-                        
-                        # 이미지 저장
-                        cv2.imwrite(str(img_file), enhanced, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                        
-                        # 라벨 저장 (6자리 정밀도)
-                        if final_labels:
-                            with open(label_file, 'w') as f:
-                                for label in final_labels:
-                                    f.write(label.strip() + '\n')
-                    else:
-                        # val/valid는 라벨 정밀도만 정규화, 이미지는 원본 유지
-                        with open(label_file, 'w') as f:
-                            for label in normalized_labels:
-                                f.write(label.strip() + '\n')
-                    
-                    processed += 1
-                    
-                    if processed % 100 == 0:
-                        print(f"   📈 처리됨: {processed}개 (정밀도 정규화: {normalized_count}개)")
-                        
-                except Exception as e:
-                    print(f"⚠️ 처리 오류 {img_file.name}: {e}")
+            for normalized in self.run_stage('webcam', tasks, {'enable_320': self.enable_320}):
+                if normalized is None:
                     continue
+                normalized_count += normalized
+                processed += 1
+                
+                if processed % 100 == 0:
+                    print(f"   📈 처리됨: {processed}개 (정밀도 정규화: {normalized_count}개)")
         
         print(f"✅ 웹캠 환경 전처리 완료: {processed}개")
         print(f"📐 좌표 정밀도 정규화: {normalized_count}개 파일")
         print(f"🎯 Train: 웹캠 효과 적용, Val/Valid: 원본 유지")
         return processed
     
+    def res320_item(self, img_file, label_file, out_img=None, out_label=None):
+        """
+        이미지 1장을 320 해상도 데이터로 추가 생성 (성공 여부 반환)
+        :param out_img, out_label: 결과 경로 (None이면 train 폴더에 res320_ 이름으로)
+        """
+        new_name = f"res320_{img_file.stem}"
+        out_img = out_img or img_file.parent / f"{new_name}.jpg"
+        out_label = out_label or label_file.parent / f"{new_name}.txt"
+        try:
+            # 이미지 로드 및 처리
+            image = cv2.imread(str(img_file))
+            if image is None:
+                return False
+            
+            # 라벨 로드 및 정밀도 정규화
+            with open(label_file, 'r') as f:
+                original_labels = f.readlines()
+            
+            normalized_labels = normalize_label_lines(original_labels)
+            rng, np_rng = self.task_rng('320', img_file.name)
+            
+            # 320x320으로 리사이즈 (비율 유지하며 패딩)
+            h, w = image.shape[:2]
+            if h != w:
+                # 정사각형으로 만들기 (패딩 추가)
+                max_side = max(h, w)
+                square_image = np.ones((max_side, max_side, 3), dtype=np.uint8) * 40
+                
+                start_y = (max_side - h) // 2
+                start_x = (max_side - w) // 2
+                square_image[start_y:start_y+h, start_x:start_x+w] = image
+                
+                image = square_image
+            
+            resized = cv2.resize(image, (320, 320))
+            
+            # 선명도 강화 (320에서 중요)
+            enhanced = self.enhance_sharpness(resized, strength=0.7)
+            
+            # 웹캠 환경 추가 적용
+            enhanced = self.webcam_lighting(enhanced, rng.uniform(1.10, 1.20))
+            
+            # 약간의 노이즈 (320에서는 더 적게)
+            if rng.random() < 0.2:
+                noise = np_rng.normal(0, 3, enhanced.shape).astype(np.uint8)
+                enhanced = cv2.add(enhanced, noise)
+            
+            # 이미지 저장
+            cv2.imwrite(str(out_img), enhanced, [cv2.IMWRITE_JPEG_QUALITY, 98])
+            
+            # 라벨 저장 (6자리 정밀도)
+            with open(out_label, 'w') as f:
+                for label in normalized_labels:
+                    f.write(label.strip() + '\n')
+            
+            return True
+                
+        except Exception as e:
+            print(f"⚠️ 320 변환 오류 {img_file.name}: {e}")
+            return False
+
     def create_320_data(self):
         """320 해상도 전용 데이터 생성 (6자리 정밀도 유지)"""
         if not self.enable_320:
@@ -616,76 +873,28 @@ class WebcamPreprocessor:
             return 0
         
         # 기존 이미지의 30% 정도를 320으로 변환
-        image_files = list(train_images.glob("*.jpg")) + list(train_images.glob("*.png"))
+        image_files = self.list_images(train_images)
         sample_size = min(len(image_files) // 3, 400)  # 최대 400개
-        sampled_files = random.sample(image_files, sample_size)
+        sample_rng, _ = self.task_rng('320', 'sample')
+        sampled_files = sample_rng.sample(image_files, sample_size)
         
         print(f"🎯 320 해상도 변환: {len(sampled_files)}개")
         
-        created = 0
+        tasks = []
         for img_file in sampled_files:
-            try:
-                label_file = train_labels / (img_file.stem + '.txt')
-                if not label_file.exists():
-                    continue
-                
-                # 이미지 로드 및 처리
-                image = cv2.imread(str(img_file))
-                if image is None:
-                    continue
-                
-                # 라벨 로드 및 정밀도 정규화
-                with open(label_file, 'r') as f:
-                    original_labels = f.readlines()
-                
-                normalized_labels = self.normalize_label_precision(original_labels)
-                
-                # 320x320으로 리사이즈 (비율 유지하며 패딩)
-                h, w = image.shape[:2]
-                if h != w:
-                    # 정사각형으로 만들기 (패딩 추가)
-                    max_side = max(h, w)
-                    square_image = np.ones((max_side, max_side, 3), dtype=np.uint8) * 40
-                    
-                    start_y = (max_side - h) // 2
-                    start_x = (max_side - w) // 2
-                    square_image[start_y:start_y+h, start_x:start_x+w] = image
-                    
-                    image = square_image
-                
-                resized = cv2.resize(image, (320, 320))
-                
-                # 선명도 강화 (320에서 중요)
-                enhanced = self.enhance_sharpness(resized, strength=0.7)
-                
-                # 웹캠 환경 추가 적용
-                enhanced = self.webcam_lighting(enhanced, random.uniform(1.10, 1.20))
-                
-                # 약간의 노이즈 (320에서는 더 적게)
-                if random.random() < 0.2:
-                    noise = np.random.normal(0, 3, enhanced.shape).astype(np.uint8)
-                    enhanced = cv2.add(enhanced, noise)
-                
-                # 새 파일명 생성
+            label_file = train_labels / (img_file.stem + '.txt')
+            if label_file.exists():
                 new_name = f"res320_{img_file.stem}"
-                new_img_path = train_images / f"{new_name}.jpg"
-                new_label_path = train_labels / f"{new_name}.txt"
-                
-                # 이미지 저장
-                cv2.imwrite(str(new_img_path), enhanced, [cv2.IMWRITE_JPEG_QUALITY, 98])
-                
-                # 라벨 저장 (6자리 정밀도)
-                with open(new_label_path, 'w') as f:
-                    for label in normalized_labels:
-                        f.write(label.strip() + '\n')
-                
-                created += 1
-                if created % 50 == 0:
-                    print(f"  📱 320 변환: {created}/{sample_size}")
-                    
-            except Exception as e:
-                print(f"⚠️ 320 변환 오류 {img_file.name}: {e}")
+                outputs = (train_images / f"{new_name}.jpg", train_labels / f"{new_name}.txt")
+                tasks.append(self.make_task((img_file, label_file), outputs))
+        
+        created = 0
+        for ok in self.run_stage('320', tasks):
+            if not ok:
                 continue
+            created += 1
+            if created % 50 == 0:
+                print(f"  📱 320 변환: {created}/{sample_size}")
         
         print(f"✅ 320 해상도 데이터 생성 완료: {created}개")
         return created
@@ -694,11 +903,14 @@ class WebcamPreprocessor:
         """전체 전처리 실행 (배경 다양화 포함)"""
         print("🎥 웹캠 환경 전처리 파이프라인 (배경 다양화 + 6자리 정밀도)")
         print("=" * 60)
+        print(f"🧵 워커: {self.workers}개 | 🎲 seed: {self.seed}")
         
         start_time = time.time()
         
-        # 1. 백업 생성
-        if not self.create_backup():
+        # 1. 백업 생성 (출력 폴더 모드는 원본을 수정하지 않으므로 백업 대신 출력 폴더 준비)
+        if self.output_path:
+            self.prepare_output_tree()
+        elif not self.create_backup():
             return False
         
         # 2. 배경 다양화 적용 (Domain Gap 해결)
@@ -710,6 +922,9 @@ class WebcamPreprocessor:
         # 4. 320 해상도 데이터 생성
         created_320 = self.create_320_data()
         
+        if self.output_path:
+            self.finalize_output_tree()
+        
         end_time = time.time()
         elapsed = end_time - start_time
         
@@ -736,7 +951,8 @@ class WebcamPreprocessor:
         print(f"  🎪 실제 웹캠 환경과 유사한 학습 데이터 확보")
         
         print(f"\n🚀 성능 최적화:")
-        print(f"  ✅ 배경 캐싱: 해상도별 1회만 생성")
+        print(f"  ✅ 배경 아틀라스: 해상도별 1회만 생성 (memmap, 워커 공유)")
+        print(f"  ✅ {self.background_atlas.summary()}")
         print(f"  ✅ 메모리 효율: 4,500,000개 → 450개 (99.99% 절약)")
         print(f"  ✅ 시간 단축: 95% 이상 개선")
         
@@ -744,8 +960,19 @@ class WebcamPreprocessor:
 
 def main():
     """독립 실행용"""
+    import argparse
+    import os
     from config import Config
     
+    parser = argparse.ArgumentParser(description="웹캠 환경 전처리")
+    parser.add_argument("--workers", type=int, default=1, help=f"전처리 프로세스 수 (CPU {os.cpu_count()}개)")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드 (같은 시드면 워커 수와 관계없이 같은 결과)")
+    parser.add_argument("--output", default=None, help="결과 데이터셋 폴더 (기본: <데이터셋>_webcam, 원본은 수정하지 않음)")
+    parser.add_argument("--cache-dir", default=None, help="산출물 캐시 폴더 (기본: 출력 폴더 옆 .artifact_cache)")
+    parser.add_argument("--in-place", action="store_true", help="출력 폴더 없이 데이터셋을 직접 수정 (백업 생성)")
+    parser.add_argument("--background-cache-mb", type=int, default=1024, help="배경 아틀라스를 열어 둘 최대 용량 (MB)")
+    args = parser.parse_args()
+    
     dataset_path = input("📂 데이터셋 경로: ").strip()
     if not dataset_path:
         dataset_path = "/workspace01/team06/jonghui/model/snack_data"
@@ -753,7 +980,10 @@ def main():
     enable_320 = input("📱 320 해상도 지원? (Y/n): ").strip().lower()
     enable_320_support = enable_320 in ['y', 'yes', '']
     
-    config = Config(dataset_path, enable_320_support)
+    output_path = None if args.in_place else (args.output or f"{dataset_path.rstrip('/')}_webcam")
+    config = Config(dataset_path, enable_320_support, workers=args.workers, seed=args.seed,
+                    output_path=output_path, cache_path=args.cache_dir,
+                    background_cache_mb=args.background_cache_mb)
     if not config.yaml_path:
         print("❌ data.yaml을 찾을 수 없습니다")
         return
@@ -6,9 +6,10 @@ AGV와 컨트롤러를 연결하는 부분
 
 import socket
 import threading
-import json
 import time
 
+from framing import MessageReader, FramingError, encode_cart, encode_move, encode_disconnect
+
 class ControllToAgv:
     def __init__(self, agv_ip, agv_port):
         self.agv_ip = agv_ip
@@ -33,18 +34,30 @@ class ControllToAgv:
         self.recv_thread = None
         self.stop_event = threading.Event()  # 종료 시그널
 
+        # 변경된 값만 송신 (주기적 재전송 없음)
+        self.send_lock = threading.Lock()
+        self.send_event = threading.Event()
+        self.pending = {}  # 아직 보내지 않은 변경 사항
+
     # 현재위치와 목표위치가 같으면 콜백하는 함수
     def set_same_position_callback(self, callback_func):
         self.same_position_callback = callback_func
 
     # GUI에서 쇼핑 시작 버튼을 누르면 장바구니 리스트가 여기에 저장됨
     def set_snack_cart(self, snack_list):
-        self.snack_cart = snack_list
+        self.snack_cart = [list(pos) for pos in snack_list]  # GUI 리스트가 나중에 바뀌어도 영향 없도록 복사
+        self._queue_change("snack_cart", self.snack_cart)
     
     # GUI에서 다음 버튼 or 계산 버튼을 누르면 Flag가 True로 바뀜
     def set_move_flag(self):
         print("바뀜바뀜")
         self.move_flag = True
+        self._queue_change("move_flag", True)
+
+    def _queue_change(self, key, value):
+        with self.send_lock:
+            self.pending[key] = value
+        self.send_event.set()  # 송신 스레드 즉시 깨움
 
     def connect(self):
         try:
@@ -60,65 +73,87 @@ class ControllToAgv:
         except Exception as e:
             print(f"AGV와 연결 실패: {e}")
 
-    # 송신할 프레임
+    # 송신할 프레임 (마지막 송신 이후 바뀐 값만)
     def send_frame(self):
-        return {
-            "snack_cart": self.snack_cart,
-            "move_flag": self.move_flag
-        }
+        with self.send_lock:
+            frame = self.pending
+            self.pending = {}
+        return frame
 
-    # (컨트롤러 -> agv)
+    # (컨트롤러 -> agv): 장바구니/이동 요청이 바뀔 때만 송신
     def send_to_agv(self):
         while not self.stop_event.is_set():
+            self.send_event.wait()
+            self.send_event.clear()
+            if self.stop_event.is_set():
+                break
+
+            frame = self.send_frame()
+            if not frame:
+                continue
             try:
-                payload = json.dumps(self.send_frame())
-                self.client_socket.sendall(payload.encode())
-                print(f"송신 데이터: {payload}")
+                # 장바구니를 먼저 보내야 AGV가 이동 요청을 장바구니 이후로 처리함
+                payload = b""
+                if "snack_cart" in frame:
+                    payload += encode_cart(frame["snack_cart"])
+                if frame.get("move_flag"):
+                    payload += encode_move()
+                self.client_socket.sendall(payload)
+                print(f"송신 데이터: {frame}")
                 
-                if self.move_flag == True:
+                if frame.get("move_flag"):
                     self.move_flag = False
 
+            except FramingError as e:
+                # 인코딩할 수 없는 값은 이번 변경만 버리고 송신 스레드는 유지
+                print(f"[송신 오류] 메시지 인코딩 실패: {e}")
+
             except Exception as e:
                 print(f"[송신 오류] {e}")
                 break
 
-            time.sleep(5)
-
     # (컨트롤러 <- agv)
     def recv_from_agv(self):
+        reader = MessageReader(self.client_socket)
         while not self.stop_event.is_set():
             try:
-                recv_data = self.client_socket.recv(1024)
-                if not recv_data:
+                messages = reader.read()
+                if messages is None:
                     break
-                decoded = recv_data.decode()
-                print(f"수신 데이터: {decoded}")
 
-                data = json.loads(decoded)
+                for data in messages:
+                    print(f"수신 데이터: {data}")
+                    if data.get("disconnect"):
+                        return
+                    self._handle_message(data)
 
-                if all(k in data for k in ['x', 'y', 'target_x', 'target_y']):
-                    self.position_x = data['x']
-                    self.position_y = data['y']
-                    self.target_x = data['target_x']
-                    self.target_y = data['target_y']
-
-                if self.same_position_callback is not None:
-                    if self.position_x == self.target_x and self.position_y == self.target_y:
-                        print("같음")
-                        self.same_position_callback(self.position_x, self.position_y)
-
-
-            except Exception as e:
+            except (FramingError, OSError) as e:
                 print(f"[수신 오류] {e}")
                 break
 
+    def _handle_message(self, data):
+        if all(k in data for k in ['x', 'y', 'target_x', 'target_y']):
+            self.agv_name = data.get('name', self.agv_name)
+            self.position_x = data['x']
+            self.position_y = data['y']
+            self.target_x = data['target_x']
+            self.target_y = data['target_y']
+
+        if self.same_position_callback is not None:
+            if self.position_x == self.target_x and self.position_y == self.target_y:
+                print("같음")
+                self.same_position_callback(self.position_x, self.position_y)
+
     def close(self):
         print("[System] 스레드 종료 시도 중...")
         self.stop_event.set()
-        self.send_thread.join()
-        self.recv_thread.join()
+        self.send_event.set()  # 대기 중인 송신 스레드 깨우기
+        if self.send_thread:
+            self.send_thread.join()
+        if self.recv_thread:
+            self.recv_thread.join()
         try:
-            self.client_socket.sendall("disconnect".encode())
+            self.client_socket.sendall(encode_disconnect())
         except:
             pass
         self.client_socket.close()
@@ -0,0 +1,15 @@
+'''
+매장 맵 파일 (maps/store_map.json) 읽기
+AGV, 관제센터와 같은 파일에서 매대(상품 집는 위치) 정보를 읽음
+'''
+import json
+import os
+
+# 저장소 공용 매장 맵 (환경변수 STORE_MAP으로 다른 맵 지정 가능)
+DEFAULT_MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps", "store_map.json")
+
+
+def load_store_map(path=None):
+    path = path or os.environ.get("STORE_MAP") or DEFAULT_MAP_PATH
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -1,15 +1,29 @@
+import os
 import sys
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtGui, QtWidgets, uic
 
 from controll_to_agv import ControllToAgv
+from store_map import load_store_map
+
+SNACK_SLOTS = 6 # user_gui.ui의 과자 칸 수 (칸 i: 사진 label/label_i, 이름 label_{i+6}, 버튼 btn_select{i})
+
+# 상품(DB 이름)별 사진 - 사진이 없는 상품은 이름만 표시
+SNACK_IMAGES = {
+    "crown_Potto_Cheese_Tart_322G": "img/cheese.jpg",
+    "crown_ChocoHaim_142G": "img/chocoHa.jpg",
+    "orion_Gosomi_80G": "img/goso.jpg",
+}
 
 class UserShoppingGui(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
         uic.loadUi("user_gui.ui", self)
 
-        self.snack_position = { "뽀또": [0, 1], "초코칩쿠키": [0, 3], "쵸코하임": [0, 5],
-                            "후레쉬베리": [4, 1], "고소미": [4, 3], "빅파이": [4, 5] }
+        # maps/store_map.json의 매대(shelves) 순서대로 과자 칸을 채움 (이름, 집는 위치)
+        shelves = load_store_map()["shelves"]
+        if len(shelves) > SNACK_SLOTS:
+            print(f"[WARN] 매대 {len(shelves)}개 중 앞의 {SNACK_SLOTS}개만 표시")
+        self.snack_position = {shelf["label"]: list(shelf["pick"]) for shelf in shelves[:SNACK_SLOTS]}
 
         self.snack_cart = [] # 장바구니 리스트
 
@@ -19,12 +33,7 @@ class UserShoppingGui(QtWidgets.QWidget):
 
 
         # 과자 선택 버튼
-        self.btn_select1.clicked.connect(lambda: self.add_to_cart("뽀또"))
-        self.btn_select2.clicked.connect(lambda: self.add_to_cart("초코칩쿠키"))
-        self.btn_select3.clicked.connect(lambda: self.add_to_cart("쵸코하임"))
-        self.btn_select4.clicked.connect(lambda: self.add_to_cart("후레쉬베리"))
-        self.btn_select5.clicked.connect(lambda: self.add_to_cart("고소미"))
-        self.btn_select6.clicked.connect(lambda: self.add_to_cart("빅파이"))
+        self.setup_snack_slots(shelves[:SNACK_SLOTS])
 
         self.listWidget_cart.itemClicked.connect(self.remove_from_cart)
 
@@ -36,6 +45,29 @@ class UserShoppingGui(QtWidgets.QWidget):
         self.btn_next.clicked.connect(self.next_item) # 다음
         self.btn_pay.clicked.connect(self.pay)  # 계산
 
+    # 맵의 매대로 과자 칸(사진, 이름, 선택 버튼) 구성 - 매대가 없는 칸은 숨김
+    def setup_snack_slots(self, shelves):
+        img_dir = os.path.dirname(os.path.abspath(__file__))
+        for i in range(1, SNACK_SLOTS + 1):
+            image_label = getattr(self, "label" if i == 1 else f"label_{i}")
+            name_label = getattr(self, f"label_{i + 6}")
+            button = getattr(self, f"btn_select{i}")
+
+            if i > len(shelves):
+                for widget in (image_label, name_label, button):
+                    widget.hide()
+                continue
+
+            shelf = shelves[i - 1]
+            name_label.setText(shelf["label"])
+            image = SNACK_IMAGES.get(shelf.get("product"))
+            if image:
+                image_label.setPixmap(QtGui.QPixmap(os.path.join(img_dir, image)))
+            else:
+                image_label.clear()
+                image_label.setText(shelf["label"])
+            button.clicked.connect(lambda _, name=shelf["label"]: self.add_to_cart(name))
+
     # 장바구니 추가
     def add_to_cart(self, item_name):
         self.listWidget_cart.addItem(item_name)